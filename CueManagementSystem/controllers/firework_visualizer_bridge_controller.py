@@ -11,6 +11,7 @@ Key Changes:
 - No event loop conflicts
 - No OpenGL context issues
 - Safe for macOS
+- Cues fired on the shared preview clock, slaved to the music player
 
 Author: Michael Lyman
 Version: 1.0.0
@@ -25,6 +26,9 @@ import multiprocessing
 import time
 import os
 
+from controllers.preview_clock import CueScheduler, PreviewClock
+from models.cue_store import CueStore, parse_execute_time_ms
+
 
 class FireworkVisualizerBridge(QObject):
     """
@@ -50,16 +54,16 @@ class FireworkVisualizerBridge(QObject):
 
         # Show data
         self.cues: List[Dict[str, Any]] = []
+        self._cue_times: List[float] = []  # Execute time in seconds of every cue, parsed by the cue store
         self.music_file: Optional[Dict[str, Any]] = None
         self.start_time: Optional[datetime] = None
         self.show_duration: float = 0.0
 
-        # Cue execution tracking
-        self.execution_timer = QTimer()
-        self.execution_timer.timeout.connect(self._check_cue_execution)
-        self.execution_timer.setInterval(50)
+        # Cue execution: show clock and cue scheduler
+        self.clock = PreviewClock()
+        self.scheduler = CueScheduler(self.clock)
+        self.scheduler.cues_due.connect(self._on_cues_due)
         self._executed_cues = set()
-        self._last_check_index = 0
 
         # Process monitoring
         self.monitor_timer = QTimer()
@@ -77,7 +81,7 @@ class FireworkVisualizerBridge(QObject):
         Start the Professional Firework Visualizer in a SEPARATE PROCESS
 
         Args:
-            cues: List of cue dictionaries to visualize
+            cues: The cue table's CueStore, or a list of cue rows
             music_file: Optional music file info dictionary
         """
         if self.is_running:
@@ -85,10 +89,12 @@ class FireworkVisualizerBridge(QObject):
             return False
 
         try:
-            self.cues = cues
+            # Cues in execute time order, so execution can stop at the first cue not due yet
+            store = cues if isinstance(cues, CueStore) else CueStore(cues)
+            self.cues = store.rows_by_time()
+            self._cue_times = (store.execute_ms[store.time_order] / 1000.0).tolist()
             self.music_file = music_file
             self._executed_cues.clear()
-            self._last_check_index = 0
 
             # Calculate show duration
             self.show_duration = self._calculate_show_duration()
@@ -112,9 +118,10 @@ class FireworkVisualizerBridge(QObject):
 
             self.is_running = True
             self.start_time = datetime.now()
+            self.clock.start(0.0)
 
             # Start timers
-            self.execution_timer.start()
+            self.scheduler.start(self._cue_times)
             self.monitor_timer.start()
 
             self.visualizer_started.emit()
@@ -206,25 +213,23 @@ class FireworkVisualizerBridge(QObject):
             self.logger.info("Visualizer process has ended")
             self.stop_visualizer()
 
-    def _check_cue_execution(self):
+    def _on_cues_due(self, first: int, last: int):
         """
-        Check if any cues should be executed based on current time
+        Execute the cues the scheduler found due
 
-        OPTIMIZED: Only checks unexecuted cues starting from last position.
+        Args:
+            first: Position of the first due cue (cues are in execute time order)
+            last: Position after the last due cue
         """
         if not self.is_running or not self.start_time or not self.command_queue:
             return
 
-        # Calculate elapsed time since T=0
-        elapsed = (datetime.now() - self.start_time).total_seconds()
-
-        # OPTIMIZED: Only check cues from last position forward
-        for i in range(self._last_check_index, len(self.cues)):
+        elapsed = self.clock.now()
+        for i in range(first, last):
             cue_row = self.cues[i]
 
             # Skip already executed cues
             if i in self._executed_cues:
-                self._last_check_index = i + 1
                 continue
 
             # Convert list to dict format
@@ -241,18 +246,10 @@ class FireworkVisualizerBridge(QObject):
                 'visual_properties': cue_row[5] if len(cue_row) > 5 else None
             }
 
-            cue_time = self._parse_time_code(cue_dict.get('execute_time', '00:00.0000'))
-
-            # Check if it's time to execute this cue
-            if elapsed >= cue_time:
-                self._execute_cue(cue_dict)
-                self._executed_cues.add(i)
-                self._last_check_index = i + 1
-                self.logger.debug(
-                    f"Executed cue {cue_dict.get('cue_id', 'unknown')} at {elapsed:.3f}s (scheduled: {cue_time:.3f}s)")
-            else:
-                # Cue not ready yet, stop checking (cues are in order)
-                break
+            self._execute_cue(cue_dict)
+            self._executed_cues.add(i)
+            self.logger.debug(
+                f"Executed cue {cue_dict.get('cue_id', 'unknown')} at {elapsed:.3f}s (scheduled: {self._cue_times[i]:.3f}s)")
 
     def _execute_cue(self, cue: Dict[str, Any]):
         """
@@ -298,7 +295,8 @@ class FireworkVisualizerBridge(QObject):
                 self.command_queue.put({'type': 'stop'})
 
             # Stop timers
-            self.execution_timer.stop()
+            self.scheduler.stop()
+            self.clock.stop()
             self.monitor_timer.stop()
 
             # Wait for process to end
@@ -316,32 +314,25 @@ class FireworkVisualizerBridge(QObject):
         except Exception as e:
             self.logger.error(f"Error stopping visualizer: {e}")
 
+    def set_media_player(self, player):
+        """Slave the show clock to a media player's position (None to run free)"""
+        self.clock.attach_player(player)
+
+    def get_trigger_lateness(self) -> Dict[str, float]:
+        """Lateness statistics of the cues executed so far (see CueScheduler.lateness_stats)"""
+        return self.scheduler.lateness_stats()
+
     def _calculate_show_duration(self) -> float:
         """Calculate total show duration from cues"""
         if not self.cues:
             return 0.0
 
-        max_time = 0.0
-        for cue_row in self.cues:
-            if len(cue_row) >= 5:
-                time_code = cue_row[4]
-                cue_time = self._parse_time_code(time_code)
-                max_time = max(max_time, cue_time)
-
+        max_time = max(self._cue_times)
         return max_time + 5.0  # Add 5 seconds buffer
 
     def _parse_time_code(self, time_code: str) -> float:
         """Parse MM:SS.SSSS time code to seconds"""
-        try:
-            if ':' in time_code:
-                parts = time_code.split(':')
-                minutes = int(parts[0])
-                seconds = float(parts[1])
-                return minutes * 60 + seconds
-            else:
-                return float(time_code)
-        except:
-            return 0.0
+        return parse_execute_time_ms(time_code) / 1000.0
 
     def _map_shell_to_firework(self, visual_props: Dict[str, Any]):
         """Map Excalibur shell to firework type and color"""
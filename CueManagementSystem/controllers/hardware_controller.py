@@ -32,6 +32,7 @@ from datetime import datetime
 
 from PySide6.QtCore import QObject, Signal, QTimer
 
+from controllers.ssh_session_pool import get_session_pool
 from views.managers.shift_register_formatter_manager import ShiftRegisterFormatter, ShiftRegisterConfig
 
 
@@ -228,18 +229,13 @@ class HardwareController(QObject):
         try:
             self._set_hardware_state(HardwareState.CONNECTING)
 
-            # Create SSH client
-            self.ssh_client = paramiko.SSHClient()
-            self.ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-            # Connect to SSH server
-            self.ssh_client.connect(
-                hostname=self.ssh_config.host,
-                port=self.ssh_config.port,
-                username=self.ssh_config.username,
-                password=self.ssh_config.password,
-                timeout=10
-            )
+            # Shared pooled transport (same one SystemMode and the terminal use)
+            self.ssh_client = get_session_pool(
+                self.ssh_config.host,
+                self.ssh_config.port,
+                self.ssh_config.username,
+                self.ssh_config.password
+            ).client()
 
             # Test connection with a simple command
             stdin, stdout, stderr = self.ssh_client.exec_command("echo 'SSH connection test'")
@@ -262,9 +258,8 @@ class HardwareController(QObject):
 
     def disconnect(self):
         """Disconnect from hardware"""
-        if self.ssh_client:
-            self.ssh_client.close()
-            self.ssh_client = None
+        # The transport belongs to the session pool - only drop our reference
+        self.ssh_client = None
 
         self._stop_monitoring()
         self._set_hardware_state(HardwareState.DISCONNECTED)
@@ -0,0 +1,253 @@
+"""
+Raspberry Pi Cue Daemon Client
+==============================
+
+Desktop-side client for the persistent cue daemon running on the Raspberry Pi (raspberry_pi/cue_daemon.py).
+
+Features:
+- One persistent channel per SSH transport (no per-command handshake)
+- Length-prefixed JSON framing shared with the Pi
+- Automatic daemon start over SSH when it is not running
+- Priority channel for emergency stop while a cue is executing
+- Plain TCP connection mode for loopback benchmarking
+- Round-trip latency tracking
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+import itertools
+import logging
+import socket
+import threading
+import time
+from typing import Any, Dict, List
+
+from raspberry_pi.daemon_protocol import (
+    DEFAULT_DAEMON_HOST,
+    DEFAULT_DAEMON_PORT,
+    ProtocolError,
+    recv_frame,
+    send_frame,
+)
+
+
+class DaemonUnavailableError(Exception):
+    """Raised when no channel to the cue daemon could be opened"""
+    pass
+
+
+class PiDaemonClient:
+    """
+    Client for the Raspberry Pi cue daemon
+
+    The client keeps one open stream (a paramiko direct-tcpip channel or a
+    plain socket) and sends one request at a time over it. Requests that
+    must not queue behind a running cue (emergency stop) are sent over a
+    short-lived extra channel on the same SSH transport.
+    """
+
+    START_COMMAND = "nohup python3 ~/cue_daemon.py > /tmp/cue_daemon.log 2>&1 &"
+    START_TIMEOUT = 5.0  # seconds to wait for a freshly started daemon
+    REQUEST_TIMEOUT = 30.0  # default seconds to wait for a response
+    CUE_TIMEOUT_MARGIN = 10.0  # seconds on top of a cue's firing time
+    RUN_HOLD_MS = 1000  # execute_cue holds a finished run on for 1 second
+
+    def __init__(self, daemon_host: str = DEFAULT_DAEMON_HOST, daemon_port: int = DEFAULT_DAEMON_PORT):
+        self.logger = logging.getLogger(__name__)
+        self.daemon_host = daemon_host
+        self.daemon_port = daemon_port
+
+        self._transport = None
+        self._stream = None
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self._latencies_ms: List[float] = []
+
+    def connect_ssh(self, ssh_client, auto_start: bool = True) -> bool:
+        """
+        Open the persistent daemon channel over an authenticated SSH client
+
+        Args:
+            ssh_client: Connected paramiko.SSHClient
+            auto_start: Start the daemon over SSH if the channel is refused
+
+        Returns:
+            bool: True if the daemon answered a ping
+        """
+        transport = ssh_client.get_transport()
+        if transport is None or not transport.is_active():
+            raise DaemonUnavailableError("SSH transport is not active")
+
+        if self.is_connected() and self._transport is transport:
+            return True
+
+        self.close()
+        self._transport = transport
+
+        try:
+            self._stream = self._open_channel()
+        except Exception as e:
+            if not auto_start:
+                raise DaemonUnavailableError(f"Cue daemon not reachable: {e}")
+
+            self.logger.info("Cue daemon not running, starting it over SSH")
+            stdin, stdout, stderr = ssh_client.exec_command(self.START_COMMAND)
+            stdout.channel.recv_exit_status()
+
+            deadline = time.time() + self.START_TIMEOUT
+            while self._stream is None:
+                try:
+                    self._stream = self._open_channel()
+                except Exception as retry_error:
+                    if time.time() > deadline:
+                        raise DaemonUnavailableError(f"Cue daemon failed to start: {retry_error}")
+                    time.sleep(0.1)
+
+        return self.request("ping").get("status") == "success"
+
+    def connect_socket(self, host: str, port: int, timeout: float = 5.0) -> bool:
+        """Connect over plain TCP (loopback benchmarks, local testing)"""
+        self.close()
+        sock = socket.create_connection((host, port), timeout=timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._stream = sock
+        return self.request("ping").get("status") == "success"
+
+    def _open_channel(self):
+        """Open a direct-tcpip channel to the daemon on the Pi's loopback"""
+        channel = self._transport.open_channel(
+            "direct-tcpip",
+            (self.daemon_host, self.daemon_port),
+            ("127.0.0.1", 0),
+            timeout=5
+        )
+        return channel
+
+    def is_connected(self) -> bool:
+        """Check whether the persistent stream is open"""
+        if self._stream is None:
+            return False
+        if self._transport is not None:
+            return self._transport.is_active() and not self._stream.closed
+        return True
+
+    @classmethod
+    def cue_timeout(cls, cue: Dict[str, Any]) -> float:
+        """
+        Seconds to wait for execute_cue, which the daemon answers once the cue has fired
+
+        Runs take (steps - 1) x delay plus the hold; shots take their pulse
+        duration. Never less than the default request timeout.
+        """
+        try:
+            cue_type = cue.get('type')
+            if cue_type == 'SINGLE RUN':
+                steps = cue['end_output'] - cue['start_output'] + 1
+            elif cue_type == 'DOUBLE RUN':
+                steps = max(cue['end_output1'] - cue['start_output1'] + 1,
+                            cue['end_output2'] - cue['start_output2'] + 1)
+            else:
+                return max(cls.REQUEST_TIMEOUT, cue.get('duration', 1000) / 1000.0 + cls.CUE_TIMEOUT_MARGIN)
+            firing_ms = max(0, steps - 1) * cue.get('delay', 100) + cls.RUN_HOLD_MS
+        except (KeyError, TypeError):
+            return cls.REQUEST_TIMEOUT  # The daemon rejects the cue right away
+        return max(cls.REQUEST_TIMEOUT, firing_ms / 1000.0 + cls.CUE_TIMEOUT_MARGIN)
+
+    def request(self, command: str, timeout: float = REQUEST_TIMEOUT, priority: bool = False,
+                **params) -> Dict[str, Any]:
+        """
+        Send one command and wait for its response
+
+        Args:
+            command: Daemon command name (ping, execute_cue, set_arm_state, ...)
+            timeout: Seconds to wait for the response
+            priority: Use a dedicated channel if the main one is busy
+            **params: Command parameters
+
+        Returns:
+            dict: Daemon response (always contains 'status')
+        """
+        message = {"id": next(self._request_ids), "command": command, "params": params}
+
+        if priority and self._transport is not None:
+            if not self._lock.acquire(blocking=False):
+                # Main channel is busy (e.g. a cue is holding its pulse) - don't queue behind it
+                channel = self._open_channel()
+                try:
+                    return self._round_trip(channel, message, timeout)
+                finally:
+                    channel.close()
+            try:
+                return self._send_on_stream(message, timeout)
+            finally:
+                self._lock.release()
+
+        with self._lock:
+            return self._send_on_stream(message, timeout)
+
+    def stop_all(self, timeout: float = 5.0) -> Dict[str, Any]:
+        """
+        Abort the running show or cue and put the outputs in their safe state
+
+        Sends abort_show (waits for the show thread to end) and then
+        emergency_stop, both on the priority path.
+
+        Returns:
+            dict: emergency_stop response
+        """
+        self.request("abort_show", timeout=timeout, priority=True)
+        return self.request("emergency_stop", timeout=timeout, priority=True)
+
+    def _send_on_stream(self, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        if self._stream is None:
+            raise DaemonUnavailableError("Not connected to cue daemon")
+        try:
+            return self._round_trip(self._stream, message, timeout)
+        except (OSError, ProtocolError, EOFError):
+            # Stream is unusable after a partial exchange
+            self.close()
+            raise
+
+    def _round_trip(self, stream, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        stream.settimeout(timeout)
+        start = time.perf_counter()
+        send_frame(stream, message)
+        response = recv_frame(stream)
+        if response is None:
+            raise EOFError("Cue daemon closed the connection")
+        if response.get('id') != message['id']:
+            raise ProtocolError(f"Response id {response.get('id')} does not match request {message['id']}")
+
+        self._latencies_ms.append((time.perf_counter() - start) * 1000)
+        if len(self._latencies_ms) > 1000:
+            del self._latencies_ms[:-1000]
+        return response
+
+    def get_latency_stats(self) -> Dict[str, float]:
+        """Round-trip latency statistics (ms) over the last 1000 requests"""
+        if not self._latencies_ms:
+            return {"count": 0}
+        ordered = sorted(self._latencies_ms)
+        return {
+            "count": len(ordered),
+            "min_ms": ordered[0],
+            "p50_ms": ordered[len(ordered) // 2],
+            "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+            "max_ms": ordered[-1]
+        }
+
+    def reset_latency_stats(self):
+        """Forget recorded round-trip latencies"""
+        self._latencies_ms.clear()
+
+    def close(self):
+        """Close the persistent stream (the SSH transport is left open)"""
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+        self._stream = None
+        self._transport = None
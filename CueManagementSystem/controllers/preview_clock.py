@@ -0,0 +1,194 @@
+"""
+Preview Clock
+=============
+
+Show clock and cue scheduler shared by the LED, VR and firework visualizer previews.
+
+The clock counts show time from time.perf_counter_ns, which is monotonic and
+unaffected by wall-clock adjustments. When a media player is attached, every
+position report of the player is compared with the clock: small differences
+are corrected a fraction at a time, so report jitter is smoothed out while
+the clock follows the music, and large ones (seeks, a late start) move the
+clock at once.
+
+The scheduler sleeps on a precise single-shot timer until the next cue is
+due instead of polling at a fixed rate. Each wake fires every cue due within
+a small look-ahead window, and the lateness of every trigger against its
+cue time is recorded for statistics.
+
+Features:
+- Monotonic nanosecond show clock with start, pause, resume and seek
+- Smoothed drift correction against QMediaPlayer position reports
+- Cue triggers scheduled on precise timers with a look-ahead window
+- Trigger lateness statistics (mean, 95th percentile, worst)
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+import math
+import time
+from typing import Dict
+
+import numpy as np
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+
+
+class PreviewClock(QObject):
+    """
+    Show time in seconds, optionally slaved to a media player
+
+    Args:
+        jump_threshold: Media offset (s) above which the clock jumps to the media position
+        correction: Fraction of the media offset corrected on each position report
+    """
+
+    resynced = Signal(float)  # Show time the clock jumped to after a large media offset
+
+    def __init__(self, jump_threshold: float = 0.25, correction: float = 0.1, parent=None):
+        super().__init__(parent)
+        self.jump_threshold = jump_threshold
+        self.correction = correction
+        self.drift = 0.0  # Smoothed media - clock offset in seconds
+        self.resyncs = 0  # Jumps to the media position
+        self.is_running = False
+        self._origin_ns = 0  # perf_counter_ns at show time 0 while running
+        self._position = 0.0  # Show time while stopped or paused
+        self._player = None
+
+    def now(self) -> float:
+        """Current show time in seconds"""
+        if self.is_running:
+            return (time.perf_counter_ns() - self._origin_ns) / 1e9
+        return self._position
+
+    def start(self, position: float = 0.0):
+        """Start counting from a show time"""
+        self.is_running = False
+        self._position = position
+        self.drift = 0.0
+        self.resume()
+
+    def pause(self):
+        """Stop counting, keeping the show time"""
+        self._position = self.now()
+        self.is_running = False
+
+    def resume(self):
+        """Continue counting from the paused show time"""
+        if not self.is_running:
+            self._origin_ns = time.perf_counter_ns() - int(self._position * 1e9)
+            self.is_running = True
+
+    def stop(self):
+        """Stop counting and return to show time 0"""
+        self.is_running = False
+        self._position = 0.0
+
+    def seek(self, position: float):
+        """Move to a show time (counting continues from there if running)"""
+        if self.is_running:
+            self._origin_ns = time.perf_counter_ns() - int(position * 1e9)
+        else:
+            self._position = position
+
+    def attach_player(self, player):
+        """Follow a QMediaPlayer's position reports (None to run free)"""
+        if self._player is not None:
+            self._player.positionChanged.disconnect(self.sync_to_media)
+        self._player = player
+        if player is not None:
+            player.positionChanged.connect(self.sync_to_media)
+
+    def sync_to_media(self, position_ms: int):
+        """
+        Correct the clock from a media position report
+
+        Args:
+            position_ms: Media position in milliseconds
+        """
+        if not self.is_running:
+            return
+        error = position_ms / 1000.0 - self.now()
+        if abs(error) > self.jump_threshold:
+            self.seek(position_ms / 1000.0)
+            self.drift = 0.0
+            self.resyncs += 1
+            self.resynced.emit(position_ms / 1000.0)
+            return
+        self.drift += self.correction * (error - self.drift)
+        self._origin_ns -= int(self.correction * error * 1e9)
+
+
+class CueScheduler(QObject):
+    """
+    Fire cues at their show times on a clock
+
+    Args:
+        clock: Clock giving the show time
+        window: Look-ahead window (s); cues due within it are fired on the current wake
+        max_interval: Longest sleep (s), so clock corrections are picked up
+    """
+
+    cues_due = Signal(int, int)  # Positions [first, last) of the sorted cues that are due
+
+    def __init__(self, clock: PreviewClock, window: float = 0.001, max_interval: float = 0.25, parent=None):
+        super().__init__(parent)
+        self.clock = clock
+        self.window = window
+        self.max_interval = max_interval
+        self.times = np.zeros(0)
+        self.next_index = 0
+        self._lateness = []  # Trigger lateness in seconds, one array per wake
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.wake)
+
+    def start(self, times, first: int = 0):
+        """
+        Schedule cues
+
+        Args:
+            times: Cue times in seconds, sorted
+            first: Position of the first cue still to fire
+        """
+        self.times = np.asarray(times, dtype=np.float64)
+        self.next_index = first
+        self.wake()
+
+    def stop(self):
+        """Cancel the pending wake (no more cues fire)"""
+        self.timer.stop()
+
+    def wake(self):
+        """Fire the cues that are due and sleep until the next one"""
+        now = self.clock.now()
+        last = int(np.searchsorted(self.times, now + self.window, side='right'))
+        if last > self.next_index:
+            first, self.next_index = self.next_index, last
+            self._lateness.append(now - self.times[first:last])
+            self.cues_due.emit(first, last)
+
+        if self.next_index < len(self.times) and self.clock.is_running:
+            delay = self.times[self.next_index] - self.clock.now()
+            self.timer.start(max(0, math.ceil(min(delay, self.max_interval) * 1000)))
+
+    def reset_lateness(self):
+        """Forget the recorded trigger lateness"""
+        self._lateness = []
+
+    def lateness_stats(self) -> Dict[str, float]:
+        """
+        Lateness of the cue triggers so far against their cue times
+
+        Returns:
+            Number of triggers and the mean, 95th percentile and worst lateness in milliseconds
+        """
+        if not self._lateness:
+            return {'count': 0, 'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        lateness = np.concatenate(self._lateness) * 1000.0
+        return {'count': len(lateness), 'mean_ms': float(lateness.mean()),
+                'p95_ms': float(np.percentile(lateness, 95)), 'max_ms': float(lateness.max())}
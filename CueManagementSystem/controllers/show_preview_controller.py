@@ -7,10 +7,13 @@ This controller handles precise timing, cue sequencing, and synchronization with
 preview animation system to provide accurate visual representation of show execution.
 
 Features:
-- Sequential cue playback with precise timing
+- Sequential cue playback on a monotonic show clock, cues fired by a precise scheduler
+- Show clock slaved to the music player with smoothed drift correction
 - Play, pause, resume, and stop controls
-- Time-based seeking and scrubbing
+- Time-based seeking and scrubbing with binary search over precomputed cue times
+- Incremental LED updates on seek (only LEDs of cues passed since the last position)
 - Real-time time updates (10Hz refresh rate)
+- Cue trigger lateness statistics
 - Cue triggering at exact execution times
 - Integration with preview LED animation controller
 - Active cue tracking at any given time
@@ -26,7 +29,10 @@ License: MIT
 
 from PySide6.QtCore import QObject, QTimer, Signal
 from typing import List, Dict, Any
-import time
+import numpy as np
+from controllers.preview_clock import CueScheduler, PreviewClock
+from models.cue_store import CueStore, parse_execute_time_ms
+from views.led_panel.led_canvas import LED_STATE_TYPES, led_state_code
 from views.led_panel.preview_led_animations import PreviewLedAnimationController
 
 
@@ -47,13 +53,25 @@ class ShowPreviewController(QObject):
         self.led_panel = led_panel
         self.cues = []
         self.sorted_cues = []
+        self.sorted_cue_times = np.zeros(0)  # Execute time in seconds of every sorted cue
+
+        # Outputs of the sorted cues, for LED states at any position in the show
+        self._cue_output_offsets = np.zeros(1, dtype=np.int64)  # Cue i lights _cue_outputs[offsets[i]:offsets[i + 1]]
+        self._cue_outputs = np.zeros(0, dtype=np.int64)
+        self._output_keys = np.zeros(0, dtype=np.int64)  # output * (cue count + 1) + cue position, sorted
+        self._output_key_codes = np.zeros(0, dtype=np.int16)  # LED state code of each key's cue
+        self._led_cue_count = None  # Cues shown on the LED panel (None: unknown, refresh all LEDs)
+        self._led_dirty_outputs = set()  # Outputs whose LEDs may differ from that count (cut-short animations)
 
         # Create preview animation controller if we have an LED panel
         self.preview_animation_controller = None
         if self.led_panel:
             self.preview_animation_controller = PreviewLedAnimationController(self.led_panel)
 
-        # Timing control
+        # Timing control: show clock, cue scheduler and the time display timer
+        self.clock = PreviewClock()
+        self.scheduler = CueScheduler(self.clock)
+        self.scheduler.cues_due.connect(self._on_cues_due)
         self.timer = QTimer()
         self.timer.timeout.connect(self._update_preview)
         self.timer.setInterval(100)  # Update at 10Hz (100ms)
@@ -61,9 +79,7 @@ class ShowPreviewController(QObject):
         # Playback state
         self.is_playing = False
         self.is_paused = False
-        self.start_time = 0
         self.elapsed_time = 0
-        self.pause_time = 0
         self.current_cue_index = 0
 
     def load_cues(self, cues: List[Any]):
@@ -71,15 +87,106 @@ class ShowPreviewController(QObject):
         Load cues for preview playback
 
         Args:
-            cues: List of cue data from the cue table
+            cues: The cue table's CueStore, or a list of cue rows
         """
-        self.cues = cues
-        if not cues:
+        store = cues if isinstance(cues, CueStore) else CueStore(cues)
+        self.cues = list(store.rows)
+        if not self.cues:
             return
 
-        # Sort cues by execution time
-        self.sorted_cues = sorted(self.cues, key=lambda x: self._time_to_seconds(x[4]))
+        # Sort cues by execution time (times parsed once, by the cue store)
+        self.sorted_cues = store.rows_by_time()
+        self.sorted_cue_times = store.execute_ms[store.time_order] / 1000.0
         self.current_cue_index = 0
+        self._index_cue_outputs([store.records[i] for i in store.time_order.tolist()])
+
+    def _index_cue_outputs(self, records):
+        """
+        Index the outputs of the sorted cues by output and cue position
+
+        The LED of an output at a point in the show takes the state of the
+        last cue lighting it that has fired, found by binary search for
+        output * (cue count + 1) + number of fired cues among the keys.
+        """
+        counts = np.array([len(record.outputs) for record in records], dtype=np.int64)
+        self._cue_output_offsets = np.concatenate(([0], np.cumsum(counts)))
+        self._cue_outputs = (np.concatenate([record.outputs for record in records])
+                             if records else np.zeros(0, dtype=np.int64))
+        codes = np.array([led_state_code(record.cue_type) for record in records], dtype=np.int16)
+
+        keys = self._cue_outputs * (len(records) + 1) + np.repeat(np.arange(len(records)), counts)
+        order = np.argsort(keys, kind='stable')
+        self._output_keys = keys[order]
+        self._output_key_codes = np.repeat(codes, counts)[order]
+        self._led_cue_count = None
+        self._led_dirty_outputs = set()
+
+    def _cue_count_at(self, target_time: float) -> int:
+        """Number of sorted cues executing at or before a time"""
+        return int(np.searchsorted(self.sorted_cue_times, target_time, side='right'))
+
+    def led_codes_at(self, cue_count: int, outputs):
+        """
+        LED states of some outputs once the first cue_count sorted cues have fired
+
+        Returns:
+            Sorted unique output numbers and the LED state code of each (0: off)
+        """
+        numbers = np.unique(np.asarray(outputs, dtype=np.int64))
+        positions = np.searchsorted(self._output_keys, numbers * (len(self.sorted_cues) + 1) + cue_count) - 1
+        found = positions >= 0
+        found[found] = self._output_keys[positions[found]] // (len(self.sorted_cues) + 1) == numbers[found]
+        codes = np.zeros(len(numbers), dtype=np.int16)
+        codes[found] = self._output_key_codes[positions[found]]
+        return numbers, codes
+
+    def show_led_state_at_time(self, target_time: float) -> int:
+        """
+        Show the LED panel as it stands at a time in the show, without animation
+
+        Only the LEDs of cues fired or un-fired since the last shown position
+        (and of animations cut short) are resolved and repainted; the whole
+        panel is refreshed when its state is unknown.
+
+        Args:
+            target_time: Time in seconds
+
+        Returns:
+            Number of LEDs whose state was resolved
+        """
+        if not self.led_panel:
+            return 0
+
+        # A running animation would keep lighting LEDs after the seek
+        if self.preview_animation_controller and self.preview_animation_controller.active_cue is not None:
+            self._led_dirty_outputs.update(self.preview_animation_controller.outputs)
+            self.preview_animation_controller.stop_animation()
+
+        cue_count = self._cue_count_at(target_time)
+        if self._led_cue_count is None:
+            outputs = np.concatenate((np.fromiter(self.led_panel.leds, dtype=np.int64),
+                                      self._cue_outputs[:self._cue_output_offsets[cue_count]]))
+        else:
+            first, last = sorted((self._led_cue_count, cue_count))
+            passed = self._cue_outputs[self._cue_output_offsets[first]:self._cue_output_offsets[last]]
+            outputs = np.concatenate((passed, np.fromiter(self._led_dirty_outputs, dtype=np.int64)))
+
+        numbers, codes = self.led_codes_at(cue_count, outputs)
+        if hasattr(self.led_panel, 'apply_led_changes'):
+            self.led_panel.apply_led_changes(numbers, codes)
+        else:
+            leds = self.led_panel.leds
+            for number, code in zip(numbers.tolist(), codes.tolist()):
+                if number in leds:
+                    leds[number].setState(LED_STATE_TYPES[code])
+
+        self._led_cue_count = cue_count
+        self._led_dirty_outputs = set()
+        return len(numbers)
+
+    def forget_led_state(self):
+        """Mark the LED panel as changed outside the controller (the next seek refreshes every LED)"""
+        self._led_cue_count = None
 
     def start_preview(self):
         """Start preview playback of all cues"""
@@ -101,21 +208,21 @@ class ShowPreviewController(QObject):
                 # Clear all LEDs
                 for led_number in self.led_panel.leds:
                     self.led_panel.leds[led_number].setState(None)
+                self._led_cue_count = 0
+                self._led_dirty_outputs = set()
 
-        # Set starting time
-        self.start_time = time.time()
-        if self.is_paused:
-            # Adjust for time spent paused
-            self.start_time -= self.elapsed_time
-            self.is_paused = False
+        # Start the show clock (from the paused or sought position when resuming)
+        self.clock.start(self.elapsed_time)
+        self.is_paused = False
 
         # Notify LED panel manager of preview mode
         if hasattr(self.led_panel, 'set_preview_mode'):
             self.led_panel.set_preview_mode(True)
 
-        # Start timer
+        # Start timers
         self.is_playing = True
         self.timer.start()
+        self.scheduler.start(self.sorted_cue_times, self.current_cue_index)
         self.preview_started.emit()
 
         return True
@@ -123,6 +230,8 @@ class ShowPreviewController(QObject):
     def stop_preview(self):
         """Stop preview and reset state"""
         self.timer.stop()
+        self.scheduler.stop()
+        self.clock.stop()
         self.is_playing = False
         self.is_paused = False
         self.elapsed_time = 0
@@ -144,6 +253,7 @@ class ShowPreviewController(QObject):
             if hasattr(self.led_panel, 'updateFromCueData') and self.cues:
                 # Use the original cues (not sorted) to update the LED panel
                 self.led_panel.updateFromCueData(self.cues, force_refresh=True)
+            self._led_cue_count = None
 
         # Notify LED panel manager that preview mode ended
         if hasattr(self.led_panel, 'set_preview_mode'):
@@ -157,12 +267,13 @@ class ShowPreviewController(QObject):
             return
 
         self.timer.stop()
+        self.scheduler.stop()
+        self.clock.pause()
         self.is_paused = True
         self.is_playing = False
-        self.pause_time = time.time()
 
         # Store the elapsed time at pause
-        self.elapsed_time = self.pause_time - self.start_time
+        self.elapsed_time = self.clock.now()
 
     def resume_preview(self):
         """Resume the preview from pause"""
@@ -180,14 +291,26 @@ class ShowPreviewController(QObject):
         """
         self.music_file_path = file_path
 
+    def set_media_player(self, player):
+        """
+        Slave the show clock to a media player's position (None to run free)
+
+        Args:
+            player: QMediaPlayer playing the show's music
+        """
+        self.clock.attach_player(player)
+
+    def get_trigger_lateness(self) -> Dict[str, float]:
+        """Lateness statistics of the cues triggered so far (see CueScheduler.lateness_stats)"""
+        return self.scheduler.lateness_stats()
+
     def _update_preview(self):
         """Update the preview state based on elapsed time"""
         if not self.is_playing or not self.sorted_cues:
             return
 
-        # Calculate current elapsed time
-        current_time = time.time()
-        self.elapsed_time = current_time - self.start_time
+        # Current show time
+        self.elapsed_time = self.clock.now()
 
         # Emit current time for UI updates
         self.time_updated.emit(self.elapsed_time)
@@ -195,20 +318,14 @@ class ShowPreviewController(QObject):
         # Check if we've reached the end of all cues
         if self.current_cue_index >= len(self.sorted_cues):
             self.stop_preview()
-            return
 
-        # Check if it's time to trigger the next cue
-        while (self.current_cue_index < len(self.sorted_cues)):
-            next_cue = self.sorted_cues[self.current_cue_index]
-            next_cue_time = self._time_to_seconds(next_cue[4])
-
-            if self.elapsed_time >= next_cue_time:
-                # Time to trigger this cue
-                self._trigger_cue(next_cue)
-                self.current_cue_index += 1
-            else:
-                # Not time for this cue yet
-                break
+    def _on_cues_due(self, first: int, last: int):
+        """Trigger the sorted cues the scheduler found due, up to position last"""
+        while self.current_cue_index < last:
+            self._trigger_cue(self.sorted_cues[self.current_cue_index])
+            self.current_cue_index += 1
+            if self._led_cue_count is not None:
+                self._led_cue_count = self.current_cue_index
 
     def _trigger_cue(self, cue):
         """
@@ -221,6 +338,9 @@ class ShowPreviewController(QObject):
 
         # If we have access to the LED panel and preview animation controller, show the animation
         if self.led_panel and self.preview_animation_controller:
+            # Starting this animation cuts the previous one short, leaving some of its LEDs off
+            if self.preview_animation_controller.active_cue is not None:
+                self._led_dirty_outputs.update(self.preview_animation_controller.outputs)
             # Use the preview animation controller instead of standard handle_cue_selection
             self.preview_animation_controller.start_animation(cue)
 
@@ -237,17 +357,12 @@ class ShowPreviewController(QObject):
 
         # Find appropriate cue index for this time
         # This determines which cue should be triggered next
-        self.current_cue_index = 0
-        for i, cue in enumerate(self.sorted_cues):
-            cue_time = self._time_to_seconds(cue[4])
-            if cue_time <= target_time:
-                self.current_cue_index = i + 1
-            else:
-                break
+        self.current_cue_index = self._cue_count_at(target_time)
 
-        # Adjust start time to maintain correct elapsed time
-        # This ensures the timer continues correctly from this point
-        self.start_time = time.time() - self.elapsed_time
+        # Move the show clock and reschedule the cues from this point
+        self.clock.seek(self.elapsed_time)
+        if self.is_playing:
+            self.scheduler.start(self.sorted_cue_times, self.current_cue_index)
 
         # Emit time update
         self.time_updated.emit(self.elapsed_time)
@@ -265,15 +380,7 @@ class ShowPreviewController(QObject):
         Returns:
             List of cues that should be active
         """
-        active_cues = []
-        for cue in self.sorted_cues:
-            cue_time = self._time_to_seconds(cue[4])
-            if cue_time <= time:
-                active_cues.append(cue)
-            else:
-                # Since cues are sorted, we can break early
-                break
-        return active_cues
+        return self.sorted_cues[:self._cue_count_at(time)]
 
     def get_total_duration(self) -> float:
         """
@@ -285,8 +392,7 @@ class ShowPreviewController(QObject):
         if not self.sorted_cues:
             return 0.0
 
-        last_cue = self.sorted_cues[-1]
-        return self._time_to_seconds(last_cue[4])
+        return float(self.sorted_cue_times[-1])
 
     def _time_to_seconds(self, time_str):
         """
@@ -298,8 +404,4 @@ class ShowPreviewController(QObject):
         Returns:
             Time in seconds as float
         """
-        try:
-            minutes, seconds = time_str.split(':')
-            return int(minutes) * 60 + float(seconds)
-        except (ValueError, TypeError):
-            return 0.0
+        return parse_execute_time_ms(time_str) / 1000.0
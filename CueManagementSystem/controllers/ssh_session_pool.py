@@ -0,0 +1,340 @@
+"""
+Shared SSH Session Pool
+=======================
+
+One authenticated SSH transport per Raspberry Pi, shared by every controller that talks to it.
+
+SystemMode, HardwareController, the terminal's SSHConnection and the watchdog
+used to open their own paramiko clients, several of them per button press.
+The pool keeps a single transport alive with keepalives and multiplexes
+channels over it, so a show never waits for a handshake and health checks
+run on their own channel instead of queueing behind show commands.
+
+Features:
+- Single authenticated transport per host/port/user
+- Keepalive and TCP_NODELAY on the shared transport
+- Exec, SFTP, PTY and direct-tcpip channels on demand
+- Reconnect with exponential backoff
+- Per-channel-type latency metrics (count, errors, p50/p99)
+- Process-wide registry (get_session_pool)
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+import paramiko
+
+
+class SSHPoolUnavailableError(Exception):
+    """Raised when the pool has no transport and may not reconnect yet"""
+    pass
+
+
+class SSHSessionPool:
+    """
+    Keeps one SSH transport alive and hands out channels on it
+
+    client() returns a paramiko.SSHClient bound to the shared transport for
+    code that expects a client; callers must not close it - use close() on
+    the pool (or nothing at all) instead.
+    """
+
+    LATENCY_WINDOW = 1000  # samples kept per channel type
+
+    def __init__(self, host: str, port: int = 22, username: str = "", password: str = "",
+                 keepalive_interval: int = 15, connect_timeout: float = 10.0,
+                 initial_backoff: float = 0.5, max_backoff: float = 30.0,
+                 look_for_keys: bool = True, allow_agent: bool = True):
+        self.logger = logging.getLogger(__name__)
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.keepalive_interval = keepalive_interval
+        self.connect_timeout = connect_timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.look_for_keys = look_for_keys
+        self.allow_agent = allow_agent
+
+        self._client: Optional[paramiko.SSHClient] = None
+        self._sftp: Optional[paramiko.SFTPClient] = None
+        self._lock = threading.RLock()
+
+        self._backoff = 0.0
+        self._next_attempt = 0.0
+        self._last_error: Optional[str] = None
+
+        self._latencies: Dict[str, deque] = {}
+        self._errors: Dict[str, int] = {}
+        self.handshakes = 0
+        self.reconnects = 0
+
+    # Connection management
+
+    def is_connected(self) -> bool:
+        """Check whether the shared transport is up"""
+        client = self._client
+        if client is None:
+            return False
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def client(self) -> paramiko.SSHClient:
+        """
+        Shared SSH client, (re)connecting if the transport is down
+
+        Raises:
+            SSHPoolUnavailableError: while waiting out the reconnect backoff
+            paramiko.AuthenticationException / SSHException / OSError: on a failed attempt
+        """
+        if self.is_connected():
+            return self._client
+
+        with self._lock:
+            if self.is_connected():
+                return self._client
+
+            wait = self._next_attempt - time.monotonic()
+            if wait > 0:
+                raise SSHPoolUnavailableError(
+                    f"Reconnect to {self.host} backing off for {wait:.1f}s (last error: {self._last_error})")
+
+            had_connection = self._client is not None
+            self._drop_client()
+
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            start = time.perf_counter()
+            try:
+                client.connect(
+                    hostname=self.host,
+                    port=self.port,
+                    username=self.username,
+                    password=self.password,
+                    timeout=self.connect_timeout,
+                    banner_timeout=self.connect_timeout,
+                    auth_timeout=self.connect_timeout,
+                    look_for_keys=self.look_for_keys,
+                    allow_agent=self.allow_agent
+                )
+            except Exception as e:
+                client.close()
+                self._last_error = str(e)
+                self._backoff = min(self.max_backoff, self._backoff * 2 if self._backoff else self.initial_backoff)
+                self._next_attempt = time.monotonic() + self._backoff
+                self._record("connect", None)
+                self.logger.warning(f"SSH connect to {self.host} failed, next attempt in {self._backoff:.1f}s: {e}")
+                raise
+
+            transport = client.get_transport()
+            transport.set_keepalive(self.keepalive_interval)
+            try:
+                # Small command frames must not wait for delayed ACKs
+                transport.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except (OSError, AttributeError):
+                pass
+            self._record("connect", (time.perf_counter() - start) * 1000)
+            self._client = client
+            self._backoff = 0.0
+            self._next_attempt = 0.0
+            self._last_error = None
+            self.handshakes += 1
+            if had_connection:
+                self.reconnects += 1
+            self.logger.info(f"SSH transport to {self.username}@{self.host}:{self.port} established")
+            return client
+
+    def transport(self) -> paramiko.Transport:
+        """Shared transport, (re)connecting if needed"""
+        return self.client().get_transport()
+
+    def _drop_client(self):
+        if self._sftp is not None:
+            try:
+                self._sftp.close()
+            except Exception:
+                pass
+            self._sftp = None
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception:
+                pass
+            self._client = None
+
+    def close(self):
+        """Close the shared transport and every channel on it"""
+        with self._lock:
+            self._drop_client()
+            self._backoff = 0.0
+            self._next_attempt = 0.0
+
+    # Channels
+
+    def exec_command(self, command: str, timeout: float = 30.0, label: str = "exec") -> Tuple[int, str, str]:
+        """
+        Run a command on its own channel and wait for it to finish
+
+        Args:
+            command: Shell command
+            timeout: Seconds to wait for output and exit status
+            label: Channel type the latency is recorded under
+
+        Returns:
+            Tuple of (exit_status, stdout, stderr)
+        """
+        start = time.perf_counter()
+        try:
+            channel = self.transport().open_session(timeout=timeout)
+            try:
+                channel.settimeout(timeout)
+                channel.exec_command(command)
+                stdout = channel.makefile('rb').read()
+                stderr = channel.makefile_stderr('rb').read()
+                exit_status = channel.recv_exit_status()
+            finally:
+                channel.close()
+        except Exception:
+            self._record(label, None)
+            raise
+
+        self._record(label, (time.perf_counter() - start) * 1000)
+        return exit_status, stdout.decode('utf-8', errors='replace'), stderr.decode('utf-8', errors='replace')
+
+    def open_sftp(self) -> paramiko.SFTPClient:
+        """Shared SFTP session on the pooled transport (opened on first use)"""
+        with self._lock:
+            transport = self.transport()
+            channel = self._sftp.get_channel() if self._sftp is not None else None
+            if channel is not None and not channel.closed and channel.get_transport() is transport:
+                return self._sftp
+
+            start = time.perf_counter()
+            try:
+                self._sftp = paramiko.SFTPClient.from_transport(transport)
+            except Exception:
+                self._record("sftp", None)
+                raise
+            self._record("sftp", (time.perf_counter() - start) * 1000)
+            return self._sftp
+
+    def open_pty(self, term: str = 'xterm', width: int = 80, height: int = 24) -> paramiko.Channel:
+        """Interactive shell channel with a PTY (caller owns and closes it)"""
+        start = time.perf_counter()
+        try:
+            channel = self.transport().open_session(timeout=self.connect_timeout)
+            channel.get_pty(term=term, width=width, height=height)
+            channel.invoke_shell()
+        except Exception:
+            self._record("pty", None)
+            raise
+        self._record("pty", (time.perf_counter() - start) * 1000)
+        return channel
+
+    def open_tunnel(self, dest_host: str, dest_port: int, timeout: float = 5.0) -> paramiko.Channel:
+        """direct-tcpip channel to a port on the Pi (caller owns and closes it)"""
+        start = time.perf_counter()
+        try:
+            channel = self.transport().open_channel(
+                "direct-tcpip", (dest_host, dest_port), ("127.0.0.1", 0), timeout=timeout)
+        except Exception:
+            self._record("tunnel", None)
+            raise
+        self._record("tunnel", (time.perf_counter() - start) * 1000)
+        return channel
+
+    def health_check(self, timeout: float = 3.0) -> Tuple[bool, float]:
+        """
+        Round trip on a dedicated channel (never queues behind show commands)
+
+        Returns:
+            Tuple of (healthy, latency_ms)
+        """
+        start = time.perf_counter()
+        try:
+            exit_status, stdout, _ = self.exec_command("echo ping", timeout=timeout, label="health")
+            healthy = exit_status == 0 and stdout.strip() == "ping"
+        except Exception as e:
+            self.logger.debug(f"SSH health check failed: {e}")
+            healthy = False
+        return healthy, (time.perf_counter() - start) * 1000
+
+    # Metrics
+
+    def _record(self, label: str, latency_ms: Optional[float]):
+        if latency_ms is None:
+            self._errors[label] = self._errors.get(label, 0) + 1
+            return
+        samples = self._latencies.get(label)
+        if samples is None:
+            samples = self._latencies[label] = deque(maxlen=self.LATENCY_WINDOW)
+        samples.append(latency_ms)
+
+    def get_latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latency (ms) per channel type over the last 1000 operations"""
+        stats = {}
+        for label in set(self._latencies) | set(self._errors):
+            ordered = sorted(self._latencies.get(label, ()))
+            entry = {"count": len(ordered), "errors": self._errors.get(label, 0)}
+            if ordered:
+                entry.update({
+                    "min_ms": ordered[0],
+                    "p50_ms": ordered[len(ordered) // 2],
+                    "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+                    "max_ms": ordered[-1]
+                })
+            stats[label] = entry
+        return stats
+
+    def get_status(self) -> Dict[str, Any]:
+        """Connection state and counters for diagnostics panels"""
+        return {
+            "host": self.host,
+            "connected": self.is_connected(),
+            "handshakes": self.handshakes,
+            "reconnects": self.reconnects,
+            "backoff_s": self._backoff,
+            "last_error": self._last_error,
+            "latency": self.get_latency_stats()
+        }
+
+
+_pools: Dict[Tuple[str, int, str], SSHSessionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_session_pool(host: str, port: int = 22, username: str = "", password: str = "",
+                     **kwargs) -> SSHSessionPool:
+    """
+    Process-wide pool for a host/port/user
+
+    Every caller asking for the same Pi gets the same transport. A changed
+    password replaces the pool (the old transport is closed).
+    """
+    key = (host, int(port or 22), username)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and pool.password != password:
+            pool.close()
+            pool = None
+        if pool is None:
+            pool = SSHSessionPool(host, key[1], username, password, **kwargs)
+            _pools[key] = pool
+        return pool
+
+
+def close_all_pools():
+    """Close every pooled transport (application shutdown)"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -28,7 +28,10 @@ from datetime import datetime
 from typing import Optional, Dict, Any, List
 from PySide6.QtCore import QObject, Signal, QTimer
 from controllers.hardware_controller import HardwareController
+from controllers.pi_daemon_client import PiDaemonClient
+from controllers.ssh_session_pool import SSHSessionPool, get_session_pool
 from views.managers.shift_register_formatter_manager import ShiftRegisterFormatter, ShiftRegisterConfig
+from raspberry_pi.show_format import SHOW_UPLOAD_PATH
 
 
 class SystemMode(QObject):
@@ -57,8 +60,15 @@ class SystemMode(QObject):
             "known_hosts": None
         }
         self.ssh_connection = None
+        self.ssh_pool: Optional[SSHSessionPool] = None
         self.hardware_controller = HardwareController(self)
 
+        # Persistent channel to the cue daemon on the Pi (falls back to per-command scripts)
+        self.pi_daemon = PiDaemonClient()
+
+        # Opt-in SCHED_FIFO/pinned-core show loop on the Pi (needs CAP_SYS_NICE there)
+        self.realtime_show_mode = False
+
         # Create shift register configuration for large-scale system (1000 outputs)
         # Configure for 5 chains of 25 registers each = 125 total registers = 1000 outputs
         try:
@@ -289,20 +299,8 @@ class SystemMode(QObject):
                 if result != 0:
                     return False, f"Cannot reach SSH port {self.connection_settings['port']}"
 
-                # Create SSH connection using paramiko
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-                ssh.connect(
-                    hostname=self.connection_settings['host'],
-                    port=self.connection_settings['port'],
-                    username=self.connection_settings['username'],
-                    password=self.connection_settings['password'],
-                    timeout=30
-                )
-
-                # Store the connection
-                self.ssh_connection = ssh
+                # Authenticate the pooled transport (stored as self.ssh_connection)
+                self._get_persistent_ssh()
                 print("SSH connection established successfully")
 
             return True, "Successfully connected to Raspberry Pi via SSH"
@@ -334,21 +332,17 @@ class SystemMode(QObject):
 
     def close_connection_sync(self):
         """Close any active connections (synchronous version for shutdown)"""
+        # Close the daemon channel before its transport goes away
+        self.pi_daemon.close()
+
         # Close SSH connection if it exists
         if self.ssh_connection:
             print("Closing SSH connection")
             try:
-                # Properly close paramiko SSH connection
-                import paramiko
-                if isinstance(self.ssh_connection, paramiko.SSHClient):
-                    # Close any active channels first
-                    transport = self.ssh_connection.get_transport()
-                    if transport and transport.is_active():
-                        transport.close()
-                    # Close the SSH client
-                    self.ssh_connection.close()
+                # Closes the pooled transport and every channel on it
+                if self.ssh_pool is not None:
+                    self.ssh_pool.close()
                 else:
-                    # Fallback for other SSH connection types
                     self.ssh_connection.close()
 
                 self.ssh_connection = None
@@ -357,6 +351,88 @@ class SystemMode(QObject):
                 print(f"Error closing SSH connection: {e}")
                 self.ssh_connection = None
 
+    def _get_persistent_ssh(self):
+        """
+        Return the shared SSH client, connecting if needed (synchronous)
+
+        The client belongs to the process-wide session pool for the current
+        connection settings - never close it directly, use close_connection_sync().
+
+        Returns:
+            paramiko.SSHClient with an active transport
+        """
+        self.ssh_connection = self._get_session_pool().client()
+        return self.ssh_connection
+
+    def _get_session_pool(self) -> SSHSessionPool:
+        """Session pool for the current connection settings (shared with the terminal and watchdog)"""
+        self.ssh_pool = get_session_pool(
+            self.connection_settings['host'],
+            self.connection_settings.get('port', 22),
+            self.connection_settings['username'],
+            self.connection_settings.get('password', '')
+        )
+        return self.ssh_pool
+
+    def _send_daemon_command(self, command: str, timeout: float = 30.0, priority: bool = False,
+                             auto_start: bool = True, **params) -> Optional[Dict[str, Any]]:
+        """
+        Send a command to the persistent cue daemon on the Pi
+
+        Args:
+            command: Daemon command name
+            timeout: Seconds to wait for the response
+            priority: Bypass a busy channel (emergency stop)
+            auto_start: Start the daemon over SSH if it is not running
+            **params: Command parameters
+
+        Returns:
+            Response dict, or None if the daemon could not be reached and the
+            caller should fall back to launching the standalone script
+        """
+        try:
+            if not self.pi_daemon.is_connected():
+                self.pi_daemon.connect_ssh(self._get_persistent_ssh(), auto_start=auto_start)
+        except Exception as e:
+            self.logger.warning(f"Cue daemon unavailable, using script fallback: {e}")
+            return None
+
+        try:
+            return self.pi_daemon.request(command, timeout=timeout, priority=priority, **params)
+        except Exception as e:
+            # The request may already have reached the Pi - never retry through the fallback
+            self.logger.error(f"Cue daemon command '{command}' failed: {e}")
+            return {"status": "error", "message": f"Cue daemon error: {e}"}
+
+    def get_show_telemetry(self, since: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Poll per-frame lateness of the show running on the Pi
+
+        Args:
+            since: 'sequence' from the previous poll (0 for the whole ring)
+
+        Returns:
+            Telemetry dict (summary with p50/p99/p999, new samples in µs and the
+            next sequence), or None if the cue daemon is not connected
+        """
+        if not self.pi_daemon.is_connected():
+            return None
+        try:
+            return self.pi_daemon.request("show_telemetry", timeout=5.0, priority=True, since=since)
+        except Exception as e:
+            self.logger.warning(f"Show telemetry unavailable: {e}")
+            return None
+
+    def _report_daemon_gpio_response(self, response: Dict[str, Any], status_message: str):
+        """Emit UI feedback for a GPIO state command answered by the cue daemon"""
+        if response.get('status') == 'success':
+            self.logger.info(f"{status_message} via cue daemon: {response}")
+            self.message_received.emit("gpio_status", f"{status_message} successfully")
+        else:
+            error = response.get('message', 'Unknown error')
+            self.logger.error(f"Cue daemon GPIO command failed: {error}")
+            self.error_occurred.emit(f"Warning: {status_message} in UI only. Hardware control failed: {error}")
+
     async def test_connection(self):
         """Test the connection to the Raspberry Pi"""
         return self.test_ssh_connection_sync()  # Use synchronous version
@@ -380,17 +456,8 @@ class SystemMode(QObject):
             if result != 0:
                 return False, f"Cannot reach SSH port {self.connection_settings['port']}"
 
-            # Try SSH authentication
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-            ssh.connect(
-                hostname=self.connection_settings['host'],
-                port=self.connection_settings['port'],
-                username=self.connection_settings['username'],
-                password=self.connection_settings['password'],
-                timeout=10
-            )
+            # Try SSH authentication (a successful test leaves the pooled transport warm)
+            ssh = self._get_persistent_ssh()
 
             # Test a simple command
             stdin, stdout, stderr = ssh.exec_command("echo 'SSH test successful'")
@@ -402,8 +469,6 @@ class SystemMode(QObject):
             stdout.close()
             stderr.close()
 
-            ssh.close()
-
             if output == "SSH test successful":
                 print("SSH connection test successful")
                 return True, "SSH connection successful!"
@@ -541,26 +606,19 @@ class SystemMode(QObject):
             # Prepare status message for UI feedback
             status_message = f"Outputs {'enabled' if new_state else 'disabled'}"
 
-            # Send SSH command to Pi if in hardware mode
+            # Send command to Pi if in hardware mode (cue daemon first, script fallback)
+            daemon_response = None
             if self.is_hardware_mode():
-                print("SystemMode: In hardware mode, creating fresh SSH connection")
+                daemon_response = self._send_daemon_command("set_outputs_enabled", enabled=new_state)
 
-                # Create fresh SSH connection (like Set GPIO State button does)
-                import paramiko
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            if daemon_response is not None:
+                self._report_daemon_gpio_response(daemon_response, status_message)
+            elif self.is_hardware_mode():
+                print("SystemMode: In hardware mode, using pooled SSH connection")
 
                 try:
-                    # Connect using stored settings
-                    print(f"SystemMode: Connecting to {self.connection_settings['host']}...")
-                    ssh.connect(
-                        hostname=self.connection_settings['host'],
-                        port=self.connection_settings.get('port', 22),
-                        username=self.connection_settings['username'],
-                        password=self.connection_settings.get('password', ''),
-                        timeout=10
-                    )
-                    print("SystemMode: SSH connection established")
+                    # Shared pooled transport (no handshake per button press)
+                    ssh = self._get_persistent_ssh()
 
                     # Execute command
                     command = f"python3 ~/toggle_outputs.py --enabled={int(new_state)}"
@@ -591,10 +649,6 @@ class SystemMode(QObject):
                         self.error_occurred.emit(
                             f"Warning: {status_message} in UI only. Hardware control failed: {error if error else 'Unknown error'}")
 
-                    # Close the connection
-                    ssh.close()
-                    print("SystemMode: SSH connection closed")
-
                 except Exception as e:
                     self.logger.error(f"Error with SSH connection: {e}")
                     print(f"SystemMode: SSH connection error: {e}")
@@ -602,12 +656,6 @@ class SystemMode(QObject):
                     # Emit error for UI feedback
                     self.error_occurred.emit(
                         f"Warning: {status_message} in UI only. SSH connection error: {str(e)}")
-
-                    # Try to close connection if it was opened
-                    try:
-                        ssh.close()
-                    except:
-                        pass
             else:
                 print("SystemMode: In simulation mode, skipping SSH command")
                 self.message_received.emit("gpio_status", f"Simulation: {status_message}")
@@ -649,26 +697,19 @@ class SystemMode(QObject):
             # Prepare status message for UI feedback
             status_message = f"System {'armed' if new_state else 'disarmed'}"
 
-            # Send SSH command to Pi if in hardware mode
+            # Send command to Pi if in hardware mode (cue daemon first, script fallback)
+            daemon_response = None
             if self.is_hardware_mode():
-                print("SystemMode: In hardware mode, creating fresh SSH connection for arm command")
+                daemon_response = self._send_daemon_command("set_arm_state", armed=new_state)
 
-                # Create fresh SSH connection
-                import paramiko
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            if daemon_response is not None:
+                self._report_daemon_gpio_response(daemon_response, status_message)
+            elif self.is_hardware_mode():
+                print("SystemMode: In hardware mode, using pooled SSH connection for arm command")
 
                 try:
-                    # Connect using stored settings
-                    print(f"SystemMode: Connecting to {self.connection_settings['host']}...")
-                    ssh.connect(
-                        hostname=self.connection_settings['host'],
-                        port=self.connection_settings.get('port', 22),
-                        username=self.connection_settings['username'],
-                        password=self.connection_settings.get('password', ''),
-                        timeout=10
-                    )
-                    print("SystemMode: SSH connection established")
+                    # Shared pooled transport (no handshake per button press)
+                    ssh = self._get_persistent_ssh()
 
                     # Execute command
                     command = f"python3 ~/set_arm_state.py --armed={int(new_state)}"
@@ -699,10 +740,6 @@ class SystemMode(QObject):
                         self.error_occurred.emit(
                             f"Warning: {status_message} in UI only. Hardware control failed: {error if error else 'Unknown error'}")
 
-                    # Close the connection
-                    ssh.close()
-                    print("SystemMode: SSH connection closed")
-
                 except Exception as e:
                     self.logger.error(f"Error with SSH connection: {e}")
                     print(f"SystemMode: SSH connection error: {e}")
@@ -710,12 +747,6 @@ class SystemMode(QObject):
                     # Emit error for UI feedback
                     self.error_occurred.emit(
                         f"Warning: {status_message} in UI only. SSH connection error: {str(e)}")
-
-                    # Try to close connection if it was opened
-                    try:
-                        ssh.close()
-                    except:
-                        pass
             else:
                 self.logger.info(f"Simulation: {status_message}")
                 self.message_received.emit("gpio_status", f"Simulation: {status_message}")
@@ -762,26 +793,28 @@ class SystemMode(QObject):
             # Execute through show execution manager for consistency
             success = await self.show_execution_manager.execute_single_cue(selected_cue)
 
-            # If in hardware mode, send SSH command to Pi
+            # If in hardware mode, send the cue to the Pi (cue daemon first, script fallback)
+            daemon_response = None
             if self.is_hardware_mode():
-                print("SystemMode: In hardware mode, creating fresh SSH connection for cue execution")
+                pi_cue = self.normalize_cue_for_pi(selected_cue)
+                # The daemon answers once the whole cue has fired - long runs outlast the default timeout
+                daemon_response = self._send_daemon_command(
+                    "execute_cue", timeout=PiDaemonClient.cue_timeout(pi_cue), cue=pi_cue)
 
-                # Create fresh SSH connection
-                import paramiko
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            if daemon_response is not None:
+                success = daemon_response.get('status') == 'success'
+                if success:
+                    self.logger.info(f"Cue executed via cue daemon: {daemon_response}")
+                else:
+                    error = daemon_response.get('message', 'Unknown error')
+                    self.logger.error(f"Failed to execute cue via cue daemon: {error}")
+                    self.error_occurred.emit(f"Hardware cue execution failed: {error}")
+            elif self.is_hardware_mode():
+                print("SystemMode: In hardware mode, using pooled SSH connection for cue execution")
 
                 try:
-                    # Connect using stored settings
-                    print(f"SystemMode: Connecting to {self.connection_settings['host']}...")
-                    ssh.connect(
-                        hostname=self.connection_settings['host'],
-                        port=self.connection_settings.get('port', 22),
-                        username=self.connection_settings['username'],
-                        password=self.connection_settings.get('password', ''),
-                        timeout=10
-                    )
-                    print("SystemMode: SSH connection established")
+                    # Shared pooled transport (no handshake per button press)
+                    ssh = self._get_persistent_ssh()
 
                     # Normalize cue data for Pi
                     normalized_cue = self.normalize_cue_for_pi(selected_cue)
@@ -810,22 +843,12 @@ class SystemMode(QObject):
                         self.error_occurred.emit(f"Hardware cue execution failed: {error}")
                         success = False
 
-                    # Close the connection
-                    ssh.close()
-                    print("SystemMode: SSH connection closed")
-
                 except Exception as ssh_e:
                     self.logger.error(f"SSH cue execution error: {ssh_e}")
                     print(f"SystemMode: SSH connection error: {ssh_e}")
                     self.error_occurred.emit(f"SSH cue execution error: {str(ssh_e)}")
                     success = False
 
-                    # Try to close connection if it was opened
-                    try:
-                        ssh.close()
-                    except:
-                        pass
-
             if success:
                 self.logger.info(f"Cue {selected_cue['cue_id']} executed successfully")
                 self.message_received.emit("cue_status", f"Cue {selected_cue.get('cue_id', '')} executed successfully")
@@ -867,52 +890,37 @@ class SystemMode(QObject):
             if self.show_execution_manager.load_show(show_cues):
                 success = await self.show_execution_manager.execute_show()
 
-                # If in hardware mode, send SSH command to Pi
+                # If in hardware mode, start the show on the Pi (cue daemon first, script fallback)
+                daemon_response = None
                 if self.is_hardware_mode():
-                    import paramiko
-
-                    # Try to reuse existing SSH connection if available
-                    ssh = None
-                    if self.ssh_connection:
-                        try:
-                            # Test if connection is still alive
-                            transport = self.ssh_connection.get_transport()
-                            if transport and transport.is_active():
-                                print("SystemMode: Reusing existing SSH connection for show execution")
-                                ssh = self.ssh_connection
-                            else:
-                                print("SystemMode: Existing SSH connection is dead, creating new one")
-                        except:
-                            print("SystemMode: Error checking SSH connection, creating new one")
+                    # The daemon already has GPIO initialized, so no READY handshake is needed
+                    daemon_start = start_timestamp if start_timestamp else time.time() + 0.5
+                    daemon_response = self._send_daemon_command(
+                        "execute_show", show_file=SHOW_UPLOAD_PATH, start_timestamp=daemon_start,
+                        realtime=self.realtime_show_mode)
+
+                if daemon_response is not None:
+                    success = daemon_response.get('status') == 'success'
+                    if success:
+                        self.logger.info(f"Show execution started via cue daemon: {daemon_response}")
                     else:
-                        print("SystemMode: No existing SSH connection, creating new one")
-
-                    # Create fresh connection if needed
-                    if ssh is None:
-                        ssh = paramiko.SSHClient()
-                        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-                        try:
-                            # Connect using stored settings
-                            print(f"SystemMode: Connecting to {self.connection_settings['host']}...")
-                            ssh.connect(
-                                hostname=self.connection_settings['host'],
-                                port=self.connection_settings.get('port', 22),
-                                username=self.connection_settings['username'],
-                                password=self.connection_settings.get('password', ''),
-                                timeout=10
-                            )
-                            print("SystemMode: SSH connection established")
-                        except Exception as conn_error:
-                            print(f"SystemMode: Failed to establish SSH connection: {conn_error}")
-                            self.error_occurred.emit(f"SSH connection failed: {str(conn_error)}")
-                            return False
+                        error = daemon_response.get('message', 'Unknown error')
+                        self.logger.error(f"Cue daemon failed to start show: {error}")
+                        self.error_occurred.emit(f"Hardware show execution failed: {error}")
+                elif self.is_hardware_mode():
+                    # Shared pooled transport (kept alive between shows)
+                    try:
+                        ssh = self._get_persistent_ssh()
+                    except Exception as conn_error:
+                        print(f"SystemMode: Failed to establish SSH connection: {conn_error}")
+                        self.error_occurred.emit(f"SSH connection failed: {str(conn_error)}")
+                        return False
 
                     try:
 
                         # Use the pre-uploaded show file from checklist
                         # This avoids re-uploading during the critical synchronization window
-                        temp_file = "/tmp/show_data.json"
+                        temp_file = SHOW_UPLOAD_PATH
                         print(f"SystemMode: Using pre-uploaded show file: {temp_file}")
                         # Verify file exists on Pi
                         stdin, stdout, stderr = ssh.exec_command(f"test -f {temp_file} && echo 'exists'")
@@ -926,10 +934,11 @@ class SystemMode(QObject):
                             print("SystemMode: Starting two-way handshake synchronization...")
 
                             # Build command WITHOUT background (&) so we can communicate via stdin/stdout
+                            realtime_flag = " --realtime" if self.realtime_show_mode else ""
                             if start_timestamp:
-                                command = f"python3 ~/execute_show.py {temp_file} {start_timestamp} 2>/tmp/show_execution.log"
+                                command = f"python3 ~/execute_show.py {temp_file} {start_timestamp}{realtime_flag} 2>/tmp/show_execution.log"
                             else:
-                                command = f"python3 ~/execute_show.py {temp_file} 2>/tmp/show_execution.log"
+                                command = f"python3 ~/execute_show.py {temp_file}{realtime_flag} 2>/tmp/show_execution.log"
 
                             print(f"SystemMode: Executing command: {command}")
 
@@ -988,26 +997,12 @@ class SystemMode(QObject):
                                 f"Show file not found. Upload show data first using Pre-Show Checklist.")
                             success = False
 
-                        # Only close if we created a new connection (not reusing existing)
-                        if ssh != self.ssh_connection:
-                            ssh.close()
-                            print("SystemMode: SSH connection closed")
-                        else:
-                            print("SystemMode: Keeping SSH connection alive for future use")
-
                     except Exception as ssh_e:
                         self.logger.error(f"SSH show execution error: {ssh_e}")
                         print(f"SystemMode: SSH connection error: {ssh_e}")
                         self.error_occurred.emit(f"SSH show execution error: {str(ssh_e)}")
                         success = False
 
-                        # Try to close connection if it was opened (only if not reusing)
-                        try:
-                            if ssh and ssh != self.ssh_connection:
-                                ssh.close()
-                        except:
-                            pass
-
                 if success:
                     self.logger.info("Show execution started successfully")
                     self.message_received.emit("show_status", "Show execution started successfully")
@@ -1174,55 +1169,91 @@ class SystemMode(QObject):
                 self.logger.error(f"Error aborting GPIO states: {gpio_e}")
                 self.error_occurred.emit(f"GPIO abort error: {str(gpio_e)}")
 
-            # 3. Send emergency stop command via SSH to hardware
-            if self.is_hardware_mode():
-                # Create fresh SSH connection for emergency stop
-                import paramiko
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
+            # 3. Send emergency stop to hardware (cue daemon first, script fallback)
+            daemon_response = None
+            if self.is_hardware_mode() and self.pi_daemon.is_connected():
+                daemon_response = self._send_daemon_command(
+                    "emergency_stop", timeout=5.0, priority=True, auto_start=False)
+                if daemon_response is None or daemon_response.get('status') != 'success':
+                    error = daemon_response.get('message') if daemon_response else "daemon unreachable"
+                    self.logger.error(f"Cue daemon emergency stop failed: {error}")
+                    daemon_response = None  # Fall through to the standalone script
+
+            if daemon_response is not None:
+                self.logger.info(f"Hardware emergency stop via cue daemon: {daemon_response}")
+                abort_results["hardware"] = True
+            elif self.is_hardware_mode():
+                ssh, owns_ssh = None, False
                 try:
-                    # Connect using stored settings
-                    ssh.connect(
-                        hostname=self.connection_settings['host'],
-                        port=self.connection_settings.get('port', 22),
-                        username=self.connection_settings['username'],
-                        password=self.connection_settings.get('password', ''),
-                        timeout=10
-                    )
-
-                    # First, kill any running execute_show.py processes
-                    kill_command = "pkill -f 'python3.*execute_show.py' || true"
-                    stdin, stdout, stderr = ssh.exec_command(kill_command)
-                    stdout.channel.recv_exit_status()  # Wait for completion
-                    self.logger.info("Killed any running show processes")
-
-                    # Then send emergency stop command
-                    command = "python3 ~/emergency_stop.py"
-                    stdin, stdout, stderr = ssh.exec_command(command)
-                    exit_status = stdout.channel.recv_exit_status()
-
-                    # Read both stdout and stderr
-                    output = stdout.read().decode().strip()
-                    error = stderr.read().decode().strip()
+                    # New channel on the pooled transport - no handshake before the stop.
+                    # Any pool error (including reconnect backoff) falls back to a fresh connection.
+                    try:
+                        ssh = self._get_persistent_ssh()
+                    except Exception as pool_e:
+                        self.logger.warning(f"SSH pool unavailable for emergency stop, connecting directly: {pool_e}")
+                        import paramiko
+                        ssh = paramiko.SSHClient()
+                        owns_ssh = True
+                        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                        ssh.connect(
+                            hostname=self.connection_settings['host'],
+                            port=self.connection_settings.get('port', 22),
+                            username=self.connection_settings['username'],
+                            password=self.connection_settings.get('password', ''),
+                            timeout=10
+                        )
+
+                    # Shows and cues run inside the cue daemon - stop them over a fresh tunnel first
+                    daemon_stopped = False
+                    try:
+                        self.pi_daemon.connect_ssh(ssh, auto_start=False)
+                        stop_response = self.pi_daemon.stop_all(timeout=5.0)
+                        daemon_stopped = stop_response.get('status') == 'success'
+                        if daemon_stopped:
+                            self.logger.info(f"Hardware emergency stop via cue daemon: {stop_response}")
+                        else:
+                            self.logger.error(f"Cue daemon emergency stop failed: {stop_response.get('message')}")
+                    except Exception as daemon_e:
+                        self.logger.warning(f"Cue daemon unreachable for emergency stop: {daemon_e}")
 
-                    if exit_status == 0:
-                        self.logger.info(f"Hardware emergency stop successful: {output}")
+                    if daemon_stopped:
                         abort_results["hardware"] = True
                     else:
-                        error_msg = error if error else f"Exit code {exit_status}, output: {output}"
-                        self.logger.error(f"Emergency stop returned error: {error_msg}")
-                        # Don't emit error to user - emergency stop still worked
-                        # Just log it for debugging
-                        abort_results["hardware"] = True  # Consider it successful anyway
+                        # Kill any running execute_show.py processes and the daemon (its show thread
+                        # keeps shifting frames otherwise)
+                        kill_command = ("pkill -f 'python3.*execute_show.py'; "
+                                        "pkill -f 'python3.*cue_daemon.py'; true")
+                        stdin, stdout, stderr = ssh.exec_command(kill_command)
+                        stdout.channel.recv_exit_status()  # Wait for completion
+                        self.logger.info("Killed any running show processes and the cue daemon")
+
+                        # Then send emergency stop command
+                        command = "python3 ~/emergency_stop.py"
+                        stdin, stdout, stderr = ssh.exec_command(command)
+                        exit_status = stdout.channel.recv_exit_status()
+
+                        # Read both stdout and stderr
+                        output = stdout.read().decode().strip()
+                        error = stderr.read().decode().strip()
 
-                    # Close connection
-                    ssh.close()
+                        if exit_status == 0:
+                            self.logger.info(f"Hardware emergency stop successful: {output}")
+                            abort_results["hardware"] = True
+                        else:
+                            error_msg = error if error else f"Exit code {exit_status}, output: {output}"
+                            self.logger.error(f"Emergency stop returned error: {error_msg}")
+                            # Don't emit error to user - emergency stop still worked
+                            # Just log it for debugging
+                            abort_results["hardware"] = True  # Consider it successful anyway
 
                 except Exception as ssh_e:
                     self.logger.error(f"Error sending emergency stop via SSH: {ssh_e}")
                     # Don't fail the abort - local GPIO was already reset
                     abort_results["hardware"] = True  # Consider successful if local GPIO worked
+                finally:
+                    if owns_ssh:
+                        self.pi_daemon.close()  # Its tunnel runs on the client closed below
+                        ssh.close()
             else:
                 self.logger.info("In simulation mode, skipping hardware emergency stop")
                 abort_results["hardware"] = True  # Consider successful in simulation mode
@@ -1375,17 +1406,14 @@ class SystemMode(QObject):
         if not self.is_hardware_mode():
             return True  # Always healthy in simulation mode
 
-        if not self.ssh_connection:
+        if not self.ssh_connection or self.ssh_pool is None:
             return False
 
-        try:
-            # Send a simple echo command to test connection
-            stdin, stdout, stderr = self.ssh_connection.exec_command("echo 'ping'", timeout=3)
-            output = stdout.read().decode().strip()
-            return output == "ping"
-        except Exception as e:
-            self.logger.warning(f"Connection health check failed: {e}")
-            return False
+        # Dedicated channel on the pooled transport - does not queue behind show commands
+        healthy, latency_ms = self.ssh_pool.health_check(timeout=3)
+        if not healthy:
+            self.logger.warning(f"Connection health check failed after {latency_ms:.0f}ms")
+        return healthy
 
     def handle_connection_loss_during_show(self):
         """
@@ -10,6 +10,7 @@ This version works with the embedded visualizer - no separate process needed!
 Features:
 - 10-second countdown before preview starts
 - Perfect music and cue synchronization (T=0)
+- Cues fired on the shared preview clock, slaved to the music player
 - Direct rendering to embedded canvas
 - Fullscreen preview window
 - Optional music playback
@@ -25,6 +26,9 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from PySide6.QtCore import QObject, Signal, QTimer
 
+from controllers.preview_clock import CueScheduler, PreviewClock
+from models.cue_store import CueStore, parse_execute_time_ms
+
 
 class VRPreviewController(QObject):
     """
@@ -51,6 +55,8 @@ class VRPreviewController(QObject):
         # Preview state
         self.is_previewing = False
         self.preview_cues: List[Dict[str, Any]] = []
+        self._cue_order: List[int] = []  # Preview cue indexes in execute time order
+        self._cue_times: List[float] = []  # Execute times in seconds in that order, parsed by the cue store
         self.music_file: Optional[Dict[str, Any]] = None
         self.start_time: Optional[datetime] = None
 
@@ -59,7 +65,12 @@ class VRPreviewController(QObject):
         self.countdown_timer.timeout.connect(self._countdown_tick)
         self.countdown_value = 10
 
-        # Cue execution timer
+        # Show clock and cue scheduler
+        self.clock = PreviewClock()
+        self.scheduler = CueScheduler(self.clock)
+        self.scheduler.cues_due.connect(self._on_cues_due)
+
+        # Completion check timer
         self.execution_timer = QTimer()
         self.execution_timer.timeout.connect(self._check_cue_execution)
 
@@ -77,7 +88,7 @@ class VRPreviewController(QObject):
         Start VR preview with countdown
 
         Args:
-            cues: List of cue dictionaries to preview
+            cues: The cue table's CueStore, or a list of cue rows
             music_file: Optional music file info dictionary
         """
         if self.is_previewing:
@@ -85,7 +96,10 @@ class VRPreviewController(QObject):
             return
 
         try:
-            self.preview_cues = cues
+            store = cues if isinstance(cues, CueStore) else CueStore(cues)
+            self.preview_cues = list(store.rows)
+            self._cue_order = store.time_order.tolist()
+            self._cue_times = (store.execute_ms[store.time_order] / 1000.0).tolist()
             self.music_file = music_file
             self._executed_cues.clear()  # Reset executed cues tracking
             self.is_previewing = True
@@ -128,12 +142,14 @@ class VRPreviewController(QObject):
         try:
             # Record start time (T=0)
             self.start_time = datetime.now()
+            self.clock.start(0.0)
 
             # Emit preview started signal (this will trigger music playback)
             self.preview_started.emit()
 
-            # Start cue execution timer (check every 10ms for precise timing)
-            self.execution_timer.start(10)
+            # Schedule the cues and check for completion every 100ms
+            self.scheduler.start(self._cue_times)
+            self.execution_timer.start(100)
 
             self.logger.info("Preview started at T=0 (Embedded Visualizer)")
 
@@ -144,27 +160,30 @@ class VRPreviewController(QObject):
 
     def _check_cue_execution(self):
         """
-        Check if any cues should be executed based on current time
+        Complete the preview once every cue has been executed
 
-        This runs every 10ms to ensure precise timing.
-        Checks ALL cues on each tick instead of sequential execution.
+        Cues themselves are fired by the scheduler at their execute times.
         """
         if not self.is_previewing or not self.start_time:
             return
 
-        # Calculate elapsed time since T=0
-        elapsed = (datetime.now() - self.start_time).total_seconds()
+        # Check if all cues have been executed
+        if self.scheduler.next_index >= len(self._cue_times):
+            # Wait a bit after last cue before completing
+            if self.clock.now() > self._get_last_cue_time() + 5.0:
+                self.stop_preview()
+
+    def _on_cues_due(self, first: int, last: int):
+        """Execute the cues at time order positions [first, last)"""
+        elapsed = self.clock.now()
+        for position in range(first, last):
+            i = self._cue_order[position]
+            cue_row = self.preview_cues[i]
 
-        # Check ALL cues to see if any should be executed now
-        all_cues_executed = True
-        for i, cue_row in enumerate(self.preview_cues):
             # Skip already executed cues
             if i in self._executed_cues:
                 continue
 
-            # This cue hasn't been executed yet
-            all_cues_executed = False
-
             # Convert list to dict format
             # _data[row] = [cue_number, type, outputs, delay, execute_time, visual_properties]
             if len(cue_row) < 5:
@@ -181,21 +200,11 @@ class VRPreviewController(QObject):
                 'visual_properties': cue_row[5] if len(cue_row) > 5 else None
             }
 
-            cue_time = self._parse_time_code(cue_dict.get('execute_time', '00:00.0000'))
-
-            # Check if it's time to execute this cue
-            if elapsed >= cue_time:
-                self._execute_cue(cue_dict)
-                # Mark this cue as executed
-                self._executed_cues.add(i)
-                self.logger.debug(
-                    f"Executed cue {cue_dict.get('cue_id', 'unknown')} at {elapsed:.3f}s (scheduled: {cue_time:.3f}s)")
-
-        # Check if all cues have been executed
-        if all_cues_executed:
-            # Wait a bit after last cue before completing
-            if elapsed > self._get_last_cue_time() + 5.0:
-                self.stop_preview()
+            self._execute_cue(cue_dict)
+            # Mark this cue as executed
+            self._executed_cues.add(i)
+            self.logger.debug(f"Executed cue {cue_dict.get('cue_id', 'unknown')} at {elapsed:.3f}s "
+                              f"(scheduled: {self._cue_times[position]:.3f}s)")
 
     def _execute_cue(self, cue: Dict[str, Any]):
         """
@@ -247,10 +256,14 @@ class VRPreviewController(QObject):
             # Stop timers
             self.countdown_timer.stop()
             self.execution_timer.stop()
+            self.scheduler.stop()
+            self.clock.stop()
 
             # Reset state
             self.is_previewing = False
             self.preview_cues = []
+            self._cue_order = []
+            self._cue_times = []
             self.music_file = None
             self.start_time = None
             self._executed_cues.clear()
@@ -270,6 +283,8 @@ class VRPreviewController(QObject):
 
         try:
             self.execution_timer.stop()
+            self.scheduler.stop()
+            self.clock.pause()
             self.logger.info("VR preview paused")
 
         except Exception as e:
@@ -281,7 +296,9 @@ class VRPreviewController(QObject):
             return
 
         try:
-            self.execution_timer.start(10)
+            self.clock.resume()
+            self.scheduler.start(self._cue_times, self.scheduler.next_index)
+            self.execution_timer.start(100)
             self.logger.info("VR preview resumed")
 
         except Exception as e:
@@ -301,54 +318,19 @@ class VRPreviewController(QObject):
         Returns:
             Time in seconds
         """
-        try:
-            parts = time_code.split(':')
-
-            if len(parts) == 2:
-                # Format: MM:SS.SSSS
-                minutes = int(parts[0])
-                seconds_parts = parts[1].split('.')
-                seconds = int(seconds_parts[0])
-                # Handle fractional seconds (could be .0000 or .000)
-                if len(seconds_parts) > 1:
-                    frac_str = seconds_parts[1]
-                    # Normalize to milliseconds (pad or truncate to 3 digits)
-                    if len(frac_str) > 3:
-                        milliseconds = int(frac_str[:3])
-                    else:
-                        milliseconds = int(frac_str.ljust(3, '0'))
-                else:
-                    milliseconds = 0
-
-                total_seconds = minutes * 60 + seconds + milliseconds / 1000.0
-                return total_seconds
-
-            elif len(parts) == 3:
-                # Format: HH:MM:SS.SSS
-                hours = int(parts[0])
-                minutes = int(parts[1])
-                seconds_parts = parts[2].split('.')
-                seconds = int(seconds_parts[0])
-                milliseconds = int(seconds_parts[1]) if len(seconds_parts) > 1 else 0
-
-                total_seconds = hours * 3600 + minutes * 60 + seconds + milliseconds / 1000.0
-                return total_seconds
-            else:
-                self.logger.warning(f"Invalid time code format '{time_code}' - expected MM:SS.SSSS or HH:MM:SS.SSS")
-                return 0.0
-        except Exception as e:
-            self.logger.error(f"Failed to parse time code '{time_code}': {e}")
-            return 0.0
+        return parse_execute_time_ms(time_code) / 1000.0
 
-    def _get_last_cue_time(self) -> float:
-        """Get the execution time of the last cue"""
-        if not self.preview_cues:
-            return 0.0
+    def set_media_player(self, player):
+        """Slave the show clock to a media player's position (None to run free)"""
+        self.clock.attach_player(player)
 
-        # Handle list format from table model
-        last_cue_row = self.preview_cues[-1]
-        if len(last_cue_row) < 5:
+    def get_trigger_lateness(self) -> Dict[str, float]:
+        """Lateness statistics of the cues executed so far (see CueScheduler.lateness_stats)"""
+        return self.scheduler.lateness_stats()
+
+    def _get_last_cue_time(self) -> float:
+        """Get the execution time of the last cue to execute"""
+        if not self._cue_times:
             return 0.0
 
-        execute_time = last_cue_row[4]  # execute_time is at index 4
-        return self._parse_time_code(execute_time)
\ No newline at end of file
+        return self._cue_times[-1]
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Cue Store
+=========
+
+Typed, columnar view of the cue table's rows, parsed once per edit.
+
+The cue table keeps every cue as a row list [cue #, type, outputs, delay,
+execute time, visual properties]. The store parses each row once into a
+CueRecord: output numbers as an array, execute time in integer milliseconds,
+and the derived "# OF OUTPUTS", duration and time display values. Records are
+cached by row identity and re-parsed only when a row or one of its fields is
+replaced. The store also keeps NumPy columns over all rows, a time order and
+a cue number index. Table painting, preview playback and the visualizers
+read these columns instead of re-parsing the strings on every use.
+
+Features:
+- One record per row with parsed outputs and execute time in milliseconds
+- Re-parsing limited to new or replaced rows on sync
+- NumPy columns for cue numbers, times, delays, output counts and durations
+- Cue number lookup and time-ordered range queries without list scans
+- Sequence interface over the raw rows for code that expects the row list
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def parse_outputs(outputs) -> List[int]:
+    """Output numbers of a cue's OUTPUTS string ("1,2,3" or the double run format "1,2;3,4")"""
+    output_list = []
+    if ";" in outputs:  # Handle double run format with semicolons
+        for pair in outputs.split(";"):
+            for value in pair.split(","):
+                if value.strip() and value.strip().isdigit():
+                    output_list.append(int(value.strip()))
+    else:  # Handle regular comma-separated format
+        output_list = [int(x.strip()) for x in outputs.split(',') if x.strip().isdigit()]
+    return output_list
+
+
+def parse_execute_time_ms(time_code) -> int:
+    """
+    Execute time in integer milliseconds
+
+    Supports "MM:SS.ss" (any number of decimals), "HH:MM:SS.sss" and plain
+    seconds; anything else is 0.
+    """
+    try:
+        if isinstance(time_code, (int, float)):
+            return int(round(time_code * 1000))
+        parts = time_code.strip().split(':')
+        seconds = float(parts[-1])
+        if len(parts) == 2:
+            seconds += int(parts[0]) * 60
+        elif len(parts) == 3:
+            seconds += int(parts[0]) * 3600 + int(parts[1]) * 60
+        elif len(parts) != 1:
+            return 0
+        return int(round(seconds * 1000))
+    except (ValueError, TypeError, AttributeError):
+        return 0
+
+
+@dataclass
+class CueRecord:
+    """One cue row parsed for display and playback"""
+    row: list
+    fields: tuple  # The row's raw values the record was parsed from
+    number: Optional[int]
+    cue_type: str
+    outputs: np.ndarray
+    output_count: int
+    delay: float
+    execute_ms: int
+    duration: Optional[float]
+    duration_display: str
+    execute_display: str
+
+    def matches(self, row) -> bool:
+        """Whether row is still the row (and values) this record was parsed from"""
+        return (row is self.row and min(len(row), 5) == len(self.fields)
+                and all(a is b for a, b in zip(self.fields, row)))
+
+
+def _display_time(value) -> str:
+    """EXECUTE TIME column text: "M:SS.ss" (".00" added when there are no decimals)"""
+    minutes, seconds = value.split(':')
+    if '.' in value:
+        return f"{minutes}:{seconds}"
+    return f"{minutes}:{seconds}.00"
+
+
+def parse_cue_row(row) -> CueRecord:
+    """Parse a cue table row [cue #, type, outputs, delay, execute time, ...]"""
+    fields = tuple(row[:5])
+    cue_type = str(row[1]) if len(row) > 1 else ""
+    outputs_text = row[2] if len(row) > 2 else ""
+
+    try:
+        number = int(row[0])
+    except (ValueError, TypeError, IndexError):
+        number = None
+
+    try:
+        outputs = np.array(parse_outputs(outputs_text), dtype=np.int64)
+    except (ValueError, AttributeError, TypeError) as e:
+        print(f"Error processing outputs: {e}")
+        outputs = np.zeros(0, dtype=np.int64)
+
+    # "# OF OUTPUTS" counts the comma-separated entries of the OUTPUTS text
+    try:
+        output_count = len(outputs_text.split(',')) if outputs_text else 0
+    except AttributeError:
+        output_count = 0
+
+    try:
+        delay = float(row[3])
+    except (ValueError, TypeError, IndexError):
+        delay = 0.0
+
+    # SHOT cues take no time; RUN cues fire one output per delay
+    if "SHOT" in cue_type:
+        duration = 0.0
+    else:
+        try:
+            duration = (output_count - 1) * float(row[3])
+        except (ValueError, TypeError, IndexError):
+            duration = None
+
+    execute_text = row[4] if len(row) > 4 else ""
+    try:
+        execute_display = _display_time(execute_text)
+    except (ValueError, TypeError, AttributeError):
+        execute_display = str(execute_text)
+
+    return CueRecord(row=row, fields=fields, number=number, cue_type=cue_type, outputs=outputs,
+                     output_count=output_count, delay=delay, execute_ms=parse_execute_time_ms(execute_text),
+                     duration=duration, duration_display=f"{duration or 0.0:.2f}s", execute_display=execute_display)
+
+
+class CueStore(Sequence):
+    """
+    Parsed records and columns of a list of cue rows
+
+    Args:
+        rows: Cue rows (the store keeps a reference; call sync after editing the list)
+    """
+
+    def __init__(self, rows: Optional[list] = None):
+        self.rows: list = []
+        self.records: List[CueRecord] = []
+        self._cache: Dict[int, CueRecord] = {}
+        self.sync(rows if rows is not None else [])
+
+    def sync(self, rows: list) -> int:
+        """
+        Bring the records and columns up to date with rows
+
+        Returns:
+            Number of rows that had to be parsed
+        """
+        parsed = 0
+        records = []
+        cache = {}
+        for row in rows:
+            record = self._cache.get(id(row))
+            if record is None or not record.matches(row):
+                record = parse_cue_row(row)
+                parsed += 1
+            cache[id(row)] = record
+            records.append(record)
+
+        self.rows = rows
+        self.records = records
+        self._cache = cache
+
+        self.numbers = np.array([-1 if r.number is None else r.number for r in records], dtype=np.int64)
+        self.execute_ms = np.array([r.execute_ms for r in records], dtype=np.int64)
+        self.delays = np.array([r.delay for r in records], dtype=np.float64)
+        self.output_counts = np.array([r.output_count for r in records], dtype=np.int64)
+        self.durations = np.array([np.nan if r.duration is None else r.duration for r in records], dtype=np.float64)
+
+        # Indexes: row positions in execute time order (ties in table order) and by cue number
+        self.time_order = np.argsort(self.execute_ms, kind='stable')
+        self._sorted_ms = self.execute_ms[self.time_order]
+        self._by_number: Dict[int, int] = {}
+        for position, record in enumerate(records):
+            if record.number is not None:
+                self._by_number.setdefault(record.number, position)
+        return parsed
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def record(self, row) -> CueRecord:
+        """Record of a row (parsed now if the row is new or was changed since the last sync)"""
+        record = self._cache.get(id(row))
+        if record is None or not record.matches(row):
+            record = self._cache[id(row)] = parse_cue_row(row)  # Kept for the next sync
+        return record
+
+    def record_at(self, position: int) -> CueRecord:
+        """
+        Record of the row at a table position
+
+        Called for every painted cell, so only the row object is checked: values
+        edited in place are picked up by the sync that follows every edit.
+        """
+        row = self.rows[position]
+        if position < len(self.records) and self.records[position].row is row:
+            return self.records[position]
+        return self.record(row)
+
+    def position_of(self, cue_number) -> Optional[int]:
+        """Table position of the first cue with this number (None if there is none)"""
+        try:
+            return self._by_number.get(int(cue_number))
+        except (ValueError, TypeError):
+            return None
+
+    def rows_by_time(self) -> list:
+        """Rows in execute time order (ties keep table order)"""
+        return [self.rows[i] for i in self.time_order.tolist()]
+
+    def time_span(self, start_ms: int, stop_ms: int) -> Tuple[int, int]:
+        """Positions [first, last) in time order of the cues with start_ms <= execute time <= stop_ms"""
+        return (int(np.searchsorted(self._sorted_ms, start_ms, side='left')),
+                int(np.searchsorted(self._sorted_ms, stop_ms, side='right')))
+
+    def last_execute_ms(self) -> int:
+        """Latest execute time (0 without cues)"""
+        return int(self._sorted_ms[-1]) if len(self._sorted_ms) else 0
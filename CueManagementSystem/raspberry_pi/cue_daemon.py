@@ -0,0 +1,354 @@
+"""
+Cue Daemon for Raspberry Pi
+===========================
+
+Long-running service that keeps GPIO initialized and executes framed commands from the desktop application.
+
+Replaces launching a fresh Python interpreter per button press (execute_cue.py,
+set_arm_state.py, toggle_outputs.py, emergency_stop.py, execute_show.py). The
+daemon listens on a loopback TCP port; the desktop reaches it through a
+direct-tcpip channel on its existing SSH transport, so no extra port is exposed
+on the network.
+
+Features:
+- Persistent GPIO setup (no per-command RPi.GPIO initialization)
+- Length-prefixed JSON command protocol (daemon_protocol.py)
+- Single cue execution, arm/disarm and output enable control
+- Background show execution with abort support
+- Optional real-time show mode with live lateness telemetry
+- Emergency stop that preempts running shows and cues
+- Loopback GPIO backend for benchmarking on a plain Linux box
+- Command-line interface
+
+Usage:
+    python3 cue_daemon.py [--host 127.0.0.1] [--port 8765] [--loopback]
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+
+import daemon_protocol
+import parallel_shifter
+import realtime_mode
+import show_format
+
+# PID file so the desktop can check whether the daemon is running
+PID_FILE = "/tmp/cue_daemon.pid"
+
+
+def load_gpio_backend(loopback=False):
+    """
+    Select the GPIO backend before any Pi script is imported
+
+    The Pi scripts do 'import RPi.GPIO as GPIO' at module level, so the
+    loopback backend registers itself under that name when requested.
+    """
+    if loopback:
+        import loopback_gpio
+        return loopback_gpio.install()
+
+    import RPi.GPIO as GPIO
+    return GPIO
+
+
+class _DaemonServer(socketserver.ThreadingTCPServer):
+    """Threaded TCP server that restarts cleanly on the same port"""
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class CueDaemon:
+    """
+    Command dispatcher that owns the GPIO state for the lifetime of the process
+
+    Commands are handled one at a time per connection. A GPIO lock serializes
+    hardware access across connections, except for emergency_stop which never
+    waits for the lock.
+    """
+
+    def __init__(self, host=daemon_protocol.DEFAULT_DAEMON_HOST,
+                 port=daemon_protocol.DEFAULT_DAEMON_PORT, loopback=False):
+        self.gpio = load_gpio_backend(loopback)
+        self.loopback = loopback
+
+        # Import the script modules only after the backend is in place
+        import execute_cue
+        import execute_show
+        import set_arm_state
+        import toggle_outputs
+        import emergency_stop
+        import get_gpio_status
+
+        self._execute_cue = execute_cue
+        self._execute_show = execute_show
+        self._set_arm_state = set_arm_state
+        self._toggle_outputs = toggle_outputs
+        self._emergency_stop = emergency_stop
+        self._get_gpio_status = get_gpio_status
+
+        # GPIO initialized once for the whole process
+        execute_show.setup_gpio()
+
+        # One shifter shared by every script so unchanged chains are skipped across commands
+        if loopback:
+            self.shifter = parallel_shifter.ParallelShifter(parallel_shifter.RPiGPIOBackend())
+        else:
+            self.shifter = parallel_shifter.ParallelShifter()
+        parallel_shifter.set_shifter(self.shifter)
+
+        self._gpio_lock = threading.Lock()
+        self._abort_event = threading.Event()
+        self._show_thread = None
+        self._last_show_result = None
+        self._show_number = 0
+        self.telemetry = realtime_mode.LatenessRecorder()
+        self._started_at = time.time()
+        self._commands_handled = 0
+
+        self._handlers = {
+            'ping': self._handle_ping,
+            'status': self._handle_status,
+            'set_outputs_enabled': self._handle_set_outputs_enabled,
+            'set_arm_state': self._handle_set_arm_state,
+            'execute_cue': self._handle_execute_cue,
+            'execute_show': self._handle_execute_show,
+            'abort_show': self._handle_abort_show,
+            'show_telemetry': self._handle_show_telemetry,
+            'emergency_stop': self._handle_emergency_stop,
+            'shutdown': self._handle_shutdown,
+        }
+
+        daemon = self
+
+        class _Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                daemon._serve_connection(self.request)
+
+        self.server = _DaemonServer((host, port), _Handler)
+
+    @property
+    def address(self):
+        """(host, port) the daemon is bound to"""
+        return self.server.server_address
+
+    def serve_forever(self):
+        """Serve commands until shutdown"""
+        self.server.serve_forever()
+
+    def shutdown(self):
+        """Stop serving and release the listening socket"""
+        self._abort_event.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _serve_connection(self, sock):
+        """Read frames from one client until it disconnects"""
+        while True:
+            try:
+                request = daemon_protocol.recv_frame(sock)
+            except (daemon_protocol.ProtocolError, OSError) as e:
+                print(f"[Daemon] Dropping connection: {e}", file=sys.stderr)
+                return
+
+            if request is None:
+                return
+
+            response = self.dispatch(request)
+            try:
+                daemon_protocol.send_frame(sock, response)
+            except OSError:
+                return
+
+    def dispatch(self, request):
+        """Execute one request dict and return the response dict"""
+        request_id = request.get('id')
+        command = request.get('command')
+        params = request.get('params') or {}
+
+        handler = self._handlers.get(command)
+        if handler is None:
+            response = {"status": "error", "message": f"Unknown command: {command}"}
+        else:
+            try:
+                response = handler(**params)
+            except Exception as e:
+                response = {"status": "error", "message": str(e)}
+
+        self._commands_handled += 1
+        response['id'] = request_id
+        return response
+
+    def _show_running(self):
+        return self._show_thread is not None and self._show_thread.is_alive()
+
+    # Command handlers
+
+    def _handle_ping(self):
+        return {
+            "status": "success",
+            "time": time.time(),
+            "uptime": time.time() - self._started_at,
+            "protocol_version": daemon_protocol.PROTOCOL_VERSION
+        }
+
+    def _handle_status(self):
+        result = self._get_gpio_status.get_all_states()
+        result["daemon"] = {
+            "pid": os.getpid(),
+            "uptime": time.time() - self._started_at,
+            "commands_handled": self._commands_handled,
+            "backend": "loopback" if self.loopback else "RPi.GPIO",
+            "shift_backend": self.shifter.backend.name,
+            "frames_shifted": self.shifter.frames_shifted,
+            "chains_skipped": self.shifter.chains_skipped,
+            "show_running": self._show_running(),
+            "last_show_result": self._last_show_result
+        }
+        return result
+
+    def _handle_set_outputs_enabled(self, enabled):
+        with self._gpio_lock:
+            # SRCLR toggles clear the shift registers behind the shifter's back
+            self.shifter.invalidate()
+            if enabled:
+                return self._toggle_outputs.enable_outputs()
+            return self._toggle_outputs.disable_outputs()
+
+    def _handle_set_arm_state(self, armed):
+        with self._gpio_lock:
+            if armed:
+                return self._set_arm_state.arm()
+            return self._set_arm_state.disarm()
+
+    def _handle_execute_cue(self, cue):
+        if self._show_running():
+            return {"status": "error", "message": "Show in progress - cue rejected"}
+        # A new cue is not affected by an earlier stop; a stop during this cue ends it
+        self._abort_event.clear()
+        with self._gpio_lock:
+            return self._execute_cue.execute_cue(cue, abort_event=self._abort_event)
+
+    def _handle_execute_show(self, show=None, show_file=None, start_timestamp=None, wait=False,
+                             realtime=False):
+        if self._show_running():
+            return {"status": "error", "message": "Show already running"}
+
+        if show is None:
+            if not show_file:
+                return {"status": "error", "message": "execute_show requires 'show' or 'show_file'"}
+            show = self._execute_show.load_show_file(show_file)
+
+        cue_count = show.cue_count if isinstance(show, show_format.PackedShow) else len(show.get('cues', []))
+        if not cue_count:
+            return {"status": "error", "message": "No cues in show"}
+
+        self._abort_event.clear()
+        self._last_show_result = None
+        self._show_number += 1
+        self.telemetry.reset()
+
+        def run_show():
+            sync_error = None
+            if start_timestamp:
+                sync_error = self._execute_show.wait_until_timestamp(start_timestamp)
+            with self._gpio_lock:
+                result = self._execute_show.execute_show(show, abort_event=self._abort_event,
+                                                         realtime=realtime, telemetry=self.telemetry)
+            if sync_error is not None:
+                result["sync_error_ms"] = round(sync_error, 4)
+            self._last_show_result = result
+
+        self._show_thread = threading.Thread(target=run_show, name="cue-daemon-show", daemon=True)
+        self._show_thread.start()
+
+        if wait:
+            self._show_thread.join()
+            return dict(self._last_show_result or {"status": "error", "message": "Show produced no result"})
+
+        return {"status": "success", "message": f"Show started: {cue_count} cues"}
+
+    def _handle_abort_show(self):
+        was_running = self._show_running()
+        self._abort_event.set()
+        if self._show_thread is not None:
+            self._show_thread.join(timeout=2.0)
+        return {"status": "success", "show_was_running": was_running}
+
+    def _handle_show_telemetry(self, since=0, samples=True):
+        """
+        Lateness of the current (or last) show
+
+        Poll with 'since' set to the previous response's 'sequence' to
+        stream only new per-frame samples (microseconds).
+        """
+        result = {
+            "status": "success",
+            "show_number": self._show_number,
+            "show_running": self._show_running(),
+            "summary": self.telemetry.summary()
+        }
+        if samples:
+            result["sequence"], result["lateness_us"] = self.telemetry.read_since(since)
+        else:
+            result["sequence"] = self.telemetry.count
+        return result
+
+    def _handle_emergency_stop(self):
+        # Never wait for the GPIO lock - safe pin states win over any running cue
+        self._abort_event.set()
+        self.shifter.invalidate()
+        return self._emergency_stop.emergency_stop()
+
+    def _handle_shutdown(self):
+        threading.Thread(target=self.shutdown, daemon=True).start()
+        return {"status": "success", "message": "Daemon shutting down"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CuePi GPIO command daemon')
+    parser.add_argument('--host', default=daemon_protocol.DEFAULT_DAEMON_HOST,
+                        help='Address to bind (loopback only by default)')
+    parser.add_argument('--port', type=int, default=daemon_protocol.DEFAULT_DAEMON_PORT,
+                        help='TCP port to listen on')
+    parser.add_argument('--loopback', action='store_true',
+                        help='Use the in-memory loopback GPIO backend (no hardware)')
+    args = parser.parse_args()
+
+    try:
+        daemon = CueDaemon(host=args.host, port=args.port, loopback=args.loopback)
+    except Exception as e:
+        print(json.dumps({"status": "error", "message": str(e)}))
+        sys.exit(1)
+
+    try:
+        with open(PID_FILE, 'w') as f:
+            f.write(str(os.getpid()))
+    except OSError:
+        pass  # Don't fail if we can't write the PID file
+
+    host, port = daemon.address
+    print(json.dumps({"status": "ready", "host": host, "port": port, "pid": os.getpid()}), flush=True)
+
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.server.server_close()
+        try:
+            os.remove(PID_FILE)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
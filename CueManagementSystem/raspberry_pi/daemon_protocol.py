@@ -0,0 +1,86 @@
+"""
+Cue Daemon Wire Protocol
+========================
+
+Length-prefixed JSON framing shared by the Raspberry Pi cue daemon and the desktop client.
+
+Features:
+- 4-byte big-endian length prefix per frame
+- UTF-8 JSON payloads
+- Frame size limit to reject corrupted streams
+- Works with sockets and paramiko channels alike
+- No dependencies outside the standard library
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+import json
+import struct
+
+# Daemon listens on loopback only; the desktop reaches it through the SSH transport
+DEFAULT_DAEMON_HOST = "127.0.0.1"
+DEFAULT_DAEMON_PORT = 8765
+
+PROTOCOL_VERSION = 1
+HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 16 * 1024 * 1024  # 16 MB, large enough for an inline show
+
+
+class ProtocolError(Exception):
+    """Raised when the stream does not contain a valid frame"""
+    pass
+
+
+def encode_frame(message):
+    """Encode a message dict into a length-prefixed frame"""
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame too large: {len(payload)} bytes")
+    return HEADER.pack(len(payload)) + payload
+
+
+def _recv_exact(stream, size):
+    """Read exactly size bytes from a socket-like object, None on clean EOF"""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.recv(remaining)
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ProtocolError("Connection closed mid-frame")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_frame(stream, message):
+    """Send one message over a socket-like object"""
+    stream.sendall(encode_frame(message))
+
+
+def recv_frame(stream):
+    """
+    Receive one message from a socket-like object
+
+    Returns:
+        dict, or None if the peer closed the connection between frames
+    """
+    header = _recv_exact(stream, HEADER.size)
+    if header is None:
+        return None
+
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame too large: {length} bytes")
+
+    payload = _recv_exact(stream, length) if length else b''
+    if payload is None:
+        raise ProtocolError("Connection closed mid-frame")
+
+    try:
+        return json.loads(payload.decode('utf-8'))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ProtocolError(f"Invalid frame payload: {e}")
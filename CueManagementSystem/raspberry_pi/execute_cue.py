@@ -24,6 +24,8 @@ import sys
 import json
 import time
 
+import parallel_shifter
+
 # GPIO Pin Definitions (BCM numbering)
 OUTPUT_ENABLE_PINS = [2, 3, 4, 5, 6]
 SERIAL_CLEAR_PINS = [13, 16, 19, 20, 26]
@@ -56,25 +58,40 @@ def get_bit_position_in_chain(output_num):
 def shift_out_data(chain, data_bits):
     """
     Shift out 200 bits of data to a specific chain
-    Optimized for speed - GPIO operations provide sufficient delay
+    Delegates to the parallel shifter (skipped if the chain is unchanged)
     """
-    data_pin = DATA_PINS[chain]
-    clock_pin = SCLK_PINS[chain]
-    latch_pin = RCLK_PINS[chain]
-    
-    # Shift out data (MSB first)
-    # No sleep needed - GPIO operations are slow enough for 74HC595
-    for bit in reversed(data_bits):
-        GPIO.output(data_pin, bit)
-        GPIO.output(clock_pin, GPIO.HIGH)
-        GPIO.output(clock_pin, GPIO.LOW)
-    
-    # Latch the data
-    GPIO.output(latch_pin, GPIO.HIGH)
-    GPIO.output(latch_pin, GPIO.LOW)
+    parallel_shifter.get_shifter().shift_chain(chain, data_bits)
 
-def fire_output(output_num, duration_ms):
-    """Fire a single output for specified duration"""
+def shift_out_chains(chain_bits):
+    """
+    Shift out several chains together (dict chain -> 200 bits)
+    All changed chains share one clock edge per bit and one latch
+    """
+    parallel_shifter.get_shifter().shift_chains(chain_bits)
+
+def wait_or_abort(seconds, abort_event=None):
+    """
+    Sleep between cue steps, waking early on abort
+
+    Returns:
+        bool: True if the cue was aborted (before or during the wait)
+    """
+    if abort_event is None:
+        time.sleep(seconds)
+        return False
+    return abort_event.wait(seconds)
+
+def is_aborted(abort_event):
+    """Check the abort event before shifting the next step"""
+    return abort_event is not None and abort_event.is_set()
+
+def fire_output(output_num, duration_ms, abort_event=None):
+    """
+    Fire a single output for specified duration
+
+    Returns:
+        bool: True if aborted during the pulse (the output is left to the emergency stop)
+    """
     chain = get_chain_for_output(output_num)
     bit_pos = get_bit_position_in_chain(output_num)
     
@@ -86,20 +103,33 @@ def fire_output(output_num, duration_ms):
     shift_out_data(chain, data_bits)
     
     # Wait for duration
-    time.sleep(duration_ms / 1000.0)
+    if wait_or_abort(duration_ms / 1000.0, abort_event):
+        return True
     
     # Clear the output
     data_bits[bit_pos] = 0
     shift_out_data(chain, data_bits)
+    return False
+
+def execute_cue(cue_data, abort_event=None):
+    """
+    Execute a cue based on its type
 
-def execute_cue(cue_data):
-    """Execute a cue based on its type"""
+    Args:
+        cue_data: Cue dict in Pi format
+        abort_event: threading.Event checked before every step (cue daemon);
+                     once set, nothing more is shifted out
+    """
     cue_type = cue_data.get('type')
+    aborted = {"status": "aborted", "message": f"Cue aborted: {cue_type}"}
+    if is_aborted(abort_event):
+        return aborted
     
     if cue_type == 'SINGLE SHOT':
         output = cue_data.get('output')
         duration = cue_data.get('duration', 1000)  # Changed to 1 second default
-        fire_output(output, duration)
+        if fire_output(output, duration, abort_event):
+            return aborted
         
     elif cue_type == 'DOUBLE SHOT':
         output1 = cue_data.get('output1')
@@ -118,7 +148,8 @@ def execute_cue(cue_data):
             data_bits[bit_pos1] = 1
             data_bits[bit_pos2] = 1
             shift_out_data(chain1, data_bits)
-            time.sleep(duration / 1000.0)
+            if wait_or_abort(duration / 1000.0, abort_event):
+                return aborted
             data_bits[bit_pos1] = 0
             data_bits[bit_pos2] = 0
             shift_out_data(chain1, data_bits)
@@ -129,14 +160,13 @@ def execute_cue(cue_data):
             data_bits2 = [0] * OUTPUTS_PER_CHAIN
             data_bits2[bit_pos2] = 1
             
-            shift_out_data(chain1, data_bits1)
-            shift_out_data(chain2, data_bits2)
-            time.sleep(duration / 1000.0)
+            shift_out_chains({chain1: data_bits1, chain2: data_bits2})
+            if wait_or_abort(duration / 1000.0, abort_event):
+                return aborted
             
             data_bits1[bit_pos1] = 0
             data_bits2[bit_pos2] = 0
-            shift_out_data(chain1, data_bits1)
-            shift_out_data(chain2, data_bits2)
+            shift_out_chains({chain1: data_bits1, chain2: data_bits2})
     
     elif cue_type == 'SINGLE RUN':
         start_output = cue_data.get('start_output')
@@ -149,15 +179,19 @@ def execute_cue(cue_data):
         
         # Turn on outputs sequentially, keeping previous ones on
         for output in range(start_output, end_output + 1):
+            if is_aborted(abort_event):
+                return aborted
             bit_pos = get_bit_position_in_chain(output)
             data_bits[bit_pos] = 1
             shift_out_data(chain, data_bits)
             
             if output < end_output:
-                time.sleep(delay / 1000.0)
+                if wait_or_abort(delay / 1000.0, abort_event):
+                    return aborted
         
         # Hold all outputs on for 1 second
-        time.sleep(1.0)
+        if wait_or_abort(1.0, abort_event):
+            return aborted
         
         # Turn off all outputs in the run
         for output in range(start_output, end_output + 1):
@@ -184,6 +218,8 @@ def execute_cue(cue_data):
         num_pairs = max(end_output1 - start_output1 + 1, end_output2 - start_output2 + 1)
         
         for i in range(num_pairs):
+            if is_aborted(abort_event):
+                return aborted
             output1 = start_output1 + i if start_output1 + i <= end_output1 else None
             output2 = start_output2 + i if start_output2 + i <= end_output2 else None
             
@@ -201,15 +237,16 @@ def execute_cue(cue_data):
                 combined_bits = [data_bits1[j] | data_bits2[j] for j in range(OUTPUTS_PER_CHAIN)]
                 shift_out_data(chain1, combined_bits)
             else:
-                # Different chains
-                shift_out_data(chain1, data_bits1)
-                shift_out_data(chain2, data_bits2)
+                # Different chains - shift both in one parallel pass
+                shift_out_chains({chain1: data_bits1, chain2: data_bits2})
             
             if i < num_pairs - 1:
-                time.sleep(delay / 1000.0)
+                if wait_or_abort(delay / 1000.0, abort_event):
+                    return aborted
         
         # Hold all outputs on for 1 second
-        time.sleep(1.0)
+        if wait_or_abort(1.0, abort_event):
+            return aborted
         
         # Turn off all outputs in both runs
         for i in range(num_pairs):
@@ -229,8 +266,7 @@ def execute_cue(cue_data):
             combined_bits = [data_bits1[j] | data_bits2[j] for j in range(OUTPUTS_PER_CHAIN)]
             shift_out_data(chain1, combined_bits)
         else:
-            shift_out_data(chain1, data_bits1)
-            shift_out_data(chain2, data_bits2)
+            shift_out_chains({chain1: data_bits1, chain2: data_bits2})
     
     return {"status": "success", "message": f"Cue executed: {cue_type}"}
 
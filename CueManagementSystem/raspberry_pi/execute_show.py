@@ -10,6 +10,10 @@ Features:
 - Single shot support
 - Double shot support
 - Run sequence support
+- Precompiled frame timeline (show_compiler.py, cached by show hash)
+- Packed binary show files from the desktop (show_format.py)
+- Optional real-time mode (SCHED_FIFO, CPU pinning, mlockall, no GC)
+- Per-frame lateness telemetry (p50/p99/p999)
 - GPIO pin control
 - 74HC595 shift register integration
 - Command-line interface
@@ -23,6 +27,11 @@ import RPi.GPIO as GPIO
 import sys
 import json
 import time
+
+import parallel_shifter
+import realtime_mode
+import show_compiler
+import show_format
 from datetime import datetime
 
 # GPIO Pin Definitions (BCM numbering)
@@ -57,22 +66,16 @@ def get_bit_position_in_chain(output_num):
 def shift_out_data(chain, data_bits):
     """
     Shift out 200 bits of data to a specific chain
-    Optimized for speed - GPIO operations provide sufficient delay
+    Delegates to the parallel shifter (skipped if the chain is unchanged)
     """
-    data_pin = DATA_PINS[chain]
-    clock_pin = SCLK_PINS[chain]
-    latch_pin = RCLK_PINS[chain]
-    
-    # Shift out data (MSB first)
-    # No sleep needed - GPIO operations are slow enough for 74HC595
-    for bit in reversed(data_bits):
-        GPIO.output(data_pin, bit)
-        GPIO.output(clock_pin, GPIO.HIGH)
-        GPIO.output(clock_pin, GPIO.LOW)
-    
-    # Latch the data
-    GPIO.output(latch_pin, GPIO.HIGH)
-    GPIO.output(latch_pin, GPIO.LOW)
+    parallel_shifter.get_shifter().shift_chain(chain, data_bits)
+
+def shift_out_chains(chain_bits):
+    """
+    Shift out several chains together (dict chain -> 200 bits)
+    All changed chains share one clock edge per bit and one latch
+    """
+    parallel_shifter.get_shifter().shift_chains(chain_bits)
 
 def fire_output(output_num, duration_ms):
     """Fire a single output for specified duration"""
@@ -122,14 +125,12 @@ def execute_cue(cue_data):
             data_bits2 = [0] * OUTPUTS_PER_CHAIN
             data_bits2[bit_pos2] = 1
             
-            shift_out_data(chain1, data_bits1)
-            shift_out_data(chain2, data_bits2)
+            shift_out_chains({chain1: data_bits1, chain2: data_bits2})
             time.sleep(duration / 1000.0)
             
             data_bits1[bit_pos1] = 0
             data_bits2[bit_pos2] = 0
-            shift_out_data(chain1, data_bits1)
-            shift_out_data(chain2, data_bits2)
+            shift_out_chains({chain1: data_bits1, chain2: data_bits2})
     
     elif cue_type == 'SINGLE RUN':
         start_output = cue_data.get('start_output')
@@ -175,14 +176,12 @@ def execute_cue(cue_data):
                     data_bits2 = [0] * OUTPUTS_PER_CHAIN
                     data_bits2[bit_pos2] = 1
                     
-                    shift_out_data(chain1, data_bits1)
-                    shift_out_data(chain2, data_bits2)
+                    shift_out_chains({chain1: data_bits1, chain2: data_bits2})
                     time.sleep(duration / 1000.0)
                     
                     data_bits1[bit_pos1] = 0
                     data_bits2[bit_pos2] = 0
-                    shift_out_data(chain1, data_bits1)
-                    shift_out_data(chain2, data_bits2)
+                    shift_out_chains({chain1: data_bits1, chain2: data_bits2})
             elif output1:
                 fire_output(output1, duration)
             elif output2:
@@ -190,182 +189,184 @@ def execute_cue(cue_data):
             
             time.sleep(delay / 1000.0)
 
-def execute_cue_for_show(cue_data, active_outputs):
-    """
-    Execute a cue during show mode - turns outputs ON but never turns them OFF
-    active_outputs is a dict mapping chain_index -> list of 200 bits representing current state
-    """
-    cue_type = cue_data.get('type')
-    
-    if cue_type == 'SINGLE SHOT':
-        output = cue_data.get('output')
-        chain = get_chain_for_output(output)
-        bit_pos = get_bit_position_in_chain(output)
-        
-        # Turn on this output (keep all others in their current state)
-        active_outputs[chain][bit_pos] = 1
-        shift_out_data(chain, active_outputs[chain])
-        
-    elif cue_type == 'DOUBLE SHOT':
-        output1 = cue_data.get('output1')
-        output2 = cue_data.get('output2')
-        
-        chain1 = get_chain_for_output(output1)
-        chain2 = get_chain_for_output(output2)
-        bit_pos1 = get_bit_position_in_chain(output1)
-        bit_pos2 = get_bit_position_in_chain(output2)
-        
-        # Turn on both outputs
-        active_outputs[chain1][bit_pos1] = 1
-        active_outputs[chain2][bit_pos2] = 1
-        
-        # Shift out data (handle same chain or different chains)
-        shift_out_data(chain1, active_outputs[chain1])
-        if chain1 != chain2:
-            shift_out_data(chain2, active_outputs[chain2])
-        
-    elif cue_type == 'SINGLE RUN':
-        start_output = cue_data.get('start_output')
-        end_output = cue_data.get('end_output')
-        delay = cue_data.get('delay', 100)
-        
-        chain = get_chain_for_output(start_output)
-        
-        # Turn on outputs sequentially with delay
-        for output in range(start_output, end_output + 1):
-            bit_pos = get_bit_position_in_chain(output)
-            active_outputs[chain][bit_pos] = 1
-            shift_out_data(chain, active_outputs[chain])
-            
-            if output < end_output:
-                time.sleep(delay / 1000.0)
-        
-    elif cue_type == 'DOUBLE RUN':
-        start_output1 = cue_data.get('start_output1')
-        end_output1 = cue_data.get('end_output1')
-        start_output2 = cue_data.get('start_output2')
-        end_output2 = cue_data.get('end_output2')
-        delay = cue_data.get('delay', 100)
-        
-        chain1 = get_chain_for_output(start_output1)
-        chain2 = get_chain_for_output(start_output2)
-        
-        num_pairs = max(end_output1 - start_output1 + 1, end_output2 - start_output2 + 1)
-        
-        # Turn on output pairs sequentially with delay
-        for i in range(num_pairs):
-            output1 = start_output1 + i if start_output1 + i <= end_output1 else None
-            output2 = start_output2 + i if start_output2 + i <= end_output2 else None
-            
-            if output1:
-                bit_pos1 = get_bit_position_in_chain(output1)
-                active_outputs[chain1][bit_pos1] = 1
-            
-            if output2:
-                bit_pos2 = get_bit_position_in_chain(output2)
-                active_outputs[chain2][bit_pos2] = 1
-            
-            # Shift out data
-            shift_out_data(chain1, active_outputs[chain1])
-            if chain1 != chain2:
-                shift_out_data(chain2, active_outputs[chain2])
-            
-            if i < num_pairs - 1:
-                time.sleep(delay / 1000.0)
-
-def execute_show(show_data):
+def execute_show(show_data, abort_event=None, realtime=False, telemetry=None):
     """
     Execute a complete show with high-precision timing
     Uses perf_counter for nanosecond precision and hybrid sleep/spin-wait
     Outputs stay ON throughout the show (never turn off)
+
+    The show is compiled (or loaded from the cache) into precomputed frames
+    before the clock starts, so the loop below only waits and shifts.
+    show_data may also be a show_format.PackedShow, which already carries
+    the frames and is played as-is.
+
+    abort_event is an optional threading.Event; when set the show stops
+    before the next frame (used by the cue daemon for emergency stop)
+
+    realtime=True runs the loop under realtime_mode.RealtimeMode (SCHED_FIFO,
+    pinned core, locked memory, GC off). telemetry is an optional
+    realtime_mode.LatenessRecorder that receives every frame's lateness so
+    another thread can stream it while the show runs.
     """
-    cues = show_data.get('cues', [])
+    packed = isinstance(show_data, show_format.PackedShow)
+    cue_count = show_data.cue_count if packed else len(show_data.get('cues', []))
     
-    if not cues:
+    if not cue_count:
         return {"status": "error", "message": "No cues in show"}
     
-    # Sort cues by execution time to ensure proper order
-    sorted_cues = sorted(cues, key=lambda c: c.get('time', 0))
+    if packed:
+        # Frames were packed on the desktop - nothing to compile
+        compiled, cache_hit, compile_ms = show_data, False, 0.0
+    else:
+        # Compile to time-sorted frames (RUN delays expanded, same-time cues merged)
+        compile_start = time.perf_counter()
+        compiled, cache_hit = show_compiler.load_or_compile(show_data)
+        compile_ms = (time.perf_counter() - compile_start) * 1000
     
-    # Initialize active outputs state for all 5 chains
-    # This tracks which outputs are currently on
-    active_outputs = {
-        0: [0] * OUTPUTS_PER_CHAIN,
-        1: [0] * OUTPUTS_PER_CHAIN,
-        2: [0] * OUTPUTS_PER_CHAIN,
-        3: [0] * OUTPUTS_PER_CHAIN,
-        4: [0] * OUTPUTS_PER_CHAIN
-    }
+    if telemetry is None:
+        telemetry = realtime_mode.LatenessRecorder(capacity=max(1, compiled.frame_count))
+    telemetry.reset()
+    
+    if realtime:
+        with realtime_mode.RealtimeMode() as rt:
+            result = _run_frames(compiled, abort_event, telemetry)
+        result["timing_stats"]["realtime"] = rt.applied
+    else:
+        result = _run_frames(compiled, abort_event, telemetry)
     
-    # Use perf_counter for high-precision timing (nanosecond resolution)
-    start_time = time.perf_counter()
+    result["timing_stats"].update({
+        "total_cues": cue_count,
+        "packed_show": packed,
+        "compile_ms": round(compile_ms, 3),
+        "compile_cache_hit": cache_hit,
+        "lateness": telemetry.summary()
+    })
+    return result
+
+def _run_frames(compiled, abort_event, telemetry):
+    """The timed frame loop (kept free of allocation-heavy work)"""
+    times_ns = compiled.times_ns
+    frame_count = compiled.frame_count
+    shifter = parallel_shifter.get_shifter()
+    record_lateness = telemetry.record
     
     # Track timing statistics
-    timing_errors = []
+    frames_fired = 0
+    total_late_ns = 0
+    max_late_ns = 0
+    aborted = False
     
-    for cue in sorted_cues:
-        # Target time in seconds
-        target_time = cue.get('time', 0) / 1000.0
+    # Use perf_counter_ns for high-precision timing (nanosecond resolution)
+    start_ns = time.perf_counter_ns()
+    
+    for frame_index in range(frame_count):
+        if abort_event is not None and abort_event.is_set():
+            aborted = True
+            break
+        
+        # Unpack the frame before waiting so fire time only pays for the shift
+        frame_bits = compiled.frame_bits(frame_index)
+        target_ns = start_ns + times_ns[frame_index]
         
         # Wait with high precision
-        current_time = time.perf_counter() - start_time
-        wait_time = target_time - current_time
+        wait_ns = target_ns - time.perf_counter_ns()
         
-        if wait_time > 0:
+        if wait_ns > 0:
             # Hybrid sleep/spin-wait for precision
-            if wait_time > 0.001:  # If more than 1ms to wait
+            if wait_ns > 1_000_000:  # If more than 1ms to wait
                 # Sleep for most of the time (minus 500μs buffer)
-                sleep_time = wait_time - 0.0005
-                if sleep_time > 0:
+                sleep_time = (wait_ns - 500_000) / 1e9
+                if abort_event is not None:
+                    # Wake up immediately if an abort arrives mid-wait
+                    if abort_event.wait(sleep_time):
+                        aborted = True
+                        break
+                else:
                     time.sleep(sleep_time)
             
             # Spin-wait for final microseconds (high precision)
-            while (time.perf_counter() - start_time) < target_time:
+            while time.perf_counter_ns() < target_ns:
                 pass  # Busy-wait for precise timing
         
         # Record actual execution time
-        actual_time = time.perf_counter() - start_time
-        timing_error = (actual_time - target_time) * 1000  # Error in milliseconds
-        timing_errors.append(timing_error)
+        late_ns = time.perf_counter_ns() - target_ns
+        record_lateness(late_ns)
+        total_late_ns += late_ns
+        if late_ns > max_late_ns:
+            max_late_ns = late_ns
+        frames_fired += 1
         
-        # Execute the cue for show (outputs stay on)
-        execute_cue_for_show(cue, active_outputs)
+        # Emit the precomputed frame (outputs stay on)
+        shifter.shift_chains(frame_bits)
     
     # Calculate timing statistics
-    total_duration = time.perf_counter() - start_time
-    avg_error = sum(timing_errors) / len(timing_errors) if timing_errors else 0
-    max_error = max(timing_errors) if timing_errors else 0
+    total_duration = (time.perf_counter_ns() - start_ns) / 1e9
+    avg_error = total_late_ns / frames_fired / 1e6 if frames_fired else 0
     
     return {
-        "status": "success",
-        "message": f"Show executed: {len(cues)} cues",
+        "status": "aborted" if aborted else "success",
+        "message": f"Show aborted after {frames_fired} of {frame_count} frames" if aborted
+                   else f"Show executed: {compiled.cue_count} cues",
         "duration": total_duration,
         "timing_stats": {
             "average_error_ms": round(avg_error, 4),
-            "max_error_ms": round(max_error, 4),
-            "total_cues": len(cues)
+            "max_error_ms": round(max_late_ns / 1e6, 4),
+            "total_frames": frame_count
         }
     }
 
+def wait_until_timestamp(start_timestamp):
+    """
+    Block until the given wall-clock timestamp (seconds since epoch)
+    Sleeps in 1ms steps, then spin-waits for the final millisecond
+
+    Returns:
+        Sync error in milliseconds
+    """
+    # Sleep until close to start time (leave 1ms buffer)
+    while time.time() < start_timestamp - 0.001:
+        time.sleep(0.001)  # Sleep 1ms at a time
+    
+    # Spin-wait for final precision
+    while time.time() < start_timestamp:
+        pass  # Busy-wait for exact moment
+    
+    return (time.time() - start_timestamp) * 1000
+
+def load_show_file(path):
+    """
+    Load a show file uploaded by the desktop
+
+    Returns:
+        show_format.PackedShow for packed binary files, otherwise the JSON show dict
+    """
+    import os
+    file_path = os.path.expanduser(path)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    
+    if show_format.is_packed_show(data):
+        return show_format.PackedShow(data)
+    return json.loads(data.decode('utf-8'))
+
 def main():
     if len(sys.argv) < 2:
-        print(json.dumps({"status": "error", "message": "Usage: execute_show.py '<show_file_path>' [start_timestamp]"}))
+        print(json.dumps({"status": "error", "message": "Usage: execute_show.py '<show_file_path>' [start_timestamp] [--realtime]"}))
         sys.exit(1)
     
     try:
-        arg = sys.argv[1]
-        start_timestamp = float(sys.argv[2]) if len(sys.argv) > 2 else None
+        realtime = '--realtime' in sys.argv
+        args = [a for a in sys.argv[1:] if a != '--realtime']
+        arg = args[0]
+        start_timestamp = float(args[1]) if len(args) > 1 else None
         
         # Check if argument is a file path or JSON string
         if arg.startswith('{'):
             # Direct JSON string
             show_data = json.loads(arg)
         else:
-            # File path - read JSON from file
-            import os
-            file_path = os.path.expanduser(arg)
-            with open(file_path, 'r') as f:
-                show_data = json.load(f)
+            # File path - packed binary show or JSON
+            show_data = load_show_file(arg)
         
         # If start timestamp provided, wait until that exact time
         if start_timestamp:
@@ -373,21 +374,13 @@ def main():
             print(f"[Sync] Current time: {time.time()}", file=sys.stderr)
             print(f"[Sync] Wait duration: {(start_timestamp - time.time()) * 1000:.1f}ms", file=sys.stderr)
             
-            # Sleep until close to start time (leave 1ms buffer)
-            while time.time() < start_timestamp - 0.001:
-                time.sleep(0.001)  # Sleep 1ms at a time
-            
-            # Spin-wait for final precision
-            while time.time() < start_timestamp:
-                pass  # Busy-wait for exact moment
-            
+            sync_error = wait_until_timestamp(start_timestamp)  # Error in milliseconds
             actual_start = time.time()
-            sync_error = (actual_start - start_timestamp) * 1000  # Error in milliseconds
             print(f"[Sync] Show started at: {actual_start}", file=sys.stderr)
             print(f"[Sync] Sync error: {sync_error:.3f}ms", file=sys.stderr)
         
         setup_gpio()
-        result = execute_show(show_data)
+        result = execute_show(show_data, realtime=realtime)
         print(json.dumps(result))
         sys.exit(0)
         
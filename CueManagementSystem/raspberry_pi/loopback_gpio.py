@@ -0,0 +1,150 @@
+"""
+Loopback GPIO Backend
+=====================
+
+Stand-in for the RPi.GPIO module so the Pi scripts and the cue daemon can run on a plain Linux box.
+
+Features:
+- RPi.GPIO compatible API (setmode, setup, output, input, cleanup)
+- In-memory pin levels instead of hardware access
+- Per-pin write counters for benchmarking
+- Optional registration as RPi.GPIO in sys.modules
+- Thread-safe pin bookkeeping
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+import sys
+import threading
+
+# RPi.GPIO compatible constants
+BCM = 11
+BOARD = 10
+OUT = 0
+IN = 1
+HIGH = 1
+LOW = 0
+PUD_OFF = 20
+PUD_DOWN = 21
+PUD_UP = 22
+
+# Backend identification (RPi.GPIO exposes RPI_INFO, we expose our own marker)
+IS_LOOPBACK = True
+
+_lock = threading.Lock()
+_mode = None
+_pin_modes = {}
+_pin_levels = {}
+_write_counts = {}
+_output_calls = 0
+
+
+def setmode(mode):
+    """Set the pin numbering mode"""
+    global _mode
+    _mode = mode
+
+
+def getmode():
+    """Get the pin numbering mode"""
+    return _mode
+
+
+def setwarnings(flag):
+    """Accepted for API compatibility, loopback never warns"""
+    pass
+
+
+def setup(channel, direction, pull_up_down=PUD_OFF, initial=None):
+    """Configure one pin or a list of pins"""
+    channels = channel if isinstance(channel, (list, tuple)) else [channel]
+    with _lock:
+        for pin in channels:
+            _pin_modes[pin] = direction
+            if initial is not None:
+                _pin_levels[pin] = 1 if initial else 0
+            else:
+                _pin_levels.setdefault(pin, 0)
+
+
+def output(channel, value):
+    """Drive one pin or a list of pins"""
+    global _output_calls
+    channels = channel if isinstance(channel, (list, tuple)) else [channel]
+    values = value if isinstance(value, (list, tuple)) else [value] * len(channels)
+    with _lock:
+        _output_calls += 1
+        for pin, level in zip(channels, values):
+            _pin_levels[pin] = 1 if level else 0
+            _write_counts[pin] = _write_counts.get(pin, 0) + 1
+
+
+def input(channel):
+    """Read back the last level written to a pin"""
+    with _lock:
+        return _pin_levels.get(channel, 0)
+
+
+def cleanup(channel=None):
+    """Forget pin configuration (all pins or the given ones)"""
+    with _lock:
+        if channel is None:
+            _pin_modes.clear()
+            _pin_levels.clear()
+        else:
+            channels = channel if isinstance(channel, (list, tuple)) else [channel]
+            for pin in channels:
+                _pin_modes.pop(pin, None)
+                _pin_levels.pop(pin, None)
+
+
+def get_pin_levels():
+    """Snapshot of current pin levels (pin -> 0/1)"""
+    with _lock:
+        return dict(_pin_levels)
+
+
+def get_write_counts():
+    """Snapshot of GPIO.output() calls per pin"""
+    with _lock:
+        return dict(_write_counts)
+
+
+def get_total_writes():
+    """Total number of pin writes since the last reset"""
+    with _lock:
+        return sum(_write_counts.values())
+
+
+def get_output_calls():
+    """Number of GPIO.output() calls (a list write counts once)"""
+    with _lock:
+        return _output_calls
+
+
+def reset_counters():
+    """Reset the write counters"""
+    global _output_calls
+    with _lock:
+        _write_counts.clear()
+        _output_calls = 0
+
+
+def install():
+    """
+    Register this module as RPi.GPIO so 'import RPi.GPIO as GPIO' in the
+    Pi scripts resolves to the loopback backend. Must be called before
+    those scripts are imported.
+    """
+    import types
+
+    module = sys.modules[__name__]
+    package = sys.modules.get('RPi')
+    if package is None:
+        package = types.ModuleType('RPi')
+        sys.modules['RPi'] = package
+    package.GPIO = module
+    sys.modules['RPi.GPIO'] = module
+    return module
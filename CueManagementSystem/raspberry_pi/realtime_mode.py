@@ -0,0 +1,235 @@
+"""
+Real-Time Show Mode for Raspberry Pi
+====================================
+
+Opt-in real-time scheduling for the show loop plus per-frame lateness telemetry.
+
+Features:
+- SCHED_FIFO priority for the show thread
+- CPU pinning to an isolated core (isolcpus) with os.sched_setaffinity
+- mlockall() so page faults can't stall a cue
+- Garbage collector disabled for the duration of the show
+- Full restore of the previous state afterwards
+- Fixed-size lateness ring buffer with p50/p99/p999 and a bucket histogram
+- Incremental reads so telemetry can be streamed back while the show runs
+
+Each step is best-effort: missing privileges (no CAP_SYS_NICE, low
+RLIMIT_MEMLOCK) are reported in the applied-settings dict instead of
+failing the show.
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+import array
+import ctypes
+import ctypes.util
+import gc
+import os
+import threading
+
+DEFAULT_PRIORITY = 80
+ISOLATED_CPUS_FILE = "/sys/devices/system/cpu/isolated"
+
+# mlockall() flags from <sys/mman.h>
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+# Histogram bucket upper bounds in microseconds (last bucket is open-ended)
+HISTOGRAM_BOUNDS_US = [10, 50, 100, 250, 500, 1000, 2000, 5000]
+
+
+def _parse_cpu_list(text):
+    """Parse a kernel CPU list such as '2-3,5' into a sorted list"""
+    cpus = set()
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            low, high = part.split('-')
+            cpus.update(range(int(low), int(high) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def pick_show_cpu():
+    """
+    Choose the CPU for the show loop
+
+    Prefers the last core isolated with isolcpus=, otherwise the last core
+    the process is allowed to run on.
+    """
+    try:
+        with open(ISOLATED_CPUS_FILE, 'r') as f:
+            isolated = _parse_cpu_list(f.read())
+        if isolated:
+            return isolated[-1]
+    except (OSError, ValueError):
+        pass
+
+    try:
+        return max(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return None
+
+
+class RealtimeMode:
+    """
+    Context manager that applies real-time settings to the calling thread
+
+    Usage:
+        with RealtimeMode() as rt:
+            ...  # show loop
+        rt.applied  # what actually took effect
+    """
+
+    def __init__(self, priority=DEFAULT_PRIORITY, cpu=None, lock_memory=True, disable_gc=True):
+        self.priority = priority
+        self.cpu = cpu
+        self.lock_memory = lock_memory
+        self.disable_gc = disable_gc
+        self.applied = {}
+
+        self._previous_policy = None
+        self._previous_param = None
+        self._previous_affinity = None
+        self._gc_was_enabled = False
+        self._memory_locked = False
+        self._libc = None
+
+    def __enter__(self):
+        # CPU pinning first so the FIFO thread never migrates
+        cpu = self.cpu if self.cpu is not None else pick_show_cpu()
+        try:
+            self._previous_affinity = os.sched_getaffinity(0)
+            if cpu is not None:
+                os.sched_setaffinity(0, {cpu})
+                self.applied["cpu"] = cpu
+        except (AttributeError, OSError) as e:
+            self.applied["cpu_error"] = str(e)
+
+        try:
+            self._previous_policy = os.sched_getscheduler(0)
+            self._previous_param = os.sched_getparam(0)
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+            self.applied["sched_fifo"] = self.priority
+        except (AttributeError, OSError) as e:
+            self._previous_policy = None
+            self.applied["sched_fifo_error"] = str(e)
+
+        if self.lock_memory:
+            try:
+                self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+                if self._libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+                    raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+                self._memory_locked = True
+                self.applied["mlockall"] = True
+            except (OSError, AttributeError, TypeError) as e:
+                self.applied["mlockall_error"] = str(e)
+
+        if self.disable_gc:
+            self._gc_was_enabled = gc.isenabled()
+            gc.disable()
+            self.applied["gc_disabled"] = True
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.disable_gc and self._gc_was_enabled:
+            gc.enable()
+
+        if self._memory_locked:
+            try:
+                self._libc.munlockall()
+            except Exception:
+                pass
+
+        if self._previous_policy is not None:
+            try:
+                os.sched_setscheduler(0, self._previous_policy, self._previous_param)
+            except OSError:
+                pass
+
+        if self._previous_affinity is not None:
+            try:
+                os.sched_setaffinity(0, self._previous_affinity)
+            except OSError:
+                pass
+
+        return False
+
+
+class LatenessRecorder:
+    """
+    Lock-light ring buffer of per-frame lateness (nanoseconds)
+
+    The show loop calls record() once per frame; other threads call
+    read_since() to stream new samples or summary() for percentiles.
+    """
+
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self._samples = array.array('q', bytes(8 * capacity))
+        self._count = 0  # Total samples ever recorded (ring position = count % capacity)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._count = 0
+
+    def record(self, lateness_ns):
+        """Append one sample (the show loop's only cost is an array store)"""
+        self._samples[self._count % self.capacity] = lateness_ns
+        self._count += 1
+
+    @property
+    def count(self):
+        return self._count
+
+    def read_since(self, sequence):
+        """
+        Samples recorded after the given sequence number
+
+        Returns:
+            (next_sequence, list of lateness values in microseconds)
+        """
+        with self._lock:
+            end = self._count
+            start = max(sequence, end - self.capacity)
+            values = [self._samples[i % self.capacity] / 1000.0 for i in range(start, end)]
+        return end, values
+
+    def _window(self):
+        end = self._count
+        start = max(0, end - self.capacity)
+        return sorted(self._samples[i % self.capacity] for i in range(start, end))
+
+    def summary(self):
+        """Percentiles (ms) and bucket histogram over the samples in the ring"""
+        with self._lock:
+            ordered = self._window()
+
+        if not ordered:
+            return {"samples": 0}
+
+        def percentile(fraction):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] / 1e6
+
+        histogram = [0] * (len(HISTOGRAM_BOUNDS_US) + 1)
+        bucket = 0
+        for value in ordered:
+            while bucket < len(HISTOGRAM_BOUNDS_US) and value >= HISTOGRAM_BOUNDS_US[bucket] * 1000:
+                bucket += 1
+            histogram[bucket] += 1
+
+        labels = [f"<{bound}us" for bound in HISTOGRAM_BOUNDS_US] + [f">={HISTOGRAM_BOUNDS_US[-1]}us"]
+        return {
+            "samples": len(ordered),
+            "p50_ms": round(percentile(0.50), 4),
+            "p99_ms": round(percentile(0.99), 4),
+            "p999_ms": round(percentile(0.999), 4),
+            "max_ms": round(ordered[-1] / 1e6, 4),
+            "histogram": dict(zip(labels, histogram))
+        }
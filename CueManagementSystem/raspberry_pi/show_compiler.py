@@ -0,0 +1,283 @@
+"""
+Show Timeline Compiler for Raspberry Pi
+=======================================
+
+Compiles show JSON into a flat, time-sorted list of frames so the realtime loop in execute_show.py only waits and shifts.
+
+Each frame holds the absolute fire time in nanoseconds, a bitmask of the
+chains that changed, and the packed 25-byte register image of every chain
+(outputs stay ON for the rest of the show, as in show mode). RUN cues are
+expanded into one frame per step with their delays already applied, and
+cues that land on the same timestamp are merged into one frame.
+
+Packed image layout (per chain, 25 bytes):
+    byte k holds outputs 8k+1 .. 8k+8 of the chain, MSB = first output
+
+Compiled shows are cached on disk keyed by a SHA-256 of the show content,
+so running the same show again skips compilation.
+
+Features:
+- RUN/DOUBLE RUN delay expansion
+- Same-timestamp frame merging
+- Chain change masks (unchanged chains are never shifted)
+- Compact binary cache keyed by show hash
+- Cache pruning (oldest files removed first)
+- Standard library only (array, struct, hashlib)
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+import array
+import hashlib
+import json
+import os
+import struct
+
+# Constants
+NUM_CHAINS = 5
+OUTPUTS_PER_CHAIN = 200
+REGISTERS_PER_CHAIN = 25
+FRAME_IMAGE_SIZE = NUM_CHAINS * REGISTERS_PER_CHAIN
+
+# Bump when the frame semantics or file layout change so stale caches are ignored
+COMPILER_VERSION = 1
+
+CACHE_DIR = os.path.expanduser("~/.cache/cuepi/shows")
+CACHE_MAX_FILES = 20
+
+_MAGIC = b"CPSH"
+_HEADER = struct.Struct("<4sHHI32s")  # magic, compiler version, chains, frame count, show hash
+
+# 8 bits of a packed byte, MSB first (first output of the register first)
+_BYTE_BITS = [tuple((value >> (7 - i)) & 1 for i in range(8)) for value in range(256)]
+
+
+class CompiledShow:
+    """
+    Flat frame arrays produced by compile_show()
+
+    Attributes:
+        times_ns: array('q') of frame fire times relative to show start
+        chain_masks: array('B') of chains changed by each frame (bit n = chain n)
+        images: bytes of frame_count * 125 bytes (5 chains x 25 registers)
+        cue_count: number of cues in the source show
+        show_hash: hex SHA-256 of the source show
+    """
+
+    def __init__(self, times_ns, chain_masks, images, cue_count, show_hash):
+        self.times_ns = times_ns
+        self.chain_masks = chain_masks
+        self.images = images
+        self.cue_count = cue_count
+        self.show_hash = show_hash
+
+    @property
+    def frame_count(self):
+        return len(self.times_ns)
+
+    def chain_image(self, frame_index, chain):
+        """Packed 25-byte register image of one chain in one frame"""
+        offset = frame_index * FRAME_IMAGE_SIZE + chain * REGISTERS_PER_CHAIN
+        return self.images[offset:offset + REGISTERS_PER_CHAIN]
+
+    def frame_bits(self, frame_index):
+        """
+        Unpack the changed chains of a frame for the shifter
+
+        Returns:
+            dict chain -> tuple of 200 bits (only chains in the frame's mask)
+        """
+        mask = self.chain_masks[frame_index]
+        result = {}
+        for chain in range(NUM_CHAINS):
+            if mask & (1 << chain):
+                bits = ()
+                for value in self.chain_image(frame_index, chain):
+                    bits += _BYTE_BITS[value]
+                result[chain] = bits
+        return result
+
+    def to_bytes(self):
+        """Serialize for the on-disk cache"""
+        header = _HEADER.pack(_MAGIC, COMPILER_VERSION, NUM_CHAINS,
+                              self.frame_count, bytes.fromhex(self.show_hash))
+        return (header + struct.pack("<I", self.cue_count) + self.times_ns.tobytes()
+                + self.chain_masks.tobytes() + bytes(self.images))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Deserialize a cached show, raises ValueError if incompatible"""
+        magic, version, chains, frame_count, digest = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != COMPILER_VERSION or chains != NUM_CHAINS:
+            raise ValueError("Incompatible compiled show")
+
+        offset = _HEADER.size
+        (cue_count,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+
+        times_ns = array.array('q')
+        times_ns.frombytes(data[offset:offset + frame_count * 8])
+        offset += frame_count * 8
+
+        chain_masks = array.array('B')
+        chain_masks.frombytes(data[offset:offset + frame_count])
+        offset += frame_count
+
+        images = data[offset:offset + frame_count * FRAME_IMAGE_SIZE]
+        if len(images) != frame_count * FRAME_IMAGE_SIZE:
+            raise ValueError("Truncated compiled show")
+
+        return cls(times_ns, chain_masks, bytes(images), cue_count, digest.hex())
+
+
+def show_hash(show_data):
+    """SHA-256 of the canonical show JSON"""
+    canonical = json.dumps(show_data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _expand_cue(cue):
+    """
+    Expand one Pi-format cue into (time_ms, output) firing events
+
+    Show-mode semantics: shots fire all outputs at the cue time,
+    runs fire one output (or pair) per step, 'delay' ms apart.
+    """
+    cue_type = cue.get('type')
+    start_ms = cue.get('time', 0)
+    events = []
+
+    if cue_type == 'SINGLE SHOT':
+        events.append((start_ms, cue.get('output')))
+
+    elif cue_type == 'DOUBLE SHOT':
+        events.append((start_ms, cue.get('output1')))
+        events.append((start_ms, cue.get('output2')))
+
+    elif cue_type == 'SINGLE RUN':
+        delay = cue.get('delay', 100)
+        start_output = cue.get('start_output')
+        for step, output in enumerate(range(start_output, cue.get('end_output') + 1)):
+            events.append((start_ms + step * delay, output))
+
+    elif cue_type == 'DOUBLE RUN':
+        delay = cue.get('delay', 100)
+        start_output1 = cue.get('start_output1')
+        end_output1 = cue.get('end_output1')
+        start_output2 = cue.get('start_output2')
+        end_output2 = cue.get('end_output2')
+        num_pairs = max(end_output1 - start_output1 + 1, end_output2 - start_output2 + 1)
+        for step in range(num_pairs):
+            step_ms = start_ms + step * delay
+            if start_output1 + step <= end_output1:
+                events.append((step_ms, start_output1 + step))
+            if start_output2 + step <= end_output2:
+                events.append((step_ms, start_output2 + step))
+
+    else:
+        raise ValueError(f"Unknown cue type: {cue_type}")
+
+    return events
+
+
+def compile_show(show_data):
+    """
+    Compile a show dict ({'cues': [...]}) into a CompiledShow
+
+    Raises:
+        ValueError: on unknown cue types, missing output fields or outputs outside 1..1000
+    """
+    cues = show_data.get('cues', [])
+
+    events = []
+    for cue in cues:
+        try:
+            events.extend(_expand_cue(cue))
+        except TypeError:
+            raise ValueError(f"Invalid {cue.get('type')} cue: {cue}") from None
+    events.sort(key=lambda event: event[0])
+
+    state = [bytearray(REGISTERS_PER_CHAIN) for _ in range(NUM_CHAINS)]
+    times_ns = array.array('q')
+    chain_masks = array.array('B')
+    images = bytearray()
+
+    index = 0
+    while index < len(events):
+        time_ms = events[index][0]
+        mask = 0
+        # Merge every event at this timestamp into one frame
+        while index < len(events) and events[index][0] == time_ms:
+            output = events[index][1]
+            if not isinstance(output, int) or not 1 <= output <= NUM_CHAINS * OUTPUTS_PER_CHAIN:
+                raise ValueError(f"Invalid output number: {output}")
+            chain, bit = divmod(output - 1, OUTPUTS_PER_CHAIN)
+            register, position = divmod(bit, 8)
+            flag = 0x80 >> position
+            if not state[chain][register] & flag:
+                state[chain][register] |= flag
+                mask |= 1 << chain
+            index += 1
+
+        if not mask:
+            continue  # Every output was already on
+
+        times_ns.append(int(round(time_ms * 1_000_000)))
+        chain_masks.append(mask)
+        for chain_state in state:
+            images += chain_state
+
+    return CompiledShow(times_ns, chain_masks, bytes(images), len(cues), show_hash(show_data))
+
+
+def _cache_path(digest, cache_dir):
+    return os.path.join(cache_dir, f"{digest}.cshow")
+
+
+def _prune_cache(cache_dir, max_files):
+    try:
+        files = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.endswith(".cshow")]
+    except OSError:
+        return
+    files.sort(key=os.path.getmtime)
+    for path in files[:max(0, len(files) - max_files)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def load_or_compile(show_data, cache_dir=CACHE_DIR, max_files=CACHE_MAX_FILES):
+    """
+    Return the compiled show, from the on-disk cache when possible
+
+    Returns:
+        (CompiledShow, cache_hit: bool)
+    """
+    digest = show_hash(show_data)
+    path = _cache_path(digest, cache_dir)
+
+    try:
+        with open(path, 'rb') as f:
+            compiled = CompiledShow.from_bytes(f.read())
+        if compiled.show_hash == digest:
+            os.utime(path)  # Keep recently used shows from being pruned
+            return compiled, True
+    except (OSError, ValueError, struct.error):
+        pass  # Missing or stale cache entry - compile below
+
+    compiled = compile_show(show_data)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(compiled.to_bytes())
+        os.replace(temp_path, path)
+        _prune_cache(cache_dir, max_files)
+    except OSError:
+        pass  # Don't fail the show if the cache can't be written
+
+    return compiled, False
@@ -0,0 +1,251 @@
+"""
+Packed Binary Show Format
+=========================
+
+Versioned binary show file shared by the desktop encoder and the Raspberry Pi show player.
+
+Replaces /tmp/show_data.json: the desktop ships the cue table together with
+the precomputed register frames, so the Pi neither parses JSON nor compiles
+the show before it starts. The decoder wraps the file in memoryviews and
+only unpacks a frame when the show loop asks for it.
+
+File layout (little-endian, sections 8-byte aligned):
+    header        24 bytes   magic, version, chains, registers per chain,
+                             cue count, frame count, image section size
+    cue table     26 bytes per cue (CUE_RECORD)
+    times         int64 per frame, fire time in ns from show start
+    offsets       uint32 per frame, start of the frame in the image section
+    masks         uint8 per frame, chains changed by the frame (bit n = chain n)
+    images        25 bytes per changed chain, ascending chain order,
+                  byte k = outputs 8k+1..8k+8 of the chain, MSB = first output
+    trailer       CRC-32 of everything before it
+
+Features:
+- Delta frames (only changed chain images are stored)
+- Zero-copy decode with memoryview casts
+- CRC-32 integrity check
+- Cue table round trip back to the Pi cue dict format
+- Standard library only (struct, zlib)
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+import struct
+import sys
+import zlib
+
+MAGIC = b"CPSB"
+FORMAT_VERSION = 2
+FILE_EXTENSION = ".cpsb"
+
+# Where the pre-show checklist uploads the packed show on the Pi
+SHOW_UPLOAD_PATH = "/tmp/show_data.cpsb"
+
+NUM_CHAINS = 5
+REGISTERS_PER_CHAIN = 25
+
+HEADER = struct.Struct("<4sHBBIII4x")  # magic, version, chains, registers/chain, cues, frames, image bytes
+CUE_RECORD = struct.Struct("<dIIBxHHHH")  # time ms, delay ms, duration ms, type, 4 output fields
+TRAILER = struct.Struct("<I")
+
+CUE_TYPES = ['SINGLE SHOT', 'DOUBLE SHOT', 'SINGLE RUN', 'DOUBLE RUN']
+
+# Pi cue dict keys stored in the four output fields of a record, per type
+CUE_OUTPUT_FIELDS = {
+    'SINGLE SHOT': ('output',),
+    'DOUBLE SHOT': ('output1', 'output2'),
+    'SINGLE RUN': ('start_output', 'end_output'),
+    'DOUBLE RUN': ('start_output1', 'end_output1', 'start_output2', 'end_output2'),
+}
+
+# 8 bits of a packed byte, MSB first (first output of the register first)
+_BYTE_BITS = [tuple((value >> (7 - i)) & 1 for i in range(8)) for value in range(256)]
+
+
+class ShowFormatError(ValueError):
+    """Raised when a packed show is malformed, truncated or corrupted"""
+    pass
+
+
+def _align(size):
+    return (size + 7) & ~7
+
+
+def pack_cue(cue):
+    """
+    Pack one Pi-format cue dict into a CUE_RECORD
+
+    Raises:
+        ShowFormatError: on unknown cue types, missing output fields or
+                         values that do not fit their record field
+    """
+    cue_type = cue.get('type')
+    if cue_type not in CUE_OUTPUT_FIELDS:
+        raise ShowFormatError(f"Unknown cue type: {cue_type}")
+
+    outputs = [0, 0, 0, 0]
+    for index, key in enumerate(CUE_OUTPUT_FIELDS[cue_type]):
+        if key not in cue:
+            raise ShowFormatError(f"{cue_type} cue missing required field: {key}")
+        outputs[index] = cue[key]
+
+    try:
+        return CUE_RECORD.pack(float(cue.get('time', 0)), int(cue.get('delay', 0)),
+                               int(cue.get('duration', 0)), CUE_TYPES.index(cue_type), *outputs)
+    except struct.error as e:
+        raise ShowFormatError(f"{cue_type} cue at {cue.get('time', 0)} ms does not fit the show format: {e}") from None
+
+
+def pack_show(cues, frames):
+    """
+    Assemble a packed show file
+
+    Args:
+        cues: list of Pi-format cue dicts (cue table)
+        frames: list of (time_ns, chain_mask, images) where images holds the
+                25-byte image of every chain in the mask, ascending chain order
+
+    Returns:
+        bytes of the complete file including the CRC trailer
+    """
+    image_size = sum(len(images) for _, _, images in frames)
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, NUM_CHAINS, REGISTERS_PER_CHAIN,
+                         len(cues), len(frames), image_size)]
+
+    table = b''.join(pack_cue(cue) for cue in cues)
+    parts.append(table + bytes(_align(len(table)) - len(table)))
+
+    frame_count = len(frames)
+    parts.append(struct.pack(f"<{frame_count}q", *(time_ns for time_ns, _, _ in frames)))
+
+    offsets = []
+    offset = 0
+    for _, _, images in frames:
+        offsets.append(offset)
+        offset += len(images)
+    parts.append(struct.pack(f"<{frame_count}I", *offsets))
+    parts.append(bytes(mask for _, mask, _ in frames))
+    parts.append(bytes(_align(frame_count * 13) - frame_count * 13))  # Pad the frame index
+    parts.extend(images for _, _, images in frames)
+
+    body = b''.join(parts)
+    return body + TRAILER.pack(zlib.crc32(body))
+
+
+class PackedShow:
+    """
+    Zero-copy view of a packed show
+
+    Exposes the same frame interface as show_compiler.CompiledShow
+    (frame_count, times_ns, chain_masks, frame_bits, cue_count), so the
+    show loop in execute_show.py can play it directly.
+    """
+
+    def __init__(self, data):
+        view = memoryview(data)
+        if view.ndim != 1 or view.itemsize != 1:
+            view = view.cast('B')
+        if len(view) < HEADER.size + TRAILER.size:
+            raise ShowFormatError("Packed show is truncated")
+
+        magic, version, chains, registers, cue_count, frame_count, image_size = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ShowFormatError("Not a packed show file")
+        if version != FORMAT_VERSION:
+            raise ShowFormatError(f"Unsupported packed show version {version}")
+        if chains != NUM_CHAINS or registers != REGISTERS_PER_CHAIN:
+            raise ShowFormatError(f"Show is for {chains}x{registers} registers, "
+                                  f"hardware has {NUM_CHAINS}x{REGISTERS_PER_CHAIN}")
+
+        cue_offset = HEADER.size
+        times_offset = cue_offset + _align(cue_count * CUE_RECORD.size)
+        offsets_offset = times_offset + frame_count * 8
+        masks_offset = offsets_offset + frame_count * 4
+        images_offset = times_offset + _align(frame_count * 13)
+        end = images_offset + image_size
+
+        if len(view) != end + TRAILER.size:
+            raise ShowFormatError(f"Packed show size mismatch: expected {end + TRAILER.size}, got {len(view)}")
+
+        (stored_crc,) = TRAILER.unpack_from(view, end)
+        if zlib.crc32(view[:end]) != stored_crc:
+            raise ShowFormatError("Packed show checksum mismatch")
+
+        self.cue_count = cue_count
+        self.checksum = stored_crc
+        self._view = view
+        self._cue_offset = cue_offset
+
+        times = view[times_offset:offsets_offset]
+        offsets = view[offsets_offset:masks_offset]
+        if sys.byteorder == 'little':
+            self.times_ns = times.cast('q')
+            self._offsets = offsets.cast('I')
+        else:
+            # Big-endian hosts get decoded copies (the Pi itself is little-endian)
+            self.times_ns = struct.unpack(f"<{frame_count}q", times)
+            self._offsets = struct.unpack(f"<{frame_count}I", offsets)
+        self.chain_masks = view[masks_offset:masks_offset + frame_count]
+        self._images = view[images_offset:end]
+
+    @property
+    def frame_count(self):
+        return len(self.times_ns)
+
+    @property
+    def size(self):
+        return len(self._view)
+
+    def frame_bits(self, frame_index):
+        """
+        Unpack the changed chains of a frame for the shifter
+
+        Returns:
+            dict chain -> tuple of 200 bits (only chains in the frame's mask)
+        """
+        mask = self.chain_masks[frame_index]
+        offset = self._offsets[frame_index]
+        images = self._images
+        result = {}
+        for chain in range(NUM_CHAINS):
+            if mask & (1 << chain):
+                bits = ()
+                for value in images[offset:offset + REGISTERS_PER_CHAIN]:
+                    bits += _BYTE_BITS[value]
+                result[chain] = bits
+                offset += REGISTERS_PER_CHAIN
+        return result
+
+    def cue(self, index):
+        """Cue table entry as a Pi-format cue dict"""
+        if not 0 <= index < self.cue_count:
+            raise IndexError(index)
+        time_ms, delay, duration, type_code, *outputs = CUE_RECORD.unpack_from(
+            self._view, self._cue_offset + index * CUE_RECORD.size)
+        if type_code >= len(CUE_TYPES):
+            raise ShowFormatError(f"Unknown cue type code {type_code} in cue {index + 1}")
+
+        cue_type = CUE_TYPES[type_code]
+        cue = {'type': cue_type, 'time': int(time_ms) if time_ms.is_integer() else time_ms,
+               'duration': duration}
+        cue.update(zip(CUE_OUTPUT_FIELDS[cue_type], outputs))
+        if cue_type in ('SINGLE RUN', 'DOUBLE RUN'):
+            cue['delay'] = delay
+        return cue
+
+    def cues(self):
+        """Full cue table as a list of Pi-format cue dicts"""
+        return [self.cue(index) for index in range(self.cue_count)]
+
+
+def is_packed_show(data):
+    """True if the buffer starts with the packed show magic"""
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def load_show(path):
+    """Read and validate a packed show file"""
+    with open(path, 'rb') as f:
+        return PackedShow(f.read())
@@ -29,7 +29,14 @@ def upload_scripts(host, username, password, port=22):
         'get_gpio_status.py',
         'emergency_stop.py',
         'execute_cue.py',
-        'execute_show.py'
+        'execute_show.py',
+        'cue_daemon.py',
+        'daemon_protocol.py',
+        'loopback_gpio.py',
+        'parallel_shifter.py',
+        'realtime_mode.py',
+        'show_compiler.py',
+        'show_format.py'
     ]
     
     try:
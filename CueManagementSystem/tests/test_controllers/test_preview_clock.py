@@ -0,0 +1,205 @@
+"""
+Test script for the preview clock and cue scheduler.
+
+Checks that the show clock starts, pauses, resumes and seeks on the monotonic
+counter, that it follows a media player's position reports (smoothing report
+jitter, jumping on large offsets), that scheduled cues fire once, in order,
+at their times, and that the previews use the clock. Prints the trigger
+lateness of the scheduler against polling on a 100ms timer.
+
+Usage:
+    python test_preview_clock.py
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEventLoop, QObject, QTimer, Signal
+from PySide6.QtWidgets import QApplication
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from controllers.preview_clock import CueScheduler, PreviewClock
+from controllers.show_preview_controller import ShowPreviewController
+from controllers.vr_preview_controller import VRPreviewController
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class MediaPlayer(QObject):
+    """Media player reporting positions of a reference clock running offset seconds ahead"""
+
+    positionChanged = Signal(int)
+
+    def __init__(self, offset=0.0):
+        super().__init__()
+        self.origin = time.perf_counter()
+        self.offset = offset
+
+    def position(self):
+        return time.perf_counter() - self.origin + self.offset
+
+    def report(self, jitter=0.0):
+        self.positionChanged.emit(int(round((self.position() + jitter) * 1000)))
+
+
+def run_events(seconds):
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+
+
+def test_clock_controls():
+    clock = PreviewClock()
+    assert clock.now() == 0.0 and not clock.is_running
+    clock.start(5.0)
+    first = clock.now()
+    assert 5.0 <= first < 5.05 and clock.now() >= first
+
+    clock.pause()
+    paused = clock.now()
+    time.sleep(0.02)
+    assert clock.now() == paused
+    clock.seek(12.0)
+    assert clock.now() == 12.0
+    clock.resume()
+    assert 12.0 <= clock.now() < 12.05
+    clock.seek(3.0)
+    assert 3.0 <= clock.now() < 3.05
+    clock.stop()
+    assert clock.now() == 0.0
+
+
+def test_clock_follows_media():
+    clock = PreviewClock()
+    player = MediaPlayer(offset=0.1)  # Music 100ms ahead of the clock
+    clock.attach_player(player)
+    clock.start(player.position() - 0.1)
+
+    rng = np.random.default_rng(0)
+    for _ in range(80):
+        player.report(jitter=float(rng.uniform(-0.01, 0.01)))
+    assert abs(clock.now() - player.position()) < 0.005 and clock.resyncs == 0
+
+    # A seek of the music moves the clock at once
+    player.offset += 2.0
+    player.report()
+    assert clock.resyncs == 1 and abs(clock.now() - player.position()) < 0.005
+
+    # Reports are ignored while paused and after detaching
+    clock.pause()
+    paused = clock.now()
+    player.report()
+    assert clock.now() == paused
+    clock.resume()
+    clock.attach_player(None)
+    player.offset += 5.0
+    player.report()
+    assert clock.resyncs == 1
+
+
+def test_scheduler_fires_cues_in_order():
+    clock = PreviewClock()
+    scheduler = CueScheduler(clock)
+    fired = []
+    scheduler.cues_due.connect(lambda first, last: fired.extend(range(first, last)))
+    times = np.sort(np.random.default_rng(1).uniform(0.0, 0.5, 30))
+    times[5] = times[6]  # Cues at the same time fire on the same wake
+
+    clock.start(0.0)
+    scheduler.start(times)
+    run_events(0.35)
+    scheduler.stop()
+    clock.pause()
+    stopped = list(fired)
+    assert stopped == list(range(len(stopped))) and 0 < len(stopped) < 30
+    run_events(0.2)
+    assert fired == stopped  # Nothing fires while stopped
+
+    clock.resume()
+    scheduler.start(times, scheduler.next_index)
+    run_events(0.4)
+    assert fired == list(range(30))
+    assert scheduler.lateness_stats()['count'] == 30
+
+
+def test_previews_use_clock():
+    cues = [[number, "SINGLE SHOT", str(number), 0.0, f"00:{0.02 * number:05.2f}"] for number in range(1, 21)]
+    controller = ShowPreviewController()
+    controller.load_cues(cues)
+    triggered = []
+    controller.cue_triggered.connect(triggered.append)
+    player = MediaPlayer()
+    controller.set_media_player(player)
+
+    assert controller.start_preview()
+    run_events(0.2)
+    controller.pause_preview()
+    paused_at = controller.elapsed_time
+    assert 0.15 < paused_at < 0.35 and triggered == controller.sorted_cues[:len(triggered)]
+    controller.seek_to_time(0.3)
+    controller.resume_preview()
+    run_events(0.25)
+    assert triggered[-1] is controller.sorted_cues[-1] and not controller.is_playing  # Ended after the last cue
+    assert controller.get_trigger_lateness()['count'] == len(triggered)
+
+    vr = VRPreviewController()
+    vr.set_media_player(player)
+    vr.start_preview(cues)
+    vr._start_preview_at_t0()
+    run_events(0.5)
+    assert vr._executed_cues == set(range(20)) and vr.get_trigger_lateness()['count'] == 20
+    vr.stop_preview()
+
+
+def test_trigger_lateness(cues=40, span=1.0):
+    """Trigger lateness: polling on a 100ms timer vs the cue scheduler"""
+    times = np.sort(np.random.default_rng(2).uniform(0.05, span, cues))
+
+    # Reference: the previous preview loop, checking the next cue on every 100ms tick
+    lateness = []
+    start = time.perf_counter()
+    state = {'index': 0}
+
+    def poll():
+        elapsed = time.perf_counter() - start
+        while state['index'] < cues and elapsed >= times[state['index']]:
+            lateness.append(elapsed - times[state['index']])
+            state['index'] += 1
+
+    timer = QTimer()
+    timer.timeout.connect(poll)
+    timer.start(100)
+    run_events(span + 0.2)
+    timer.stop()
+    polled = np.array(lateness) * 1000.0
+
+    clock = PreviewClock()
+    scheduler = CueScheduler(clock)
+    clock.start(0.0)
+    scheduler.start(times)
+    run_events(span + 0.2)
+    stats = scheduler.lateness_stats()
+
+    print(f"\n{cues} cues over {span:.1f}s")
+    print(f"100ms polling: mean {polled.mean():6.2f} ms, p95 {np.percentile(polled, 95):6.2f} ms, "
+          f"max {polled.max():6.2f} ms")
+    print(f"Scheduler:     mean {stats['mean_ms']:6.2f} ms, p95 {stats['p95_ms']:6.2f} ms, "
+          f"max {stats['max_ms']:6.2f} ms")
+    assert len(polled) == cues and stats['count'] == cues
+    assert stats['mean_ms'] < polled.mean()
+
+
+if __name__ == "__main__":
+    test_clock_controls()
+    test_clock_follows_media()
+    test_scheduler_fires_cues_in_order()
+    test_previews_use_clock()
+    test_trigger_lateness()
+    print("All preview clock tests passed.")
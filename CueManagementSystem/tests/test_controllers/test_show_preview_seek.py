@@ -0,0 +1,174 @@
+"""
+Test script for seeking in the show preview.
+
+Checks that binary-search seeks and active-cue queries of
+ShowPreviewController match scanning the sorted cues, that the LED panel
+shown at any time matches lighting every active cue, while a seek resolves
+only the LEDs of the cues passed since the last position, and prints the
+time of one scrub step in a long show against clearing and re-lighting
+every LED. The benchmark only runs when CUE_RUN_BENCHMARKS=1 is set (or when
+the script is run directly).
+
+Usage:
+    python test_show_preview_seek.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_show_preview_seek.py -s
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from controllers.show_preview_controller import ShowPreviewController
+from views.led_panel.led_canvas import LED_STATE_TYPES, cue_data_states
+from views.managers.led_panel_manager import LedPanelManager
+from views.managers.preview_state_manager import PreviewStateManager
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+CUE_TYPES = LED_STATE_TYPES[1:5]
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_cues(count, seed=0, duration=600.0):
+    rng = np.random.default_rng(seed)
+    cues = []
+    for number in range(1, count + 1):
+        outputs = sorted(set(rng.integers(1, 1001, rng.integers(1, 8)).tolist()))
+        seconds = round(float(rng.uniform(0, duration)), 1)  # Rounded, so some cues share a time
+        cues.append([number, CUE_TYPES[number % 4], ",".join(map(str, outputs)), 0.1,
+                     f"{int(seconds // 60):02d}:{seconds % 60:04.1f}"])
+    return cues
+
+
+def old_time_to_seconds(time_str):
+    minutes, seconds = time_str.split(':')
+    return int(minutes) * 60 + float(seconds)
+
+
+def old_active_cues(sorted_cues, target_time):
+    """Reference: scan of the sorted cues up to the first one after target_time"""
+    active_cues = []
+    for cue in sorted_cues:
+        if old_time_to_seconds(cue[4]) <= target_time:
+            active_cues.append(cue)
+        else:
+            break
+    return active_cues
+
+
+def panel_states(led_panel):
+    grid = led_panel.get_current_grid()
+    return grid.canvas.states if hasattr(grid, 'canvas') else grid.led_states
+
+
+class MusicManager:
+    """Music manager recording playback positions"""
+
+    def __init__(self):
+        self.positions = []
+
+    def set_playback_position(self, position_ms):
+        self.positions.append(position_ms)
+
+
+def test_seek_matches_linear_scan():
+    controller = ShowPreviewController()
+    controller.load_cues(create_cues(400, seed=1))
+    times = np.concatenate((np.random.default_rng(2).uniform(-5, 620, 200), controller.sorted_cue_times[::7]))
+
+    for target_time in times.tolist():
+        expected = old_active_cues(controller.sorted_cues, target_time)
+        assert controller.get_active_cues_at_time(target_time) == expected
+        controller.seek_to_time(target_time)
+        assert controller.current_cue_index == len(expected)
+    assert controller.get_total_duration() == max(old_time_to_seconds(cue[4]) for cue in controller.cues)
+
+
+def test_seek_leds_match_active_cues():
+    for view in ("traditional", "grouped"):
+        led_panel = LedPanelManager()
+        led_panel.switch_to_view(view)
+        controller = ShowPreviewController(led_panel)
+        controller.load_cues(create_cues(500, seed=3))
+        state_manager = PreviewStateManager(controller, MusicManager(), led_panel)
+
+        resolved = []
+        for target_time in np.random.default_rng(4).uniform(0, 600, 60).tolist() + [610.0, 0.0, 300.0, 300.05]:
+            state_manager.seek_to_time(target_time)
+            resolved.append(controller.show_led_state_at_time(target_time))
+            active = old_active_cues(controller.sorted_cues, target_time)
+            np.testing.assert_array_equal(panel_states(led_panel), cue_data_states(active, 1000))
+        assert resolved[-1] == 0  # The position was just shown: nothing to resolve
+        assert state_manager.music_manager.positions[-1] == 300050
+
+
+def test_playback_then_seek():
+    led_panel = LedPanelManager()
+    controller = ShowPreviewController(led_panel)
+    cues = create_cues(300, seed=5, duration=60.0)
+    controller.load_cues(cues)
+    assert controller.start_preview()
+
+    # Play the first 30 seconds: cues fire through the preview animations
+    controller.clock.seek(30.0)
+    controller.scheduler.wake()
+    assert controller.current_cue_index == len(old_active_cues(controller.sorted_cues, 30.0))
+
+    for target_time in (12.5, 45.0, 45.0, 0.0):
+        controller.pause_preview()
+        controller.seek_to_time(target_time)
+        controller.show_led_state_at_time(target_time)
+        active = old_active_cues(controller.sorted_cues, target_time)
+        np.testing.assert_array_equal(panel_states(led_panel), cue_data_states(active, 1000))
+    controller.stop_preview()
+    np.testing.assert_array_equal(panel_states(led_panel), cue_data_states(cues, 1000))
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_scrub_times(cues=5000, steps=40):
+    """One scrub step in a 5000-cue show: clear and re-light every active cue vs LED delta"""
+    led_panel = LedPanelManager()
+    controller = ShowPreviewController(led_panel)
+    controller.load_cues(create_cues(cues, seed=6, duration=1800.0))
+    animations = controller.preview_animation_controller
+    times = np.linspace(600.0, 660.0, steps).tolist()  # Dragging the playhead through a minute
+
+    start = time.perf_counter()
+    for target_time in times:
+        animations.clear_all_leds()
+        for cue in old_active_cues(controller.sorted_cues, target_time):
+            animations.set_led_state_instant(cue)
+    full_seconds = (time.perf_counter() - start) / steps
+    app.processEvents()
+
+    controller.forget_led_state()
+    start = time.perf_counter()
+    for target_time in times:
+        controller.show_led_state_at_time(target_time)
+    delta_seconds = (time.perf_counter() - start) / steps
+    app.processEvents()
+    np.testing.assert_array_equal(panel_states(led_panel),
+                                  cue_data_states(controller.get_active_cues_at_time(times[-1]), 1000))
+
+    print(f"\n{cues} cues, {steps} scrub steps")
+    print(f"Clear and re-light: {full_seconds * 1000:8.3f} ms per step")
+    print(f"LED delta:          {delta_seconds * 1000:8.3f} ms per step")
+    assert delta_seconds < full_seconds
+
+
+if __name__ == "__main__":
+    test_seek_matches_linear_scan()
+    test_seek_leds_match_active_cues()
+    test_playback_then_seek()
+    test_scrub_times()
+    print("All show preview seek tests passed.")
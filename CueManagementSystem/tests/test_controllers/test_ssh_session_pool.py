@@ -0,0 +1,293 @@
+"""
+Test script for the shared SSH session pool.
+
+Runs a local paramiko server stub (password auth, exec, PTY shell and SFTP
+on a temporary directory) and checks that every channel type shares one
+handshake, that health checks run alongside a busy channel, and that the
+pool reconnects with backoff after the server drops the transport.
+
+Usage:
+    python test_ssh_session_pool.py
+"""
+
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import paramiko
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from controllers.ssh_session_pool import SSHPoolUnavailableError, SSHSessionPool, get_session_pool
+
+USERNAME = "cuepi"
+PASSWORD = "secret"
+
+
+class StubSFTPHandle(paramiko.SFTPHandle):
+    def stat(self):
+        return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+
+class StubSFTPServer(paramiko.SFTPServerInterface):
+    """Serves a local directory (paths are used as-is)"""
+
+    def list_folder(self, path):
+        return [paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(path, name)), name)
+                for name in os.listdir(path)]
+
+    def stat(self, path):
+        return paramiko.SFTPAttributes.from_stat(os.stat(path))
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        mode = 'rb' if not flags & (os.O_WRONLY | os.O_RDWR) else 'wb'
+        handle = StubSFTPHandle(flags)
+        f = open(path, mode)
+        handle.readfile = f
+        handle.writefile = f
+        return handle
+
+
+class StubServer(paramiko.ServerInterface):
+    def __init__(self, stub):
+        self.stub = stub
+
+    def check_auth_password(self, username, password):
+        if username == USERNAME and password == PASSWORD:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == "session" else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self.stub.run_command, args=(channel, command.decode()), daemon=True).start()
+        return True
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        threading.Thread(target=self.stub.run_shell, args=(channel,), daemon=True).start()
+        return True
+
+
+class SSHServerStub:
+    """Minimal SSH server on 127.0.0.1 for pool tests"""
+
+    def __init__(self):
+        self.host_key = paramiko.RSAKey.generate(1024)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(8)
+        self.port = self.sock.getsockname()[1]
+        self.transports = []
+        self.connections = 0
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.host_key)
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, StubSFTPServer)
+            transport.start_server(server=StubServer(self))
+            self.transports.append(transport)
+
+    def run_command(self, channel, command):
+        # paramiko sends the exec reply after check_channel_exec_request returns
+        time.sleep(0.005)
+        if command.startswith("sleep "):
+            time.sleep(float(command.split()[1]))
+            channel.sendall(b"")
+        elif command.startswith("echo "):
+            channel.sendall(command[5:].encode() + b"\n")
+        else:
+            channel.sendall_stderr(f"unknown command: {command}\n".encode())
+            channel.send_exit_status(127)
+            channel.close()
+            return
+        channel.send_exit_status(0)
+        channel.close()
+
+    def run_shell(self, channel):
+        # Echo shell: returns whatever is typed
+        while not channel.closed:
+            data = channel.recv(1024)
+            if not data:
+                break
+            channel.sendall(data)
+
+    def drop_connections(self):
+        for transport in self.transports:
+            transport.close()
+        self.transports.clear()
+
+    def close(self):
+        self.drop_connections()
+        self.sock.close()
+
+
+def create_pool(stub, **kwargs):
+    return SSHSessionPool("127.0.0.1", stub.port, USERNAME, PASSWORD, **kwargs)
+
+
+def test_channels_share_one_handshake():
+    stub = SSHServerStub()
+    pool = create_pool(stub)
+    try:
+        for i in range(20):
+            assert pool.exec_command(f"echo cue {i}") == (0, f"cue {i}\n", "")
+
+        exit_status, _, stderr = pool.exec_command("bogus")
+        assert exit_status == 127 and "unknown command" in stderr
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "show_data.cpsb"), "wb") as f:
+                f.write(b"CPSB" + bytes(60))
+            sftp = pool.open_sftp()
+            assert sftp.listdir(tmp) == ["show_data.cpsb"]
+            assert sftp.stat(os.path.join(tmp, "show_data.cpsb")).st_size == 64
+            assert pool.open_sftp() is sftp
+
+        channel = pool.open_pty(width=120, height=40)
+        channel.sendall(b"ls\n")
+        deadline = time.time() + 2
+        received = b""
+        while b"ls\n" not in received and time.time() < deadline:
+            if channel.recv_ready():
+                received += channel.recv(1024)
+            time.sleep(0.01)
+        channel.close()
+        assert b"ls\n" in received
+
+        # Same transport handed out as a client for legacy code paths
+        assert pool.client().get_transport() is pool.transport()
+
+        assert stub.connections == 1
+        assert pool.handshakes == 1
+        stats = pool.get_latency_stats()
+        assert stats["exec"]["count"] == 21
+        assert stats["sftp"]["count"] == 1 and stats["pty"]["count"] == 1
+    finally:
+        pool.close()
+        stub.close()
+
+
+def test_health_check_does_not_wait_for_busy_channel():
+    stub = SSHServerStub()
+    pool = create_pool(stub)
+    try:
+        pool.client()
+        busy = threading.Thread(target=pool.exec_command, args=("sleep 1",), daemon=True)
+        busy.start()
+        time.sleep(0.1)
+
+        healthy, latency_ms = pool.health_check()
+        assert healthy
+        assert latency_ms < 500, f"Health check queued behind the busy channel ({latency_ms:.0f}ms)"
+        busy.join()
+        print(f"\nHealth check during a 1s command: {latency_ms:.1f}ms")
+    finally:
+        pool.close()
+        stub.close()
+
+
+def test_reconnect_with_backoff():
+    stub = SSHServerStub()
+    pool = create_pool(stub, initial_backoff=0.2, max_backoff=1.0)
+    try:
+        assert pool.exec_command("echo up")[0] == 0
+        stub.drop_connections()
+        time.sleep(0.1)
+        assert not pool.is_connected()
+
+        # Transparent reconnect on the next call
+        assert pool.exec_command("echo again")[1] == "again\n"
+        assert pool.reconnects == 1 and stub.connections == 2
+
+        # Wrong credentials: first failure arms the backoff window
+        pool.close()
+        pool.password = "wrong"
+        try:
+            pool.client()
+            assert False, "Connected with a wrong password"
+        except paramiko.AuthenticationException:
+            pass
+        try:
+            pool.client()
+            assert False, "Reconnect attempted inside the backoff window"
+        except SSHPoolUnavailableError:
+            pass
+
+        pool.password = PASSWORD
+        time.sleep(0.25)
+        assert pool.health_check()[0]
+        assert pool.get_latency_stats()["connect"]["errors"] == 1
+    finally:
+        pool.close()
+        stub.close()
+
+
+def test_key_and_agent_auth_enabled_by_default():
+    """Key-only Pis must still connect, as with a plain SSHClient.connect()"""
+    pool = SSHSessionPool("127.0.0.1", 22, USERNAME, PASSWORD)
+    assert pool.look_for_keys and pool.allow_agent
+
+
+def test_registry_shares_pools():
+    first = get_session_pool("10.0.0.5", 22, USERNAME, PASSWORD)
+    assert get_session_pool("10.0.0.5", 22, USERNAME, PASSWORD) is first
+    assert get_session_pool("10.0.0.5", 22, USERNAME, "changed") is not first
+
+
+def test_handshake_savings(commands=30):
+    """Per-command SSHClient (old behaviour) vs the pooled transport"""
+    stub = SSHServerStub()
+    pool = create_pool(stub)
+    try:
+        start = time.perf_counter()
+        for i in range(commands):
+            ssh = paramiko.SSHClient()
+            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            ssh.connect("127.0.0.1", port=stub.port, username=USERNAME, password=PASSWORD)
+            stdin, stdout, stderr = ssh.exec_command(f"echo {i}")
+            stdout.read()
+            ssh.close()
+        per_client_ms = (time.perf_counter() - start) * 1000 / commands
+
+        start = time.perf_counter()
+        for i in range(commands):
+            pool.exec_command(f"echo {i}")
+        pooled_ms = (time.perf_counter() - start) * 1000 / commands
+
+        print(f"\nPer-command client: {per_client_ms:.1f}ms/command | pooled: {pooled_ms:.1f}ms/command")
+        assert pooled_ms < per_client_ms
+    finally:
+        pool.close()
+        stub.close()
+
+
+if __name__ == "__main__":
+    test_channels_share_one_handshake()
+    test_health_check_does_not_wait_for_busy_channel()
+    test_reconnect_with_backoff()
+    test_key_and_agent_auth_enabled_by_default()
+    test_registry_shares_pools()
+    test_handshake_savings()
+    print("All SSH session pool tests passed.")
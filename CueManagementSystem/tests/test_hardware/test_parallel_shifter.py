@@ -0,0 +1,106 @@
+"""
+Test script for the parallel shift register engine.
+
+Verifies on the mock backend that every chain latches the expected 200-bit
+image, that unchanged chains are skipped, and compares GPIO operations and
+edges against the original one-chain-at-a-time shift_out_data() loop.
+
+Usage:
+    python test_parallel_shifter.py
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent / "raspberry_pi"))
+
+from parallel_shifter import (
+    DATA_PINS, SCLK_PINS, RCLK_PINS, OUTPUTS_PER_CHAIN,
+    MockShiftBackend, ParallelShifter,
+)
+
+
+def random_bits(rng, density=0.1):
+    return [1 if rng.random() < density else 0 for _ in range(OUTPUTS_PER_CHAIN)]
+
+
+def legacy_shift_out_data(backend, chain, data_bits):
+    """The original serial loop: three single-pin writes per bit, per chain"""
+    for bit in reversed(data_bits):
+        backend.write([DATA_PINS[chain]] if bit else [], [] if bit else [DATA_PINS[chain]])
+        backend.write([SCLK_PINS[chain]], [])
+        backend.write([], [SCLK_PINS[chain]])
+    backend.write([RCLK_PINS[chain]], [])
+    backend.write([], [RCLK_PINS[chain]])
+
+
+def test_parallel_shift_latches_expected_bits():
+    rng = random.Random(42)
+    backend = MockShiftBackend()
+    shifter = ParallelShifter(backend)
+
+    frame = {chain: random_bits(rng) for chain in (0, 2, 4)}
+    assert sorted(shifter.shift_chains(frame)) == [0, 2, 4]
+
+    for chain, bits in frame.items():
+        assert backend.latched[chain] == bits
+
+    # Legacy loop must produce the same latched image on the same simulator
+    legacy = MockShiftBackend()
+    for chain, bits in frame.items():
+        legacy_shift_out_data(legacy, chain, bits)
+        assert legacy.latched[chain] == backend.latched[chain]
+
+
+def test_unchanged_chains_are_skipped():
+    backend = MockShiftBackend()
+    shifter = ParallelShifter(backend)
+    bits = [0] * OUTPUTS_PER_CHAIN
+    bits[10] = 1
+
+    shifter.shift_chains({1: bits, 3: bits})
+    operations = backend.operations
+
+    assert shifter.shift_chains({1: bits, 3: bits}) == []
+    assert backend.operations == operations
+    assert shifter.chains_skipped == 2
+
+    bits_changed = list(bits)
+    bits_changed[11] = 1
+    assert shifter.shift_chains({1: bits_changed, 3: bits}) == [1]
+
+    shifter.invalidate()
+    assert sorted(shifter.shift_chains({1: bits_changed, 3: bits})) == [1, 3]
+
+
+def test_operation_reduction():
+    rng = random.Random(7)
+    scenarios = {
+        "DOUBLE SHOT (2 chains)": {0: random_bits(rng, 0.01), 1: random_bits(rng, 0.01)},
+        "5-chain frame": {chain: random_bits(rng) for chain in range(5)},
+    }
+
+    print()
+    for name, frame in scenarios.items():
+        legacy = MockShiftBackend()
+        for chain, bits in frame.items():
+            legacy_shift_out_data(legacy, chain, bits)
+
+        parallel = MockShiftBackend()
+        ParallelShifter(parallel).shift_chains(frame)
+
+        print(f"{name:24s} legacy: {legacy.operations:5d} ops {legacy.edges:5d} edges | "
+              f"parallel: {parallel.operations:5d} ops {parallel.edges:5d} edges "
+              f"({legacy.operations / parallel.operations:.1f}x fewer ops)")
+
+        assert parallel.latched == legacy.latched
+        assert parallel.operations < legacy.operations
+        assert parallel.edges <= legacy.edges
+
+
+if __name__ == "__main__":
+    test_parallel_shift_latches_expected_bits()
+    test_unchanged_chains_are_skipped()
+    test_operation_reduction()
+    print("All parallel shifter tests passed.")
@@ -0,0 +1,196 @@
+"""
+Test script for the Raspberry Pi cue daemon.
+
+Runs the daemon in-process on the loopback GPIO backend and talks to it over
+plain TCP with PiDaemonClient, so it works on any Linux box without hardware.
+
+Usage:
+    python test_pi_daemon.py [iterations]
+"""
+
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent / "raspberry_pi"))
+
+import cue_daemon
+import loopback_gpio
+from controllers.pi_daemon_client import PiDaemonClient
+
+
+def start_daemon():
+    """Start a loopback daemon on an ephemeral port, return (daemon, client)"""
+    daemon = cue_daemon.CueDaemon(port=0, loopback=True)
+    threading.Thread(target=daemon.serve_forever, daemon=True).start()
+
+    client = PiDaemonClient()
+    host, port = daemon.address
+    assert client.connect_socket(host, port)
+    return daemon, client
+
+
+def test_daemon_commands():
+    daemon, client = start_daemon()
+    try:
+        assert client.request("set_outputs_enabled", enabled=True)["outputs_enabled"] is True
+        assert client.request("set_arm_state", armed=True)["armed"] is True
+        assert loopback_gpio.input(21) == 1
+
+        response = client.request("execute_cue", cue={"type": "SINGLE SHOT", "output": 5, "duration": 0})
+        assert response["status"] == "success"
+
+        show = {"cues": [
+            {"type": "SINGLE SHOT", "output": 1, "time": 0},
+            {"type": "DOUBLE SHOT", "output1": 201, "output2": 402, "time": 10},
+        ]}
+        result = client.request("execute_show", show=show, wait=True)
+        assert result["status"] == "success"
+        assert result["timing_stats"]["total_cues"] == 2
+
+        response = client.request("unknown_command")
+        assert response["status"] == "error"
+    finally:
+        client.close()
+        daemon.shutdown()
+
+
+def test_emergency_stop_aborts_show():
+    daemon, client = start_daemon()
+    try:
+        show = {"cues": [
+            {"type": "SINGLE SHOT", "output": 1, "time": 0},
+            {"type": "SINGLE SHOT", "output": 2, "time": 60000},
+        ]}
+        assert client.request("execute_show", show=show)["status"] == "success"
+        time.sleep(0.05)
+
+        assert client.request("emergency_stop")["status"] == "success"
+        assert loopback_gpio.input(21) == 0
+
+        deadline = time.time() + 2.0
+        status = client.request("status")
+        while status["daemon"]["show_running"] and time.time() < deadline:
+            time.sleep(0.01)
+            status = client.request("status")
+
+        assert not status["daemon"]["show_running"]
+        assert status["daemon"]["last_show_result"]["status"] == "aborted"
+    finally:
+        client.close()
+        daemon.shutdown()
+
+
+def test_abort_after_client_stream_dropped():
+    """A show keeps running when the client's stream dies; a fresh connection must still stop it"""
+    daemon, client = start_daemon()
+    try:
+        client.request("set_arm_state", armed=True)
+        show = {"cues": [
+            {"type": "SINGLE SHOT", "output": 1, "time": 0},
+            {"type": "SINGLE SHOT", "output": 2, "time": 60000},
+        ]}
+        assert client.request("execute_show", show=show)["status"] == "success"
+        time.sleep(0.05)
+
+        client.close()  # Stream dropped, e.g. after a client-side timeout
+        time.sleep(0.1)
+        assert daemon._show_running()
+
+        # The abort fallback reconnects instead of relying on the dead stream
+        assert client.connect_socket(*daemon.address)
+        assert client.stop_all()["status"] == "success"
+        assert not daemon._show_running()
+        assert daemon._last_show_result["status"] == "aborted"
+        assert loopback_gpio.input(21) == 0
+    finally:
+        client.close()
+        daemon.shutdown()
+
+
+def test_emergency_stop_aborts_run_cue():
+    """A RUN cue stops shifting its next steps once the emergency stop arrives"""
+    daemon, client = start_daemon()
+    stopper = PiDaemonClient()
+    assert stopper.connect_socket(*daemon.address)
+    try:
+        cue = {"type": "SINGLE RUN", "start_output": 1, "end_output": 20, "delay": 200}  # About 5 s
+        results = []
+        runner = threading.Thread(target=lambda: results.append(client.request("execute_cue", cue=cue)))
+        start = time.perf_counter()
+        runner.start()
+        time.sleep(0.3)
+
+        assert stopper.request("emergency_stop")["status"] == "success"
+        frames = daemon.shifter.frames_shifted
+        runner.join(timeout=2.0)
+        assert results and results[0]["status"] == "aborted"
+        assert time.perf_counter() - start < 2.0
+        time.sleep(0.3)
+        assert daemon.shifter.frames_shifted == frames
+
+        # The next cue is not affected by the earlier stop
+        response = client.request("execute_cue", cue={"type": "SINGLE SHOT", "output": 5, "duration": 0})
+        assert response["status"] == "success"
+    finally:
+        stopper.close()
+        client.close()
+        daemon.shutdown()
+
+
+def test_cue_timeout_covers_firing_time():
+    run = {"type": "SINGLE RUN", "start_output": 1, "end_output": 200, "delay": 500}
+    assert PiDaemonClient.cue_timeout(run) >= 199 * 0.5 + 1.0
+    double_run = {"type": "DOUBLE RUN", "start_output1": 1, "end_output1": 100,
+                  "start_output2": 201, "end_output2": 250, "delay": 400}
+    assert PiDaemonClient.cue_timeout(double_run) >= 99 * 0.4 + 1.0
+    assert PiDaemonClient.cue_timeout({"type": "SINGLE SHOT", "output": 1}) == PiDaemonClient.REQUEST_TIMEOUT
+    assert PiDaemonClient.cue_timeout({"type": "SINGLE RUN"}) == PiDaemonClient.REQUEST_TIMEOUT
+
+
+def test_round_trip_latency(iterations=500):
+    """Compare daemon round trips against the cost of starting an interpreter"""
+    daemon, client = start_daemon()
+    try:
+        client.reset_latency_stats()
+        for _ in range(iterations):
+            client.request("ping")
+        ping_stats = client.get_latency_stats()
+
+        cue = {"type": "SINGLE SHOT", "output": 7, "duration": 0}
+        client.reset_latency_stats()
+        loopback_gpio.reset_counters()
+        for _ in range(iterations):
+            client.request("execute_cue", cue=cue)
+        cue_stats = client.get_latency_stats()
+        writes_per_cue = loopback_gpio.get_total_writes() / iterations
+        calls_per_cue = loopback_gpio.get_output_calls() / iterations
+    finally:
+        client.close()
+        daemon.shutdown()
+
+    # Lower bound of the old path: interpreter start alone, before SSH or GPIO setup
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    interpreter_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\nDaemon ping:        p50 {ping_stats['p50_ms']:.3f}ms  p99 {ping_stats['p99_ms']:.3f}ms")
+    print(f"Daemon execute_cue: p50 {cue_stats['p50_ms']:.3f}ms  p99 {cue_stats['p99_ms']:.3f}ms "
+          f"({calls_per_cue:.0f} GPIO calls, {writes_per_cue:.0f} pin writes/cue)")
+    print(f"Interpreter start:  {interpreter_ms:.1f}ms (per-command script launch, excluding SSH)")
+
+    assert ping_stats["count"] == iterations
+    assert cue_stats["count"] == iterations
+
+
+if __name__ == "__main__":
+    test_daemon_commands()
+    test_emergency_stop_aborts_show()
+    test_abort_after_client_stream_dropped()
+    test_emergency_stop_aborts_run_cue()
+    test_cue_timeout_covers_firing_time()
+    test_round_trip_latency(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
+    print("All cue daemon tests passed.")
@@ -0,0 +1,123 @@
+"""
+Test script for the real-time show mode and lateness telemetry.
+
+Checks the lateness ring buffer (percentiles, wrap-around, incremental reads),
+that RealtimeMode restores scheduler/GC state, and streams telemetry from a
+loopback cue daemon while a show runs. Also prints the lateness distribution
+of the same show with and without real-time mode.
+
+Usage:
+    python test_realtime_mode.py
+"""
+
+import gc
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent / "raspberry_pi"))
+
+import cue_daemon
+import realtime_mode
+from controllers.pi_daemon_client import PiDaemonClient
+
+
+def spaced_show(frames, spacing_ms):
+    return {"cues": [
+        {"type": "SINGLE SHOT", "output": i + 1, "time": i * spacing_ms}
+        for i in range(frames)
+    ]}
+
+
+def test_recorder_percentiles_and_wrap():
+    recorder = realtime_mode.LatenessRecorder(capacity=1000)
+    for i in range(1500):
+        recorder.record(i * 1000)  # 0..1499 µs
+
+    summary = recorder.summary()
+    assert summary["samples"] == 1000  # Only the newest 1000 are kept
+    assert summary["p50_ms"] == 1.0
+    assert summary["max_ms"] == 1.499
+    assert sum(summary["histogram"].values()) == 1000
+
+    sequence, values = recorder.read_since(1490)
+    assert sequence == 1500
+    assert values == [float(us) for us in range(1490, 1500)]
+
+    # A reader that fell behind the ring only gets what is still buffered
+    _, values = recorder.read_since(0)
+    assert len(values) == 1000 and values[0] == 500.0
+
+
+def test_realtime_mode_restores_state():
+    affinity = os.sched_getaffinity(0)
+    policy = os.sched_getscheduler(0)
+    assert gc.isenabled()
+
+    with realtime_mode.RealtimeMode(priority=10) as rt:
+        assert not gc.isenabled()
+        assert "cpu" in rt.applied or "cpu_error" in rt.applied
+        assert "sched_fifo" in rt.applied or "sched_fifo_error" in rt.applied
+
+    assert gc.isenabled()
+    assert os.sched_getaffinity(0) == affinity
+    assert os.sched_getscheduler(0) == policy
+    print(f"\nRealtime settings applied: {rt.applied}")
+
+
+def test_daemon_streams_telemetry():
+    daemon = cue_daemon.CueDaemon(port=0, loopback=True)
+    threading.Thread(target=daemon.serve_forever, daemon=True).start()
+    client = PiDaemonClient()
+    assert client.connect_socket(*daemon.address)
+
+    try:
+        show = spaced_show(100, 5)
+        assert client.request("execute_show", show=show, realtime=True)["status"] == "success"
+
+        streamed = []
+        sequence = 0
+        deadline = time.time() + 5.0
+        while time.time() < deadline:
+            response = client.request("show_telemetry", since=sequence)
+            sequence = response["sequence"]
+            streamed.extend(response["lateness_us"])
+            if not response["show_running"] and len(streamed) == 100:
+                break
+            time.sleep(0.05)
+
+        assert len(streamed) == 100
+        result = client.request("status")["daemon"]["last_show_result"]
+        assert result["status"] == "success"
+        assert result["timing_stats"]["lateness"]["samples"] == 100
+        assert "realtime" in result["timing_stats"]
+    finally:
+        client.close()
+        daemon.shutdown()
+
+
+def test_lateness_comparison(frames=400, spacing_ms=2):
+    """Same show through the standard and real-time loops (loopback GPIO)"""
+    cue_daemon.load_gpio_backend(loopback=True)
+    import execute_show
+
+    show = spaced_show(frames, spacing_ms)
+    print()
+    for realtime in (False, True):
+        result = execute_show.execute_show(show, realtime=realtime)
+        lateness = result["timing_stats"]["lateness"]
+        print(f"{'realtime' if realtime else 'standard':9s} p50 {lateness['p50_ms'] * 1000:7.1f}us  "
+              f"p99 {lateness['p99_ms'] * 1000:7.1f}us  p999 {lateness['p999_ms'] * 1000:7.1f}us  "
+              f"max {lateness['max_ms'] * 1000:7.1f}us")
+        assert lateness["samples"] == frames
+
+
+if __name__ == "__main__":
+    test_recorder_percentiles_and_wrap()
+    test_realtime_mode_restores_state()
+    test_daemon_streams_telemetry()
+    test_lateness_comparison()
+    print("All realtime mode tests passed.")
@@ -0,0 +1,111 @@
+"""
+Test script for the show timeline compiler.
+
+Checks RUN expansion, same-timestamp merging, packed register images and the
+show-hash cache, then replays the compiled frames through the mock shift
+register backend.
+
+Usage:
+    python test_show_compiler.py
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent / "raspberry_pi"))
+
+import show_compiler
+from parallel_shifter import MockShiftBackend, ParallelShifter
+
+
+def create_test_show():
+    return {"cues": [
+        {"type": "SINGLE SHOT", "output": 1, "time": 0},
+        {"type": "DOUBLE SHOT", "output1": 9, "output2": 201, "time": 500},
+        {"type": "SINGLE RUN", "start_output": 401, "end_output": 404, "delay": 100, "time": 1000},
+        {"type": "DOUBLE RUN", "start_output1": 601, "end_output1": 602,
+         "start_output2": 801, "end_output2": 803, "delay": 50, "time": 1000},
+        {"type": "SINGLE SHOT", "output": 2, "time": 500},
+    ]}
+
+
+def test_frames_are_expanded_and_merged():
+    compiled = show_compiler.compile_show(create_test_show())
+
+    expected_ms = [0, 500, 1000, 1050, 1100, 1200, 1300]
+    assert list(compiled.times_ns) == [ms * 1_000_000 for ms in expected_ms]
+
+    # 500ms frame merges the DOUBLE SHOT and the second SINGLE SHOT (chains 0 and 1)
+    assert compiled.chain_masks[1] == 0b00011
+    # 1000ms frame holds the first RUN step plus the first DOUBLE RUN pair (chains 2, 3, 4)
+    assert compiled.chain_masks[2] == 0b11100
+
+    # Outputs 1, 2 and 9 are on in chain 0 after the 500ms frame (MSB = first output)
+    image = compiled.chain_image(1, 0)
+    assert image[0] == 0b11000000
+    assert image[1] == 0b10000000
+
+
+def test_replay_matches_expected_outputs():
+    compiled = show_compiler.compile_show(create_test_show())
+    backend = MockShiftBackend()
+    shifter = ParallelShifter(backend)
+
+    for frame_index in range(compiled.frame_count):
+        shifter.shift_chains(compiled.frame_bits(frame_index))
+
+    fired = set()
+    for chain, bits in enumerate(backend.latched):
+        fired.update(chain * 200 + i + 1 for i, bit in enumerate(bits) if bit)
+
+    assert fired == {1, 2, 9, 201, 401, 402, 403, 404, 601, 602, 801, 802, 803}
+
+
+def test_cache_round_trip():
+    show = create_test_show()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        compiled, hit = show_compiler.load_or_compile(show, cache_dir=cache_dir)
+        assert not hit
+
+        cached, hit = show_compiler.load_or_compile(show, cache_dir=cache_dir)
+        assert hit
+        assert list(cached.times_ns) == list(compiled.times_ns)
+        assert list(cached.chain_masks) == list(compiled.chain_masks)
+        assert cached.images == compiled.images
+        assert cached.cue_count == len(show["cues"])
+
+
+def test_compile_time_large_show(num_cues=5000):
+    """Compile cost moves out of the realtime loop; cache hits skip it entirely"""
+    show = {"cues": [
+        {"type": "SINGLE SHOT", "output": (i % 1000) + 1, "time": i * 20}
+        for i in range(num_cues)
+    ]}
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        compiled, hit = show_compiler.load_or_compile(show, cache_dir=cache_dir)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        _, hit = show_compiler.load_or_compile(show, cache_dir=cache_dir)
+        cached_ms = (time.perf_counter() - start) * 1000
+        assert hit
+
+    start = time.perf_counter()
+    for frame_index in range(compiled.frame_count):
+        compiled.frame_bits(frame_index)
+    unpack_us = (time.perf_counter() - start) * 1e6 / compiled.frame_count
+
+    print(f"\n{num_cues} cues -> {compiled.frame_count} frames: compile {compile_ms:.1f}ms, "
+          f"cache hit {cached_ms:.1f}ms, frame unpack {unpack_us:.1f}us (done before the wait)")
+
+
+if __name__ == "__main__":
+    test_frames_are_expanded_and_merged()
+    test_replay_matches_expected_outputs()
+    test_cache_round_trip()
+    test_compile_time_large_show()
+    print("All show compiler tests passed.")
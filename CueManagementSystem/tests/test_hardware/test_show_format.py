@@ -0,0 +1,193 @@
+"""
+Test script for the packed binary show format.
+
+Encodes shows with ShiftRegisterFormatter.format_show(), decodes them with the
+Pi-side PackedShow reader and checks the frames against show_compiler, the
+cue table round trip and corruption detection. Prints size and parse
+benchmarks against the JSON upload for a 1000-output, 5000-cue show.
+
+Usage:
+    python test_show_format.py
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent / "raspberry_pi"))
+
+import show_compiler
+from raspberry_pi import show_format
+from views.managers.shift_register_formatter_manager import ShiftRegisterConfig, ShiftRegisterFormatter
+
+
+def create_formatter():
+    config = ShiftRegisterConfig(num_registers=125, max_simultaneous_outputs=50,
+                                 num_chains=5, registers_per_chain=25, outputs_per_chain=200)
+    return ShiftRegisterFormatter(config)
+
+
+def create_test_show():
+    return [
+        {"type": "SINGLE SHOT", "output": 1, "time": 0, "duration": 500},
+        {"type": "DOUBLE SHOT", "output1": 9, "output2": 201, "time": 500, "duration": 500},
+        {"type": "SINGLE RUN", "start_output": 401, "end_output": 404, "delay": 100, "time": 1000,
+         "duration": 500},
+        {"type": "DOUBLE RUN", "start_output1": 601, "end_output1": 602,
+         "start_output2": 801, "end_output2": 803, "delay": 50, "time": 1000, "duration": 500},
+        {"type": "SINGLE SHOT", "output": 2, "time": 500.25, "duration": 500},
+    ]
+
+
+def create_large_show(num_cues=5000, seed=3):
+    """Synthetic 1000-output show, every output type represented"""
+    rng = random.Random(seed)
+    cues = []
+    for i in range(num_cues):
+        time_ms = i * 20
+        kind = i % 4
+        if kind == 0:
+            cues.append({"type": "SINGLE SHOT", "output": rng.randint(1, 1000), "time": time_ms, "duration": 500})
+        elif kind == 1:
+            cues.append({"type": "DOUBLE SHOT", "output1": rng.randint(1, 500), "output2": rng.randint(501, 1000),
+                         "time": time_ms, "duration": 500})
+        elif kind == 2:
+            start = rng.randint(1, 990)
+            cues.append({"type": "SINGLE RUN", "start_output": start, "end_output": start + 5,
+                         "delay": 50, "time": time_ms, "duration": 500})
+        else:
+            start = rng.randint(1, 495)
+            cues.append({"type": "DOUBLE RUN", "start_output1": start, "end_output1": start + 3,
+                         "start_output2": start + 500, "end_output2": start + 503,
+                         "delay": 50, "time": time_ms, "duration": 500})
+    return cues
+
+
+def assert_frames_match(packed, compiled):
+    assert packed.frame_count == compiled.frame_count
+    assert list(packed.times_ns) == list(compiled.times_ns)
+    assert list(packed.chain_masks) == list(compiled.chain_masks)
+    for frame_index in range(compiled.frame_count):
+        assert packed.frame_bits(frame_index) == compiled.frame_bits(frame_index)
+
+
+def test_round_trip_matches_compiler():
+    cues = create_test_show()
+    packet = create_formatter().format_show(cues)
+    packed = show_format.PackedShow(packet.register_data)
+
+    assert packet.metadata["frame_count"] == packed.frame_count
+    assert_frames_match(packed, show_compiler.compile_show({"cues": cues}))
+
+    # Cue table comes back in Pi format (shots carry no delay)
+    assert packed.cues() == cues
+
+
+def test_corruption_is_detected():
+    data = bytearray(create_formatter().format_show(create_test_show()).register_data)
+
+    for corrupt in (data[:-1], data[:40]):
+        try:
+            show_format.PackedShow(bytes(corrupt))
+            assert False, "Truncated show accepted"
+        except show_format.ShowFormatError:
+            pass
+
+    data[show_format.HEADER.size + 3] ^= 0xFF
+    try:
+        show_format.PackedShow(bytes(data))
+        assert False, "Corrupted show accepted"
+    except show_format.ShowFormatError as e:
+        assert "checksum" in str(e)
+
+
+def test_invalid_cues_are_rejected():
+    formatter = create_formatter()
+    for cue in ({"type": "SINGLE SHOT", "output": 1001, "time": 0},
+                {"type": "DOUBLE SHOT", "output1": 1, "time": 0},
+                {"type": "BOUQUET", "output": 1, "time": 0}):
+        try:
+            formatter.format_show([cue])
+            assert False, f"Invalid cue accepted: {cue}"
+        except ValueError:
+            pass
+
+
+def test_long_cue_duration_round_trip():
+    """Durations beyond 65.535 s must survive the cue table"""
+    cues = [{"type": "SINGLE SHOT", "output": 1, "time": 0, "duration": 180000}]
+    packed = show_format.PackedShow(create_formatter().format_show(cues).register_data)
+    assert packed.cues() == cues
+
+    try:
+        show_format.pack_cue({"type": "SINGLE SHOT", "output": 1, "time": 0, "duration": -1})
+        assert False, "Negative duration accepted"
+    except ValueError:
+        pass
+
+
+def test_pi_plays_packed_file():
+    """execute_show.py loads a .cpsb upload and plays it without compiling"""
+    import cue_daemon
+    cue_daemon.load_gpio_backend(loopback=True)
+    import execute_show
+
+    packet = create_formatter().format_show(create_test_show())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "show" + show_format.FILE_EXTENSION)
+        with open(path, 'wb') as f:
+            f.write(packet.register_data)
+
+        # The Pi scripts import show_format flat, as they do on the Pi
+        show = execute_show.load_show_file(path)
+        assert isinstance(show, execute_show.show_format.PackedShow)
+
+        result = execute_show.execute_show(show)
+        assert result["status"] == "success"
+        assert result["timing_stats"]["packed_show"]
+        assert result["timing_stats"]["total_frames"] == show.frame_count
+
+
+def test_large_show_benchmark(num_cues=5000):
+    cues = create_large_show(num_cues)
+    formatter = create_formatter()
+
+    start = time.perf_counter()
+    packet = formatter.format_show(cues)
+    encode_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    show_json = json.dumps({"cues": cues})
+    json_encode_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    packed = show_format.PackedShow(packet.register_data)
+    decode_ms = (time.perf_counter() - start) * 1000
+
+    # JSON path on the Pi: parse, then compile the frames before the show can start
+    start = time.perf_counter()
+    compiled = show_compiler.compile_show(json.loads(show_json))
+    json_ready_ms = (time.perf_counter() - start) * 1000
+
+    assert_frames_match(packed, compiled)
+    assert packed.cues() == cues
+
+    print(f"\n{num_cues} cues, {packed.frame_count} frames")
+    print(f"Size:   JSON {len(show_json) / 1024:7.1f} KB | packed {len(packet.register_data) / 1024:7.1f} KB")
+    print(f"Encode: JSON {json_encode_ms:7.1f} ms | packed {encode_ms:7.1f} ms (desktop, includes frames)")
+    print(f"Ready:  JSON {json_ready_ms:7.1f} ms | packed {decode_ms:7.3f} ms (Pi, parse + compile vs decode)")
+
+
+if __name__ == "__main__":
+    test_round_trip_matches_compiler()
+    test_corruption_is_detected()
+    test_invalid_cues_are_rejected()
+    test_long_cue_duration_round_trip()
+    test_pi_plays_packed_file()
+    test_large_show_benchmark()
+    print("All show format tests passed.")
@@ -0,0 +1,194 @@
+"""
+Test script for the cue store behind the cue table.
+
+Checks that execute times and the derived table columns parsed once by the
+cue store match the string parsing they replace, that syncing re-parses only
+new or changed rows, the cue number and time indexes, and that the preview
+controllers read the store. Prints the cost of painting the table columns
+against parsing on every data() call. The benchmark only runs when
+CUE_RUN_BENCHMARKS=1 is set (or when the script is run directly).
+
+Usage:
+    python test_cue_store.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_cue_store.py -s
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from controllers.show_preview_controller import ShowPreviewController
+from controllers.vr_preview_controller import VRPreviewController
+from models.cue_store import CueStore, parse_cue_row, parse_execute_time_ms
+from views.table.cue_table import _DISPLAY_ROLE, CueTableModel
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+CUE_TYPES = ["SINGLE SHOT", "DOUBLE SHOT", "SINGLE RUN", "DOUBLE RUN"]
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_rows(count, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for number in range(1, count + 1):
+        outputs = ",".join(map(str, sorted(set(rng.integers(1, 1001, rng.integers(1, 8)).tolist()))))
+        seconds = float(rng.uniform(0, 600))
+        execute_time = f"{int(seconds // 60):02d}:{seconds % 60:05.2f}"
+        rows.append([number, CUE_TYPES[number % 4], outputs, round(float(rng.uniform(0, 1)), 2), execute_time])
+    return rows
+
+
+def old_display(row, col):
+    """Reference: the table's columns 2, 5 and 6 as data() computed them from the strings"""
+    if col == 2:
+        try:
+            return str(len(row[2].split(',')) if row[2] else 0)
+        except:
+            return "0"
+    if col == 5:
+        if "SHOT" in row[1]:
+            return "0.00s"
+        try:
+            num_outputs = len(row[2].split(',')) if row[2] else 0
+            return f"{(num_outputs - 1) * float(row[3]):.2f}s"
+        except:
+            return "0.00s"
+    minutes, seconds = row[4].split(':')
+    return f"{minutes}:{seconds}" if '.' in row[4] else f"{minutes}:{seconds}.00"
+
+
+class StringParsingModel(CueTableModel):
+    """Reference: the table model parsing the strings on every data() call"""
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == _DISPLAY_ROLE and index.row() < len(self._data) and index.column() in (2, 5, 6):
+            return old_display(self._data[index.row()], index.column())
+        return super().data(index, role)
+
+
+def old_time_to_seconds(time_str):
+    """Reference: ShowPreviewController._time_to_seconds before the cue store"""
+    try:
+        minutes, seconds = time_str.split(':')
+        return int(minutes) * 60 + float(seconds)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def test_parsed_values_match_strings():
+    for text, ms in (("00:01.0000", 1000), ("1:30.5", 90500), ("02:03", 123000), ("00:01:30.500", 90500),
+                     ("12.25", 12250), (7, 7000), ("bad", 0), (None, 0), ("1:2:3:4", 0)):
+        assert parse_execute_time_ms(text) == ms, text
+
+    rows = create_rows(300) + [[301, "SINGLE RUN", "", 0.5, "00:10"], [302, "DOUBLE RUN", "1,2;3,4", "0.25", "0:05.5"],
+                               [303, "SINGLE RUN", "5,6", "x", "00:02.00"]]
+    model = CueTableModel()
+    model._data = rows
+    model.layoutChanged.emit()
+    for row, cue in enumerate(rows):
+        for col in (2, 5, 6):
+            assert model.data(model.index(row, col), Qt.DisplayRole) == old_display(cue, col), (cue, col)
+        assert abs(model.cue_store.execute_ms[row] / 1000.0 - old_time_to_seconds(cue[4])) < 5e-4
+    np.testing.assert_array_equal(parse_cue_row(rows[301]).outputs, [1, 2, 3, 4])
+
+
+def test_sync_parses_only_changed_rows():
+    rows = create_rows(200)
+    store = CueStore(rows)
+    assert store.sync(rows) == 0
+
+    rows[5] = list(rows[5])  # New row object
+    rows[9][4] = "09:59.99"  # Field replaced in place
+    rows[12].append({'shell_name': 'red_peony'})  # Visual properties don't affect parsing
+    rows.append([201, "SINGLE SHOT", "7", 0.0, "00:00.50"])
+    assert store.sync(rows) == 3
+    assert store.execute_ms[9] == 599990 and store.execute_ms[200] == 500
+
+    # The table model syncs on every edit
+    model = CueTableModel()
+    model.add_cues_batch(create_rows(50))
+    model.add_cue([51, "DOUBLE SHOT", "1,2", 0.0, "00:01.00"])
+    assert model.cue_store.rows is model._data and model.cue_store.sync(model._data) == 0
+    model.remove_cue(3)
+    assert len(model.cue_store) == 50 and model.cue_store.position_of(3) is None
+
+
+def test_indexes_match_list_scans():
+    rows = create_rows(500, seed=2)
+    rows[40][4] = rows[41][4]  # Equal times keep table order
+    store = CueStore(rows)
+
+    assert store.rows_by_time() == sorted(rows, key=lambda x: old_time_to_seconds(x[4]))
+    for number in (1, 250, 500, "17", 9999):
+        expected = next((i for i, row in enumerate(rows) if row[0] == int(number)), None)
+        assert store.position_of(number) == expected
+
+    ordered = store.rows_by_time()
+    first, last = store.time_span(60000, 120000)
+    assert ordered[first:last] == [row for row in ordered if 60 <= old_time_to_seconds(row[4]) <= 120]
+    assert store.last_execute_ms() == max(store.execute_ms)
+
+
+def test_preview_controllers_read_store():
+    model = CueTableModel()
+    model.add_cues_batch(create_rows(100, seed=3))
+
+    preview = ShowPreviewController()
+    preview.load_cues(model.cue_store)
+    assert preview.cues == model._data and preview.cues is not model._data
+    assert preview.sorted_cues == sorted(model._data, key=lambda x: old_time_to_seconds(x[4]))
+    assert preview.get_total_duration() == max(old_time_to_seconds(row[4]) for row in model._data)
+    active = preview.get_active_cues_at_time(200.0)
+    assert active == [row for row in preview.sorted_cues if old_time_to_seconds(row[4]) <= 200.0]
+
+    # A plain list of rows still works
+    preview.load_cues(list(model._data))
+    assert preview.sorted_cues == sorted(model._data, key=lambda x: old_time_to_seconds(x[4]))
+
+    vr = VRPreviewController()
+    vr.start_preview(model.cue_store)
+    assert vr.preview_cues == model._data
+    assert vr._get_last_cue_time() == max(old_time_to_seconds(row[4]) for row in model._data)
+    vr.stop_preview()
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_table_paint_times(rows=1000, repeats=5):
+    """Columns 2, 5 and 6 of every row: parsing in data() vs the cue store"""
+    results = []
+    for model in (StringParsingModel(), CueTableModel()):
+        model.add_cues_batch(create_rows(rows, seed=4))
+        indexes = [model.index(row, col) for row in range(rows) for col in (2, 5, 6)]
+        role = Qt.DisplayRole
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for index in indexes:
+                model.data(index, role)
+        results.append((time.perf_counter() - start) / repeats)
+    old_seconds, store_seconds = results
+
+    print(f"\n{rows} rows, 3 derived columns")
+    print(f"String parsing: {old_seconds * 1000:7.2f} ms per table paint")
+    print(f"Cue store:      {store_seconds * 1000:7.2f} ms per table paint")
+    assert store_seconds < old_seconds
+
+
+if __name__ == "__main__":
+    test_parsed_values_match_strings()
+    test_sync_parses_only_changed_rows()
+    test_indexes_match_list_scans()
+    test_preview_controllers_read_store()
+    test_table_paint_times()
+    print("All cue store tests passed.")
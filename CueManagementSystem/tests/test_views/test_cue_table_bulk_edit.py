@@ -0,0 +1,208 @@
+"""
+Test script for bulk edits of the cue table.
+
+Checks that edits inside CueTableModel.bulk_edit() leave the table, cue store
+and LED panel in the same state as the same edits made one at a time, with
+one layoutChanged and one LED panel update per block, that set_cues resets
+the model once, that show import and the musical generator go through one
+update, and prints the time of a 5000-cue import. The benchmark only runs
+when CUE_RUN_BENCHMARKS=1 is set (or when the script is run directly).
+
+Usage:
+    python test_cue_table_bulk_edit.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_cue_table_bulk_edit.py -s
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QTableView
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from views.led_panel.led_canvas import LED_STATE_TYPES, cue_data_states
+from views.managers.led_panel_manager import LedPanelManager
+from views.table.cue_table import CueTableModel
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+CUE_TYPES = LED_STATE_TYPES[1:5]
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_cue(number, rng):
+    outputs = sorted(set(rng.integers(1, 1001, rng.integers(1, 12)).tolist()))
+    seconds = float(rng.uniform(0, 600))
+    return [number, CUE_TYPES[number % 4], ",".join(map(str, outputs)), 0.5,
+            f"{int(seconds // 60):02d}:{seconds % 60:05.2f}"]
+
+
+def create_cues(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [create_cue(number + 1, rng) for number in range(count)]
+
+
+class CountingLedPanel(LedPanelManager):
+    """LED panel counting its updates"""
+
+    def __init__(self):
+        super().__init__()
+        self.updates = 0
+
+    def updateFromCueData(self, cue_data, force_refresh=False):
+        self.updates += 1
+        super().updateFromCueData(cue_data, force_refresh=force_refresh)
+
+    def apply_led_changes(self, numbers, codes, cue_data=None):
+        self.updates += 1
+        super().apply_led_changes(numbers, codes, cue_data=cue_data)
+
+
+def create_model(cues=()):
+    model = CueTableModel()
+    model.led_panel = CountingLedPanel()
+    model.set_cues([list(cue) for cue in cues])
+    model.led_panel.updates = 0
+    signals = {'layout': 0, 'reset': 0}
+    model.layoutChanged.connect(lambda *args: signals.__setitem__('layout', signals['layout'] + 1))
+    model.modelReset.connect(lambda: signals.__setitem__('reset', signals['reset'] + 1))
+    return model, signals
+
+
+def panel_states(model):
+    return model.led_panel.get_current_grid().canvas.states
+
+
+def edit(model, rng, steps):
+    """Mixed adds, updates, removes and moves"""
+    for step in range(steps):
+        action = step % 4
+        if action == 0:
+            model.add_cue(create_cue(1000 + step, rng))
+        elif action == 1:
+            row = int(rng.integers(len(model._data)))
+            model.update_cue(row, create_cue(model._data[row][0], rng))
+        elif action == 2:
+            model.remove_cue(model._data[int(rng.integers(len(model._data)))][0])
+        else:
+            model.moveRow(int(rng.integers(len(model._data))), int(rng.integers(len(model._data) + 1)))
+
+
+def test_bulk_edit_notifies_once():
+    model, signals = create_model(create_cues(300, seed=1))
+    events = []
+    model.cue_outputs_changed.connect(lambda old, new: events.append((old, new)))
+
+    with model.bulk_edit():
+        edit(model, np.random.default_rng(2), 40)
+        with model.bulk_edit():  # Nested blocks join the outer one
+            model.add_cues_batch([create_cue(5000, np.random.default_rng(3))])
+        assert signals['layout'] == 0 and model.led_panel.updates == 0 and not events
+
+    assert signals == {'layout': 1, 'reset': 0} and model.led_panel.updates == 1 and len(events) == 1
+    np.testing.assert_array_equal(panel_states(model), cue_data_states(model._data, 1000))
+    assert model.cue_store.rows is model._data and model.cue_store.sync(model._data) == 0
+
+    # A block without edits notifies nobody
+    with model.bulk_edit():
+        pass
+    assert signals['layout'] == 1 and model.led_panel.updates == 1
+
+
+def test_bulk_edit_same_result_as_single_edits():
+    cues = create_cues(300, seed=1)
+    single, _ = create_model(cues)
+    edit(single, np.random.default_rng(2), 80)
+
+    bulk, signals = create_model(cues)
+    with bulk.bulk_edit():
+        edit(bulk, np.random.default_rng(2), 80)
+    assert bulk._data == single._data and signals['layout'] == 1 and bulk.led_panel.updates == 1
+    np.testing.assert_array_equal(panel_states(bulk), panel_states(single))
+    np.testing.assert_array_equal(bulk.cue_store.execute_ms, single.cue_store.execute_ms)
+
+    # Removing a cue number that appears twice removes both rows
+    bulk.add_cue([7, "SINGLE SHOT", "999", 0.0, "00:01.00"])
+    bulk.remove_cue(7)
+    assert all(row[0] != 7 for row in bulk._data) and bulk.cue_store.position_of(7) is None
+    np.testing.assert_array_equal(panel_states(bulk), cue_data_states(bulk._data, 1000))
+
+
+def test_set_cues_resets_once():
+    model, signals = create_model(create_cues(200, seed=4))
+    events = []
+    model.cue_outputs_changed.connect(lambda old, new: events.append((old, new)))
+    old_outputs = model._output_index.all_outputs()
+
+    cues = create_cues(500, seed=5)
+    model.set_cues(cues)
+    assert model._data == cues and model._data is not cues
+    assert signals == {'layout': 0, 'reset': 1} and model.led_panel.updates == 1
+    assert events == [(old_outputs, model._output_index.all_outputs())]
+    np.testing.assert_array_equal(panel_states(model), cue_data_states(cues, 1000))
+    assert len(model.cue_store) == 500 and model.cue_store.position_of(250) == 249
+
+    # Clear and add inside one block (generator output)
+    model.led_panel.updates = 0
+    with model.bulk_edit():
+        model.set_cues([])
+        model.add_cues_batch(create_cues(50, seed=6))
+    assert signals == {'layout': 1, 'reset': 2} and model.led_panel.updates == 1
+    np.testing.assert_array_equal(panel_states(model), cue_data_states(model._data, 1000))
+    assert len(model.cue_store) == 50
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_import_times(count=5000, per_row_count=1000):
+    """
+    Import of 5000 cues into a viewed table: one add_cue per row vs one bulk edit
+
+    Row by row takes tens of seconds for all 5000 cues (every row a layout
+    pass and an LED update), so that path only imports the first 1000.
+    """
+    results = {}
+    for name in ("add_cue per row", "bulk_edit", "set_cues"):
+        model, signals = create_model()
+        view = QTableView()
+        view.setModel(model)
+        cues = create_cues(per_row_count if name == "add_cue per row" else count, seed=7)
+        rows = [list(cue) for cue in cues]
+
+        start = time.perf_counter()
+        if name == "add_cue per row":
+            for row in rows:
+                model.add_cue(row)
+        elif name == "bulk_edit":
+            with model.bulk_edit():
+                for row in rows:
+                    model.add_cue(row)
+        else:
+            model.set_cues(rows)
+        app.processEvents()
+        results[name] = time.perf_counter() - start
+
+        assert model._data == cues
+        np.testing.assert_array_equal(panel_states(model), cue_data_states(cues, 1000))
+        view.deleteLater()
+
+    print(f"\n{count}-cue import into a viewed table")
+    print(f"add_cue per row: {results['add_cue per row'] * 1000:9.1f} ms for the first {per_row_count} cues")
+    print(f"      bulk_edit: {results['bulk_edit'] * 1000:9.1f} ms")
+    print(f"       set_cues: {results['set_cues'] * 1000:9.1f} ms")
+    assert results["bulk_edit"] < results["add_cue per row"]
+    assert results["set_cues"] < results["add_cue per row"]
+
+
+if __name__ == "__main__":
+    test_bulk_edit_notifies_once()
+    test_bulk_edit_same_result_as_single_edits()
+    test_set_cues_resets_once()
+    test_import_times()
+    print("All cue table bulk edit tests passed.")
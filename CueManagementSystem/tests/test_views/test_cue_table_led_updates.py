@@ -0,0 +1,170 @@
+"""
+Test script for incremental LED panel updates from cue table edits.
+
+Checks the output -> cue reverse index of CueTableModel against parsing the
+whole cue list, that add/update/remove/move edits leave the LED panel in the
+same state as a full refresh while repainting only the LEDs of the edited
+cue, the change signal, the fallback when the cue list is replaced directly,
+and prints the time of one cue edit in a 1000-cue show. The benchmark only
+runs when CUE_RUN_BENCHMARKS=1 is set (or when the script is run directly).
+
+Usage:
+    python test_cue_table_led_updates.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_cue_table_led_updates.py -s
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from views.led_panel.led_canvas import LED_STATE_TYPES, cue_data_states
+from views.managers.led_panel_manager import LedPanelManager
+from views.table.cue_output_index import CueOutputIndex
+from views.table.cue_table import CueTableModel
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+CUE_TYPES = LED_STATE_TYPES[1:5]
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_cue(number, rng):
+    outputs = sorted(set(rng.integers(1, 1001, rng.integers(1, 12)).tolist()))
+    cue_type = CUE_TYPES[number % 4]
+    if cue_type == "DOUBLE RUN" and len(outputs) > 1:
+        half = len(outputs) // 2
+        text = ",".join(map(str, outputs[:half])) + ";" + ",".join(map(str, outputs[half:]))
+    else:
+        text = ",".join(map(str, outputs))
+    return [number, cue_type, text, 0.5, "0:00.00"]
+
+
+def create_model(count, seed=0):
+    rng = np.random.default_rng(seed)
+    model = CueTableModel()
+    model.led_panel = LedPanelManager()
+    model._data = [create_cue(number + 1, rng) for number in range(count)]
+    model.update_led_panel(force_refresh=True)
+    return model, rng
+
+
+def panel_states(model):
+    grid = model.led_panel.get_current_grid()
+    return grid.canvas.states if hasattr(grid, 'canvas') else grid.led_states
+
+
+def test_output_index_matches_full_parse():
+    rng = np.random.default_rng(1)
+    rows = [create_cue(number, rng) for number in range(300)]
+    index = CueOutputIndex()
+    index.rebuild(rows)
+    expected = cue_data_states(rows, 1000)
+
+    numbers, codes = index.resolve(range(1, 1001))
+    np.testing.assert_array_equal(numbers, np.arange(1, 1001))
+    np.testing.assert_array_equal(codes, expected[1:])
+
+    # Edits keep the index equal to a rebuilt one
+    index.remove(10)
+    del rows[10]
+    rows.insert(3, create_cue(500, rng))
+    index.insert(3, rows[3])
+    index.move(0, 250)
+    rows.insert(250, rows.pop(0))
+    old, new = index.replace(7, create_cue(501, rng))
+    rows[7] = index.rows[7]
+    assert old and new == index.outputs_of(7)
+    assert index.matches(rows) and not index.matches(list(reversed(rows)))
+    np.testing.assert_array_equal(index.resolve(range(1, 1001))[1], cue_data_states(rows, 1000)[1:])
+
+
+def test_edits_match_full_refresh():
+    for view in ("traditional", "grouped"):
+        model, rng = create_model(400)
+        model.led_panel.switch_to_view(view)
+        events = []
+        model.cue_outputs_changed.connect(lambda old, new: events.append((old, new)))
+
+        for step in range(60):
+            action = step % 5
+            if action == 0:
+                model.add_cue(create_cue(1000 + step, rng))
+            elif action == 1:
+                row = int(rng.integers(len(model._data)))
+                model.update_cue(row, create_cue(model._data[row][0], rng))
+            elif action == 2:
+                model.remove_cue(model._data[int(rng.integers(len(model._data)))][0])
+            elif action == 3:
+                model.moveRow(int(rng.integers(len(model._data))), int(rng.integers(len(model._data) + 1)))
+            else:
+                model.add_cues_batch([create_cue(2000 + step * 3 + i, rng) for i in range(3)])
+            np.testing.assert_array_equal(panel_states(model), cue_data_states(model._data, 1000))
+
+        assert len(events) >= 55  # Moves onto the same row emit nothing
+        assert model.led_panel.current_cue_data is model._data
+
+
+def test_edit_repaints_only_its_leds():
+    model, rng = create_model(1000)
+    canvas = model.led_panel.traditional_grid.canvas
+    updated = []
+    canvas.update_leds = lambda numbers: updated.extend(int(n) for n in numbers)
+    events = []
+    model.cue_outputs_changed.connect(lambda old, new: events.append((old, new)))
+
+    row = 500
+    old_outputs = model._output_index.outputs_of(row)
+    model.update_cue(row, [model._data[row][0], "DOUBLE SHOT", "1,2,3", 0.5, "0:00.00"])
+    assert events == [(old_outputs, frozenset({1, 2, 3}))]
+    assert set(updated) <= old_outputs | {1, 2, 3}
+    np.testing.assert_array_equal(canvas.states, cue_data_states(model._data, 1000))
+
+    # A cue list replaced directly (show load) is picked up with a full update
+    model._data = model._data[::-1]
+    model.led_panel.updateFromCueData(model._data, force_refresh=True)
+    model.update_cue(0, [1, "SINGLE RUN", "999,1000", 0.5, "0:00.00"])
+    np.testing.assert_array_equal(canvas.states, cue_data_states(model._data, 1000))
+    assert model._output_index.matches(model._data)
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_edit_times(edits=50):
+    """Time of one cue edit in a 1000-cue show: full refresh vs output index"""
+    model, rng = create_model(1000)
+    rows = rng.integers(0, 1000, edits)
+    replacements = [create_cue(int(model._data[row][0]), rng) for row in rows]
+
+    start = time.perf_counter()
+    for row, cue in zip(rows, replacements):
+        model._data[row] = cue
+        model.led_panel.updateFromCueData(model._data)
+    full_seconds = (time.perf_counter() - start) / edits
+
+    start = time.perf_counter()
+    for row, cue in zip(rows, replacements[::-1]):
+        model.update_cue(int(row), list(cue))
+    incremental_seconds = (time.perf_counter() - start) / edits
+    np.testing.assert_array_equal(panel_states(model), cue_data_states(model._data, 1000))
+
+    print(f"\n1000 cues, {edits} single-cue edits")
+    print(f"Full refresh: {full_seconds * 1000:7.3f} ms per edit")
+    print(f"Output index: {incremental_seconds * 1000:7.3f} ms per edit")
+    assert incremental_seconds < full_seconds
+
+
+if __name__ == "__main__":
+    test_output_index_matches_full_parse()
+    test_edits_match_full_refresh()
+    test_edit_repaints_only_its_leds()
+    test_edit_times()
+    print("All cue table LED update tests passed.")
@@ -0,0 +1,201 @@
+"""
+Test script for the batched-painting LED canvas.
+
+Checks that LedGrid and LedGridGrouped keep the LED numbering, cue parsing
+and LedWidget-style per-LED interface on top of the NumPy state array, that
+a canvas LED looks like a LedWidget, that state changes repaint only the
+changed cells, and prints cue updates per second against a grid of 1000
+LedWidgets. The benchmark only runs when CUE_RUN_BENCHMARKS=1 is set (or
+when the script is run directly).
+
+Usage:
+    python test_led_canvas.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_led_canvas.py -s
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QRect
+from PySide6.QtWidgets import QApplication, QGridLayout, QSizePolicy, QWidget
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from views.led_panel.led_canvas import LED_STATE_TYPES, LedCanvas
+from views.led_panel.led_grid import LedGrid
+from views.led_panel.led_grid_grouped import LedGridGrouped
+from views.led_panel.led_widget import LedWidget
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_cues(count, seed=0):
+    """Cue rows in table format [number, type, shots, outputs, delay, duration, time]"""
+    rng = np.random.default_rng(seed)
+    cue_types = LED_STATE_TYPES[1:5]
+    cues = []
+    for number in range(count):
+        outputs = sorted(set(rng.integers(1, 1001, rng.integers(1, 12)).tolist()))
+        cues.append([number + 1, cue_types[number % 4], ",".join(map(str, outputs)), 0.5, 0.0, "0:00"])
+    return cues
+
+
+def image_array(image):
+    """Channels of a 32-bit image as an int array"""
+    return np.frombuffer(image.constBits(), np.uint8).reshape(image.height(), image.bytesPerLine())[
+        :, :image.width() * 4].astype(np.int16)
+
+
+class RecordingCanvas(LedCanvas):
+    """Canvas that records the rectangles it repaints"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.painted = []
+
+    def paintEvent(self, event):
+        self.painted.extend(event.region())
+        super().paintEvent(event)
+
+
+class WidgetGrid(QWidget):
+    """Reference: the previous LedGrid with one LedWidget per output"""
+
+    def __init__(self):
+        super().__init__()
+        layout = QGridLayout(self)
+        layout.setSpacing(2)
+        layout.setContentsMargins(2, 2, 2, 2)
+        self.leds = {}
+        for number in range(1, 1001):
+            led = LedWidget(number)
+            led.setMinimumSize(10, 10)
+            led.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+            layout.addWidget(led, (number - 1) // 25, (number - 1) % 25)
+            self.leds[number] = led
+
+    def updateFromCueData(self, cue_data):
+        for led in self.leds.values():
+            led.setState(None)
+        for cue in cue_data:
+            for output in [int(x) for x in cue[2].split(',')]:
+                self.leds[output].setState(cue[1])
+
+
+def test_grid_states_and_led_interface():
+    grid = LedGrid()
+    cues = [[1, "SINGLE SHOT", "1,2,3"], [2, "DOUBLE RUN", "3,4;5,6"], [3, "SINGLE RUN", "1000,1001,x"],
+            [4, "DOUBLE SHOT", 7]]  # Invalid outputs are skipped like before
+    grid.updateFromCueData(cues)
+
+    assert grid.leds[1].cue_type == "SINGLE SHOT" and grid.leds[3].cue_type == "DOUBLE RUN"  # Later cue wins
+    assert grid.leds[6].is_active and grid.leds[1000].cue_type == "SINGLE RUN" and not grid.leds[7].is_active
+    assert int(np.count_nonzero(grid.canvas.states)) == 7
+
+    # LedWidget-style access used by the animation and preview controllers
+    grid.leds[10].setState("DOUBLE SHOT")
+    grid.leds[1].is_active = False
+    grid.leds[2].cue_type = None
+    assert grid.leds[10].cue_type == "DOUBLE SHOT" and not grid.leds[1].is_active and not grid.leds[2].is_active
+    grid.leds[11].setState("CUSTOM")  # Unknown types stay active (drawn without a body, like LedWidget)
+    assert grid.leds[11].is_active and grid.leds[11].cue_type == "CUSTOM"
+
+    grid.reset_all_leds()
+    assert not grid.canvas.states.any()
+
+    # Grouped view: bottom-to-top columns of 10 per group, one state array shared by all groups
+    grouped = LedGridGrouped()
+    group = grouped.led_groups[2]
+    assert group.canvas.led_numbers[9, 0] == 101 and group.canvas.led_numbers[0, 4] == 150
+    assert grouped.leds is grouped.leds and len(grouped.leds) == 1000
+    grouped.updateFromCueData(cues)
+    assert grouped.leds[3].cue_type == "DOUBLE RUN" and grouped.leds[1000].is_active
+    assert group.states is grouped.led_states
+    grouped.reset_all_leds()
+    assert not grouped.led_states.any()
+
+
+def test_sprites_match_led_widget():
+    canvas = LedCanvas(np.array([[1, 2]]), spacing=0, margin=0)
+    canvas.resize(80, 40)
+    canvas.set_state(2, "SINGLE RUN")
+    image = canvas.grab().toImage()
+
+    for number in (1, 2):
+        widget = LedWidget(number)
+        widget.setStyleSheet("background-color: #1a1a2e;")
+        widget.setFixedSize(40, 40)
+        widget.setState(canvas.leds[number].cue_type)
+        expected = widget.grab().toImage().convertToFormat(image.format())
+        # Sprites are composited from a transparent pixmap: equal up to rounding
+        assert np.abs(image_array(image.copy(canvas.led_rect(number))) - image_array(expected)).max() <= 2
+
+
+def test_dirty_rect_repaints():
+    numbers = np.arange(1, 1001).reshape(40, 25)
+    canvas = RecordingCanvas(numbers)
+    canvas.resize(800, 600)
+    canvas.show()
+    app.processEvents()
+    canvas.painted.clear()
+
+    canvas.leds[27].setState("SINGLE SHOT")
+    canvas.leds[27].setState("SINGLE SHOT")  # No change, no repaint
+    canvas.set_state(500, "DOUBLE SHOT")
+    app.processEvents()
+    painted = canvas.painted
+    assert painted and all(rect.width() * rect.height() < 800 * 600 // 10 for rect in painted)
+    assert any(rect.contains(canvas.led_rect(27)) for rect in painted)
+
+    # Bulk updates repaint only the LEDs whose state changed
+    states = canvas.states.copy()
+    states[[27, 500, 501]] = [0, 2, 4]
+    canvas.painted.clear()
+    canvas.set_states(states)
+    app.processEvents()
+    covered = QRect()
+    for rect in canvas.painted:
+        covered = covered.united(rect)
+    assert covered.contains(canvas.led_rect(27)) and covered.contains(canvas.led_rect(501))
+    assert not covered.intersects(canvas.led_rect(1000))
+    canvas.close()
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_update_rate(updates=30):
+    """Cue updates per second (state change and repaint): LedWidget grid vs canvas"""
+    cue_sets = [create_cues(40, seed) for seed in range(updates)]
+    results = {}
+    for name, grid in (("LedWidget grid", WidgetGrid()), ("LED canvas", LedGrid())):
+        grid.resize(900, 700)
+        grid.show()
+        app.processEvents()
+
+        start = time.perf_counter()
+        for cues in cue_sets:
+            grid.updateFromCueData(cues)
+            app.processEvents()
+        results[name] = updates / (time.perf_counter() - start)
+        grid.close()
+
+    print(f"\n1000 LEDs, {updates} cue updates of 40 cues")
+    for name, rate in results.items():
+        print(f"{name:>15}: {rate:8.1f} updates/s")
+    assert results["LED canvas"] > results["LedWidget grid"]
+
+
+if __name__ == "__main__":
+    test_grid_states_and_led_interface()
+    test_sprites_match_led_widget()
+    test_dirty_rect_repaints()
+    test_update_rate()
+    print("All LED canvas tests passed.")
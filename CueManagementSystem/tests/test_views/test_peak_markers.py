@@ -0,0 +1,236 @@
+"""
+Test script for the sorted peak index behind the waveform view's peak markers.
+
+Checks PeakIndex range/nearest queries and incremental insert/remove against
+brute force, that WaveformView's visible peaks, hit tests and manual peak
+edits and WaveformAnalyzer.get_peak_markers give the same results as the
+linear scans they replace, and prints the per-frame cost with thousands of
+peaks. The benchmark only runs when CUE_RUN_BENCHMARKS=1 is set (or when the
+script is run directly).
+
+Usage:
+    python test_peak_markers.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_peak_markers.py -s
+"""
+
+import os
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtWidgets import QApplication
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.audio.peak_index import PeakIndex
+from utils.audio.waveform_analyzer import Peak, WaveformAnalyzer
+from views.waveform.waveform_widget import WaveformView
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+ManualPeak = namedtuple('Peak', ['position', 'time', 'amplitude', 'segment', 'is_manual'])
+
+SAMPLE_RATE = 44100
+TYPES = ['generic', 'kick', 'snare', 'hi-hat', 'tom', 'cymbal']
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_peaks(count, seconds, seed=3):
+    rng = np.random.default_rng(seed)
+    times = np.sort(rng.uniform(0, seconds, count))
+    return [Peak(float(t), amplitude=float(rng.uniform(0.1, 1.0)), confidence=float(rng.uniform(0.5, 1.0)),
+                 type=TYPES[rng.integers(len(TYPES))]) for t in times]
+
+
+def create_manual_peaks(count, total_samples, seed=5):
+    rng = np.random.default_rng(seed)
+    positions = rng.integers(0, total_samples, count)  # Placement order, not sorted
+    return [ManualPeak(int(p), p / SAMPLE_RATE, 0.5, 2, True) for p in positions]
+
+
+def create_view(seconds=60, peak_count=2000, width=1000, height=240):
+    rng = np.random.default_rng(9)
+    analyzer = WaveformAnalyzer()
+    analyzer.waveform_data = [rng.normal(0, 0.2, seconds * SAMPLE_RATE).astype(np.float32)]
+    analyzer.sample_rate = SAMPLE_RATE
+    analyzer.duration_seconds = float(seconds)
+    analyzer.peaks = create_peaks(peak_count, seconds)
+
+    view = WaveformView()
+    view.set_analyzer(analyzer)
+    view.resize(width, height)
+    return view
+
+
+def linear_visible_peaks(view, rect):
+    """Reference: the linear scan WaveformView used before the index"""
+    peaks = list(view.analyzer.peaks)
+    total_samples = len(view.analyzer.waveform_data[0])
+    samples_per_pixel = total_samples / (rect.width() * view.zoom_factor)
+    visible_start = int(view.offset * total_samples)
+    visible_end = int(visible_start + rect.width() * samples_per_pixel)
+    if view.max_peak_count is not None and view.max_peak_count > 0:
+        peaks = sorted(peaks, key=lambda p: p.prominence, reverse=True)[:view.max_peak_count]
+    visible = [p for p in peaks if visible_start <= int(p.position * SAMPLE_RATE) <= visible_end]
+    return sorted(visible, key=lambda p: p.position)
+
+
+def linear_hit(view, peaks, x, rect, to_sample, skip=()):
+    """Reference: first peak (in list order) whose marker is within 10 px of x"""
+    total_samples = len(view.analyzer.waveform_data[0])
+    samples_per_pixel = total_samples / (rect.width() * view.zoom_factor)
+    for i, peak in enumerate(peaks):
+        if i in skip:
+            continue
+        peak_x = int((to_sample(peak) - view.offset * total_samples) / samples_per_pixel)
+        if abs(x - (rect.left() + peak_x)) <= 10:
+            return i
+    return False
+
+
+def test_peak_index_queries():
+    rng = np.random.default_rng(1)
+    peaks = create_peaks(500, 30)
+    rng.shuffle(peaks)
+    index = PeakIndex(peaks)
+
+    assert np.all(np.diff(index.keys) >= 0) and len(index) == 500
+    assert [peaks[i] for i in index.source_indices] == index.peaks
+    for low, high in ((0.0, 30.0), (3.2, 3.9), (12.0, 11.0), (29.99, 40.0)):
+        first, last = index.span(low, high)
+        assert set(map(id, index.peaks[first:last])) == {id(p) for p in peaks if low <= p.time <= high}
+
+    target = 17.123
+    nearest = index.nearest(target)
+    assert abs(index.keys[nearest] - target) == min(abs(p.time - target) for p in peaks)
+    assert index.nearest(-5.0, tolerance=1.0) is None
+
+    # Top N by prominence, ties in list order like sorted(..., reverse=True)[:N]
+    expected = sorted(peaks, key=lambda p: p.prominence, reverse=True)[:40]
+    assert {id(index.peaks[i]) for i in np.flatnonzero(index.top_by_prominence(40))} == set(map(id, expected))
+
+    # Incremental edits keep the order and the caller's list indices in step
+    manual = create_manual_peaks(50, 30 * SAMPLE_RATE)
+    manual_index = PeakIndex([], key=lambda peak: int(peak.position))
+    for peak in manual:
+        manual_index.insert(peak)
+    for removed in (7, 0, 30, 46):
+        assert manual_index.remove_source_index(removed) is manual[removed]
+        del manual[removed]
+    rebuilt = PeakIndex(manual, key=lambda peak: int(peak.position))
+    np.testing.assert_array_equal(manual_index.keys, rebuilt.keys)
+    assert [manual[i] for i in manual_index.source_indices] == manual_index.peaks
+
+
+def test_view_matches_linear_scan():
+    view = create_view()
+    rect = QRect(45, 10, 1000, 200)
+    rng = np.random.default_rng(2)
+    view.hidden_detected_peaks = {5, 6, 700}
+
+    for zoom, offset, max_count in ((1.0, 0.0, None), (6.0, 0.37, None), (25.0, 0.8, None), (4.0, 0.1, 300)):
+        view.zoom_factor, view.offset, view.max_peak_count = zoom, offset, max_count
+        view._update_visible_peaks(rect)
+        assert view.visible_peaks == linear_visible_peaks(view, rect)
+
+        for x in rng.integers(rect.left() - 20, rect.right() + 20, 60):
+            expected = linear_hit(view, view.analyzer.peaks, x, rect, lambda p: int(p.position * SAMPLE_RATE),
+                                  view.hidden_detected_peaks)
+            assert view._is_detected_peak_at_position(x, 0, rect) == expected
+
+    # Manual peaks: added and deleted through the view, or assigned as a new list
+    view.zoom_factor, view.offset = 8.0, 0.25
+    total_samples = len(view.analyzer.waveform_data[0])
+    view.manual_peaks = create_manual_peaks(200, total_samples)
+    for x in rng.integers(rect.left(), rect.right(), 60):
+        expected = linear_hit(view, view.manual_peaks, x, rect, lambda p: int(p.position))
+        assert view._is_manual_peak_at_position(x, 0, rect) == expected
+
+    view._delete_manual_peak_at_index(3)
+    view.manual_peaks.append(ManualPeak(int(total_samples * 0.26), 0.26 * view.analyzer.duration_seconds, 0.4, 1, True))
+    view._get_manual_peak_index().insert(view.manual_peaks[-1])
+    index = view._get_manual_peak_index()
+    assert len(index) == 200 and [view.manual_peaks[i] for i in index.source_indices] == index.peaks
+
+    peaks, x_positions, _ = view._get_visible_manual_markers(rect, total_samples)
+    samples_per_pixel = total_samples / (rect.width() * view.zoom_factor)
+    expected = {id(p) for p in view.manual_peaks
+                if 0 <= int((int(p.position) - view.offset * total_samples) / samples_per_pixel) <= rect.width()}
+    assert set(map(id, peaks)) == expected and len(x_positions) == len(peaks)
+
+    # Markers paint from the cached geometry
+    image = QImage(1100, 260, QImage.Format_ARGB32_Premultiplied)
+    image.fill(0)
+    painter = QPainter(image)
+    view._draw_peak_markers(painter, rect)
+    painter.end()
+    assert view._peak_geometry['detected'][0][-1] == view.zoom_factor
+    assert image.pixelColor(rect.left() + x_positions[0], rect.center().y()).alpha() > 0
+
+
+def test_analyzer_peak_markers():
+    view = create_view()
+    analyzer = view.analyzer
+    for offset, zoom in ((0.0, 1.0), (12.5, 8.0), (59.0, 2.0)):
+        markers = analyzer.get_peak_markers(800, 200, offset, zoom)
+        visible_duration = analyzer.duration_seconds / zoom
+        expected = [p for p in analyzer.peaks if offset <= p.time <= offset + visible_duration]
+        assert [m['time'] for m in markers] == [p.time for p in expected]
+        assert [m['x'] for m in markers] == [int((p.time - offset) / visible_duration * 800) for p in expected]
+        assert [m['color'] for m in markers] == [analyzer._get_color_for_peak_type(p.type) for p in expected]
+
+    # A new peak list is picked up
+    analyzer.peaks = analyzer.peaks[:10]
+    assert len(analyzer.get_peak_markers(800, 200)) == 10
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_marker_frame_times(peak_count=5000, manual_count=500, frames=50):
+    """Per-frame marker work while panning: linear scans vs the sorted index"""
+    view = create_view(seconds=600, peak_count=peak_count)
+    rect = QRect(45, 10, 1600, 260)
+    total_samples = len(view.analyzer.waveform_data[0])
+    view.manual_peaks = create_manual_peaks(manual_count, total_samples)
+    view.zoom_factor = 20.0
+    offsets = 0.3 + np.arange(frames) * 0.0005
+
+    start = time.perf_counter()
+    for offset in offsets:
+        view.offset = offset
+        linear_visible_peaks(view, rect)
+        samples_per_pixel = total_samples / (rect.width() * view.zoom_factor)
+        [int((int(p.position) - offset * total_samples) / samples_per_pixel) for p in view.manual_peaks]
+        linear_hit(view, view.manual_peaks, rect.center().x(), rect, lambda p: int(p.position))
+        linear_hit(view, view.analyzer.peaks, rect.center().x(), rect, lambda p: int(p.position * SAMPLE_RATE))
+    linear_seconds = (time.perf_counter() - start) / frames
+
+    start = time.perf_counter()
+    for offset in offsets:
+        view.offset = offset
+        view._update_visible_peaks(rect)
+        view._get_visible_detected_markers(rect, total_samples)
+        view._get_visible_manual_markers(rect, total_samples)
+        view._is_manual_peak_at_position(rect.center().x(), 0, rect)
+        view._is_detected_peak_at_position(rect.center().x(), 0, rect)
+    index_seconds = (time.perf_counter() - start) / frames
+
+    print(f"\n{peak_count} detected + {manual_count} manual peaks, zoom {view.zoom_factor}, {frames} frames")
+    print(f"Linear scans: {linear_seconds * 1000:7.3f} ms per frame")
+    print(f"Peak index:   {index_seconds * 1000:7.3f} ms per frame")
+    assert index_seconds < linear_seconds
+
+
+if __name__ == "__main__":
+    test_peak_index_queries()
+    test_view_matches_linear_scan()
+    test_analyzer_peak_markers()
+    test_marker_frame_times()
+    print("All peak marker tests passed.")
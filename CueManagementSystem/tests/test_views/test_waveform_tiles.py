@@ -0,0 +1,209 @@
+"""
+Test script for the tiled waveform cache of WaveformView.
+
+Checks that tiles line up to the same image as rendering the whole view at
+once, the LRU memory budget, that panning renders only newly exposed tiles
+(playhead moves render none) and the background tile prefetch. Prints the
+frame time of panning with tiles against re-rendering the whole view. The
+benchmark only runs when CUE_RUN_BENCHMARKS=1 is set (or when the script is
+run directly).
+
+Usage:
+    python test_waveform_tiles.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_waveform_tiles.py -s
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QImage, QPainter, QPixmap
+from PySide6.QtWidgets import QApplication
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.audio.waveform_analyzer import WaveformAnalyzer
+from utils.audio.waveform_pyramid import WaveformPyramid
+from views.waveform.enhanced_waveform_renderer import (
+    ColorScheme, ProfessionalWaveformRenderer, RenderingConfig, WaveformRenderMode
+)
+from views.waveform.waveform_tiles import (
+    TILE_WIDTH, TileKey, WaveformTileCache, render_tile_image, samples_per_column
+)
+from views.waveform.waveform_widget import BackgroundRenderer, WaveformView
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_signal(seconds, sample_rate=44100, seed=4):
+    """Noise bed with a louder, brighter burst every 0.25 s"""
+    rng = np.random.default_rng(seed)
+    signal = rng.normal(0, 0.05, int(seconds * sample_rate)).astype(np.float32)
+    burst = (rng.normal(0, 0.4, 3000) * np.exp(-np.linspace(0, 5, 3000))).astype(np.float32)
+    for start in range(0, len(signal) - len(burst), sample_rate // 4):
+        signal[start:start + len(burst)] += burst
+    return signal
+
+
+def create_view(signal, width=1000, height=240):
+    analyzer = WaveformAnalyzer()
+    analyzer.waveform_data = [signal]
+    analyzer.sample_rate = 44100
+    analyzer.duration_seconds = len(signal) / 44100
+    analyzer.waveform_pyramid = WaveformPyramid(signal)
+
+    view = WaveformView()
+    view.set_analyzer(analyzer)
+    view.resize(width, height)
+    return view
+
+
+def paint_waveform(view, rect):
+    image = QImage(rect.width() + rect.left(), rect.height() + rect.top(), QImage.Format_ARGB32_Premultiplied)
+    image.fill(0)
+    painter = QPainter(image)
+    view._draw_professional_waveform(painter, rect)
+    painter.end()
+    return image
+
+
+def test_tiles_match_full_view():
+    signal = create_signal(20)
+    config = RenderingConfig(mode=WaveformRenderMode.FREQUENCY_BANDS, color_scheme=ColorScheme.FREQUENCY_BASED,
+                             smoothing_factor=0.0)
+    renderer = ProfessionalWaveformRenderer(config)
+    width, height, zoom = 700, 160, 6.0
+    spc = samples_per_column(len(signal), width, zoom)
+
+    # View starting 300 columns into the track, so it spans three partial and full tiles
+    view_column = 300
+    offset = (view_column * spc + 0.5) / len(signal)
+    expected = renderer.render_waveform_image(renderer.render_waveform(signal, 44100, width, height, offset, zoom),
+                                              width, height)
+
+    composed = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    composed.fill(0)
+    painter = QPainter(composed)
+    for index in range(view_column // TILE_WIDTH, (view_column + width - 1) // TILE_WIDTH + 1):
+        key = TileKey(spc, index, config.mode, config.color_scheme, height)
+        tile = render_tile_image(renderer, signal, 44100, len(signal), key)
+        assert tile.width() == TILE_WIDTH and tile.height() == height
+        painter.drawImage(index * TILE_WIDTH - view_column, 0, tile)
+    painter.end()
+
+    # Outline joins between tiles included, the tiled image is the whole-view image. Only the
+    # whole view closes its outline at the view edges, tiles close it at the ends of the track
+    assert composed.copy(1, 0, width - 2, height) == expected.copy(1, 0, width - 2, height)
+
+    # Tiles after the end of the track are not rendered
+    last = TileKey(spc, len(signal) // (spc * TILE_WIDTH) + 1, config.mode, config.color_scheme, height)
+    assert render_tile_image(renderer, signal, 44100, len(signal), last) is None
+
+
+def test_tile_cache_budget():
+    pixmap = QPixmap(TILE_WIDTH, 100)
+    tile_bytes = TILE_WIDTH * 100 * pixmap.depth() // 8
+    cache = WaveformTileCache(max_bytes=3 * tile_bytes)
+    keys = [TileKey(64, index, WaveformRenderMode.BASIC_MINMAX, ColorScheme.CLASSIC_BLUE, 100) for index in range(5)]
+
+    for key in keys[:3]:
+        cache.put(key, QPixmap(pixmap))
+    assert cache.get(keys[0]) is not None  # Most recently used now
+    cache.put(keys[3], QPixmap(pixmap))
+
+    assert keys[1] not in cache and keys[0] in cache and keys[2] in cache and keys[3] in cache
+    assert cache.size_bytes() == 3 * tile_bytes and cache.get_stats()['evictions'] == 1
+    assert cache.get(keys[4]) is None and cache.get_stats()['misses'] == 1
+    cache.clear()
+    assert len(cache) == 0 and cache.size_bytes() == 0
+
+
+def test_pan_renders_only_new_tiles():
+    signal = create_signal(30)
+    view = create_view(signal)
+    view.zoom_factor = 4.0
+    rect = QRect(45, 10, 900, 200)
+    spc = samples_per_column(len(signal), rect.width(), view.zoom_factor)
+    view.offset = (3 * TILE_WIDTH * spc + 0.5) / len(signal)  # Tile-aligned view: tiles 3-6 visible
+
+    paint_waveform(view, rect)
+    assert view.waveform_cache.get_stats()['misses'] == 4 and len(view.waveform_cache) == 4
+
+    # Playhead and mouse marker updates reuse every tile
+    view.current_position = 0.5
+    paint_waveform(view, rect)
+    assert view.waveform_cache.get_stats()['misses'] == 4
+
+    # Panning one tile to the right exposes exactly one new tile
+    view.offset += TILE_WIDTH * spc / len(signal)
+    paint_waveform(view, rect)
+    stats = view.waveform_cache.get_stats()
+    assert stats['misses'] == 5 and stats['hits'] == 4 + 3
+
+    # Neighbours of the viewport are queued for the background renderer
+    waveform_data, total_samples, keys = view._pending_tile_prefetch
+    assert sorted(key.index for key in keys) == [2, 8, 9]  # Tile 3 is still cached
+    prefetch = BackgroundRenderer(view.prefetch_renderer, waveform_data, 44100, total_samples, keys)
+    prefetch.tile_rendered.connect(view._on_background_render_complete)
+    view.prefetch_renderer.config = view.rendering_config
+    prefetch.run()  # Synchronously; the thread runs the same loop
+    assert all(key in view.waveform_cache for key in keys)
+
+    # Prefetched tiles are drawn without rendering when the view pans onto them
+    view.offset += 2 * TILE_WIDTH * spc / len(signal)
+    paint_waveform(view, rect)
+    assert view.waveform_cache.get_stats()['misses'] == 5
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_pan_frame_times(seconds=600, width=1920, height=300):
+    """Frame time while panning: tiles (one new tile every few frames) vs whole-view render"""
+    signal = create_signal(seconds)
+    view = create_view(signal, width + 55, height + 30)
+    view.zoom_factor = 8.0
+    rect = QRect(45, 10, width, height)
+    spc = samples_per_column(len(signal), width, view.zoom_factor)
+    renderer = ProfessionalWaveformRenderer(RenderingConfig())
+    renderer.set_pyramid(view.analyzer.waveform_pyramid)
+
+    step = 16 * spc / len(signal)  # 16 px per frame
+    start_offset = 0.3
+    frames = 32
+
+    tiled, full = [], []
+    first_frame_tiles = 0
+    for frame in range(frames):
+        view.offset = start_offset + frame * step
+        start = time.perf_counter()
+        paint_waveform(view, rect)
+        tiled.append(time.perf_counter() - start)
+        if frame == 0:
+            first_frame_tiles = view.waveform_cache.get_stats()['misses']
+
+        start = time.perf_counter()
+        rendered = renderer.render_waveform([signal], 44100, width, height, view.offset, view.zoom_factor)
+        renderer.render_waveform_image(rendered, width, height)
+        full.append(time.perf_counter() - start)
+
+    print(f"\n{seconds}s track, {width}x{height}, zoom {view.zoom_factor}, 16 px per frame, {frames} frames")
+    print(f"Tiled:      first {tiled[0] * 1000:7.2f} ms | median {np.median(tiled[1:]) * 1000:7.2f} ms")
+    print(f"Whole view: first {full[0] * 1000:7.2f} ms | median {np.median(full[1:]) * 1000:7.2f} ms")
+    print(f"Tiles rendered after the first frame: {view.waveform_cache.get_stats()['misses'] - first_frame_tiles}")
+    assert np.median(tiled[1:]) < np.median(full[1:])
+
+
+if __name__ == "__main__":
+    test_tiles_match_full_view()
+    test_tile_cache_budget()
+    test_pan_renders_only_new_tiles()
+    test_pan_frame_times()
+    print("All waveform tile tests passed.")
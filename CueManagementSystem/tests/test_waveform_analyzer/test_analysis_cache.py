@@ -0,0 +1,152 @@
+"""
+Test script for the on-disk waveform analysis cache.
+
+Checks stage storage and chained keys, LRU size eviction and that
+WaveformAnalyzer reruns only the stages downstream of a changed setting
+on a few seconds of audio. Printing the time of a cold and a fully cached
+analysis of a 20 s track only runs when CUE_RUN_BENCHMARKS=1 is set (or
+when the script is run directly).
+
+Usage:
+    python test_analysis_cache.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_analysis_cache.py -s
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from utils.audio import analysis_cache
+from utils.audio.analysis_cache import AnalysisCache, AudioHasher, hash_audio
+from test_streaming_load import write_test_track
+
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def test_stages_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AnalysisCache(tmp)
+        signal = np.linspace(-1, 1, 48000, dtype=np.float32)
+        peaks = [{'time': np.float64(1.5), 'amplitude': np.float32(0.5), 'type': 'kick',
+                  'original_methods': ('madmom_rnn', 'merged')}]
+
+        assert cache.load_array("preprocessed-x") is None and cache.load_peaks("onsets-x") is None
+        cache.store_array("preprocessed-x", signal)
+        cache.store_peaks("onsets-x", peaks)
+
+        np.testing.assert_array_equal(cache.load_array("preprocessed-x"), signal)
+        assert cache.load_peaks("onsets-x") == [{'time': 1.5, 'amplitude': 0.5, 'type': 'kick',
+                                                'original_methods': ['madmom_rnn', 'merged']}]
+        stats = cache.get_stats()
+        assert (stats['hits'], stats['misses'], stats['stores'], stats['entries']) == (2, 2, 2, 2)
+
+        # Unreadable entries count as misses and are removed
+        with open(os.path.join(tmp, "onsets-y.json"), "w") as f:
+            f.write("{truncated")
+        assert cache.load_peaks("onsets-y") is None
+        assert not os.path.exists(os.path.join(tmp, "onsets-y.json"))
+
+
+def test_keys_chain_and_hash_is_incremental():
+    samples = np.random.default_rng(1).normal(size=10000).astype(np.float32)
+    hasher = AudioHasher()
+    for start in range(0, len(samples), 3000):
+        hasher.update(samples[start:start + 3000])
+    audio_key = hasher.hexdigest(44100)
+    assert audio_key == hash_audio(samples, 44100) != hash_audio(samples, 48000)
+
+    config = {'noise_reduction': True, 'onset_methods': ['hfc']}
+    first = AnalysisCache.stage_key(audio_key, 'preprocessed', config, ['noise_reduction'])
+    second = AnalysisCache.stage_key(first, 'onsets', config, ['onset_methods'])
+
+    # Unrelated keys do not change a stage key, an upstream change changes every later key
+    assert AnalysisCache.stage_key(audio_key, 'preprocessed', dict(config, onset_methods=[]),
+                                   ['noise_reduction']) == first
+    changed = AnalysisCache.stage_key(audio_key, 'preprocessed', dict(config, noise_reduction=False),
+                                      ['noise_reduction'])
+    assert changed != first
+    assert AnalysisCache.stage_key(changed, 'onsets', config, ['onset_methods']) != second
+
+
+def test_lru_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AnalysisCache(tmp, max_size_mb=1.1)
+        block = np.zeros(100000, dtype=np.float32)  # ~0.4 MB per entry
+
+        for i, name in enumerate(("a", "b")):
+            cache.store_array(name, block)
+            os.utime(os.path.join(tmp, f"{name}.npz"), (1000 + i, 1000 + i))
+
+        # Touching "a" makes "b" the least recently used entry
+        assert cache.load_array("a") is not None
+        cache.store_array("c", block)
+
+        assert cache.get_stats()['evictions'] == 1
+        assert cache.load_array("b") is None
+        assert cache.load_array("a") is not None and cache.load_array("c") is not None
+        assert cache.size_bytes() <= cache.max_size_bytes
+
+
+def check_analyzer_reuses_unchanged_stages(seconds):
+    """Cold, cached and partly cached analyses of a click track; returns the cold and cached times"""
+    from utils.audio.waveform_analyzer import WaveformAnalyzer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "drums.wav")
+        write_test_track(path, seconds, channels=1)
+        previous = analysis_cache._analysis_cache
+        analysis_cache._analysis_cache = AnalysisCache(os.path.join(tmp, "cache"))
+
+        def analyze(**config):
+            analyzer = WaveformAnalyzer()
+            analyzer.config.update(multi_threading=False, use_visual_validation=False, **config)
+            assert analyzer.load_file(path)
+            start = time.perf_counter()
+            analyzer.process_waveform()
+            return analyzer, time.perf_counter() - start
+
+        try:
+            cold, cold_seconds = analyze()
+            assert set(cold.analysis_cache_stages.values()) == {'miss'}
+
+            warm, warm_seconds = analyze()
+            assert set(warm.analysis_cache_stages.values()) == {'hit'}
+            assert [p.time for p in warm.peaks] == [p.time for p in cold.peaks]
+
+            # Onset setting changed: preprocessing is reused, onsets and later stages rerun
+            changed, _ = analyze(use_madmom_beat_tracking=False)
+            assert changed.analysis_cache_stages == {'preprocessed': 'hit', 'onsets': 'miss',
+                                                     'refined': 'miss', 'classified': 'miss'}
+
+            summary = changed.get_analysis_summary()['analysis_cache']
+            assert summary['enabled'] and summary['hits'] == 5 and summary['misses'] == 7
+            return cold_seconds, warm_seconds
+        finally:
+            analysis_cache._analysis_cache = previous
+
+
+def test_analyzer_reuses_unchanged_stages():
+    check_analyzer_reuses_unchanged_stages(4)
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_cached_analysis_times(seconds=20):
+    cold_seconds, warm_seconds = check_analyzer_reuses_unchanged_stages(seconds)
+    print(f"\n{seconds}s analysis: cold {cold_seconds * 1000:.1f} ms | cached {warm_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    test_stages_round_trip()
+    test_keys_chain_and_hash_is_incremental()
+    test_lru_eviction()
+    test_analyzer_reuses_unchanged_stages()
+    test_cached_analysis_times()
+    print("All analysis cache tests passed.")
@@ -0,0 +1,106 @@
+"""
+Test script for the vectorized drum classifier.
+
+Builds a synthetic kick/snare/hi-hat pattern, checks that
+DrumClassifier.classify_drum_hits_batch returns the same labels and
+confidences as calling classify_drum_hit for every hit (including hits at
+the very start and end of the signal) and prints the peaks-per-second
+throughput of both paths. The benchmark only runs when CUE_RUN_BENCHMARKS=1
+is set (or when the script is run directly).
+
+Usage:
+    python test_drum_classifier_batch.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_drum_classifier_batch.py -s
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.audio.waveform_analyzer import DrumClassificationModel, DrumClassifier
+
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_drum_pattern(seconds, sample_rate=44100, bpm=120, seed=3):
+    """Kick on the beat, snare on the backbeat, hi-hat on every eighth note"""
+    rng = np.random.default_rng(seed)
+    signal = rng.normal(0, 0.002, int(seconds * sample_rate)).astype(np.float32)
+    t = np.arange(int(0.12 * sample_rate)) / sample_rate
+
+    kick = np.sin(2 * np.pi * (55 + 90 * np.exp(-t * 30)) * t) * np.exp(-t * 25)
+    snare = 0.5 * np.sin(2 * np.pi * 190 * t) * np.exp(-t * 30) + rng.normal(0, 0.4, len(t)) * np.exp(-t * 20)
+    noise = np.diff(rng.normal(0, 0.6, len(t) + 1))  # High-passed noise
+    hihat = noise * np.exp(-t * 60)
+
+    eighth = 60 / bpm / 2
+    times, kinds = [], []
+    for index, hit_time in enumerate(np.arange(0, seconds - 0.12, eighth)):
+        kind = ('kick', 'hi-hat', 'snare', 'hi-hat')[index % 4]
+        sample = hit_time * sample_rate
+        start = int(sample)
+        shape = {'kick': kick, 'snare': snare, 'hi-hat': hihat}[kind]
+        signal[start:start + len(t)] += shape.astype(np.float32)
+        times.append(hit_time + 0.01)
+        kinds.append(kind)
+    return signal, sample_rate, times, kinds
+
+
+def classify_each(signal, sample_rate, times):
+    """Reference: one classify_drum_hit call per hit on a fresh classifier"""
+    classifier = DrumClassifier(DrumClassificationModel())
+    return [classifier.classify_drum_hit(signal, sample_rate, hit_time) for hit_time in times], classifier
+
+
+def test_batch_matches_per_hit():
+    signal, sample_rate, times, _ = create_drum_pattern(8)
+    # Clipped windows at both edges and one outside the signal
+    times = [0.0, 0.02] + times + [len(signal) / sample_rate - 0.01, len(signal) / sample_rate + 1.0]
+
+    expected, reference = classify_each(signal, sample_rate, times)
+    classifier = DrumClassifier(DrumClassificationModel())
+    classifier.BATCH_SIZE = 7  # Several strided batches
+    result = classifier.classify_drum_hits_batch(signal, sample_rate, times)
+
+    assert [label for label, _ in result] == [label for label, _ in expected]
+    np.testing.assert_allclose([c for _, c in result], [c for _, c in expected], rtol=1e-6)
+    assert result[-1] == ('generic', 0.5)
+
+    # Context history carries over to the next call exactly as with per-hit calls
+    assert [c[0] for c in classifier.previous_classifications] == [c[0] for c in reference.previous_classifications]
+    more = [1.01, 2.26, 3.51]
+    assert [l for l, _ in classifier.classify_multiple_hits(signal, sample_rate, more)] == \
+           [reference.classify_drum_hit(signal, sample_rate, t)[0] for t in more]
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_batch_throughput(seconds=30):
+    signal, sample_rate, times, kinds = create_drum_pattern(seconds)
+
+    start = time.perf_counter()
+    expected, _ = classify_each(signal, sample_rate, times)
+    per_hit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = DrumClassifier(DrumClassificationModel()).classify_drum_hits_batch(signal, sample_rate, times)
+    batch_seconds = time.perf_counter() - start
+
+    assert [label for label, _ in result] == [label for label, _ in expected]
+    matches = sum(label == kind for (label, _), kind in zip(result, kinds))
+
+    print(f"\n{len(times)} hits, {matches} labelled as synthesized")
+    print(f"Per-hit: {len(times) / per_hit_seconds:8.1f} peaks/s")
+    print(f"Batch:   {len(times) / batch_seconds:8.1f} peaks/s")
+    assert batch_seconds < per_hit_seconds
+
+
+if __name__ == "__main__":
+    test_batch_matches_per_hit()
+    test_batch_throughput()
+    print("All drum classifier batch tests passed.")
@@ -0,0 +1,197 @@
+"""
+Test script for the shared feature plan of the waveform analysis.
+
+Checks that FeaturePlan features match computing them directly with librosa,
+that the NumPy STFT matches librosa's framing, that the byte budget evicts
+least recently used features and lets go of their signals, that the
+AdvancedSignalProcessor stages share their STFTs, and that a full
+process_waveform run computes each STFT once.
+Prints the time of the spectral stages with and without a shared plan. The
+benchmark only runs when CUE_RUN_BENCHMARKS=1 is set (or when the script is
+run directly).
+
+Usage:
+    python test_feature_plan.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_feature_plan.py -s
+"""
+
+import os
+import sys
+import tempfile
+import time
+import weakref
+from pathlib import Path
+
+import librosa
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from utils.audio.feature_plan import FeaturePlan, numpy_stft
+from utils.audio.waveform_analyzer import AdvancedSignalProcessor, WaveformAnalyzer
+from test_streaming_load import write_test_track
+
+SR = 22050
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_signal(seconds=4.0, seed=0):
+    rng = np.random.default_rng(seed)
+    signal = rng.normal(0, 0.05, int(seconds * SR)).astype(np.float32)
+    signal[::SR // 3] = 0.9  # Clicks
+    return signal
+
+
+def test_features_match_librosa():
+    signal = create_signal()
+    plan = FeaturePlan(SR)
+    stft = librosa.stft(signal, n_fft=2048, hop_length=512)
+
+    np.testing.assert_array_equal(plan.stft(signal, 2048, 512), stft)
+    np.testing.assert_array_equal(plan.magnitude(signal, 2048, 512), np.abs(stft))
+    np.testing.assert_array_equal(plan.power(signal, 2048, 512), np.abs(stft) ** 2)
+    np.testing.assert_array_equal(plan.phase(signal, 2048, 512), np.angle(stft))
+    np.testing.assert_allclose(plan.mel(signal, 2048, 512), librosa.feature.melspectrogram(y=signal, sr=SR),
+                               rtol=1e-5)
+    np.testing.assert_allclose(plan.onset_strength(signal, lag=1, max_size=3),
+                               librosa.onset.onset_strength(y=signal, sr=SR, lag=1, max_size=3), rtol=1e-4,
+                               atol=1e-4)
+    np.testing.assert_allclose(plan.spectral_flux(signal, 2048, 512),
+                               AdvancedSignalProcessor.spectral_flux(stft), rtol=1e-5)
+
+    bands = [(50, 200), (5000, 10000)]
+    freqs = librosa.fft_frequencies(sr=SR, n_fft=2048)
+    expected = [np.sum(np.abs(stft[(freqs >= low) & (freqs <= high)]) ** 2, axis=0) for low, high in bands]
+    np.testing.assert_allclose(plan.band_energies(signal, bands), expected, rtol=1e-5)
+
+    # One FFT for everything above; the default hop is n_fft // 4
+    assert plan.ffts == 1 and plan.reused['power'] >= 2
+    assert plan.stft(signal, 2048) is plan.stft(signal, 2048, 512) and plan.ffts == 1
+    plan.stft(signal.copy(), 2048, 512)  # Another array is another signal
+    assert plan.ffts == 2
+
+    for center in (True, False):
+        np.testing.assert_allclose(numpy_stft(signal, 1024, 256, center=center),
+                                   librosa.stft(signal, n_fft=1024, hop_length=256, center=center), atol=1e-3)
+
+
+def test_byte_budget():
+    signal = create_signal(2.0)
+    stft_bytes = librosa.stft(signal, n_fft=1024, hop_length=256).nbytes
+    plan = FeaturePlan(SR, max_bytes=int(stft_bytes * 1.8))
+
+    plan.stft(signal, 1024, 256)
+    plan.magnitude(signal, 1024, 256)  # Half the size of the STFT
+    plan.stft(signal, 1024, 256)  # Most recently used
+    plan.stft(signal, 1024, 512)  # Half the frames: the magnitude is evicted to make room
+    assert plan.evictions == 1 and plan.size_bytes() <= plan.max_bytes
+    assert plan.ffts == 2
+    plan.magnitude(signal, 1024, 256)  # Recomputed from the kept STFT
+    assert plan.ffts == 2 and plan.computed['magnitude'] == 2
+
+    plan.release(signal)
+    assert plan.size_bytes() == 0
+    plan.stft(signal, 1024, 256)
+    assert plan.ffts == 3
+
+    # A feature larger than the budget is returned but not kept
+    small = FeaturePlan(SR, max_bytes=1024)
+    small.stft(signal, 1024, 256)
+    small.stft(signal, 1024, 256)
+    assert small.ffts == 2 and small.size_bytes() == 0
+    assert small.report() == {'ffts': 2, 'computed': {'stft': 2}, 'reused': {}, 'evictions': 0, 'peak_bytes': 0}
+
+    # A signal whose last feature is evicted is no longer held by the plan
+    single = FeaturePlan(SR, max_bytes=int(stft_bytes * 1.5))
+    other = create_signal(2.0, seed=1)
+    other_ref = weakref.ref(other)
+    single.stft(other, 1024, 256)
+    single.stft(signal, 1024, 256)  # Evicts the only feature of the other signal
+    del other
+    assert single.evictions == 1 and other_ref() is None
+
+
+def run_processor_stages(processor, signal):
+    processor.multi_resolution_spectral_analysis(signal, SR)
+    processor.spectral_flux_derivative_analysis(signal, SR)
+    processor.calculate_perceptual_snr(signal, SR)
+    processor.enhanced_onset_strength(signal, SR)
+    return processor.percussive_harmonic_separation(signal, SR)
+
+
+def test_processor_stages_share_stfts():
+    signal = create_signal()
+    processor = AdvancedSignalProcessor()
+    unshared = run_processor_stages(processor, signal)
+
+    processor.begin_feature_plan(SR, 1 << 30)
+    shared = run_processor_stages(processor, signal)
+    report = processor.end_feature_plan()
+
+    # Windows 256 to 4096 once each; 2048/512 serves the flux, SNR, onset and HPSS stages
+    assert report['ffts'] == 5 and report['computed']['stft'] == 5
+    assert report['reused']['magnitude'] >= 4 and processor.feature_plan is None
+    for a, b in zip(shared, unshared):
+        np.testing.assert_array_equal(a, b)
+    for a, b in zip(shared, librosa.effects.hpss(signal, margin=3.0)[::-1]):
+        np.testing.assert_allclose(a, b, atol=1e-5)
+
+
+def test_process_waveform_computes_each_stft_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "drums.wav")
+        write_test_track(path, 20, channels=1)
+        analyzer = WaveformAnalyzer()
+        analyzer.config.update(multi_threading=False, use_visual_validation=False, analysis_cache=False)
+        assert analyzer.load_file(path)
+        analyzer.process_waveform()
+
+        # Noise reduction, HPSS and the detection stages each read one 2048/512 STFT of their input
+        report = analyzer.get_analysis_summary()['feature_plan']
+        assert analyzer.is_analyzed and report['ffts'] == 3
+        assert report['reused']['magnitude'] >= 3 and report['computed']['onset_strength'] == 1
+        assert analyzer.signal_processor.feature_plan is None
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_stage_times(seconds=120.0):
+    """Spectral reads of one analysis on a 2-minute signal: an STFT per read vs a shared plan"""
+    signal = create_signal(seconds, seed=1)
+    processor = AdvancedSignalProcessor()
+
+    def stages():
+        features = processor.features(SR)
+        features.spectral_flux(signal)  # Spectral flux onsets
+        features.onset_strength(signal)  # librosa onsets
+        for _ in range(3):  # SNR, flux and centroid of the adaptive threshold
+            features.magnitude(signal)
+        processor.calculate_perceptual_snr(signal, SR)
+        processor.spectral_flux_derivative_analysis(signal, SR)
+
+    start = time.perf_counter()
+    stages()
+    own_seconds = time.perf_counter() - start
+
+    plan = processor.begin_feature_plan(SR, 1 << 31)
+    start = time.perf_counter()
+    stages()
+    shared_seconds = time.perf_counter() - start
+    report = processor.end_feature_plan()
+
+    print(f"\nSpectral reads on {seconds:.0f}s of audio")
+    print(f"STFT per read: {own_seconds * 1000:8.1f} ms (9 STFTs)")
+    print(f"Shared plan:   {shared_seconds * 1000:8.1f} ms ({report['ffts']} STFTs, "
+          f"{sum(report['reused'].values())} features reused, {plan.peak_bytes / 2 ** 20:.0f} MB kept)")
+    assert report['ffts'] == 3
+    assert shared_seconds < own_seconds
+
+
+if __name__ == "__main__":
+    test_features_match_librosa()
+    test_byte_budget()
+    test_processor_stages_share_stfts()
+    test_process_waveform_computes_each_stft_once()
+    test_stage_times()
+    print("All feature plan tests passed.")
@@ -0,0 +1,163 @@
+"""
+Test script for the multi-band filter bank.
+
+Checks that the filter bank gives the same band signals as one sosfilt call
+per band, with or without threads, that the default designs and multi-band
+onsets match the previous per-band filter, that designs are cached per
+sample rate, and that with Hz band edges multi-band onset detection finds
+band limited bursts in their bands. Prints the time and peak memory of
+filtering a 10-minute stem band by band against the filter bank. The
+benchmark only runs when CUE_RUN_BENCHMARKS=1 is set (or when the script is
+run directly).
+
+Usage:
+    python test_filter_bank.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_filter_bank.py -s
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytest
+import scipy.signal
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.audio import filter_bank
+from utils.audio.filter_bank import FilterBank, get_filter_bank
+from utils.audio.waveform_analyzer import AdvancedSignalProcessor
+
+SR = 44100
+BANDS = ((20, 200), (200, 800), (800, 2500), (2500, 8000), (8000, SR / 2))
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_signal(seconds, seed=0):
+    return np.random.default_rng(seed).normal(0, 0.1, int(seconds * SR)).astype(np.float32)
+
+
+def band_by_band(signal, bands, sr, hz_edges=True):
+    """Reference: the previous per-band loop (design, clean, filter, check)"""
+    outputs = []
+    for low, high in bands:
+        clean_signal = np.nan_to_num(signal, nan=0.0, posinf=0.0, neginf=0.0)
+        if not hz_edges:
+            # Edges normalized to Nyquist, then passed with fs=sr (the analyzer's design)
+            low = max(0.001, min(0.999, low / (sr / 2)))
+            high = max(low + 0.001, min(0.999, high / (sr / 2)))
+            sos = scipy.signal.butter(4, [low, high], btype='band', output='sos', fs=sr)
+        elif high >= sr / 2:
+            sos = scipy.signal.butter(4, low, btype='highpass', output='sos', fs=sr)
+        else:
+            sos = scipy.signal.butter(4, [low, high], btype='band', output='sos', fs=sr)
+        filtered = scipy.signal.sosfilt(sos, clean_signal)
+        assert np.all(np.isfinite(filtered))
+        outputs.append(filtered)
+    return outputs
+
+
+def test_bank_matches_sosfilt():
+    signal = create_signal(3.3)  # Not a whole number of blocks
+    for hz_edges in (False, True):
+        bank = FilterBank(BANDS, SR, hz_edges=hz_edges)
+        expected = np.array(band_by_band(signal, BANDS, SR, hz_edges))
+
+        threaded = bank.apply(signal)
+        serial = bank.apply(signal, workers=1)
+        assert threaded.shape == (5, len(signal)) and threaded.dtype == np.float64
+        np.testing.assert_array_equal(threaded, serial)
+        np.testing.assert_allclose(threaded, expected, rtol=1e-7, atol=1e-10)
+        np.testing.assert_allclose(bank.apply(signal, dtype=np.float32), expected, atol=1e-6)
+
+    out = np.zeros((5, len(signal)), dtype=np.float32)
+    assert bank.apply(signal, out=out) is out
+
+
+def test_designs_cached_in_hz():
+    assert get_filter_bank(BANDS, SR) is get_filter_bank(BANDS, SR)
+    assert get_filter_bank(BANDS, 48000) is not get_filter_bank(BANDS, SR)
+    assert get_filter_bank(BANDS, SR, hz_edges=True) is not get_filter_bank(BANDS, SR)
+
+    # Nyquist edge: high-pass; band above Nyquist: passed through
+    bank = FilterBank(((8000, SR / 2), (30000, 40000)), SR, hz_edges=True)
+    assert bank.sos[1] is None
+    _, response = scipy.signal.sosfreqz(bank.sos[0], worN=[100, 12000], fs=SR)
+    assert abs(response[0]) < 0.01 and abs(response[1]) > 0.9
+
+    tone = np.sin(2 * np.pi * 100 * np.arange(SR) / SR).astype(np.float32)
+    low, high = get_filter_bank(BANDS, SR, hz_edges=True).apply(tone)[[0, 3]]
+    assert np.std(low[SR // 2:]) > 0.5 and np.std(high[SR // 2:]) < 0.01
+
+    processor = AdvancedSignalProcessor()
+    np.testing.assert_array_equal(processor._bandpass_filter(tone, 20, 200, SR, hz_edges=True), low)
+    assert processor._bandpass_filter(tone, 300, 200, SR) is tone
+
+    # Default design and dtype are unchanged from the per-band filter
+    legacy = processor._bandpass_filter(tone, 20, 200, SR)
+    assert legacy.dtype == np.float64
+    np.testing.assert_allclose(legacy, band_by_band(tone, ((20, 200),), SR, hz_edges=False)[0],
+                               rtol=1e-7, atol=1e-10)
+
+
+def test_multi_band_onsets_unchanged_by_default():
+    """Without hz_band_edges the onset functions match the previous band-by-band loop"""
+    librosa = pytest.importorskip("librosa")
+    signal = create_signal(2.0, seed=4)
+    processor = AdvancedSignalProcessor()
+    onsets = processor.multi_band_onset_detection(signal, SR)
+
+    assert list(onsets) == ['low', 'mid_low', 'mid', 'high', 'very_high']
+    for flux, filtered in zip(onsets.values(), band_by_band(signal, BANDS, SR, hz_edges=False)):
+        expected = processor.spectral_flux(librosa.stft(filtered * np.hanning(len(filtered)),
+                                                        n_fft=2048, hop_length=512))
+        np.testing.assert_allclose(flux, expected / np.max(expected), rtol=1e-6, atol=1e-9)
+
+
+def test_multi_band_onsets_in_their_bands():
+    t = np.arange(SR // 5) / SR
+    burst = np.exp(-t * 30)
+    signal = create_signal(4.0, seed=1) * 0.01
+    signal[SR:SR + len(t)] += (np.sin(2 * np.pi * 80 * t) * burst).astype(np.float32)  # Kick at 1s
+    signal[3 * SR:3 * SR + len(t)] += (np.sin(2 * np.pi * 5000 * t) * burst).astype(np.float32)  # Hi-hat at 3s
+
+    onsets = AdvancedSignalProcessor().multi_band_onset_detection(signal, SR, hz_band_edges=True)
+    assert list(onsets) == ['low', 'mid_low', 'mid', 'high', 'very_high']
+    assert len({len(flux) for flux in onsets.values()}) == 1
+    seconds = {name: np.argmax(flux) * 512 / SR for name, flux in onsets.items()}
+    assert abs(seconds['low'] - 1.0) < 0.1 and abs(seconds['high'] - 3.0) < 0.1
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_filter_times(minutes=10):
+    """Filtering a 10-minute stem into 5 bands: band by band vs the filter bank"""
+    signal = create_signal(minutes * 60, seed=2)
+    results = {}
+    for name, run in (("band by band", lambda: band_by_band(signal, BANDS, SR, hz_edges=False)),
+                      ("filter bank", lambda: FilterBank(BANDS, SR).apply(signal)),
+                      ("bank float32", lambda: FilterBank(BANDS, SR).apply(signal, dtype=np.float32))):
+        tracemalloc.start()
+        start = time.perf_counter()
+        output = run()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[name] = (seconds, peak)
+        del output
+
+    print(f"\n{minutes}-minute stem at {SR} Hz, {len(BANDS)} bands, {filter_bank.os.cpu_count()} CPUs")
+    for name, (seconds, peak) in results.items():
+        print(f"{name:>12}: {seconds * 1000:8.1f} ms, peak {peak / 2 ** 20:7.1f} MB")
+    assert results["bank float32"][1] < results["band by band"][1]
+
+
+if __name__ == "__main__":
+    test_bank_matches_sosfilt()
+    test_designs_cached_in_hz()
+    test_multi_band_onsets_unchanged_by_default()
+    test_multi_band_onsets_in_their_bands()
+    test_filter_times()
+    print("All filter bank tests passed.")
@@ -0,0 +1,295 @@
+"""
+Test script for the array-based onset clustering stages.
+
+Checks that the cluster helpers pick and add up values like max() and sum()
+over each cluster, and that clustering and merging onset candidates, the
+adaptive post-clustering refinement, temporal consistency validation and
+distance clustering of peaks select the same peaks, with the same values, as
+the previous peak-by-peak loops. Prints the time of each stage on the
+candidates of a dense drum track against those loops. The benchmark only
+runs when CUE_RUN_BENCHMARKS=1 is set (or when the script is run directly).
+
+Usage:
+    python test_onset_clustering.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_onset_clustering.py -s
+"""
+
+import copy
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from utils.audio.peak_set import PeakSet, cluster_argmax, cluster_starts, cluster_sum
+from utils.audio.waveform_analyzer import Peak
+from test_peak_set import SR, create_analyzer, create_candidates, create_signal
+
+METHODS = ['madmom_rnn', 'madmom_beat', 'merged', 'merged_multi_drum', 'multi_band_low', 'multi_band_mid',
+           'multi_band_high', 'librosa_onset', 'spectral_flux']
+TYPES = ['kick', 'snare', 'hi-hat', 'tom', 'generic', 'clap', None]
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_mixed_candidates(seed):
+    """Candidates of every method and drum type, some without a type or out of the signal"""
+    rng = np.random.default_rng(seed)
+    candidates = []
+    for hit in np.sort(rng.uniform(-0.05, 12.05, 150)):
+        for _ in range(rng.integers(1, 5)):
+            candidate = {'time': float(hit + rng.normal(0, 0.02)), 'amplitude': float(rng.uniform(0, 1)),
+                         'confidence': float(rng.choice([0.6, 0.9, rng.uniform(0.3, 1.0)])),
+                         'method': METHODS[rng.integers(len(METHODS))]}
+            drum_type = TYPES[rng.integers(len(TYPES))]
+            if drum_type is not None:
+                candidate['type'] = drum_type
+            if rng.random() < 0.2:
+                candidate['transient_verified'] = bool(rng.random() < 0.5)
+            candidates.append(candidate)
+    return candidates
+
+
+def create_rhythm(seed, count=60):
+    """Kick-snare peaks on a grid with some off-grid peaks"""
+    rng = np.random.default_rng(seed)
+    times = np.arange(count) * 0.25 + np.where(rng.random(count) < 0.15, rng.normal(0, 0.08, count), 0)
+    return [{'time': float(t), 'confidence': float(rng.choice([0.5, 0.92, rng.uniform(0.3, 0.99)])),
+             'method': 'merged', 'type': ['kick', 'snare'][i % 2] if rng.random() < 0.8 else 'hi-hat'}
+            for i, t in enumerate(np.sort(times))]
+
+
+def clusters_of(peaks, close):
+    """Reference: clusters of time-sorted peaks, a peak joining while close(previous, peak)"""
+    clusters = [[peaks[0]]]
+    for peak in peaks[1:]:
+        if close(clusters[-1][-1], peak):
+            clusters[-1].append(peak)
+        else:
+            clusters.append([peak])
+    return clusters
+
+
+def merge_cluster(cluster):
+    """Reference: the previous merge of one cluster of candidate dicts"""
+    if len(cluster) == 1:
+        return cluster[0]
+    unique_drum_types = set(onset['type'] for onset in cluster if 'type' in onset)
+    if len(unique_drum_types) > 1 and 'generic' not in unique_drum_types:
+        priority_order = {'kick': 3, 'snare': 2, 'tom': 1, 'hi-hat': 0, 'cymbal': 0}
+        highest_priority, primary_type = -1, 'generic'
+        for drum_type in unique_drum_types:
+            if drum_type in priority_order and priority_order[drum_type] > highest_priority:
+                highest_priority, primary_type = priority_order[drum_type], drum_type
+        primary_onsets = [onset for onset in cluster if onset.get('type', 'generic') == primary_type]
+        if primary_onsets:
+            best_primary = max(primary_onsets, key=lambda x: x['confidence'])
+            return dict(best_primary, confidence=min(0.95, best_primary['confidence'] + 0.1),
+                        method='merged_multi_drum', original_methods=[onset['method'] for onset in cluster],
+                        drum_types_detected=list(unique_drum_types))
+
+    weights = []
+    for onset in cluster:
+        weight, method = onset['confidence'], onset['method']
+        if method == 'madmom_rnn':
+            weight *= 1.4
+        elif method == 'madmom_beat':
+            weight *= 1.2
+        elif 'merged' in method:
+            weight *= 1.25
+        elif 'multi_band' in method:
+            weight *= 1.15
+            if 'multi_band_low' in method:
+                weight *= 1.1
+            elif 'multi_band_mid' in method:
+                weight *= 1.05
+        if onset.get('type') in ('kick', 'snare'):
+            weight *= 1.2
+        elif onset.get('type') == 'hi-hat':
+            weight *= 1.1
+        if onset.get('transient_verified'):
+            weight *= 1.2
+        weights.append(weight)
+    total_weight = sum(weights)
+    weights = [w / total_weight for w in weights] if total_weight > 0 else [1.0 / len(cluster)] * len(cluster)
+    avg_time = sum(onset['time'] * weight for onset, weight in zip(cluster, weights))
+    best_onset = max(cluster, key=lambda x: x['confidence'])
+    earliest = next((onset for onset in cluster if abs(onset['time'] - avg_time) <= 0.01), None)
+
+    confidence_boost = 0.05 * (len(cluster) - 1)
+    if len(set(onset['method'] for onset in cluster)) > 1:
+        confidence_boost += 0.05
+    if any('madmom' in o['method'] for o in cluster) and any('madmom' not in o['method'] for o in cluster):
+        confidence_boost += 0.05
+    return {'time': earliest['time'] if earliest else avg_time,
+            'amplitude': max(onset['amplitude'] for onset in cluster),
+            'confidence': min(0.95, best_onset['confidence'] + confidence_boost), 'method': 'merged',
+            'original_methods': [onset['method'] for onset in cluster], 'type': best_onset.get('type', 'generic')}
+
+
+def reference_clustering(analyzer, candidates):
+    ordered = sorted(candidates, key=lambda x: x['time'])
+    min_distance = analyzer.config['min_peak_distance']
+    clusters = clusters_of(ordered, lambda a, b: b['time'] - a['time'] < min_distance)
+    return [merge_cluster(cluster) for cluster in clusters]
+
+
+def reference_refinement(analyzer, peaks, signal):
+    """Reference: the previous adaptive distance clustering, amplitudes read peak by peak"""
+    amplitude = lambda peak: analyzer._get_amplitude_at_time(signal, peak['time'])
+
+    def close(a, b):
+        adjustments = 0.0
+        if a['method'] != b['method']:
+            adjustments -= 0.005
+        if 'type' in a and 'type' in b and a['type'] != b['type']:
+            adjustments -= 0.005
+        if abs(amplitude(a) - amplitude(b)) > 0.3:
+            adjustments -= 0.005
+        return b['time'] - a['time'] < max(0.015, analyzer.config['cluster_refinement_distance'] + adjustments)
+
+    def score(peak):
+        bonus = {'madmom_rnn': 1.2, 'madmom_beat': 1.1}.get(peak['method'], 1.15 if 'merged' in peak['method'] else 1)
+        value = amplitude(peak) * peak['confidence']
+        return value * bonus if bonus != 1 else value
+
+    ordered = sorted(peaks, key=lambda x: x['time'])
+    return [max(cluster, key=score) for cluster in clusters_of(ordered, close)]
+
+
+def reference_temporal(peaks):
+    """Reference: the previous temporal consistency validation and smoothing"""
+    peaks = [dict(peak) for peak in sorted(peaks, key=lambda x: x['time'])]
+    times = [peak['time'] for peak in peaks]
+    iois = [times[i + 1] - times[i] for i in range(len(times) - 1)]
+    median_ioi, ioi_std = np.median(iois), np.std(iois)
+    tempo_factor = 1.1 if any(abs(median_ioi - 60 / bpm / division) < 0.03
+                              for bpm in range(60, 181) for division in (1, 2, 4)) else 1.0
+    for i, ioi in enumerate(iois):
+        for outlier in (abs(ioi - median_ioi) > 1.5 * ioi_std, i > 0 and abs(ioi - iois[i - 1]) > 0.5 * median_ioi):
+            if outlier:
+                peaks[i + 1]['confidence'] *= 0.7
+                peaks[i + 1]['temporal_outlier'] = True
+    for i in range(1, len(peaks) - 1):
+        if not peaks[i].get('temporal_outlier') and abs(iois[i - 1] - iois[i]) < 0.1 * median_ioi:
+            peaks[i]['confidence'] = min(0.95, peaks[i]['confidence'] * tempo_factor)
+            peaks[i]['pattern_match'] = True
+    for i in range(len(peaks) - 3):
+        if [peak.get('type') for peak in peaks[i:i + 4]] == ['kick', 'snare', 'kick', 'snare']:
+            for peak in peaks[i:i + 4]:
+                peak['confidence'] = min(0.95, peak['confidence'] * 1.15)
+                peak['drum_pattern_match'] = True
+    for i in range(1, len(peaks) - 1):
+        if peaks[i]['confidence'] <= 0.9 and not peaks[i].get('temporal_outlier'):
+            peaks[i]['time'] = 0.8 * peaks[i]['time'] + 0.1 * peaks[i - 1]['time'] + 0.1 * peaks[i + 1]['time']
+    return peaks
+
+
+def sorted_drum_types(peaks):
+    return [dict(peak, drum_types_detected=sorted(peak['drum_types_detected']))
+            if 'drum_types_detected' in peak else peak for peak in peaks]
+
+
+def test_cluster_helpers():
+    times = np.array([0.0, 0.01, 0.1, 0.2, 0.205, 0.5])
+    starts = cluster_starts(times, 0.05)
+    assert starts.tolist() == [0, 2, 3, 5]
+    assert cluster_starts(times, np.array([0.0, 0.1, 0.0, 0.01, 0.0])).tolist() == [0, 1, 3, 5]
+    assert len(cluster_starts(np.zeros(0), 0.05)) == 0
+
+    # First of equal values wins; NaN is skipped unless it comes first
+    values = np.array([1.0, 3.0, 3.0, np.nan, 2.0, 0.5, np.nan])
+    starts = np.array([0, 3, 5])
+    assert cluster_argmax(values, starts).tolist() == [1, 3, 5]
+    assert cluster_argmax(values, starts, where=np.array([1, 0, 1, 0, 1, 0, 0], dtype=bool)).tolist() == [2, 4, 7]
+
+    rng = np.random.default_rng(0)
+    values = rng.random(1000) * 10.0 ** rng.uniform(-3, 3, 1000)
+    starts = np.flatnonzero(np.concatenate(([True], rng.random(999) < 0.2)))
+    bounds = zip(starts, np.append(starts[1:], 1000))
+    assert cluster_sum(values, starts).tolist() == [sum(values[start:stop].tolist()) for start, stop in bounds]
+
+
+def test_clustering_matches_loops():
+    analyzer = create_analyzer(create_signal(12))
+    for seed in range(20):
+        candidates = create_mixed_candidates(seed)
+        clustered = analyzer._cluster_and_validate_onsets(PeakSet.from_dicts(copy.deepcopy(candidates)), None)
+        assert sorted_drum_types(clustered.to_dicts()) == sorted_drum_types(reference_clustering(analyzer, candidates))
+
+
+def test_refinement_matches_loops():
+    signal = create_signal(12)
+    analyzer = create_analyzer(signal)
+    for seed in range(20):
+        peaks = create_mixed_candidates(seed)
+        refined = analyzer._post_cluster_refinement(PeakSet.from_dicts(copy.deepcopy(peaks)), signal)
+        assert refined.to_dicts() == reference_refinement(analyzer, peaks, signal)
+
+
+def test_temporal_consistency_matches_loops():
+    analyzer = create_analyzer(create_signal(1))
+    for seed in range(20):
+        peaks = create_rhythm(seed)
+        validated = analyzer._validate_temporal_consistency(PeakSet.from_dicts(copy.deepcopy(peaks)), None)
+        assert validated.to_dicts() == reference_temporal(peaks)
+
+
+def test_distance_clustering():
+    analyzer = create_analyzer(create_signal(1))
+    rng = np.random.default_rng(4)
+    peaks = [Peak(float(t), float(rng.uniform(0, 1)), float(rng.uniform(0, 1))) for t in rng.uniform(0, 10, 300)]
+    ordered = sorted(peaks, key=lambda p: p.time)
+    for min_distance in (0.01, 0.05, 0.2):
+        expected = [max(cluster, key=lambda p: p.confidence * p.amplitude)
+                    for cluster in clusters_of(ordered, lambda a, b: b.time - a.time < min_distance)]
+        assert analyzer._apply_distance_clustering(peaks, min_distance) == expected
+    assert analyzer._apply_distance_clustering(peaks[:1], 0.05) == peaks[:1]
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_stage_times(seconds=600):
+    """Clustering stages on the candidates of a 10-minute dense drum track: loops vs array operations"""
+    signal = create_signal(seconds, seed=1)
+    candidates = create_candidates(seconds, seed=1)
+    analyzer = create_analyzer(signal)
+
+    # The stages pass peak sets between them: both sides start from their own input
+    candidate_set = PeakSet.from_dicts(candidates)
+    clustered = analyzer._cluster_and_validate_onsets(candidate_set, signal)
+    clustered_dicts = clustered.to_dicts()
+    refined = analyzer._post_cluster_refinement(clustered, signal)
+    refined_dicts = refined.to_dicts()
+
+    stages = (("cluster + merge", lambda: reference_clustering(analyzer, candidates),
+               lambda: analyzer._cluster_and_validate_onsets(candidate_set, signal)),
+              ("refinement", lambda: reference_refinement(analyzer, clustered_dicts, signal),
+               lambda: analyzer._post_cluster_refinement(clustered, signal)),
+              ("temporal", lambda: reference_temporal(refined_dicts),
+               lambda: analyzer._validate_temporal_consistency(refined, signal)))
+
+    print(f"\n{seconds}s dense drum track at {SR} Hz: {len(candidates)} candidates, {len(clustered)} clusters")
+    for name, loop, arrays in stages:
+        times = []
+        for run in (loop, arrays):
+            start = time.perf_counter()
+            result = run()
+            times.append(time.perf_counter() - start)
+        expected = loop()
+        assert sorted_drum_types(result.to_dicts()) == sorted_drum_types(expected)
+        print(f"{name:>15}: loops {times[0] * 1000:7.1f} ms, arrays {times[1] * 1000:7.1f} ms "
+              f"({times[0] / times[1]:.1f}x)")
+
+
+if __name__ == "__main__":
+    test_cluster_helpers()
+    test_clustering_matches_loops()
+    test_refinement_matches_loops()
+    test_temporal_consistency_matches_loops()
+    test_distance_clustering()
+    test_stage_times()
+    print("All onset clustering tests passed.")
@@ -0,0 +1,188 @@
+"""
+Test script for the columnar peak set of the peak refinement stages.
+
+Checks that peak dicts go through a PeakSet and back with the same keys and
+value types, that take, sort, concatenate and set work on every column,
+that Peak objects are slotted and only keep measured spectral features, and
+that the refinement stages return their peaks as dicts without changing the
+onset candidates. Prints the memory per peak of dicts, a PeakSet and Peak
+objects, and the time of the refinement and validation stages on the
+candidates of a dense drum track. The benchmark only runs when
+CUE_RUN_BENCHMARKS=1 is set (or when the script is run directly).
+
+Usage:
+    python test_peak_set.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_peak_set.py -s
+"""
+
+import copy
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.audio.peak_set import PeakSet
+from utils.audio.waveform_analyzer import Peak, WaveformAnalyzer
+from utils.json_utils import clean_data_for_json, safe_json_dumps
+
+SR = 44100
+METHODS = ['spectral_flux', 'librosa', 'multi_band_low', 'multi_band_mid', 'energy']
+TYPES = ['generic', 'kick', 'snare', 'hi-hat']
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_candidates(seconds, seed=0):
+    """Onset candidates of 16th notes at 140 BPM: one to five detections per hit"""
+    rng = np.random.default_rng(seed)
+    candidates = []
+    for hit in np.arange(0.1, seconds - 0.2, 60 / 140 / 4):
+        hit += rng.normal(0, 0.004)
+        for detection in range(rng.integers(1, 6)):
+            candidate = {'time': float(hit + rng.normal(0, 0.008)), 'amplitude': float(rng.uniform(0.1, 1.0)),
+                         'confidence': float(rng.uniform(0.4, 0.95)), 'method': METHODS[rng.integers(5)],
+                         'type': TYPES[rng.integers(4)]}
+            if detection % 2:
+                candidate['original_methods'] = ['librosa', 'energy']
+            candidates.append(candidate)
+    return candidates
+
+
+def create_signal(seconds, seed=0):
+    """Noise with a decaying burst on every 16th note"""
+    rng = np.random.default_rng(seed)
+    signal = rng.normal(0, 0.02, int(seconds * SR)).astype(np.float32)
+    burst = (rng.normal(0, 0.5, SR // 10) * np.exp(-np.arange(SR // 10) / SR * 40)).astype(np.float32)
+    for hit in np.arange(0.1, seconds - 0.2, 60 / 140 / 4):
+        signal[int(hit * SR):int(hit * SR) + len(burst)] += burst
+    return np.clip(signal, -1, 1)
+
+
+def create_analyzer(signal):
+    analyzer = WaveformAnalyzer()
+    analyzer.config.update(multi_threading=False, use_visual_validation=False, analysis_cache=False, max_peaks=4000)
+    analyzer.sample_rate = SR
+    analyzer.waveform_data = [signal]
+    analyzer.duration_seconds = len(signal) / SR
+    analyzer.confidence_threshold_override = 0.6  # Skip the spectral threshold: time the peak stages
+    return analyzer
+
+
+def test_round_trip():
+    peaks = [
+        {'time': 1.5, 'amplitude': np.float32(0.25), 'confidence': 0.75, 'method': 'librosa', 'type': 'kick'},
+        {'time': 0.5, 'amplitude': np.float32(0.5), 'confidence': 0.5, 'method': 'merged', 'type': 'snare',
+         'original_methods': ['librosa', 'energy'], 'transient_verified': True},
+        {'time': 1.0, 'amplitude': np.float32(0.75), 'confidence': 0.9, 'method': 'librosa', 'type': 'kick',
+         'precise_time': np.float64(1.001), 'snr': 2.0, 'rescued': False},
+        {'time': 2.0, 'amplitude': np.float32(1.0), 'confidence': 0.6, 'method': 'energy', 'type': 'kick',
+         'precise_time': 2.0, 'snr': np.float64(3.0)},
+    ]
+    peak_set = PeakSet.from_dicts(peaks)
+    assert len(peak_set) == 4 and peak_set.to_dicts() == peaks
+    for peak, original in zip(peak_set.to_dicts(), peaks):
+        assert {key: type(value) for key, value in peak.items()} == {key: type(value) for key, value in original.items()}
+    assert peak_set.row(1) == peaks[1] and peak_set['amplitude'].dtype == np.float32
+    assert peak_set.has('original_methods').tolist() == [False, True, False, False]
+    assert peak_set.get('transient_verified', False).tolist() == [False, True, False, False]
+    assert peak_set.label_mask('method', lambda method: 'merged' in method).tolist() == [False, True, False, False]
+
+    ordered = peak_set.sort_by_time()
+    assert ordered['time'].tolist() == [0.5, 1.0, 1.5, 2.0] and ordered.to_dicts()[0] == peaks[1]
+    taken = peak_set.take(peak_set['confidence'] > 0.55)
+    assert taken.to_dicts() == [peaks[0], peaks[2], peaks[3]] and 'original_methods' in taken
+
+    taken.set('confidence', np.array([0.1, 0.2, 0.3]), where=np.array([True, False, True]))
+    taken.set('pattern_match', True, where=np.array([False, True, False]))
+    taken.set('type', 'hi-hat', where=np.array([True, False, False]))
+    assert taken['confidence'].tolist() == [0.1, 0.9, 0.3]
+    assert [peak.get('pattern_match') for peak in taken.to_dicts()] == [None, True, None]
+    assert taken['type'].tolist() == ['hi-hat', 'kick', 'kick']
+
+    combined = PeakSet.concatenate([peak_set.take([1]), PeakSet.from_dicts([{'time': 3.0, 'method': 'x'}]),
+                                    PeakSet()])
+    assert combined.to_dicts() == [peaks[1], {'time': 3.0, 'method': 'x'}]
+    assert len(PeakSet.from_dicts([])) == 0 and len(PeakSet.concatenate([])) == 0
+
+
+def test_peak_is_slotted():
+    peak = Peak(1.25, amplitude=0.5, confidence=0.8, type='kick')
+    assert not hasattr(peak, '__dict__') and peak.drum_type == 'kick' and peak.prominence == 0.4
+    assert peak.spectral_features['centroid'] == 0.0 and len(peak.spectral_features) == 9
+
+    peak.set_spectral_features({'centroid': 1200.0, 'unknown': 1.0})
+    assert peak.spectral_features['centroid'] == 1200.0 and 'unknown' not in peak.spectral_features
+    assert peak.to_dict()['spectral_features']['centroid'] == 1200.0
+    assert peak == Peak(1.25, amplitude=0.5, confidence=0.8, type='kick')  # Spectral features are not compared
+
+    assert '_spectral_features' not in clean_data_for_json(peak)
+    assert json.loads(safe_json_dumps(peak))['data']['time'] == 1.25
+
+
+def test_refinement_returns_dicts():
+    signal = create_signal(20)
+    candidates = create_candidates(20)
+    original = copy.deepcopy(candidates)
+    analyzer = create_analyzer(signal)
+
+    refined = analyzer._refine_and_filter_peaks(candidates, signal)
+    assert candidates == original  # The onset candidates are not changed
+    assert len(refined) > 0 and all(isinstance(peak, dict) for peak in refined)
+    times = [peak['time'] for peak in refined]
+    assert times == sorted(times) and min(np.diff(times)) > 0
+    assert all({'precise_time', 'snr', 'spectral_centroid', 'method'} <= set(peak) for peak in refined)
+
+    validated = analyzer._validate_and_sort_peaks(refined)
+    assert 0 < len(validated) <= len(refined) and all(isinstance(peak, Peak) for peak in validated)
+
+
+def retained_bytes(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, size
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_memory_and_stage_times(seconds=600):
+    """Memory per refined peak and time of the peak stages on a 10-minute dense drum track"""
+    signal = create_signal(seconds, seed=1)
+    candidates = create_candidates(seconds, seed=1)
+    analyzer = create_analyzer(signal)
+
+    start = time.perf_counter()
+    refined = analyzer._refine_and_filter_peaks(copy.deepcopy(candidates), signal)
+    refine_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    peaks = analyzer._validate_and_sort_peaks(refined)
+    validate_seconds = time.perf_counter() - start
+
+    dicts, dict_bytes = retained_bytes(lambda: copy.deepcopy(refined))
+    peak_set, set_bytes = retained_bytes(lambda: PeakSet.from_dicts(dicts))
+    objects, object_bytes = retained_bytes(lambda: [Peak(p.time, p.amplitude, p.confidence, p.type)
+                                                    for p in peaks])
+    assert peak_set.to_dicts() == dicts and set_bytes < dict_bytes
+
+    print(f"\n{seconds}s dense drum track: {len(candidates)} candidates, {len(refined)} refined, "
+          f"{len(peaks)} final peaks")
+    print(f"Refinement:  {refine_seconds * 1000:8.1f} ms (without the spectral threshold)")
+    print(f"Validation:  {validate_seconds * 1000:8.1f} ms")
+    print(f"Peak dicts:  {dict_bytes / len(dicts):8.0f} bytes per peak")
+    print(f"PeakSet:     {set_bytes / len(dicts):8.0f} bytes per peak ({len(peak_set.names)} columns)")
+    print(f"Peak object: {object_bytes / len(objects):8.0f} bytes per peak")
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_peak_is_slotted()
+    test_refinement_returns_dicts()
+    test_memory_and_stage_times()
+    print("All peak set tests passed.")
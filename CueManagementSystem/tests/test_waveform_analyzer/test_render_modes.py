@@ -0,0 +1,179 @@
+"""
+Test script for the vectorized waveform render modes.
+
+Checks the per-column arrays of every render mode (against the tuple form
+and the scalar color rules), the packed colors and the rasterized waveform
+image, and prints per-mode frame times at 4K width next to the previous
+QPainterPath + per-column pen painting. The benchmark only runs when
+CUE_RUN_BENCHMARKS=1 is set (or when the script is run directly).
+
+Usage:
+    python test_render_modes.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_render_modes.py -s
+"""
+
+import colorsys
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QBrush, QColor, QImage, QPainter, QPainterPath, QPen
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from views.waveform.enhanced_waveform_renderer import (
+    ColorScheme, ProfessionalWaveformRenderer, RenderedWaveform, RenderingConfig, WaveformRenderMode,
+    hsv_to_rgb, pack_rgba
+)
+
+MODES = (WaveformRenderMode.RMS_ENVELOPE, WaveformRenderMode.SPECTRAL_COLOR, WaveformRenderMode.DUAL_LAYER,
+         WaveformRenderMode.FREQUENCY_BANDS, WaveformRenderMode.ENVELOPE_FOLLOWER, WaveformRenderMode.BASIC_MINMAX)
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_signal(seconds, sample_rate=44100, seed=21):
+    """Low hum with a high-pitched burst every second"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = 0.2 * np.sin(2 * np.pi * 60 * t) + rng.normal(0, 0.01, len(t))
+    signal[(t % 1.0) < 0.1] += 0.4 * np.sin(2 * np.pi * 6000 * t[(t % 1.0) < 0.1])
+    return signal.astype(np.float32)
+
+
+def paint_points(renderer, points, width, height):
+    """Reference: the widget's previous painting (filled path, one pen per column, outline)"""
+    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    image.fill(0)
+    painter = QPainter(image)
+    path = QPainterPath()
+    path.moveTo(points[0][0], height / 2)
+    for x, y_top, _, _ in points:
+        path.lineTo(int(x), int(y_top))
+    path.lineTo(int(points[-1][0]), height / 2)
+    for x, _, y_bottom, _ in reversed(points):
+        path.lineTo(int(x), int(y_bottom))
+    path.lineTo(int(points[0][0]), height / 2)
+    painter.setOpacity(0.85)
+    painter.fillPath(path, QBrush(renderer.get_gradient_for_scheme(width, height)))
+    painter.setOpacity(0.7)
+    for x, y_top, y_bottom, color in points:
+        if color is not None:
+            painter.setPen(QPen(color, 1.0))
+            painter.drawLine(int(x), int(y_top), int(x), int(y_bottom))
+    painter.setOpacity(1.0)
+    painter.setPen(QPen(renderer._current_palette()['primary'].lighter(120), 1.0))
+    painter.drawPath(path)
+    painter.end()
+    return image
+
+
+def test_modes_return_column_arrays():
+    signal = create_signal(4)
+    width, height = 500, 160
+    for mode in MODES:
+        renderer = ProfessionalWaveformRenderer(RenderingConfig(mode=mode, color_scheme=ColorScheme.SPECTRAL_RAINBOW))
+        rendered = renderer.render_waveform(signal, 44100, width, height)
+        assert isinstance(rendered, RenderedWaveform) and len(rendered) == width, mode
+        np.testing.assert_array_equal(rendered.x, np.arange(width))
+        assert np.all((rendered.top >= 0) & (rendered.top <= height) & (rendered.bottom >= 0) &
+                      (rendered.bottom <= height)), mode
+        assert (rendered.rgba is None) == (mode == WaveformRenderMode.BASIC_MINMAX), mode
+
+        points = renderer.render_waveform_points(signal, 44100, width, height)
+        assert [p[1] for p in points] == rendered.top.tolist()
+        if rendered.rgba is not None:
+            assert [p[3].rgba() for p in points] == rendered.rgba.tolist()
+
+    # Bursts are colored by their spectral centroid / dominant band
+    renderer = ProfessionalWaveformRenderer(RenderingConfig(mode=WaveformRenderMode.FREQUENCY_BANDS,
+                                                            color_scheme=ColorScheme.FREQUENCY_BASED))
+    rendered = renderer.render_waveform(signal, 44100, 400, 100)
+    burst, hum = QColor.fromRgba(int(rendered.rgba[2])), QColor.fromRgba(int(rendered.rgba[60]))
+    assert (burst.red(), burst.green()) != (hum.red(), hum.green())
+
+    # Stereo: left and right columns interleaved, right channel in the bottom half
+    renderer = ProfessionalWaveformRenderer(RenderingConfig(mode=WaveformRenderMode.DUAL_LAYER))
+    stereo = renderer.render_waveform(np.stack([signal, signal * 0.5]), 44100, width, height)
+    assert stereo.channels == 2 and len(stereo) == 2 * width
+    assert np.all(stereo.top[1::2] >= height // 2) and np.all(stereo.bottom[0::2] <= height // 2)
+
+
+def test_vectorized_colors():
+    hue, saturation, value = np.random.default_rng(2).random((3, 200))
+    red, green, blue = hsv_to_rgb(hue, saturation, value)
+    np.testing.assert_allclose(np.stack([red, green, blue], axis=1),
+                               [colorsys.hsv_to_rgb(*hsv) for hsv in zip(hue, saturation, value)], atol=1e-12)
+    assert pack_rgba(300, 128, -5, 64) == QColor(255, 128, 0, 64).rgba()
+
+    renderer = ProfessionalWaveformRenderer(RenderingConfig(color_scheme=ColorScheme.ENERGY_HEAT))
+    heat = renderer._energy_colors(np.array([0.0, 0.1, 0.35, 0.79, 0.8]))
+    assert heat.tolist() == [QColor(64, 0, 0).rgba(), QColor(128, 32, 0).rgba(), QColor(255, 64, 0).rgba(),
+                             QColor(255, 128, 0).rgba(), QColor(255, 255, 128).rgba()]
+
+    # Every column keeps its own alpha (the palette color is not mutated)
+    renderer.config.color_scheme = ColorScheme.PROFESSIONAL_DARK
+    primary = renderer._current_palette()['primary']
+    alphas = [QColor.fromRgba(int(c)).alpha() for c in renderer._energy_colors(np.array([0.0, 0.5, 2.0]))]
+    assert alphas == [128, 191, 255] and primary.alpha() == 255
+
+
+def test_waveform_image():
+    renderer = ProfessionalWaveformRenderer(RenderingConfig())
+    width, height = 6, 20
+    x = np.arange(width, dtype=np.float64)
+    top, bottom = np.full(width, 5.0), np.full(width, 15.0)
+    rgba = np.full(width, QColor(255, 0, 0).rgba(), dtype=np.uint32)
+    image = renderer.render_waveform_image(RenderedWaveform(x, top, bottom, rgba), width, height)
+
+    outline = renderer._current_palette()['primary'].lighter(120).rgba()
+    assert image.width() == width and image.height() == height
+    assert image.pixel(3, 2) == 0  # Outside the waveform
+    assert image.pixel(3, 5) == outline and image.pixel(3, 15) == outline and image.pixel(0, 10) == outline
+    inside = QColor.fromRgba(image.pixel(3, 10))
+    assert inside.red() >= round(0.7 * 255) and inside.alpha() == 255 - round(0.3 * 0.15 * 255)  # 0.7 red over 0.85 gradient
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_mode_frame_times(seconds=300, width=3840, height=400):
+    """Per-mode frame time at 4K width: render + rasterize vs previous tuple painting"""
+    signal = create_signal(seconds)
+    print(f"\n{seconds}s track, {width}x{height}")
+    print(f"{'mode':>20} {'render ms':>10} {'image ms':>9} {'previous paint ms':>18}")
+    total_image_seconds = total_paint_seconds = 0.0
+    for mode in MODES:
+        renderer = ProfessionalWaveformRenderer(RenderingConfig(mode=mode, color_scheme=ColorScheme.FREQUENCY_BASED))
+        renderer.render_waveform(signal, 44100, width, height)  # Builds the pyramid
+
+        # Scrolling: a new offset per frame, so the render cache never hits
+        frames = 5
+        render_seconds = image_seconds = 0.0
+        for step in range(frames):
+            start = time.perf_counter()
+            rendered = renderer.render_waveform(signal, 44100, width, height, offset=0.2 + step * 0.01, zoom=4.0)
+            render_seconds += time.perf_counter() - start
+            start = time.perf_counter()
+            renderer.render_waveform_image(rendered, width, height)
+            image_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        paint_points(renderer, rendered.to_points(), width, height)
+        paint_seconds = time.perf_counter() - start
+
+        print(f"{mode.value:>20} {render_seconds / frames * 1000:10.2f} {image_seconds / frames * 1000:9.2f} "
+              f"{paint_seconds * 1000:18.1f}")
+        total_image_seconds += image_seconds / frames
+        total_paint_seconds += paint_seconds
+
+    assert total_image_seconds < total_paint_seconds
+
+
+if __name__ == "__main__":
+    test_modes_return_column_arrays()
+    test_vectorized_colors()
+    test_waveform_image()
+    test_mode_frame_times()
+    print("All render mode tests passed.")
@@ -0,0 +1,149 @@
+"""
+Test script for the segmented (process pool) waveform analysis.
+
+Checks that the segment layout is aligned to the STFT hop and its cores
+cover the track, that peaks of overlapping windows are stitched by core and
+de-duplicated across boundaries, and that a segmented analysis finds the
+same peaks (times, types, confidences) as the serial analysis on a few
+seconds of a click track and a drum pattern cut into short segments. The
+same check on 45 s tracks and the analysis time of a track by worker count
+take minutes and only run when CUE_RUN_BENCHMARKS=1 is set (or when the
+script is run directly).
+
+Usage:
+    python test_segmented_analysis.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_segmented_analysis.py -s
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from utils.audio.peak_set import PeakSet
+from utils.audio.segmented_analysis import HOP_LENGTH, segment_layout, stitch_peaks
+from utils.audio.waveform_analyzer import WaveformAnalyzer
+from test_streaming_load import write_test_track
+
+SEGMENTED = dict(segmented_analysis=True, chunk_size_seconds=15, overlap_seconds=4)
+SHORT_SEGMENTED = dict(segmented_analysis=True, chunk_size_seconds=2, overlap_seconds=1)
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def write_drum_track(path, seconds, sample_rate=44100, seed=3):
+    """Kick, hi-hat, snare, hi-hat eighth notes at 120 BPM over a noise bed"""
+    rng = np.random.default_rng(seed)
+    signal = rng.normal(0, 0.01, int(seconds * sample_rate)).astype(np.float32)
+    t = np.arange(int(0.2 * sample_rate)) / sample_rate
+    kick = np.sin(2 * np.pi * 60 * t) * np.exp(-t * 25)
+    snare = rng.normal(0, 0.5, len(t)) * np.exp(-t * 30)
+    hihat = rng.normal(0, 0.3, len(t)) * np.exp(-t * 120)
+    for i, start in enumerate(np.arange(0.25, seconds - 0.3, 0.25)):
+        sound = (kick, hihat, snare, hihat)[i % 4]
+        index = int(start * sample_rate)
+        signal[index:index + len(t)] += (sound * (1.0 if i % 8 == 0 else 0.8)).astype(np.float32)
+    sf.write(path, np.clip(signal, -1, 1), sample_rate)
+
+
+def analyze(path, **config):
+    analyzer = WaveformAnalyzer()
+    analyzer.config.update(multi_threading=False, use_visual_validation=False, analysis_cache=False, **config)
+    assert analyzer.load_file(path)
+    start = time.perf_counter()
+    analyzer.process_waveform()
+    assert analyzer.is_analyzed
+    return analyzer.peaks, time.perf_counter() - start
+
+
+def assert_same_peaks(peaks, expected):
+    assert len(peaks) == len(expected) > 0
+    for peak, reference in zip(peaks, expected):
+        assert peak.time == reference.time and peak.type == reference.type
+        assert abs(peak.confidence - reference.confidence) < 1e-9 and peak.category == reference.category
+
+
+def test_segment_layout():
+    sr = 44100
+    layout = segment_layout(61 * sr, sr, 15, context=sr)
+    assert len(layout) == 5 and layout[0].lo == 0 and layout[-1].stop == layout[-1].hi == 61 * sr
+    for segment, following in zip(layout, layout[1:]):
+        assert segment.stop == following.start and following.start % HOP_LENGTH == 0
+        assert following.lo % HOP_LENGTH == 0 and following.start - following.lo >= sr
+        assert segment.hi - segment.stop >= min(sr, 61 * sr - segment.stop)
+    assert segment_layout(10 * sr, sr, 15) == [(0, 0, 10 * sr, 10 * sr)]
+
+
+def test_stitch_peaks():
+    cores = [(-np.inf, 10.0), (10.0, np.inf)]
+    first = [{'time': t, 'confidence': 0.5} for t in (11.0, 5.0, 9.99)]  # 11.0 is in the next core
+    second = [{'time': t, 'confidence': 0.8, 'method': 'merged'} for t in (8.0, 10.02, 12.0)]  # 8.0 is in the previous
+    windows = [PeakSet.from_dicts(first), PeakSet.from_dicts(second)]
+    stitched = stitch_peaks(windows, cores, min_distance=0.045)
+    # 9.99 and 10.02 are one peak seen by both windows: the more confident is kept
+    assert stitched['time'].tolist() == [5.0, 10.02, 12.0]
+    assert stitch_peaks(windows, cores, min_distance=0.01).to_dicts() == [first[1], first[2], second[1], second[2]]
+    assert len(stitch_peaks([PeakSet(), PeakSet()], cores, min_distance=0.01)) == 0
+
+
+def check_segmented_matches_serial(seconds, segmented):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Separate folders: load_file prefers a drums.wav next to the file it is given
+        clicks, drums = os.path.join(tmp, "clicks", "clicks.wav"), os.path.join(tmp, "drums", "drums.wav")
+        for path in (clicks, drums):
+            os.makedirs(os.path.dirname(path))
+        write_test_track(clicks, seconds, channels=1)
+        write_drum_track(drums, seconds)
+        for path in (clicks, drums):
+            serial, _ = analyze(path)
+            peaks, _ = analyze(path, segment_workers=2, **segmented)
+            assert_same_peaks(peaks, serial)
+
+
+def test_segmented_matches_serial():
+    """6s tracks in 2s segments: three windows, two boundaries to stitch"""
+    check_segmented_matches_serial(6, SHORT_SEGMENTED)
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_segmented_matches_serial_long():
+    """45s tracks in the 15s segments of a real analysis"""
+    check_segmented_matches_serial(45, SEGMENTED)
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_speedup_vs_workers(seconds=90, workers=(1, 2, 4)):
+    """Analysis time of a 90s drum track: serial vs segmented on 1, 2 and 4 worker processes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "drums.wav")
+        write_drum_track(path, seconds)
+        serial, serial_seconds = analyze(path)
+        times = {}
+        for count in workers:
+            peaks, times[count] = analyze(path, segment_workers=count, **SEGMENTED)
+            assert_same_peaks(peaks, serial)
+
+    print(f"\n{seconds}s drum track, {SEGMENTED['chunk_size_seconds']}s segments, {os.cpu_count()} CPUs")
+    print(f"Serial:     {serial_seconds:6.1f} s")
+    for count, seconds_taken in times.items():
+        print(f"{count} workers: {seconds_taken:6.1f} s ({serial_seconds / seconds_taken:.2f}x)")
+
+    # Worker processes only pay off with cores to run them on
+    if (os.cpu_count() or 1) >= 4:
+        assert times[4] < serial_seconds
+
+
+if __name__ == "__main__":
+    test_segment_layout()
+    test_stitch_peaks()
+    test_segmented_matches_serial()
+    test_segmented_matches_serial_long()
+    test_speedup_vs_workers()
+    print("All segmented analysis tests passed.")
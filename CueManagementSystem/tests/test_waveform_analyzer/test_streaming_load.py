@@ -0,0 +1,126 @@
+"""
+Test script for the streaming audio loader used by WaveformAnalyzer.load_file.
+
+Writes synthetic WAV files, checks the block-wise mono decode and min/max
+overview against a whole-file decode, and compares peak memory and
+time-to-first-waveform of both paths on a long stereo track. The benchmark
+only runs when CUE_RUN_BENCHMARKS=1 is set (or when the script is run
+directly).
+
+Usage:
+    python test_streaming_load.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_streaming_load.py -s
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.audio.audio_stream_loader import OVERVIEW_BUCKET_SIZE, stream_load
+
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def write_test_track(path, seconds, sample_rate=44100, channels=2, seed=7):
+    """Noise bed with periodic clicks, written in 10s pieces to keep the test itself small"""
+    rng = np.random.default_rng(seed)
+    with sf.SoundFile(path, 'w', samplerate=sample_rate, channels=channels, subtype='PCM_16') as f:
+        remaining = int(seconds * sample_rate)
+        while remaining:
+            count = min(remaining, 10 * sample_rate)
+            piece = rng.normal(0, 0.02, (count, channels)).astype(np.float32)
+            piece[::sample_rate // 4] = 0.9
+            f.write(piece)
+            remaining -= count
+
+
+def whole_file_mono(path):
+    """Reference decode: entire file at once, then channel mean (librosa.load(mono=True) equivalent)"""
+    data, sample_rate = sf.read(path, dtype='float32', always_2d=True)
+    return np.mean(data, axis=1), sample_rate
+
+
+def test_stream_matches_whole_file_decode():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "drums.wav")
+        write_test_track(path, 7.3)
+
+        blocks = []
+        progress = []
+        streamed = stream_load(path, block_seconds=0.5,
+                               block_callback=lambda buffer, filled: blocks.append(filled),
+                               progress_callback=progress.append)
+        reference, sample_rate = whole_file_mono(path)
+
+        assert streamed.sample_rate == sample_rate and streamed.source_channels == 2
+        np.testing.assert_allclose(streamed.samples, reference, atol=1e-7)
+
+        # Progress per block, ending at the full length
+        assert blocks == sorted(blocks) and blocks[-1] == len(reference)
+        assert streamed.block_count == len(blocks) > 1
+        assert progress[-1] == 100
+
+        padded = np.pad(reference, (0, -len(reference) % OVERVIEW_BUCKET_SIZE), mode='edge')
+        buckets = padded.reshape(-1, OVERVIEW_BUCKET_SIZE)
+        np.testing.assert_array_equal(streamed.overview_min, buckets.min(axis=1))
+        np.testing.assert_array_equal(streamed.overview_max, buckets.max(axis=1))
+
+
+def test_memory_mapped_buffer():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mono.wav")
+        write_test_track(path, 3, channels=1)
+
+        streamed = stream_load(path, memmap_min_seconds=2)
+        try:
+            assert streamed.memory_mapped and isinstance(streamed.samples, np.memmap)
+            np.testing.assert_allclose(streamed.samples, whole_file_mono(path)[0], atol=1e-7)
+        finally:
+            streamed.close()
+
+        assert not stream_load(path, memmap_min_seconds=5).memory_mapped
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_streaming_benchmark(seconds=180):
+    """Peak memory and time-to-first-waveform: whole-file decode vs streaming"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "show_track.wav")
+        write_test_track(path, seconds)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        reference, _ = whole_file_mono(path)
+        whole_seconds = time.perf_counter() - start
+        whole_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        streamed = stream_load(path)
+        stream_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        np.testing.assert_allclose(streamed.samples, reference, atol=1e-7)
+        assert stream_peak < whole_peak
+        assert streamed.first_block_seconds < whole_seconds
+
+        print(f"\n{seconds}s stereo track")
+        print(f"Peak memory:          whole {whole_peak / 2 ** 20:6.1f} MB | streaming {stream_peak / 2 ** 20:6.1f} MB")
+        print(f"Time to first samples: whole {whole_seconds * 1000:6.1f} ms | "
+              f"streaming {streamed.first_block_seconds * 1000:6.1f} ms (full decode {streamed.decode_seconds * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    test_stream_matches_whole_file_decode()
+    test_memory_mapped_buffer()
+    test_streaming_benchmark()
+    print("All streaming load tests passed.")
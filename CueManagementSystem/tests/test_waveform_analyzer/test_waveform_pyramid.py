@@ -0,0 +1,169 @@
+"""
+Test script for the waveform level-of-detail pyramid.
+
+Checks pyramid column reductions against the per-pixel loops the renderer
+used before (exact for block-aligned and zoomed-in views, same envelope for
+the rest), the renderer and WaveformAnalyzer.get_waveform_points on top of
+it, and prints zoom/scroll render timings on a 10-minute track. The
+benchmark only runs when CUE_RUN_BENCHMARKS=1 is set (or when the script is
+run directly).
+
+Usage:
+    python test_waveform_pyramid.py
+    CUE_RUN_BENCHMARKS=1 python -m pytest test_waveform_pyramid.py -s
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.audio.waveform_pyramid import BASE_BLOCK_SIZE, WaveformPyramid
+from views.waveform.enhanced_waveform_renderer import (
+    ProfessionalWaveformRenderer, RenderingConfig, WaveformRenderMode
+)
+
+RUN_BENCHMARKS = os.environ.get("CUE_RUN_BENCHMARKS") == "1"
+
+
+def create_signal(seconds, sample_rate=44100, seed=11):
+    """Noise with a decaying burst every half second"""
+    rng = np.random.default_rng(seed)
+    signal = rng.normal(0, 0.05, int(seconds * sample_rate)).astype(np.float32)
+    burst = (rng.normal(0, 0.5, 2000) * np.exp(-np.linspace(0, 6, 2000))).astype(np.float32)
+    for start in range(0, len(signal) - len(burst), sample_rate // 2):
+        signal[start:start + len(burst)] += burst
+    return signal
+
+
+def loop_columns(signal, start, samples_per_pixel, width, end):
+    """Reference: the per-pixel loop used by the renderer before the pyramid"""
+    mins, maxs, rms = [], [], []
+    for pixel_x in range(width):
+        sample_start = start + int(pixel_x * samples_per_pixel)
+        sample_end = min(end, sample_start + samples_per_pixel)
+        if sample_start >= end:
+            break
+        pixel_data = signal[sample_start:sample_end]
+        mins.append(np.min(pixel_data))
+        maxs.append(np.max(pixel_data))
+        rms.append(np.sqrt(np.mean(pixel_data.astype(np.float64) ** 2)))
+    return np.array(mins), np.array(maxs), np.array(rms)
+
+
+def test_columns_match_per_pixel_loop():
+    signal = create_signal(3)[:123457]  # Odd length, partial blocks at every level
+    pyramid = WaveformPyramid(signal)
+    assert pyramid.levels[0].block_size == BASE_BLOCK_SIZE and len(pyramid.levels[-1].min) == 1
+    assert pyramid.levels[-1].min[0] == signal.min() and pyramid.levels[-1].max[0] == signal.max()
+
+    # Block-aligned views and views below one block per pixel are exact
+    for start, samples_per_pixel, width in ((0, 256, 400), (4096, 128, 300), (777, 17, 500), (120000, 3, 900)):
+        end = min(len(signal), start + width * samples_per_pixel)
+        columns = pyramid.columns(start, samples_per_pixel, width, end)
+        expected_min, expected_max, expected_rms = loop_columns(signal, start, samples_per_pixel, width, end)
+        np.testing.assert_array_equal(columns.min, expected_min)
+        np.testing.assert_array_equal(columns.max, expected_max)
+        np.testing.assert_allclose(columns.rms, expected_rms, rtol=1e-5)
+
+    # Unaligned views: edges move by less than one pixel and no sample is dropped from the envelope
+    start, samples_per_pixel, width = 1001, 301, 400
+    columns = pyramid.columns(start, samples_per_pixel, width)
+    expected_min, expected_max, _ = loop_columns(signal, start, samples_per_pixel, width, len(signal))
+    assert len(columns) == len(expected_min) and columns.block_size == 256
+    assert columns.min.min() <= expected_min.min() and columns.max.max() >= expected_max.max()
+    for i in range(len(columns)):
+        window = signal[max(0, start + i * samples_per_pixel - 256):start + (i + 1) * samples_per_pixel]
+        assert window.min() <= columns.min[i] and columns.max[i] <= window.max()
+
+    assert len(pyramid.columns(len(signal), 100, 50)) == 0
+
+
+def test_renderer_and_analyzer_points():
+    width, height = 800, 200
+    signal = create_signal(5)[:width * 256]  # 256 samples per pixel when fully zoomed out
+    config = RenderingConfig(mode=WaveformRenderMode.BASIC_MINMAX, smoothing_factor=0.0)
+    renderer = ProfessionalWaveformRenderer(config)
+
+    points = renderer.render_waveform_points([signal], 44100, width, height)
+    expected_min, expected_max, _ = loop_columns(signal, 0, 256, width, len(signal))
+    scale = height * 0.45
+    np.testing.assert_allclose([p[1] for p in points], np.clip(height / 2 - expected_max * scale, 0, height), atol=1e-4)
+    np.testing.assert_allclose([p[2] for p in points], np.clip(height / 2 - expected_min * scale, 0, height), atol=1e-4)
+
+    # Repaints of the same view hit the render cache without hashing the samples
+    rendered = renderer.render_waveform([signal], 44100, width, height)
+    assert renderer.render_waveform([signal], 44100, width, height) is rendered
+
+    config.mode = WaveformRenderMode.RMS_ENVELOPE
+    rms_points = renderer.render_waveform_points([signal], 44100, width, height, zoom=64.0)
+    assert len(rms_points) == width and len(renderer._pyramids) == 1
+
+    from utils.audio.waveform_analyzer import WaveformAnalyzer
+    analyzer = WaveformAnalyzer()
+    analyzer.waveform_data = [signal]
+    analyzer.sample_rate = 44100
+    analyzer.duration_seconds = len(signal) / 44100
+
+    # 2 s from 1 s: 88200 samples over 800 px -> 110 per pixel, reduced from 64-sample blocks
+    line = analyzer.get_waveform_points(width, height, offset=1.0, zoom=analyzer.duration_seconds / 2)
+    assert analyzer.waveform_pyramid is not None and analyzer.waveform_pyramid.samples is signal
+    assert len(line) == 2 * width and [x for x, _ in line[:4]] == [0, 0, 1, 1]
+    visible = signal[44100:44100 + 110 * width]
+    assert min(y for _, y in line[1::2]) == int((1 - visible.max()) * height / 2)
+    assert max(y for _, y in line[0::2]) == int((1 - visible.min()) * height / 2)
+
+
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="benchmark, set CUE_RUN_BENCHMARKS=1 to run")
+def test_zoom_scroll_benchmark(seconds=600, width=1600, height=300):
+    """Render time per frame across zoom levels: per-pixel loop vs pyramid"""
+    signal = create_signal(seconds)
+
+    start = time.perf_counter()
+    pyramid = WaveformPyramid(signal)
+    build_seconds = time.perf_counter() - start
+
+    renderer = ProfessionalWaveformRenderer(RenderingConfig(mode=WaveformRenderMode.RMS_ENVELOPE))
+    renderer.set_pyramid(pyramid)
+
+    print(f"\n{seconds}s track ({len(signal)} samples), {width} px, pyramid built in {build_seconds * 1000:.1f} ms "
+          f"({sum(level.min.nbytes * 3 + level.sum_squares.nbytes for level in pyramid.levels) / 2 ** 20:.1f} MB)")
+    print(f"{'zoom':>8} {'loop ms':>10} {'pyramid ms':>11} {'render ms':>10}")
+    pyramid_times = []
+    for zoom in (1.0, 8.0, 64.0, 512.0):
+        samples_per_pixel = max(1, int(len(signal) / (width * zoom)))
+        view_start = len(signal) // 3
+        view_end = min(len(signal), view_start + width * samples_per_pixel)
+
+        start = time.perf_counter()
+        loop_columns(signal, view_start, samples_per_pixel, width, view_end)
+        loop_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pyramid.columns(view_start, samples_per_pixel, width, view_end)
+        pyramid_seconds = time.perf_counter() - start
+        pyramid_times.append(pyramid_seconds)
+
+        # Scrolling: a new offset per frame, so the render cache never hits
+        start = time.perf_counter()
+        for step in range(10):
+            renderer.render_waveform_points([signal], 44100, width, height, offset=0.3 + step * 0.001, zoom=zoom)
+        render_seconds = (time.perf_counter() - start) / 10
+
+        print(f"{zoom:8.0f} {loop_seconds * 1000:10.1f} {pyramid_seconds * 1000:11.2f} {render_seconds * 1000:10.2f}")
+        assert pyramid_seconds < loop_seconds
+
+    # Cost follows width, not the number of visible samples
+    assert max(pyramid_times) < 20 * min(pyramid_times) + 0.005
+
+
+if __name__ == "__main__":
+    test_columns_match_per_pixel_loop()
+    test_renderer_and_analyzer_points()
+    test_zoom_scroll_benchmark()
+    print("All waveform pyramid tests passed.")
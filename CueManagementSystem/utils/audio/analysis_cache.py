@@ -0,0 +1,279 @@
+"""
+Waveform Analysis Cache
+=======================
+
+Persistent cache of WaveformAnalyzer stage outputs, keyed by audio content, analysis settings and analyzer version.
+
+Each pipeline stage (preprocessed signal, onset candidates, refined peaks,
+classified peaks) is stored under a key that chains the key of the stage
+before it with the config values the stage reads. Re-analysing a track with
+unchanged settings loads every stage from disk; changing a setting only
+reruns the stage that reads it and the stages after it.
+
+Storage layout (under the ConfigManager config dir):
+    analysis_cache/<key>.npz    signal stages (numpy arrays)
+    analysis_cache/<key>.json   peak list stages
+
+Features:
+- Content hash of the decoded audio (incremental, so loaders can feed blocks)
+- Chained per-stage keys
+- LRU eviction by total size (entries are touched on every hit)
+- Hit/miss/eviction statistics
+- Atomic writes (temp file + rename)
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+# Bump whenever a cached stage's algorithm changes so stale results are never reused
+ANALYZER_CACHE_VERSION = "1"
+
+CACHE_DIR_NAME = "analysis_cache"
+
+
+def default_cache_dir() -> Path:
+    """analysis_cache under the application config dir (temp dir if config is unavailable)"""
+    try:
+        from config_manager import get_config_manager
+
+        return get_config_manager().config_dir / CACHE_DIR_NAME
+    except Exception:
+        return Path(tempfile.gettempdir()) / "CuePi" / CACHE_DIR_NAME
+
+
+class AudioHasher:
+    """Incremental content hash of decoded audio"""
+
+    def __init__(self):
+        self._hash = hashlib.blake2b(digest_size=20)
+
+    def update(self, samples: np.ndarray):
+        self._hash.update(np.ascontiguousarray(samples, dtype=np.float32).data)
+
+    def hexdigest(self, sample_rate: int) -> str:
+        final = self._hash.copy()
+        final.update(f";sr={int(sample_rate)}".encode())
+        return final.hexdigest()
+
+
+def hash_audio(samples: np.ndarray, sample_rate: int) -> str:
+    """Content hash of a whole decoded signal (same value as feeding AudioHasher block by block)"""
+    hasher = AudioHasher()
+    hasher.update(samples)
+    return hasher.hexdigest(sample_rate)
+
+
+def _to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+class AnalysisCache:
+    """
+    Directory of cached analysis stages with LRU size eviction
+
+    Thread-safe; one instance is shared by every analyzer in the process
+    (see get_analysis_cache).
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None, max_size_mb: float = 1000):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+
+    @staticmethod
+    def stage_key(parent_key: str, stage: str, config: Dict[str, Any], keys: Iterable[str],
+                  extra: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Key for a stage output
+
+        Args:
+            parent_key: Audio hash for the first stage, otherwise the previous stage's key
+            stage: Stage name
+            config: Analyzer config
+            keys: Config keys the stage reads
+            extra: Other inputs that change the stage output (e.g. library availability)
+        """
+        material = {
+            'version': ANALYZER_CACHE_VERSION,
+            'parent': parent_key,
+            'stage': stage,
+            'config': {key: config.get(key) for key in sorted(keys)},
+            'extra': extra or {}
+        }
+        encoded = json.dumps(material, sort_keys=True, default=_to_json).encode()
+        return f"{stage}-{hashlib.blake2b(encoded, digest_size=20).hexdigest()}"
+
+    # Lookups
+
+    def load_array(self, key: str) -> Optional[np.ndarray]:
+        """Cached signal stage, or None on a miss"""
+        path = self.cache_dir / f"{key}.npz"
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                array = data['data']
+        except FileNotFoundError:
+            return self._miss()
+        except Exception as e:
+            return self._corrupt(path, e)
+        return self._hit(path, array)
+
+    def load_peaks(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached peak list stage, or None on a miss"""
+        path = self.cache_dir / f"{key}.json"
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            peaks = entry['peaks']
+        except FileNotFoundError:
+            return self._miss()
+        except Exception as e:
+            return self._corrupt(path, e)
+        return self._hit(path, peaks)
+
+    def _hit(self, path: Path, value):
+        self.hits += 1
+        try:
+            os.utime(path)  # Most recently used
+        except OSError:
+            pass
+        return value
+
+    def _miss(self):
+        self.misses += 1
+        return None
+
+    def _corrupt(self, path: Path, error: Exception):
+        self.misses += 1
+        self.errors += 1
+        self.logger.warning(f"Discarding unreadable cache entry {path.name}: {error}")
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return None
+
+    # Stores
+
+    def store_array(self, key: str, array: np.ndarray):
+        """Cache a signal stage"""
+        def write(f):
+            np.savez(f, data=np.asarray(array))
+
+        self._store(f"{key}.npz", write)
+
+    def store_peaks(self, key: str, peaks: List[Dict[str, Any]]):
+        """Cache a peak list stage (numpy values are stored as plain numbers/lists)"""
+        def write(f):
+            f.write(json.dumps({'version': ANALYZER_CACHE_VERSION, 'peaks': peaks}, default=_to_json).encode())
+
+        self._store(f"{key}.json", write)
+
+    def _store(self, filename: str, write):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    write(f)
+                os.replace(temp_path, self.cache_dir / filename)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except Exception as e:
+            self.errors += 1
+            self.logger.warning(f"Could not write analysis cache entry {filename}: {e}")
+            return
+
+        self.stores += 1
+        self._evict()
+
+    # Maintenance
+
+    def _entries(self) -> List[os.DirEntry]:
+        try:
+            return [entry for entry in os.scandir(self.cache_dir)
+                    if entry.is_file() and not entry.name.startswith('.')]
+        except FileNotFoundError:
+            return []
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits max_size_mb"""
+        with self._lock:
+            entries = [(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in self._entries()]
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_size_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                    total -= size
+                    self.evictions += 1
+                except OSError:
+                    pass
+
+    def clear(self):
+        """Delete every cached entry"""
+        with self._lock:
+            for entry in self._entries():
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+
+    def size_bytes(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics and disk usage"""
+        lookups = self.hits + self.misses
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'errors': self.errors,
+            'entries': len(entries),
+            'size_mb': sum(entry.stat().st_size for entry in entries) / (1024 * 1024),
+            'max_size_mb': self.max_size_bytes / (1024 * 1024),
+            'cache_dir': str(self.cache_dir)
+        }
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache(max_size_mb: float = 1000) -> AnalysisCache:
+    """Process-wide analysis cache in the config dir"""
+    global _analysis_cache
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache(max_size_mb=max_size_mb)
+    else:
+        _analysis_cache.max_size_bytes = int(max_size_mb * 1024 * 1024)
+    return _analysis_cache
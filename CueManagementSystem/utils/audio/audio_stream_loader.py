@@ -0,0 +1,176 @@
+"""
+Streaming Audio Loader
+======================
+
+Block-wise audio decoder that fills a preallocated mono buffer while the file is still being read.
+
+Decodes with soundfile.blocks instead of loading the whole file in one call,
+downmixes every block to mono on the fly and writes it straight into a
+float32 buffer sized from the file header (memory-mapped for very long
+tracks). Consumers get a callback per block, so noise analysis and the
+min/max overview can run while the rest of the file is decoding.
+
+Features:
+- Block-wise decoding with soundfile.blocks
+- On-the-fly mono downmix (channel mean, same as librosa.load(mono=True))
+- Preallocated or memory-mapped output buffer
+- Incremental min/max overview for waveform display
+- Per-block progress and data callbacks
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+try:
+    import soundfile as sf
+
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+# Samples per min/max overview bucket
+OVERVIEW_BUCKET_SIZE = 1024
+
+
+@dataclass
+class StreamedAudio:
+    """Result of a streaming load"""
+    samples: np.ndarray  # float32 mono, np.memmap for long tracks
+    sample_rate: int
+    source_channels: int
+    overview_min: np.ndarray  # per OVERVIEW_BUCKET_SIZE samples
+    overview_max: np.ndarray
+    memory_mapped: bool = False
+    block_count: int = 0
+    first_block_seconds: float = 0.0  # time until the first block was available
+    decode_seconds: float = 0.0
+    _backing_file: Optional[object] = field(default=None, repr=False)
+
+    @property
+    def duration_seconds(self) -> float:
+        return len(self.samples) / self.sample_rate if self.sample_rate else 0.0
+
+    def close(self):
+        """Release the memory-mapped backing file (no-op for in-memory buffers)"""
+        if self._backing_file is not None:
+            self._backing_file.close()
+            self._backing_file = None
+
+
+def can_stream(file_path: Union[str, Path]) -> bool:
+    """True if soundfile can decode the file (otherwise fall back to librosa)"""
+    if not SOUNDFILE_AVAILABLE:
+        return False
+    try:
+        sf.info(str(file_path))
+        return True
+    except Exception:
+        return False
+
+
+def stream_load(file_path: Union[str, Path], block_seconds: float = 2.0,
+                memmap_min_seconds: Optional[float] = None,
+                block_callback: Optional[Callable[[np.ndarray, int], None]] = None,
+                progress_callback: Optional[Callable[[int], None]] = None) -> StreamedAudio:
+    """
+    Decode an audio file block by block into a mono float32 buffer
+
+    Args:
+        file_path: Audio file readable by soundfile
+        block_seconds: Decode block length in seconds
+        memmap_min_seconds: Use a memory-mapped buffer for files at least this long (None = never)
+        block_callback: Called after each block with (buffer, samples_filled); the
+                        buffer is valid up to samples_filled
+        progress_callback: Called after each block with the percentage decoded
+
+    Returns:
+        StreamedAudio with the decoded samples and min/max overview
+    """
+    if not SOUNDFILE_AVAILABLE:
+        raise ImportError("soundfile is required for streaming loads")
+
+    start = time.perf_counter()
+    info = sf.info(str(file_path))
+    total = info.frames
+    sample_rate = info.samplerate
+    # Whole overview buckets per block, so only the last block can end mid-bucket
+    block_size = max(1, int(block_seconds * sample_rate) // OVERVIEW_BUCKET_SIZE) * OVERVIEW_BUCKET_SIZE
+
+    backing_file = None
+    if memmap_min_seconds is not None and total >= memmap_min_seconds * sample_rate and total > 0:
+        # Unlinked temp file - the OS reclaims it when the mapping is closed
+        backing_file = tempfile.TemporaryFile(prefix="cue_audio_", suffix=".f32")
+        buffer = np.memmap(backing_file, dtype=np.float32, mode='w+', shape=(total,))
+    else:
+        buffer = np.empty(total, dtype=np.float32)
+
+    bucket_count = -(-total // OVERVIEW_BUCKET_SIZE)
+    overview_min = np.zeros(bucket_count, dtype=np.float32)
+    overview_max = np.zeros(bucket_count, dtype=np.float32)
+
+    filled = 0
+    block_count = 0
+    first_block_seconds = 0.0
+    last_percent = -1
+    for block in sf.blocks(str(file_path), blocksize=block_size, dtype='float32', always_2d=True):
+        count = min(len(block), total - filled)
+        if count <= 0:
+            break
+        target = buffer[filled:filled + count]
+        if block.shape[1] == 1:
+            target[:] = block[:count, 0]
+        else:
+            np.mean(block[:count], axis=1, out=target)
+
+        first_bucket = filled // OVERVIEW_BUCKET_SIZE
+        whole = count // OVERVIEW_BUCKET_SIZE
+        if whole:
+            shaped = target[:whole * OVERVIEW_BUCKET_SIZE].reshape(whole, OVERVIEW_BUCKET_SIZE)
+            overview_min[first_bucket:first_bucket + whole] = shaped.min(axis=1)
+            overview_max[first_bucket:first_bucket + whole] = shaped.max(axis=1)
+        if count % OVERVIEW_BUCKET_SIZE:
+            tail = target[whole * OVERVIEW_BUCKET_SIZE:]
+            overview_min[first_bucket + whole] = tail.min()
+            overview_max[first_bucket + whole] = tail.max()
+
+        filled += count
+        block_count += 1
+        if block_count == 1:
+            first_block_seconds = time.perf_counter() - start
+
+        if block_callback is not None:
+            block_callback(buffer, filled)
+        if progress_callback is not None:
+            percent = int(filled * 100 / total)
+            if percent != last_percent:
+                last_percent = percent
+                progress_callback(percent)
+
+    if filled < total:
+        # Header overstated the length (truncated file) - keep what was decoded
+        kept_buckets = -(-filled // OVERVIEW_BUCKET_SIZE)
+        buffer = buffer[:filled]
+        overview_min = overview_min[:kept_buckets]
+        overview_max = overview_max[:kept_buckets]
+
+    return StreamedAudio(
+        samples=buffer,
+        sample_rate=sample_rate,
+        source_channels=info.channels,
+        overview_min=overview_min,
+        overview_max=overview_max,
+        memory_mapped=backing_file is not None,
+        block_count=block_count,
+        first_block_seconds=first_block_seconds,
+        decode_seconds=time.perf_counter() - start,
+        _backing_file=backing_file
+    )
@@ -0,0 +1,246 @@
+"""
+Feature Plan
+============
+
+Spectral features of the signals in one analysis, each computed once and shared by every stage that reads it.
+
+The analysis stages of WaveformAnalyzer and AdvancedSignalProcessor read
+spectrograms of the same few signals at the same few resolutions. A
+FeaturePlan computes the STFT of a signal for an (n_fft, hop length, window)
+the first time a stage asks for it and derives magnitude, power, phase, mel
+spectrogram, band energies, spectral flux and onset strength from that STFT
+only when they are asked for. Everything is kept for the stages that come
+later, within a byte budget: above it the least recently used features are
+dropped (and recomputed if they are asked for again). Counts of computed
+and reused features and of the STFTs run tell what a run shared.
+
+Signals are identified by object: stages handing the same array to the plan
+share its features, so arrays must not be changed in place while the plan
+holds features of them.
+
+Features:
+- One STFT per signal and (n_fft, hop length, window, center)
+- Lazy magnitude, power, phase, mel, band energy, spectral flux and onset strength
+- LRU byte budget over everything kept
+- Computed/reused counts per feature, STFT count and evictions
+- NumPy STFT with librosa's framing when librosa is not installed
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import librosa
+
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _window(window, n_fft: int) -> np.ndarray:
+    """Periodic analysis window (as librosa.filters.get_window)"""
+    if window == 'hann':
+        return 0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(n_fft) / n_fft)
+    import scipy.signal
+
+    return scipy.signal.get_window(window, n_fft, fftbins=True)
+
+
+def numpy_stft(signal: np.ndarray, n_fft: int, hop_length: int, window='hann', center: bool = True) -> np.ndarray:
+    """
+    STFT with librosa.stft's framing (zero padding when centered), frequency x frames
+
+    Args:
+        signal: Mono signal
+        n_fft: FFT size (= window length)
+        hop_length: Samples between frames
+        window: Window name
+        center: Pad n_fft // 2 zeros on both sides so frame t is centered on sample t * hop_length
+    """
+    if center:
+        signal = np.pad(signal, n_fft // 2)
+    if len(signal) < n_fft:
+        return np.zeros((n_fft // 2 + 1, 0), dtype=np.complex64)
+    frames = np.lib.stride_tricks.sliding_window_view(signal, n_fft)[::hop_length]
+    dtype = np.complex64 if signal.dtype == np.float32 else np.complex128
+    return np.fft.rfft(frames * _window(window, n_fft), axis=1).T.astype(dtype, copy=False)
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(item) for item in value)
+    return 0
+
+
+class FeaturePlan:
+    """
+    Spectral features of an analysis' signals, computed on first use
+
+    Args:
+        sr: Sample rate of the signals
+        max_bytes: Budget for the features kept between requests
+    """
+
+    def __init__(self, sr: int, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.sr = sr
+        self.max_bytes = max_bytes
+        self.ffts = 0  # STFTs computed
+        self.computed: Counter = Counter()  # Feature name -> times computed
+        self.reused: Counter = Counter()  # Feature name -> requests served from the plan
+        self.evictions = 0
+        self.peak_bytes = 0
+        self._features: "OrderedDict[tuple, Any]" = OrderedDict()  # Least recently used first
+        self._bytes = 0
+        self._signals: Dict[int, np.ndarray] = {}  # Held so their ids stay unique while features are kept
+        self._signal_refs: Counter = Counter()  # Signal id -> features kept of it
+
+    def _feature(self, name: str, signal: np.ndarray, params: tuple, compute: Callable[[], Any]):
+        key = (name, id(signal)) + params
+        value = self._features.get(key)
+        if value is not None:
+            self._features.move_to_end(key)
+            self.reused[name] += 1
+            return value
+
+        value = compute()
+        self.computed[name] += 1
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return value  # Larger than the whole budget: used once, not kept
+        while self._features and self._bytes + size > self.max_bytes:
+            evicted_key, evicted = self._features.popitem(last=False)
+            self._bytes -= _nbytes(evicted)
+            self._unref(evicted_key[1])
+            self.evictions += 1
+        self._features[key] = value
+        self._signals[id(signal)] = signal
+        self._signal_refs[id(signal)] += 1
+        self._bytes += size
+        self.peak_bytes = max(self.peak_bytes, self._bytes)
+        return value
+
+    def _unref(self, signal_id: int):
+        """Stop holding a signal once no kept feature refers to it"""
+        self._signal_refs[signal_id] -= 1
+        if self._signal_refs[signal_id] <= 0:
+            del self._signal_refs[signal_id]
+            self._signals.pop(signal_id, None)
+
+    def stft(self, signal: np.ndarray, n_fft: int = 2048, hop_length: Optional[int] = None, window='hann',
+             center: bool = True) -> np.ndarray:
+        """Complex STFT, frequency x frames (librosa.stft with win_length = n_fft)"""
+        hop_length = hop_length or n_fft // 4
+
+        def compute():
+            self.ffts += 1
+            if LIBROSA_AVAILABLE:
+                return librosa.stft(signal, n_fft=n_fft, hop_length=hop_length, window=window, center=center)
+            return numpy_stft(signal, n_fft, hop_length, window, center)
+
+        return self._feature('stft', signal, (n_fft, hop_length, window, center), compute)
+
+    def magnitude(self, signal: np.ndarray, n_fft: int = 2048, hop_length: Optional[int] = None, window='hann',
+                  center: bool = True) -> np.ndarray:
+        """|STFT|"""
+        params = (n_fft, hop_length or n_fft // 4, window, center)
+        return self._feature('magnitude', signal, params, lambda: np.abs(self.stft(signal, *params)))
+
+    def power(self, signal: np.ndarray, n_fft: int = 2048, hop_length: Optional[int] = None, window='hann',
+              center: bool = True) -> np.ndarray:
+        """|STFT| ** 2"""
+        params = (n_fft, hop_length or n_fft // 4, window, center)
+        return self._feature('power', signal, params, lambda: self.magnitude(signal, *params) ** 2)
+
+    def phase(self, signal: np.ndarray, n_fft: int = 2048, hop_length: Optional[int] = None, window='hann',
+              center: bool = True) -> np.ndarray:
+        """Phase angle of the STFT"""
+        params = (n_fft, hop_length or n_fft // 4, window, center)
+        return self._feature('phase', signal, params, lambda: np.angle(self.stft(signal, *params)))
+
+    def mel(self, signal: np.ndarray, n_fft: int = 2048, hop_length: Optional[int] = None, n_mels: int = 128,
+            window='hann', center: bool = True) -> np.ndarray:
+        """Mel power spectrogram (librosa.feature.melspectrogram of the signal)"""
+        params = (n_fft, hop_length or n_fft // 4, window, center)
+        return self._feature('mel', signal, params + (n_mels,), lambda: librosa.feature.melspectrogram(
+            S=self.power(signal, *params), sr=self.sr, n_fft=n_fft, n_mels=n_mels))
+
+    def mel_db(self, signal: np.ndarray, n_fft: int = 2048, hop_length: Optional[int] = None, n_mels: int = 128,
+               window='hann', center: bool = True) -> np.ndarray:
+        """Mel power spectrogram in dB (librosa.power_to_db)"""
+        params = (n_fft, hop_length or n_fft // 4)
+        return self._feature('mel_db', signal, params + (n_mels, window, center), lambda: librosa.power_to_db(
+            self.mel(signal, *params, n_mels=n_mels, window=window, center=center)))
+
+    def band_energies(self, signal: np.ndarray, bands: Sequence[Tuple[float, float]], n_fft: int = 2048,
+                      hop_length: Optional[int] = None, window='hann', center: bool = True) -> np.ndarray:
+        """
+        Power per frame summed over the bins of each band, bands x frames
+
+        Args:
+            bands: (low, high) frequencies in Hz; a bin belongs to a band if low <= frequency <= high
+        """
+        params = (n_fft, hop_length or n_fft // 4, window, center)
+        bands = tuple((float(low), float(high)) for low, high in bands)
+
+        def compute():
+            power = self.power(signal, *params)
+            freqs = np.fft.rfftfreq(n_fft, 1.0 / self.sr)
+            energies = np.zeros((len(bands), power.shape[1]), dtype=power.dtype)
+            for band, (low, high) in enumerate(bands):
+                energies[band] = power[(freqs >= low) & (freqs <= high)].sum(axis=0)
+            return energies
+
+        return self._feature('band_energies', signal, params + (bands,), compute)
+
+    def spectral_flux(self, signal: np.ndarray, n_fft: int = 2048, hop_length: Optional[int] = None,
+                      window='hann', center: bool = True) -> np.ndarray:
+        """Sum over bins of the magnitude increases from each frame to the next (one value less than frames)"""
+        params = (n_fft, hop_length or n_fft // 4, window, center)
+        return self._feature('spectral_flux', signal, params, lambda: np.sum(
+            np.maximum(0, np.diff(self.magnitude(signal, *params), axis=1)), axis=0))
+
+    def onset_strength(self, signal: np.ndarray, n_fft: int = 2048, hop_length: int = 512, lag: int = 1,
+                       max_size: int = 1) -> np.ndarray:
+        """Onset strength envelope (librosa.onset.onset_strength of the signal with these settings)"""
+        return self._feature('onset_strength', signal, (n_fft, hop_length, lag, max_size),
+                             lambda: librosa.onset.onset_strength(
+                                 S=self.mel_db(signal, n_fft, hop_length), sr=self.sr, n_fft=n_fft,
+                                 hop_length=hop_length, lag=lag, max_size=max_size))
+
+    def release(self, signal: np.ndarray):
+        """Drop the features of a signal no stage will read again"""
+        for key in [key for key in self._features if key[1] == id(signal)]:
+            self._bytes -= _nbytes(self._features.pop(key))
+        self._signal_refs.pop(id(signal), None)
+        self._signals.pop(id(signal), None)
+
+    def clear(self):
+        """Drop every feature (statistics are kept)"""
+        self._features.clear()
+        self._signals.clear()
+        self._signal_refs.clear()
+        self._bytes = 0
+
+    def size_bytes(self) -> int:
+        """Bytes of the features kept"""
+        return self._bytes
+
+    def report(self) -> Dict[str, Any]:
+        """
+        What the plan computed and shared
+
+        Returns:
+            STFTs computed, computed and reused counts per feature, evictions and peak bytes kept
+        """
+        return {'ffts': self.ffts, 'computed': dict(self.computed), 'reused': dict(self.reused),
+                'evictions': self.evictions, 'peak_bytes': self.peak_bytes}
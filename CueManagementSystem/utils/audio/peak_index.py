@@ -0,0 +1,137 @@
+"""
+Peak Index
+==========
+
+Peaks sorted by position in parallel NumPy arrays, for the range queries and hit tests done on every repaint.
+
+Keys (time, sample index, ... - whatever the caller's key function returns),
+amplitudes, prominences and type codes are kept in arrays sorted by key, next
+to the peak objects in the same order and the index each peak has in the
+caller's own list. Visible ranges and nearest-peak lookups are two binary
+searches instead of a scan over every peak; single peaks are inserted and
+removed without re-sorting.
+
+Features:
+- Visible range and nearest-peak queries with np.searchsorted
+- Incremental insert/remove (manual peaks) that keeps source indices in sync
+- Top-N by prominence as a mask over the sorted order
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Type codes of the drum types; other types get codes as they are first seen
+PEAK_TYPE_CODES: Dict[str, int] = {'generic': 0, 'kick': 1, 'snare': 2, 'hi-hat': 3, 'tom': 4, 'cymbal': 5}
+
+
+def peak_type_code(peak_type: str) -> int:
+    """Integer code of a peak type"""
+    code = PEAK_TYPE_CODES.get(peak_type)
+    if code is None:
+        code = PEAK_TYPE_CODES.setdefault(peak_type, len(PEAK_TYPE_CODES))
+    return code
+
+
+class PeakIndex:
+    """
+    Peaks sorted by key with parallel arrays
+
+    Args:
+        peaks: Peaks in the caller's order (source index = position in this sequence)
+        key: Sort key of a peak (default: peak.time)
+    """
+
+    def __init__(self, peaks: Sequence[Any] = (), key: Callable[[Any], float] = attrgetter('time')):
+        self.key = key
+        self.version = 0  # Changes on every insert/remove, for caches derived from the index
+        self._set(list(peaks))
+
+    def _set(self, peaks: List[Any]):
+        keys = np.fromiter((self.key(peak) for peak in peaks), dtype=np.float64, count=len(peaks))
+        order = np.argsort(keys, kind='stable')
+        self.peaks: List[Any] = [peaks[i] for i in order]
+        self.keys = keys[order]
+        self.amplitudes = np.array([float(getattr(peak, 'amplitude', 0.0)) for peak in self.peaks])
+        self.prominences = np.array([float(getattr(peak, 'prominence', 0.0)) for peak in self.peaks])
+        self.type_codes = np.array([peak_type_code(getattr(peak, 'type', 'generic')) for peak in self.peaks],
+                                   dtype=np.int16)
+        self.source_indices = order.astype(np.int64)
+        self.version += 1
+
+    def __len__(self) -> int:
+        return len(self.peaks)
+
+    def span(self, low: float, high: float) -> Tuple[int, int]:
+        """Sorted positions [start, stop) of the peaks with low <= key <= high"""
+        return (int(np.searchsorted(self.keys, low, side='left')),
+                int(np.searchsorted(self.keys, high, side='right')))
+
+    def nearest(self, value: float, tolerance: float = np.inf) -> Optional[int]:
+        """Sorted position of the peak whose key is closest to value (None if none within tolerance)"""
+        if not len(self.peaks):
+            return None
+        position = int(np.searchsorted(self.keys, value))
+        candidates = [p for p in (position - 1, position) if 0 <= p < len(self.peaks)]
+        best = min(candidates, key=lambda p: abs(self.keys[p] - value))
+        return best if abs(self.keys[best] - value) <= tolerance else None
+
+    def top_by_prominence(self, count: int) -> np.ndarray:
+        """
+        Mask over the sorted order of the `count` most prominent peaks
+
+        Ties keep the caller's order, like sorted(peaks, key=prominence, reverse=True)[:count].
+        """
+        by_source = np.empty(len(self.peaks), dtype=np.float64)
+        by_source[self.source_indices] = self.prominences
+        chosen = np.zeros(len(self.peaks), dtype=bool)
+        chosen[np.argsort(-by_source, kind='stable')[:count]] = True
+        return chosen[self.source_indices]
+
+    def insert(self, peak: Any, source_index: Optional[int] = None) -> int:
+        """
+        Add a peak, keeping the order
+
+        Args:
+            peak: Peak to add
+            source_index: Its index in the caller's list (default: appended)
+
+        Returns:
+            Sorted position of the new peak
+        """
+        if source_index is None:
+            source_index = len(self.peaks)
+        else:
+            self.source_indices[self.source_indices >= source_index] += 1
+
+        key = self.key(peak)
+        position = int(np.searchsorted(self.keys, key, side='right'))
+        self.peaks.insert(position, peak)
+        self.keys = np.insert(self.keys, position, key)
+        self.amplitudes = np.insert(self.amplitudes, position, float(getattr(peak, 'amplitude', 0.0)))
+        self.prominences = np.insert(self.prominences, position, float(getattr(peak, 'prominence', 0.0)))
+        self.type_codes = np.insert(self.type_codes, position, peak_type_code(getattr(peak, 'type', 'generic')))
+        self.source_indices = np.insert(self.source_indices, position, source_index)
+        self.version += 1
+        return position
+
+    def remove_source_index(self, source_index: int) -> Optional[Any]:
+        """Remove the peak that has source_index in the caller's list (later indices move down)"""
+        matches = np.flatnonzero(self.source_indices == source_index)
+        if not len(matches):
+            return None
+        position = int(matches[0])
+        peak = self.peaks.pop(position)
+        self.keys = np.delete(self.keys, position)
+        self.amplitudes = np.delete(self.amplitudes, position)
+        self.prominences = np.delete(self.prominences, position)
+        self.type_codes = np.delete(self.type_codes, position)
+        self.source_indices = np.delete(self.source_indices, position)
+        self.source_indices[self.source_indices > source_index] -= 1
+        self.version += 1
+        return peak
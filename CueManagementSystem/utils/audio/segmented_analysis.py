@@ -0,0 +1,350 @@
+"""
+Segmented Analysis
+==================
+
+Process pool running the per-segment stages of a waveform analysis on overlapping windows of a track.
+
+A long track is cut into core segments of chunk_size_seconds. Worker
+processes see the raw and preprocessed signals through shared memory (no
+copies are pickled) and run the stages whose result at a point only depends
+on the audio around it: preprocessing writes the core of each segment,
+padded by the few STFT frames of context it needs, into the shared
+preprocessed signal; peak refinement keeps the peaks its window (the core
+and overlap_seconds on both sides) found in its core; and drum
+classification classifies the peaks of its core with the peaks before and
+after it as context. Peaks are kept by the core they
+fall in, and peaks of neighbouring windows closer than min_peak_distance
+across a core boundary are merged to the more confident one.
+
+Segment starts are aligned to the STFT hop, so every frame a worker
+computes inside its core is the frame the whole-track analysis computes and
+preprocessing is identical to the serial run. Onset detection stays on the
+whole track in the parent (its activations are normalized over the track),
+as do the refinement steps that compare each peak with the whole track: the
+confidence threshold, isolated peaks, temporal consistency and the max_peaks
+cap. What is decided per window is the progressive filtering of very dense
+candidate lists (it counts the candidates of a window) and runs of clustered
+candidates longer than the overlap.
+
+Features:
+- Hop-aligned overlapping segment layout
+- Raw and preprocessed signals shared with the workers, not pickled
+- One analyzer per worker process, set up once per analysis
+- Core-based stitching with de-duplication across segment boundaries
+- Candidates and peaks sent to the workers as PeakSets (a few arrays, not thousands of dicts)
+- Per-window classification context and global hit index
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+import contextlib
+import multiprocessing as mp
+import os
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from utils.audio.peak_set import PeakSet
+
+HOP_LENGTH = 512  # Segment starts are multiples of the analysis STFT hop
+# Samples of context preprocessing needs on each side of a core: the STFTs of noise
+# reduction and HPSS chained through the 31-frame HPSS median filter span about 24 hops
+PREPROCESSING_CONTEXT = 64 * HOP_LENGTH
+CLASSIFICATION_CONTEXT_PEAKS = 8  # Peaks of context at least on each side of a classification window
+
+
+class Segment(NamedTuple):
+    """Samples of one segment: the padded window [lo, hi) around the core [start, stop)"""
+    lo: int
+    start: int
+    stop: int
+    hi: int
+
+
+def segment_layout(n_samples: int, sr: int, segment_seconds: float,
+                   context: int = PREPROCESSING_CONTEXT) -> List[Segment]:
+    """
+    Cut a signal into hop-aligned core segments padded by context on both sides
+
+    Args:
+        n_samples: Signal length
+        sr: Sample rate
+        segment_seconds: Core length
+        context: Samples of context on each side of a core (rounded up to whole hops)
+
+    Returns:
+        Segments in order; their cores cover the signal without overlapping
+    """
+    core = max(HOP_LENGTH, int(round(segment_seconds * sr / HOP_LENGTH)) * HOP_LENGTH)
+    pad = -(-context // HOP_LENGTH) * HOP_LENGTH
+    return [Segment(max(0, start - pad), start, min(n_samples, start + core), min(n_samples, start + core + pad))
+            for start in range(0, n_samples, core)]
+
+
+def stitch_peaks(windows: List[PeakSet], cores: List[Tuple[float, float]], min_distance: float) -> PeakSet:
+    """
+    Join the peaks of overlapping windows
+
+    Args:
+        windows: Peaks found by each window
+        cores: (start, stop) seconds of each window's core
+        min_distance: Peaks of neighbouring windows closer than this are one peak
+
+    Returns:
+        Peaks sorted by time: each window's peaks inside its core, the more
+        confident of two peaks closer than min_distance across a boundary
+    """
+    stitched = []  # (window, row) of each kept peak; windows only increase
+    last_time = last_confidence = None
+    for window, (peaks, (start, stop)) in enumerate(zip(windows, cores)):
+        if not len(peaks):
+            continue
+        times, confidences = peaks['time'].tolist(), peaks['confidence'].tolist()
+        for row in np.argsort(peaks['time'], kind='stable').tolist():
+            if not start <= times[row] < stop:
+                continue
+            if stitched and stitched[-1][0] != window and times[row] - last_time < min_distance:
+                if confidences[row] > last_confidence:
+                    stitched[-1] = (window, row)
+                    last_time, last_confidence = times[row], confidences[row]
+                continue
+            stitched.append((window, row))
+            last_time, last_confidence = times[row], confidences[row]
+    return PeakSet.concatenate(peaks.take([row for owner, row in stitched if owner == window])
+                               for window, peaks in enumerate(windows))
+
+
+# Worker process state: the analyzer and the shared signals of the running analysis
+_worker: Dict[str, Any] = {}
+
+
+def _attach(name: str, length: int, dtype: str) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray((length,), dtype=np.dtype(dtype), buffer=memory.buf)
+
+
+def _quietly(task: Callable, *args):
+    """Run a task in a worker with stdout discarded (the analysis stages print their progress)"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return task(*args)
+
+
+def _init_worker(state: Dict[str, Any]):
+    """Set up the analyzer of a worker process from the analysis state of the parent"""
+    _quietly(_set_up_worker, state)
+
+
+def _set_up_worker(state: Dict[str, Any]):
+    from utils.audio.waveform_analyzer import DrumClassificationModel, DrumClassifier, NoiseFilter, WaveformAnalyzer
+
+    raw_memory, raw = _attach(state['raw'], state['length'], state['dtype'])
+    processed_memory, processed = _attach(state['processed'], state['length'], state['dtype'])
+
+    analyzer = WaveformAnalyzer()
+    analyzer.config = dict(state['config'])
+    for name in ('sample_rate', 'duration_seconds', 'noise_floor', 'dynamic_range', 'is_drum_stem'):
+        setattr(analyzer, name, state[name])
+    analyzer.waveform_data = [raw]
+    analyzer.noise_filter = NoiseFilter(analyzer.sample_rate, analyzer.signal_processor)
+    analyzer.noise_filter.noise_profile = state['noise_profile']
+    analyzer.drum_classifier = DrumClassifier(DrumClassificationModel())
+    _worker.update(analyzer=analyzer, raw=raw, processed=processed, memory=(raw_memory, processed_memory),
+                   feature_plan_bytes=state['feature_plan_bytes'])
+
+
+def _preprocess_segment(segment: Segment):
+    """Preprocess a padded segment and write its core into the shared preprocessed signal"""
+    analyzer = _worker['analyzer']
+    analyzer.signal_processor.begin_feature_plan(analyzer.sample_rate, _worker['feature_plan_bytes'])
+    try:
+        processed = analyzer._preprocess_signal(_worker['raw'][segment.lo:segment.hi])
+    finally:
+        analyzer.signal_processor.end_feature_plan()
+    _worker['processed'][segment.start:segment.stop] = processed[segment.start - segment.lo:
+                                                                 segment.stop - segment.lo]
+
+
+def _filter_window(candidates: PeakSet, confidence_threshold: float) -> PeakSet:
+    """Cluster and filter the onset candidates of a window against the whole-track confidence threshold"""
+    analyzer = _worker['analyzer']
+    analyzer.confidence_threshold_override = confidence_threshold
+    return analyzer._filter_peak_candidates(candidates, _worker['processed'], remove_isolated=False)
+
+
+def _measure_window(peaks: PeakSet) -> PeakSet:
+    """Add the quality metrics (precise time, SNR, spectral centroid) of each peak"""
+    return _worker['analyzer']._add_quality_metrics(peaks, _worker['processed'])
+
+
+def _classify_window(peaks: List[Dict[str, Any]], first_index: int,
+                     history: List[Tuple[str, float, float]]) -> Tuple[List[Dict[str, Any]], list]:
+    """Classify the peaks of a window; first_index is the track index of its first peak"""
+    analyzer = _worker['analyzer']
+    analyzer.drum_classifier.previous_classifications = list(history)
+    classified = analyzer._classify_drum_hits(peaks, _worker['processed'], first_index)
+    return classified, analyzer.drum_classifier.previous_classifications
+
+
+class SegmentPool:
+    """
+    Worker processes of one segmented analysis
+
+    Args:
+        analyzer: WaveformAnalyzer with a loaded track and its noise analysis done
+        workers: Worker processes (0 for one per CPU)
+    """
+
+    def __init__(self, analyzer, workers: int = 0):
+        self.analyzer = analyzer
+        raw = np.ascontiguousarray(analyzer.waveform_data[0])
+        sr = analyzer.sample_rate
+        config = analyzer.config
+        self.segments = segment_layout(len(raw), sr, config['chunk_size_seconds'])
+        self.cores = [(segment.start / sr, segment.stop / sr) for segment in self.segments]
+        self.cores[0] = (-np.inf, self.cores[0][1])  # Every peak time falls in one core
+        self.cores[-1] = (self.cores[-1][0], np.inf)
+        self.overlap_seconds = config['overlap_seconds']
+
+        self._memory = []
+        self._raw = self._share(raw)
+        self.processed = self._share(np.zeros_like(raw))
+
+        noise_filter = analyzer.noise_filter
+        if noise_filter is not None and noise_filter.noise_profile is None and config['noise_reduction']:
+            # The serial run estimates the profile from the whole track; so must the segments
+            noise_filter.estimate_noise_profile(raw)
+            analyzer.signal_processor.features(sr).release(raw)
+        state = {
+            'raw': self._memory[0].name, 'processed': self._memory[1].name, 'length': len(raw),
+            'dtype': raw.dtype.str, 'config': dict(config), 'sample_rate': sr,
+            'duration_seconds': analyzer.duration_seconds, 'noise_floor': analyzer.noise_floor,
+            'dynamic_range': analyzer.dynamic_range, 'is_drum_stem': analyzer.is_drum_stem,
+            'noise_profile': noise_filter.noise_profile if noise_filter is not None else None,
+            'feature_plan_bytes': int(config.get('feature_plan_max_mb', 256) * 1024 * 1024),
+        }
+        self.workers = min(workers or os.cpu_count() or 1, len(self.segments))
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context('spawn'),
+                                             initializer=_init_worker, initargs=(state,))
+
+    def _share(self, array: np.ndarray) -> np.ndarray:
+        memory = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        self._memory.append(memory)
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)
+        shared[:] = array
+        return shared
+
+    def _run(self, task: Callable, arguments: List[tuple], progress: Optional[Callable[[float], None]] = None):
+        futures = {self._executor.submit(_quietly, task, *args): index for index, args in enumerate(arguments)}
+        results = [None] * len(arguments)
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if progress is not None:
+                progress(done / len(arguments))
+        return results
+
+    def preprocess(self, progress: Optional[Callable[[float], None]] = None) -> np.ndarray:
+        """
+        Preprocess the track segment by segment
+
+        Returns:
+            Preprocessed signal (same as the analyzer's _preprocess_signal)
+        """
+        self._run(_preprocess_segment, [(segment,) for segment in self.segments], progress)
+        return self.processed.copy()
+
+    def refine(self, onset_candidates: List[Dict[str, Any]], processed: np.ndarray,
+               progress: Optional[Callable[[float], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Refine onset candidates window by window
+
+        Candidates are clustered and filtered per window; the steps that
+        compare every peak with the whole track's rhythm (isolated peaks,
+        temporal consistency, the max_peaks cap) run on the joined peaks in
+        this process, and the quality metrics of the selected peaks are
+        added per core again.
+
+        Args:
+            onset_candidates: Candidates of the whole track
+            processed: Preprocessed signal (copied to the workers if it was not preprocessed here)
+
+        Returns:
+            Refined peaks of the whole track
+        """
+        if processed is not self.processed and not np.shares_memory(processed, self.processed):
+            self.processed[:] = processed
+        threshold = self.analyzer._calculate_adaptive_confidence_threshold(processed)
+
+        if len(onset_candidates) == 0:
+            return []
+        ordered = PeakSet.from_dicts(onset_candidates).sort_by_time()
+        times = ordered['time']
+        windows = [ordered.take(slice(np.searchsorted(times, start - self.overlap_seconds),
+                                      np.searchsorted(times, stop + self.overlap_seconds)))
+                   for start, stop in self.cores]
+        filtered = stitch_peaks(self._run(_filter_window, [(window, threshold) for window in windows], progress),
+                                self.cores, self.analyzer.config['min_peak_distance'])
+        if len(filtered) == 0:
+            return []
+        selected = self.analyzer._intelligent_peak_selection(self.analyzer._remove_isolated_peaks(filtered))
+
+        bounds = np.searchsorted(selected['time'], [start for start, _ in self.cores[1:]]).tolist()
+        chunks = [selected.take(slice(lo, hi)) for lo, hi in zip([0] + bounds, bounds + [len(selected)])]
+        return PeakSet.concatenate(self._run(_measure_window, [(chunk,) for chunk in chunks if len(chunk)])).to_dicts()
+
+    def classify(self, peaks: List[Dict[str, Any]],
+                 progress: Optional[Callable[[float], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Classify peaks window by window
+
+        Each window classifies the peaks of one core with the peaks in the
+        overlap around it (at least CLASSIFICATION_CONTEXT_PEAKS) as context,
+        and keeps the classifications of its core.
+
+        Args:
+            peaks: Refined peaks of the whole track
+
+        Returns:
+            Classified peaks sorted by time
+        """
+        ordered = sorted(peaks, key=lambda p: p['time'])
+        times = [peak['time'] for peak in ordered]
+        classifier = self.analyzer.drum_classifier
+        arguments, kept = [], []
+        for start, stop in self.cores:
+            first, last = bisect_left(times, start), bisect_left(times, stop)
+            if first == last:
+                continue
+            lo = min(bisect_left(times, start - self.overlap_seconds), max(0, first - CLASSIFICATION_CONTEXT_PEAKS))
+            hi = max(bisect_left(times, stop + self.overlap_seconds),
+                     min(len(ordered), last + CLASSIFICATION_CONTEXT_PEAKS))
+            history = classifier.previous_classifications if lo == 0 else []
+            arguments.append((ordered[lo:hi], lo, history))
+            kept.append((first - lo, last - lo))
+
+        classified = []
+        results = self._run(_classify_window, arguments, progress)
+        for (window, history), (first, last) in zip(results, kept):
+            classified.extend(window[first:last])
+        if results:
+            classifier.previous_classifications = results[-1][1]
+        return classified
+
+    def close(self):
+        """Stop the workers and free the shared signals"""
+        self._executor.shutdown()
+        self._raw = self.processed = None
+        for memory in self._memory:
+            memory.close()
+            memory.unlink()
+        self._memory = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -54,6 +54,14 @@ except ImportError:
     logger.warning("VisualValidator not available: No module named 'utils.audio.visual_validator'")
     logger.warning("Visual validation features will be disabled")
 
+from utils.audio.audio_stream_loader import OVERVIEW_BUCKET_SIZE, StreamedAudio, can_stream, stream_load
+from utils.audio.analysis_cache import AnalysisCache, AudioHasher, get_analysis_cache, hash_audio
+from utils.audio.feature_plan import FeaturePlan
+from utils.audio.peak_index import PeakIndex
+from utils.audio.peak_set import PeakSet, cluster_argmax, cluster_ids, cluster_starts, cluster_sum
+from utils.audio.segmented_analysis import SegmentPool, segment_layout
+from utils.audio.waveform_pyramid import WaveformPyramid
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("WaveformAnalyzer")
@@ -70,6 +78,7 @@ try:
     import scipy.stats
     from scipy.ndimage import gaussian_filter1d
     from scipy.fft import fft, fftfreq
+    from utils.audio.filter_bank import get_filter_bank
 
     SCIPY_AVAILABLE = True
 except ImportError:
@@ -127,7 +136,7 @@ except ImportError:
 # Import madmom for beat detection
 try:
     from madmom.features.beats import RNNBeatProcessor, DBNBeatTrackingProcessor
-    from madmom.audio.signal import Signal
+    from madmom.audio.signal import Signal as MadmomSignal  # PySide6's Signal is imported below
     from madmom.processors import Processor
     from madmom.features.onsets import OnsetPeakPickingProcessor, SpectralOnsetProcessor
     from madmom.features.onsets import RNNOnsetProcessor
@@ -136,6 +145,9 @@ try:
     from madmom.features.tempo import TempoEstimationProcessor
 
     MADMOM_AVAILABLE = True
+
+    # Sample rate the madmom RNN models were trained on
+    MADMOM_SAMPLE_RATE = 44100
 except ImportError as e:
     MADMOM_AVAILABLE = False
     logger.warning(f"⚠️  madmom not available - beat detection features disabled: {e}")
@@ -297,11 +309,28 @@ def enhanced_profile_method(method_name: str):
     return decorator
 
 
-@dataclass
+# Spectral features of a peak and their values until they are measured
+SPECTRAL_FEATURE_DEFAULTS: Dict[str, float] = {
+    'centroid': 0.0,
+    'bandwidth': 0.0,
+    'contrast': 0.0,
+    'flatness': 0.0,
+    'rolloff': 0.0,
+    'flux': 0.0,
+    'zero_crossing_rate': 0.0,
+    'attack_time': 0.0,
+    'decay_time': 0.0
+}
+
+
+@dataclass(slots=True)
 class Peak:
     """
     Data class representing a peak in the audio waveform.
 
+    Peaks are slotted (no per-instance __dict__) and only keep the spectral
+    features that were measured; a track can have thousands of them.
+
     Attributes:
         time (float): Time in seconds when the peak occurs
         amplitude (float): Amplitude of the peak (0.0 to 1.0)
@@ -320,6 +349,7 @@ class Peak:
     frequency: float = 0.0
     segment: str = 'medium'  # Default segment type
     category: str = 'medium'  # Default prominence category
+    _spectral_features: Optional[Dict[str, float]] = field(default=None, repr=False, compare=False)
 
     def __init__(self, time: float, amplitude: float = 1.0, confidence: float = 1.0,
                  type: str = 'generic', frequency: float = 0.0, segment: str = 'medium',
@@ -343,20 +373,9 @@ class Peak:
         self.frequency = frequency
         self.segment = segment
         self.category = category
-        self._drum_type = type
-
-        # Initialize spectral features dictionary
-        self.spectral_features = {
-            'centroid': 0.0,
-            'bandwidth': 0.0,
-            'contrast': 0.0,
-            'flatness': 0.0,
-            'rolloff': 0.0,
-            'flux': 0.0,
-            'zero_crossing_rate': 0.0,
-            'attack_time': 0.0,
-            'decay_time': 0.0
-        }
+
+        # Measured spectral features only (the others read as their defaults)
+        self._spectral_features = None
 
     @property
     def drum_type(self) -> str:
@@ -367,7 +386,6 @@ class Peak:
     def drum_type(self, value: str):
         """Setting drum_type also updates type for consistency"""
         self.type = value
-        self._drum_type = value
 
     @property
     def position(self) -> float:
@@ -397,6 +415,13 @@ class Peak:
         """
         return self.amplitude * self.confidence
 
+    @property
+    def spectral_features(self) -> Dict[str, float]:
+        """All spectral features of this peak (a new dict; use set_spectral_features to change them)"""
+        if self._spectral_features is None:
+            return dict(SPECTRAL_FEATURE_DEFAULTS)
+        return {**SPECTRAL_FEATURE_DEFAULTS, **self._spectral_features}
+
     def set_spectral_features(self, features: Dict[str, float]) -> None:
         """
         Set spectral features for this peak.
@@ -405,10 +430,12 @@ class Peak:
             features: Dictionary of spectral features
         """
         if features and isinstance(features, dict):
-            # Update only the keys that exist in both dictionaries
+            # Update only the keys that are spectral features
             for key, value in features.items():
-                if key in self.spectral_features:
-                    self.spectral_features[key] = value
+                if key in SPECTRAL_FEATURE_DEFAULTS:
+                    if self._spectral_features is None:
+                        self._spectral_features = {}
+                    self._spectral_features[key] = value
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert peak to dictionary for serialization"""
@@ -452,9 +479,39 @@ class AdvancedSignalProcessor:
     """
 
     def __init__(self):
-        self.stft_cache = {}
-        self.max_cache_size = 10  # Maximum number of STFT matrices to cache
+        self.max_cache_size = 10  # Maximum number of energy envelopes to cache
         self.energy_envelope_cache = {}  # Cache for energy envelopes
+        self.feature_plan: Optional[FeaturePlan] = None  # Spectral features shared by the stages of an analysis
+
+    def begin_feature_plan(self, sr: int, max_bytes: int) -> FeaturePlan:
+        """
+        Start sharing spectral features between the stages of an analysis.
+
+        Args:
+            sr: Sample rate of the analysed signals
+            max_bytes: Budget for the features kept
+
+        Returns:
+            The feature plan every stage reads its spectrograms from until end_feature_plan
+        """
+        self.feature_plan = FeaturePlan(sr, max_bytes)
+        return self.feature_plan
+
+    def end_feature_plan(self) -> Dict[str, Any]:
+        """
+        Release the features of the analysis.
+
+        Returns:
+            Report of the computed and reused features (empty without a plan)
+        """
+        plan, self.feature_plan = self.feature_plan, None
+        return plan.report() if plan is not None else {}
+
+    def features(self, sr: int) -> FeaturePlan:
+        """Feature plan of the running analysis (a plan for this call only outside an analysis)"""
+        if self.feature_plan is not None and self.feature_plan.sr == sr:
+            return self.feature_plan
+        return FeaturePlan(sr)
 
     def _calculate_energy_safely(self, normalized, max_abs):
         """
@@ -508,6 +565,7 @@ class AdvancedSignalProcessor:
             window_sizes = [256, 512, 1024, 2048, 4096]
 
         results = {}
+        features = self.features(sr)
 
         for window_size in window_sizes:
             hop_length = window_size // 4  # 75% overlap for better time resolution
@@ -516,14 +574,10 @@ class AdvancedSignalProcessor:
             if len(signal) >= window_size:
                 try:
                     # Apply appropriate window function for better frequency resolution
-                    stft = librosa.stft(signal, n_fft=window_size, hop_length=hop_length,
-                                        win_length=window_size, window='hann')
-                    mag_spec = np.abs(stft)
+                    mag_spec = features.magnitude(signal, window_size, hop_length, window='hann')
 
                     # Calculate spectral flux at this resolution (sensitive to transients)
-                    diff = np.diff(mag_spec, axis=1)
-                    diff = np.maximum(0, diff)  # Keep only positive changes
-                    flux = np.sum(diff, axis=0)
+                    flux = features.spectral_flux(signal, window_size, hop_length, window='hann')
 
                     # Calculate spectral derivative (rate of change of spectral flux)
                     # This is extremely effective for detecting sharp transients like drum hits
@@ -599,13 +653,13 @@ class AdvancedSignalProcessor:
             # Use multiple window sizes for complementary information
             window_sizes = [512, 1024, 2048]
             results = {}
+            features = self.features(sr)
 
             for window_size in window_sizes:
                 hop_length = window_size // 4
 
-                # Compute STFT
-                stft = librosa.stft(signal, n_fft=window_size, hop_length=hop_length, window='hann')
-                mag_spec = np.abs(stft)
+                # Magnitude spectrogram (shared with the multi-resolution analysis)
+                mag_spec = features.magnitude(signal, window_size, hop_length, window='hann')
 
                 # Calculate spectral flux
                 diff = np.diff(np.concatenate((np.zeros((mag_spec.shape[0], 1)), mag_spec), axis=1), axis=1)
@@ -847,8 +901,7 @@ class AdvancedSignalProcessor:
 
             # Calculate STFT
             n_fft = 2048
-            stft = librosa.stft(signal, n_fft=n_fft)
-            mag_spec = np.abs(stft)
+            mag_spec = self.features(sr).magnitude(signal, n_fft)
 
             # Get frequency bins
             freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
@@ -1906,36 +1959,6 @@ class AdvancedSignalProcessor:
             print(f"📊 Using standard configuration for {minutes:.1f} minute file: "
                   f"max_peaks={self.config['max_peaks']}")
 
-    def _get_cached_stft(self, signal_hash: int, hop_length: int, n_fft: int, stft=None):
-        """
-        Get cached STFT or compute and cache it.
-
-        Args:
-            signal_hash: Hash of the signal
-            hop_length: Hop length for STFT
-            n_fft: FFT size
-            stft: STFT matrix to cache if not already cached
-
-        Returns:
-            Cached STFT matrix or None if not in cache and no new STFT provided
-        """
-        cache_key = f"{signal_hash}_{hop_length}_{n_fft}"
-        if cache_key in self.stft_cache:
-            return self.stft_cache[cache_key]
-
-        # If a new STFT is provided, cache it
-        if stft is not None:
-            # If cache is full, remove the oldest entry
-            if len(self.stft_cache) >= self.max_cache_size:
-                oldest_key = next(iter(self.stft_cache))
-                del self.stft_cache[oldest_key]
-
-            # Add new entry to cache
-            self.stft_cache[cache_key] = stft
-            return stft
-
-        return None
-
     def adaptive_threshold(self, signal: np.ndarray, window_size: int = 1024) -> np.ndarray:
         """
         Apply adaptive thresholding to a signal.
@@ -2160,8 +2183,11 @@ class AdvancedSignalProcessor:
             return np.zeros(1), np.zeros(1)
 
         try:
-            # Use librosa's HPSS with error handling
-            harmonic, percussive = librosa.effects.hpss(signal, margin=3.0)
+            # librosa's HPSS (librosa.effects.hpss) on the shared STFT
+            stft_harm, stft_perc = librosa.decompose.hpss(self.features(sr).stft(signal, 2048, 512), margin=3.0)
+            harmonic = librosa.istft(stft_harm, dtype=signal.dtype, n_fft=2048, hop_length=512, length=len(signal))
+            percussive = librosa.istft(stft_perc, dtype=signal.dtype, n_fft=2048, hop_length=512,
+                                       length=len(signal))
 
             # Check for NaN or infinite values in results
             if not np.all(np.isfinite(harmonic)) or not np.all(np.isfinite(percussive)):
@@ -2195,13 +2221,15 @@ class AdvancedSignalProcessor:
             # Return original signal as percussive component
             return signal, np.zeros_like(signal)
 
-    def multi_band_onset_detection(self, signal: np.ndarray, sr: int) -> Dict[str, np.ndarray]:
+    def multi_band_onset_detection(self, signal: np.ndarray, sr: int,
+                                   hz_band_edges: bool = False) -> Dict[str, np.ndarray]:
         """
         Perform onset detection in multiple frequency bands.
 
         Args:
             signal: Input signal
             sr: Sample rate
+            hz_band_edges: Design the band filters with their edges in Hz (see filter_bank.design_band)
 
         Returns:
             Dictionary of onset detection functions for each band
@@ -2223,36 +2251,43 @@ class AdvancedSignalProcessor:
             'high': (2500, 8000),  # Hi-hat range
             'very_high': (8000, sr / 2)  # Cymbal range
         }
+        n_fft = 2048
+        hop_length = 512
 
         # Initialize result dictionary
         onset_functions = {}
 
-        # Process each band
-        for band_name, (low_freq, high_freq) in bands.items():
-            try:
-                # Apply bandpass filter
-                filtered = self._bandpass_filter(signal, low_freq, high_freq, sr)
-
-                # Check if filtered signal contains NaN or infinite values
-                if not np.all(np.isfinite(filtered)):
-                    logger.warning(
-                        f"Filtered signal for band {band_name} contains NaN or infinite values. Skipping band.")
-                    continue
-
-                # Compute STFT
-                n_fft = 2048
-                hop_length = 512
+        try:
+            # All bands filtered together into one (bands x samples) array
+            filtered = get_filter_bank(tuple(bands.values()), sr, hz_edges=hz_band_edges).apply(signal)
+        except Exception as e:
+            logger.warning(f"Error filtering bands: {e}")
+            return {'full_band': np.zeros(len(signal) // 1024)}
 
-                if LIBROSA_AVAILABLE:
-                    # Apply a window function to reduce edge effects
-                    windowed = filtered * np.hanning(len(filtered))
+        # Window function to reduce edge effects
+        window = np.hanning(len(signal))
+        finite = np.isfinite(filtered).all(axis=1)
 
-                    # Ensure signal is finite before STFT
-                    if not np.all(np.isfinite(windowed)):
+        # Process each band
+        for band, band_name in enumerate(bands):
+            try:
+                band_signal = filtered[band]
+                if not finite[band]:
+                    # Retry through the single-band filter and its conservative fallbacks
+                    low_freq, high_freq = bands[band_name]
+                    band_signal = np.array(  # Copy - windowed in place below
+                        self._bandpass_filter(signal, low_freq, high_freq, sr, hz_band_edges), dtype=np.float64)
+
+                    # Check if filtered signal contains NaN or infinite values
+                    if not np.all(np.isfinite(band_signal)):
                         logger.warning(
-                            f"Windowed signal for band {band_name} contains NaN or infinite values. Skipping band.")
+                            f"Filtered signal for band {band_name} contains NaN or infinite values. Skipping band.")
                         continue
 
+                if LIBROSA_AVAILABLE:
+                    windowed = band_signal
+                    windowed *= window
+
                     stft = librosa.stft(windowed, n_fft=n_fft, hop_length=hop_length)
 
                     # Calculate spectral flux
@@ -2282,7 +2317,8 @@ class AdvancedSignalProcessor:
 
         return onset_functions
 
-    def _bandpass_filter(self, signal: np.ndarray, low_freq: float, high_freq: float, sr: int) -> np.ndarray:
+    def _bandpass_filter(self, signal: np.ndarray, low_freq: float, high_freq: float, sr: int,
+                         hz_edges: bool = False) -> np.ndarray:
         """
         Apply bandpass filter to signal with improved error handling.
 
@@ -2291,6 +2327,7 @@ class AdvancedSignalProcessor:
             low_freq: Low cutoff frequency
             high_freq: High cutoff frequency
             sr: Sample rate
+            hz_edges: Design the edges in Hz (see filter_bank.design_band)
 
         Returns:
             Filtered signal
@@ -2316,55 +2353,21 @@ class AdvancedSignalProcessor:
             # Return original signal if frequency range is invalid
             return signal
 
-        # Normalize frequencies
-        low = max(0.001, min(0.999, low_freq / nyquist))  # Clamp to valid range
-        high = max(low + 0.001, min(0.999, high_freq / nyquist))  # Ensure high > low and within range
-
         try:
-            # First, ensure the input signal doesn't contain any NaN or infinite values
-            clean_signal = np.nan_to_num(signal, nan=0.0, posinf=0.0, neginf=0.0)
+            # Cached SOS (second-order sections) design, more numerically stable than b,a coefficients
+            filtered = get_filter_bank(((low_freq, high_freq),), sr, hz_edges=hz_edges).apply(signal)[0]
 
-            # Use more stable SOS-based filtering as the primary method
-            try:
-                # SOS (second-order sections) is more numerically stable than b,a coefficients
-                sos = scipy.signal.butter(4, [low, high], btype='band', output='sos', fs=sr)
-                filtered = scipy.signal.sosfilt(sos, clean_signal)
+            # Check for NaN or infinite values in filtered signal
+            if not np.all(np.isfinite(filtered)):
+                logger.warning("SOS filtering produced NaN values. Using robust fallback method.")
 
-                # Check for NaN or infinite values in filtered signal
-                if not np.all(np.isfinite(filtered)):
-                    logger.warning("SOS filtering produced NaN values. Using robust fallback method.")
-
-                    # Try a more conservative filter order
-                    sos_conservative = scipy.signal.butter(2, [low, high], btype='band', output='sos', fs=sr)
-                    filtered = scipy.signal.sosfilt(sos_conservative, clean_signal)
-            except Exception as e:
-                logger.warning(f"SOS filtering failed: {str(e)}. Trying traditional filter.")
-                # Fall back to traditional filtering
-                try:
-                    b, a = scipy.signal.butter(2, [low, high], btype='band')
-                    filtered = scipy.signal.filtfilt(b, a, clean_signal)
-                except Exception as e2:
-                    logger.warning(f"Traditional filtering failed: {str(e2)}. Trying simple filter.")
-                    # Try an even simpler filter
-                    try:
-                        b, a = scipy.signal.butter(1, [low / nyquist, high / nyquist], btype='band')
-                        filtered = scipy.signal.lfilter(b, a, clean_signal)
-                    except Exception as e3:
-                        logger.warning(f"Simple filtering failed: {str(e3)}. Using median filter.")
-                        # Last resort: use a simple median filter
-                        try:
-                            window_size = int(sr / 100)  # 10ms window
-                            if window_size % 2 == 0:
-                                window_size += 1  # Ensure odd window size
-                            filtered = scipy.signal.medfilt(clean_signal, window_size)
-                        except Exception as e4:
-                            logger.warning(f"All filtering methods failed: {str(e4)}. Returning original signal.")
-                            filtered = clean_signal
+                # Try a more conservative filter order
+                filtered = get_filter_bank(((low_freq, high_freq),), sr, 2, hz_edges).apply(signal)[0]
 
             # Final safety check - replace any remaining NaN/inf values
             if not np.all(np.isfinite(filtered)):
-                logger.warning("Filtering produced NaN values despite fallbacks. Using clean original signal.")
-                return clean_signal
+                logger.warning("Filtering produced NaN values despite fallbacks. Using original signal.")
+                return signal
 
             return filtered
 
@@ -2417,7 +2420,7 @@ class AdvancedSignalProcessor:
 
             # Calculate second derivative (acceleration of energy change)
             energy_diff2 = np.diff(energy_diff1)
-            energy_diff2 = np.concatenate(([0], energy_diff2, [0]))  # Pad to match original length
+            energy_diff2 = np.concatenate(([0], energy_diff2))  # Pad to match original length
 
             # Combine original energy with derivatives for enhanced detection
             # Emphasize positive first derivative (energy increase) and
@@ -2501,15 +2504,8 @@ class AdvancedSignalProcessor:
         energy_envelope = self.calculate_energy_envelope(signal, sr)
 
         if LIBROSA_AVAILABLE:
-            # Use librosa's onset strength function if available
-            onset_env = librosa.onset.onset_strength(
-                y=signal,
-                sr=sr,
-                hop_length=hop_length,
-                n_fft=n_fft,
-                lag=1,
-                max_size=3
-            )
+            # librosa's onset strength, on the shared mel spectrogram
+            onset_env = self.features(sr).onset_strength(signal, n_fft, hop_length, lag=1, max_size=3)
 
             # Combine with energy envelope for better detection
             if len(energy_envelope) > 0 and len(onset_env) > 0:
@@ -2540,21 +2536,8 @@ class AdvancedSignalProcessor:
         if SCIPY_AVAILABLE:
             logger.info("Using scipy fallback for onset strength calculation")
 
-            # Calculate STFT
-            signal_hash = hash(signal.tobytes())
-            stft = self._get_cached_stft(signal_hash, hop_length, n_fft)
-
-            if stft is None:
-                # Compute STFT using scipy
-                frames = range(0, len(signal) - n_fft + 1, hop_length)
-                stft = np.array([np.fft.rfft(signal[i:i + n_fft] * np.hanning(n_fft)) for i in frames])
-                stft = stft.T  # Transpose to match librosa's format
-
-                # Cache the computed STFT
-                self._get_cached_stft(signal_hash, hop_length, n_fft, stft)
-
-            # Calculate spectral flux (difference between consecutive frames)
-            mag_spec = np.abs(stft)
+            # Magnitude spectrogram of uncentered frames (NumPy STFT without librosa)
+            mag_spec = self.features(sr).magnitude(signal, n_fft, hop_length, center=False)
 
             # Calculate difference between consecutive frames
             diff = np.diff(mag_spec, axis=1)
@@ -2601,17 +2584,25 @@ class NoiseFilter:
     Advanced noise filtering for audio signals.
     """
 
-    def __init__(self, sr: int):
+    def __init__(self, sr: int, signal_processor: Optional[AdvancedSignalProcessor] = None):
         """
         Initialize noise filter.
 
         Args:
             sr: Sample rate
+            signal_processor: Processor whose feature plan the spectrograms are shared through
         """
         self.sr = sr
+        self.signal_processor = signal_processor
         self.noise_profile = None
         self.noise_threshold = 0.01  # Default threshold
 
+    def _features(self) -> FeaturePlan:
+        """Feature plan of the running analysis (a plan for this call only without a processor)"""
+        if self.signal_processor is not None:
+            return self.signal_processor.features(self.sr)
+        return FeaturePlan(self.sr)
+
     def estimate_noise_profile(self, signal: np.ndarray, frame_length: int = 2048, hop_length: int = 512) -> np.ndarray:
         """
         Estimate noise profile from signal.
@@ -2628,8 +2619,7 @@ class NoiseFilter:
             return np.zeros(frame_length // 2 + 1)
 
         # Calculate spectrogram
-        stft = librosa.stft(signal, n_fft=frame_length, hop_length=hop_length)
-        mag_spec = np.abs(stft)
+        mag_spec = self._features().magnitude(signal, frame_length, hop_length)
 
         # Estimate noise profile as the minimum magnitude in each frequency bin
         noise_profile = np.min(mag_spec, axis=1)
@@ -2656,9 +2646,9 @@ class NoiseFilter:
             return signal
 
         # Calculate spectrogram
-        stft = librosa.stft(signal, n_fft=frame_length, hop_length=hop_length)
-        mag_spec = np.abs(stft)
-        phase_spec = np.angle(stft)
+        features = self._features()
+        mag_spec = features.magnitude(signal, frame_length, hop_length)
+        phase_spec = features.phase(signal, frame_length, hop_length)
 
         # Estimate noise profile if not already done
         if self.noise_profile is None:
@@ -2721,6 +2711,22 @@ class DrumClassifier:
     Advanced classifier for drum sounds based on spectral characteristics and machine learning techniques.
     """
 
+    # Order of the score rows in classify_drum_hits_batch (ties resolve to the first, as in classify_drum_hit)
+    DRUM_TYPES = ('kick', 'snare', 'hi-hat', 'tom', 'cymbal')
+
+    # Detailed frequency bands for better discrimination
+    DETAILED_BANDS = {
+        'sub_bass': (20, 60),
+        'bass': (60, 120),
+        'low_mid': (120, 250),
+        'mid': (250, 500),
+        'high_mid': (500, 2000),
+        'high': (2000, 7000),
+        'very_high': (7000, 20000)
+    }
+
+    BATCH_SIZE = 256  # Windows per vectorized pass (bounds the STFT working set)
+
     def __init__(self, model: DrumClassificationModel):
         """
         Initialize drum classifier.
@@ -2811,15 +2817,7 @@ class DrumClassifier:
         detailed_band_energies = {}
 
         # Define more detailed frequency bands for better discrimination
-        detailed_bands = {
-            'sub_bass': (20, 60),
-            'bass': (60, 120),
-            'low_mid': (120, 250),
-            'mid': (250, 500),
-            'high_mid': (500, 2000),
-            'high': (2000, 7000),
-            'very_high': (7000, 20000)
-        }
+        detailed_bands = self.DETAILED_BANDS
 
         # Calculate energy in standard drum type bands
         for drum_type, (low_freq, high_freq) in self.model.frequency_ranges.items():
@@ -3108,15 +3106,280 @@ class DrumClassifier:
         Returns:
             List of (drum_type, confidence) tuples
         """
-        results = []
+        return self.classify_drum_hits_batch(signal, sr, times)
 
-        for time in times:
-            drum_type, confidence = self.classify_drum_hit(signal, sr, time)
-            results.append((drum_type, confidence))
+    def classify_drum_hits_batch(self, signal: np.ndarray, sr: int, times: List[float]) -> List[Tuple[str, float]]:
+        """
+        Classify many drum hits in vectorized passes.
 
-        return results
+        Gathers the 150ms window of every hit into one 2-D strided array and
+        computes the features of classify_drum_hit (STFT centroid and
+        flatness, zero crossing rate, attack, decay, band energies) for all
+        windows at once, then applies the same scoring and context rules as
+        array operations. Labels and confidences match calling
+        classify_drum_hit for each time in order.
+
+        Args:
+            signal: Full audio signal
+            sr: Sample rate
+            times: List of hit times in seconds
+
+        Returns:
+            List of (drum_type, confidence) tuples
+        """
+        if not LIBROSA_AVAILABLE or not SCIPY_AVAILABLE:
+            return [('generic', 0.5)] * len(times)
+        if len(times) == 0:
+            return []
+
+        signal = np.asarray(signal)
+        window_size = int(0.15 * sr)
+        half = window_size // 2
+        centers = (np.asarray(times, dtype=np.float64) * sr).astype(np.int64)
+        starts = np.maximum(0, centers - half)
+        ends = np.minimum(len(signal), centers + half)
+        lengths = np.maximum(0, ends - starts)
+
+        scores = np.zeros((len(self.DRUM_TYPES), len(times)))
+        valid = lengths > 0
+
+        # Full-length windows share one strided view; hits near the file edges are
+        # clipped like in classify_drum_hit and are processed per window length
+        full = valid & (lengths == 2 * half) & (starts + 2 * half <= len(signal))
+        if np.any(full):
+            all_windows = np.lib.stride_tricks.sliding_window_view(signal, 2 * half)
+            indices = np.flatnonzero(full)
+            for batch_start in range(0, len(indices), self.BATCH_SIZE):
+                batch = indices[batch_start:batch_start + self.BATCH_SIZE]
+                scores[:, batch] = self._score_windows(all_windows[starts[batch]], sr)
+        for index in np.flatnonzero(valid & ~full):
+            scores[:, index] = self._score_windows(signal[starts[index]:ends[index]][np.newaxis, :], sr)[:, 0]
+
+        # Normalize scores to positive values
+        min_score = scores.min(axis=0)
+        scores = np.where(min_score < 0, scores - min_score, scores)
+
+        # Highest score wins, confidence is its share of the total
+        best = np.argmax(scores, axis=0)
+        total = scores[0] + scores[1] + scores[2] + scores[3] + scores[4] + 1e-10
+        confidences = scores[best, np.arange(len(times))] / total
+
+        # Empty windows are 'generic' and, like classify_drum_hit, leave the context untouched
+        labels = [self.DRUM_TYPES[code] for code in best]
+        valid_indices = np.flatnonzero(valid)
+        confidences[valid_indices] = self._apply_context_batch(best[valid_indices], confidences[valid_indices],
+                                                               np.asarray(times, dtype=np.float64)[valid_indices])
+
+        return [(labels[i], float(confidences[i])) if valid[i] else ('generic', 0.5) for i in range(len(times))]
+
+    def _apply_context_batch(self, codes: np.ndarray, confidences: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """
+        Context corrections of classify_drum_hit for a sequence of hits, as array operations.
+
+        Args:
+            codes: DRUM_TYPES index of each hit
+            confidences: Confidence of each hit before context corrections
+            times: Hit times (stored in the classification history)
+
+        Returns:
+            Corrected confidences (previous_classifications is updated)
+        """
+        kick, snare, hihat = (self.DRUM_TYPES.index(name) for name in ('kick', 'snare', 'hi-hat'))
+        history = [self.DRUM_TYPES.index(c[0]) if c[0] in self.DRUM_TYPES else -1
+                   for c in self.previous_classifications]
+        sequence = np.concatenate([np.asarray(history, dtype=np.int64), codes])
+        offset = len(history)
+        positions = np.arange(len(codes)) + offset
+
+        # Hits with at least two earlier classifications get pattern corrections
+        has_context = positions >= 2
+        previous_1 = sequence[np.maximum(positions - 1, 0)]
+        previous_2 = sequence[np.maximum(positions - 2, 0)]
+
+        # Kicks among the (up to) four previous classifications
+        kick_counts = np.concatenate([[0], np.cumsum(sequence == kick)])
+        recent_kicks = kick_counts[positions] - kick_counts[np.maximum(positions - 4, 0)]
+
+        corrected = confidences.copy()
+        # Pattern: kick-snare alternation
+        rule = has_context & (previous_1 == kick) & (previous_2 == snare) & (codes == kick)
+        corrected = np.where(rule, np.minimum(0.95, corrected * 1.1), corrected)
+        # Pattern: hi-hat every other beat
+        rule = has_context & (previous_2 == hihat) & (codes == hihat)
+        corrected = np.where(rule, np.minimum(0.95, corrected * 1.1), corrected)
+        # Pattern: kick on downbeats
+        rule = has_context & (codes == kick) & (recent_kicks >= 2)
+        corrected = np.where(rule, np.minimum(0.95, corrected * 1.05), corrected)
+
+        # Keep only the most recent classifications
+        new_entries = [(self.DRUM_TYPES[code], float(confidence), float(time))
+                       for code, confidence, time in zip(codes[-self.max_history:], corrected[-self.max_history:],
+                                                         times[-self.max_history:])]
+        self.previous_classifications = (self.previous_classifications + new_entries)[-self.max_history:]
+        return corrected
+
+    def _score_windows(self, windows: np.ndarray, sr: int) -> np.ndarray:
+        """
+        Drum type scores of classify_drum_hit for a batch of equal-length windows.
+
+        Args:
+            windows: 2-D array (hits x samples)
+            sr: Sample rate
 
-    def classify_with_context(self, signal: np.ndarray, sr: int, times: List[float]) -> List[Tuple[str, float]]:
+        Returns:
+            Array (len(DRUM_TYPES) x hits) of raw scores
+        """
+        count, length = windows.shape
+        windows = np.asarray(windows)
+
+        # Spectral centroid and flatness (librosa defaults: n_fft=2048, hop=512, centered, zero padded)
+        n_fft, hop_length = 2048, 512
+        padded = np.pad(windows, ((0, 0), (n_fft // 2, n_fft // 2)))
+        frames = np.lib.stride_tricks.sliding_window_view(padded, n_fft, axis=-1)[:, ::hop_length]
+        fft_window = scipy.signal.get_window('hann', n_fft, fftbins=True)
+        magnitude = np.abs(np.fft.rfft(frames * fft_window, axis=-1).astype(np.complex64))
+
+        norm = np.sum(magnitude.astype(float), axis=-1, keepdims=True)
+        norm[norm < np.finfo(magnitude.dtype).tiny] = 1.0
+        frequencies = np.fft.rfftfreq(n_fft, d=1.0 / sr)
+        centroid = np.mean(np.sum(frequencies * (magnitude / norm), axis=-1), axis=-1)
+
+        power = np.maximum(1e-10, magnitude ** 2.0)
+        flatness = np.mean(np.exp(np.mean(np.log(power), axis=-1)) / np.mean(power, axis=-1), axis=-1)
+        del frames, magnitude, power
+
+        # Zero crossing rate (2048-sample frames, edge padded, |x| <= 1e-10 counts as zero)
+        zcr_padded = np.pad(windows, ((0, 0), (n_fft // 2, n_fft // 2)), mode='edge')
+        negative = zcr_padded < -1e-10
+        crossing_counts = np.zeros((count, zcr_padded.shape[1]), dtype=np.int64)
+        np.cumsum(negative[:, 1:] != negative[:, :-1], axis=1, out=crossing_counts[:, 1:])
+        frame_starts = np.arange(0, zcr_padded.shape[1] - n_fft + 1, hop_length)
+        crossings = crossing_counts[:, frame_starts + n_fft - 1] - crossing_counts[:, frame_starts]
+        zero_crossing_rate = np.mean(crossings / n_fft, axis=-1)
+
+        # Attack time (first 20ms energy reaching half of its total)
+        attack_time = np.full(count, 0.5)
+        attack_length = sr // 50
+        if length > attack_length:
+            attack_energy = np.cumsum(windows[:, :attack_length] ** 2, axis=1)
+            final = attack_energy[:, -1]
+            usable = final > 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                above = (attack_energy / final[:, np.newaxis]) > 0.5
+            reached = usable & np.any(above, axis=1)
+            attack_time = np.where(reached, np.argmax(above, axis=1) / (sr / 50), 0.5)
+
+        # Decay ratio (RMS at the end relative to the RMS peak)
+        decay_ratio = np.ones(count)
+        if length > sr // 10:
+            frame_length, rms_hop = sr // 100, sr // 200
+            rms_padded = np.pad(windows, ((0, 0), (frame_length // 2, frame_length // 2)))
+            rms_frames = np.lib.stride_tricks.sliding_window_view(rms_padded, frame_length, axis=-1)[:, ::rms_hop]
+            segment_rms = np.sqrt(np.mean(np.square(rms_frames, dtype=np.float32), axis=-1))
+            if segment_rms.shape[1] > 2:
+                peak_pos = np.argmax(segment_rms, axis=1)
+                peak_rms = segment_rms[np.arange(count), peak_pos]
+                usable = (peak_pos < segment_rms.shape[1] - 1) & (peak_rms > 0)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    decay_ratio = np.where(usable, segment_rms[:, -1] / peak_rms, 1.0)
+
+        # Band energies, normalized to the total of each band set
+        band_energies = self._batch_band_energies(windows, sr, self.model.frequency_ranges, detailed=False)
+        detailed = self._batch_band_energies(windows, sr, self.DETAILED_BANDS, detailed=True)
+
+        def zero():
+            return np.zeros(count)
+
+        kick_band = band_energies.get('kick', zero())
+        snare_band = band_energies.get('snare', zero())
+        hihat_band = band_energies.get('hi-hat', zero())
+        tom_band = band_energies.get('tom', zero())
+        cymbal_band = band_energies.get('cymbal', zero())
+        sub_bass, bass = detailed.get('sub_bass', zero()), detailed.get('bass', zero())
+        low_mid, mid = detailed.get('low_mid', zero()), detailed.get('mid', zero())
+        high_mid, high = detailed.get('high_mid', zero()), detailed.get('high', zero())
+        very_high = detailed.get('very_high', zero())
+
+        def bonus(condition, value):
+            return np.where(condition, value, 0.0)
+
+        # Same terms, weights and summation order as classify_drum_hit
+        kick_score = (3.0 * kick_band + 2.0 * sub_bass + 1.5 * bass - 1.0 * high - 1.0 * very_high
+                      + bonus(centroid < 300, 0.5) + bonus(attack_time < 0.2, 0.5)
+                      + bonus(decay_ratio < 0.3, 0.5) + bonus(zero_crossing_rate < 0.1, 0.5))
+        snare_score = (2.0 * snare_band + 1.0 * low_mid + 1.5 * mid + 1.0 * high_mid + 0.5 * high - 1.0 * sub_bass
+                       + bonus((300 <= centroid) & (centroid < 2000), 0.5) + bonus(attack_time < 0.15, 0.5)
+                       + bonus((0.2 < decay_ratio) & (decay_ratio < 0.6), 0.5)
+                       + bonus((0.1 <= zero_crossing_rate) & (zero_crossing_rate < 0.3), 0.5)
+                       + bonus(flatness > 0.2, 0.5))
+        hihat_score = (2.0 * hihat_band + 0.5 * high_mid + 2.0 * high + 2.0 * very_high - 2.0 * sub_bass - 1.0 * bass
+                       + bonus(centroid >= 3000, 1.0) + bonus(zero_crossing_rate > 0.3, 1.0)
+                       + bonus(attack_time < 0.1, 0.5) + bonus(decay_ratio > 0.5, 0.5)
+                       + bonus(flatness > 0.3, 1.0))
+        tom_score = (2.0 * tom_band + 1.0 * low_mid + 1.5 * mid - 1.0 * very_high
+                     + bonus((200 <= centroid) & (centroid < 800), 0.5) + bonus(attack_time < 0.2, 0.5)
+                     + bonus(decay_ratio < 0.4, 0.5) + bonus(zero_crossing_rate < 0.2, 0.5))
+        cymbal_score = (2.0 * cymbal_band + 0.5 * high_mid + 1.5 * high + 2.0 * very_high - 2.0 * sub_bass - 1.0 * bass
+                        + bonus(centroid >= 4000, 1.0) + bonus(decay_ratio > 0.7, 0.5)
+                        + bonus(flatness > 0.25, 0.5))
+
+        return np.vstack([kick_score, snare_score, hihat_score, tom_score, cymbal_score])
+
+    def _batch_band_energies(self, windows: np.ndarray, sr: int, bands: Dict[str, Tuple[float, float]],
+                             detailed: bool) -> Dict[str, np.ndarray]:
+        """
+        Normalized band energies of classify_drum_hit for a batch of windows.
+
+        Args:
+            windows: 2-D array (hits x samples)
+            sr: Sample rate
+            bands: Band name -> (low Hz, high Hz)
+            detailed: Use the detailed-band energy formula (log10 domain) instead of the drum band one
+
+        Returns:
+            Band name -> energy per window, divided by the per-window total over all bands
+        """
+        count = windows.shape[0]
+        nyquist = sr / 2
+        energies = {}
+        for band_name, (low_freq, high_freq) in bands.items():
+            try:
+                # Same 6th order Butterworth and zero-phase filtering as classify_drum_hit
+                b, a = scipy.signal.butter(6, [low_freq / nyquist, high_freq / nyquist], btype='band')
+                filtered = scipy.signal.filtfilt(b, a, windows, axis=-1).astype(np.float64)
+            except Exception as e:
+                logger.warning(f"Error calculating band energy for {band_name}: {e}")
+                energies[band_name] = np.zeros(count)
+                continue
+
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                max_abs = np.max(np.abs(filtered), axis=-1)
+                normalized = filtered / np.where(max_abs > 0, max_abs, 1.0)[:, np.newaxis]
+                normalized_energy = np.sum(normalized * normalized, axis=-1)
+                clamped = normalized_energy * np.minimum(max_abs * max_abs, 1e6)
+
+                if detailed:
+                    log_energy = np.minimum(np.log10(normalized_energy) + 2 * np.log10(max_abs), 307.0)
+                    energy = 10.0 ** log_energy
+                    energy = np.where(np.isfinite(energy), energy, clamped)
+                    energy = np.where(normalized_energy > 0, energy, 0.0)
+                else:
+                    log_scale = np.minimum(2.0 * np.log(max_abs), 700.0)
+                    scaled = normalized_energy * np.exp(log_scale)
+                    scaled = np.where(np.isfinite(scaled), scaled, clamped)
+                    energy = np.where(max_abs > 1.0, scaled, normalized_energy * (max_abs * max_abs))
+
+            energies[band_name] = np.where(max_abs > 0, energy, 0.0)
+
+        # Normalize (same left-to-right summation as the per-hit path)
+        total = np.zeros(count)
+        for energy in energies.values():
+            total = total + energy
+        total = total + 1e-10
+        return {band_name: energy / total for band_name, energy in energies.items()}
+
+    def classify_with_context(self, signal: np.ndarray, sr: int, times: List[float],
+                              first_index: int = 0) -> List[Tuple[str, float]]:
         """
         Classify drum hits with contextual awareness.
 
@@ -3124,6 +3387,7 @@ class DrumClassifier:
             signal: Full audio signal
             sr: Sample rate
             times: List of hit times in seconds
+            first_index: Position of the first hit in the whole sequence of hits
 
         Returns:
             List of (drum_type, confidence) tuples
@@ -3145,7 +3409,7 @@ class DrumClassifier:
                     confidence = 0.7
 
                 # Common pattern: alternating hi-hat
-                if i % 2 == 0 and prev_type == 'hi-hat' and drum_type == 'generic':
+                if (first_index + i) % 2 == 0 and prev_type == 'hi-hat' and drum_type == 'generic':
                     drum_type = 'hi-hat'
                     confidence = 0.7
 
@@ -3293,6 +3557,26 @@ class AmplitudeSegmentAnalyzer:
         return 'medium'  # Default if not found
 
 
+def to_madmom_signal(signal: np.ndarray, sample_rate: int):
+    """
+    Wrap a mono signal as a madmom Signal at MADMOM_SAMPLE_RATE
+
+    madmom only resamples when it decodes files, so in-memory signals at other
+    rates are resampled here (polyphase with scipy, linear otherwise).
+    """
+    data = np.asarray(signal, dtype=np.float32)
+    if sample_rate != MADMOM_SAMPLE_RATE and len(data):
+        if SCIPY_AVAILABLE:
+            factor = math.gcd(int(sample_rate), MADMOM_SAMPLE_RATE)
+            data = scipy.signal.resample_poly(data, MADMOM_SAMPLE_RATE // factor,
+                                              int(sample_rate) // factor).astype(np.float32)
+        else:
+            length = int(round(len(data) * MADMOM_SAMPLE_RATE / sample_rate))
+            positions = np.arange(length) * (sample_rate / MADMOM_SAMPLE_RATE)
+            data = np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+    return MadmomSignal(data, sample_rate=MADMOM_SAMPLE_RATE, num_channels=1)
+
+
 class WaveformAnalyzer(QObject):
     """
     Professional-grade waveform analyzer for drum detection using madmom
@@ -3313,6 +3597,21 @@ class WaveformAnalyzer(QObject):
     analysis_progress = Signal(int)  # Progress percentage
     analysis_status = Signal(str)  # Detailed status message
     analysis_metrics = Signal(dict)  # Real-time metrics (ETA, speed, etc.)
+    load_progress = Signal(int)  # Decode percentage during streaming loads
+
+    # Config keys read by each cached analysis stage (utils.audio.analysis_cache).
+    # Peak refinement is keyed on every key not listed here, so an unlisted
+    # setting can only cause extra cache misses, never stale results.
+    PREPROCESSING_CONFIG_KEYS = ('noise_reduction', 'multi_stage_denoising', 'percussive_separation',
+                                 'adaptive_thresholding')
+    ONSET_CONFIG_KEYS = ('onset_methods', 'use_madmom_onset_detection', 'use_madmom_beat_tracking',
+                         'madmom_onset_threshold', 'madmom_fps', 'madmom_beat_tracking_method',
+                         'madmom_tempo_range', 'hz_band_edges')
+    CLASSIFICATION_CONFIG_KEYS = ('drum_classification',)
+    CACHE_NEUTRAL_CONFIG_KEYS = ('multi_threading', 'streaming_load', 'streaming_block_seconds',
+                                 'streaming_memmap_seconds', 'analysis_cache', 'analysis_cache_max_mb',
+                                 'feature_plan_max_mb', 'segment_workers',
+                                 'use_visual_validation', 'validation_threshold')
 
     @profile_method("waveform_analyzer_init")
     def __init__(self):
@@ -3330,6 +3629,32 @@ class WaveformAnalyzer(QObject):
         self.is_processing: bool = False
         self.is_drum_stem: bool = False  # Flag to indicate if this is a drum stem
 
+        # Streaming load state (min/max overview and noise floors filled while decoding)
+        self.waveform_overview: Optional[Dict[str, Any]] = None
+        self._streamed_audio: Optional[StreamedAudio] = None
+        self._stream_noise_floors: Optional[Tuple[int, List[float]]] = None
+
+        # Level-of-detail min/max/RMS summaries for drawing (built once per loaded file)
+        self.waveform_pyramid: Optional[WaveformPyramid] = None
+
+        # Peaks sorted by time for visible-range queries (rebuilt when self.peaks is replaced)
+        self._peak_index: Optional[PeakIndex] = None
+        self._peak_index_source: Optional[List] = None
+
+        # Analysis cache state (audio hash is filled during streaming loads)
+        self._audio_hash: Optional[str] = None
+        self._analysis_cache: Optional[AnalysisCache] = None
+        self._stage_cache_key: Optional[str] = None
+        self.analysis_cache_stages: Dict[str, str] = {}  # stage -> 'hit' / 'miss' for the last analysis
+        self.feature_plan_report: Dict[str, Any] = {}  # Spectral features computed/reused by the last analysis
+
+        # Worker pool of a segmented analysis, and the whole-track confidence threshold its workers refine with
+        self._segment_pool: Optional[SegmentPool] = None
+        self.confidence_threshold_override: Optional[float] = None
+
+        # (signal, activations) of the last madmom run, see _madmom_activations
+        self._madmom_activation_cache: Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]] = None
+
         # Analysis results
         self.peaks: List[Peak] = []
         self.noise_floor: float = 0.0
@@ -3402,6 +3727,8 @@ class WaveformAnalyzer(QObject):
             'enable_adaptive_processing': True,  # Enable adaptive processing for large files
             'chunk_size_seconds': 25,  # Optimized to 25s for better balance between memory usage and context
             'overlap_seconds': 4,  # Increased to 4s for better continuity between chunks
+            'segmented_analysis': False,  # Run preprocessing, refinement and classification per chunk in processes
+            'segment_workers': 0,  # Worker processes of a segmented analysis (0 = one per CPU)
             'progressive_confidence_threshold': True,  # Adjust confidence threshold based on file position
 
             # Signal Processing Settings
@@ -3409,6 +3736,7 @@ class WaveformAnalyzer(QObject):
             'multi_stage_denoising': False,  # Disabled for better performance
             'percussive_separation': True,  # Critical for drum detection, keep enabled
             'adaptive_thresholding': True,
+            'hz_band_edges': False,  # Multi-band onset filters with edges in Hz (legacy: sub-1 Hz bands)
 
             # Analysis Settings
             'transient_filtering': True,  # Enhanced transient detection for drums
@@ -3423,6 +3751,12 @@ class WaveformAnalyzer(QObject):
             'use_caching': True,
             'memory_optimization': True,  # Enable memory optimization for large files
             'batch_size': 1024,  # Added explicit batch size for better memory management
+            'streaming_load': True,  # Decode in blocks with soundfile.blocks instead of one librosa.load
+            'streaming_block_seconds': 2.0,  # Decode block length
+            'streaming_memmap_seconds': 1800,  # Memory-map the decoded buffer for tracks at least this long
+            'analysis_cache': True,  # Reuse stage outputs from earlier analyses of the same audio
+            'analysis_cache_max_mb': 1000,  # LRU eviction above this size
+            'feature_plan_max_mb': 256,  # Spectrograms kept for the later stages (larger ones are used once)
 
             # madmom Settings
             'use_madmom_beat_tracking': True,
@@ -3574,20 +3908,29 @@ class WaveformAnalyzer(QObject):
                 print(f"{'=' * 80}")
                 logger.warning(f"Not a drum stem file: {self.filename}")
 
-            print("📚 Checking librosa availability...")
-            if not LIBROSA_AVAILABLE:
-                print("❌ librosa not available - cannot load audio file")
-                logger.error("librosa not available - cannot load audio file")
-                return False
+            self._release_streamed_audio()
+            use_streaming = self.config.get('streaming_load', True) and can_stream(self.file_path)
+
+            if not use_streaming:
+                print("📚 Checking librosa availability...")
+                if not LIBROSA_AVAILABLE:
+                    print("❌ librosa not available - cannot load audio file")
+                    logger.error("librosa not available - cannot load audio file")
+                    return False
 
-            # Load audio with librosa
-            print("🔄 Loading audio data with librosa...")
             start_time = time.time()
-            waveform_mono, self.sample_rate = librosa.load(
-                str(self.file_path),
-                sr=None,  # Keep original sample rate
-                mono=True  # Convert to mono
-            )
+            if use_streaming:
+                # Decode in blocks; noise floors and the overview are built as blocks arrive
+                print("🔄 Streaming audio data with soundfile...")
+                waveform_mono = self._stream_load_file()
+            else:
+                # Load audio with librosa
+                print("🔄 Loading audio data with librosa...")
+                waveform_mono, self.sample_rate = librosa.load(
+                    str(self.file_path),
+                    sr=None,  # Keep original sample rate
+                    mono=True  # Convert to mono
+                )
             print(f"✅ Audio loaded: length={len(waveform_mono)}, sr={self.sample_rate}")
 
             # Convert to 2D array format expected by waveform widget
@@ -3595,6 +3938,11 @@ class WaveformAnalyzer(QObject):
             self.waveform_data = [waveform_mono]  # Wrap in list to make it 2D-like
             print("🔄 Converted to 2D format for widget compatibility")
 
+            # Min/max/RMS pyramid so every zoom level is drawn from at most ~2 blocks per pixel
+            pyramid_start = time.time()
+            self.waveform_pyramid = WaveformPyramid(waveform_mono)
+            self.processing_times['waveform_pyramid'] = time.time() - pyramid_start
+
             # Set channels (mono after librosa.load with mono=True)
             self.channels = 1
 
@@ -3630,7 +3978,7 @@ class WaveformAnalyzer(QObject):
 
             print("\n🔧 Initializing noise filter...")
             # Initialize processing components
-            self.noise_filter = NoiseFilter(self.sample_rate)
+            self.noise_filter = NoiseFilter(self.sample_rate, self.signal_processor)
 
             print("🥁 Initializing drum classifier...")
             self.drum_classifier = DrumClassifier(DrumClassificationModel())
@@ -3667,6 +4015,69 @@ class WaveformAnalyzer(QObject):
             traceback.print_exc()
             return False
 
+    def _stream_load_file(self) -> np.ndarray:
+        """
+        Decode self.file_path block by block into a mono buffer.
+
+        Noise chunks are analysed as soon as they are fully decoded and the
+        min/max overview is available when the decode finishes, so neither
+        needs a second pass over the signal.
+
+        Returns:
+            Mono float32 samples (memory-mapped for very long tracks)
+        """
+        noise_floors: List[float] = []
+        hasher = AudioHasher()
+        hashed = 0
+
+        def on_block(buffer: np.ndarray, filled: int) -> None:
+            nonlocal hashed
+            hasher.update(buffer[hashed:filled])
+            hashed = filled
+
+            num_chunks, step = self._noise_chunk_layout(len(buffer))
+            if step == 0:
+                return
+            while len(noise_floors) < num_chunks and (len(noise_floors) + 1) * step <= filled:
+                i = len(noise_floors)
+                noise_floors.append(self._estimate_chunk_noise_floor(buffer[i * step:(i + 1) * step], i))
+
+        streamed = stream_load(
+            self.file_path,
+            block_seconds=self.config.get('streaming_block_seconds', 2.0),
+            memmap_min_seconds=self.config.get('streaming_memmap_seconds'),
+            block_callback=on_block,
+            progress_callback=self.load_progress.emit
+        )
+
+        self._streamed_audio = streamed
+        self.sample_rate = streamed.sample_rate
+        self._stream_noise_floors = (len(streamed.samples), noise_floors)
+        self._audio_hash = hasher.hexdigest(streamed.sample_rate)
+        self.waveform_overview = {
+            'samples_per_bucket': OVERVIEW_BUCKET_SIZE,
+            'min': streamed.overview_min,
+            'max': streamed.overview_max
+        }
+        self.processing_times['time_to_first_block'] = streamed.first_block_seconds
+
+        print(f"   📦 {streamed.block_count} blocks from {streamed.source_channels} channel(s), "
+              f"first block after {streamed.first_block_seconds * 1000:.1f}ms"
+              f"{', memory-mapped' if streamed.memory_mapped else ''}")
+        return streamed.samples
+
+    def _release_streamed_audio(self) -> None:
+        """Drop the previous file's streaming state (closes a memory-mapped buffer)."""
+        if self._streamed_audio is not None:
+            self.waveform_data = None
+            self._streamed_audio.close()
+            self._streamed_audio = None
+        self.waveform_overview = None
+        self.waveform_pyramid = None
+        self._stream_noise_floors = None
+        self._audio_hash = None
+        self._madmom_activation_cache = None
+
     @enhanced_profile_method("process_waveform")
     def process_waveform(self, callback=None) -> None:
         """
@@ -3702,6 +4113,10 @@ class WaveformAnalyzer(QObject):
                 logger.info("Starting comprehensive waveform analysis...")
                 start_time = time.time()
 
+                # Every stage reads its spectrograms from one feature plan (each STFT is computed once)
+                self.signal_processor.begin_feature_plan(
+                    self.sample_rate, int(self.config.get('feature_plan_max_mb', 256) * 1024 * 1024))
+
                 # Step 1: Noise analysis and filtering
                 print("\n📊 STEP 1: Analyzing noise characteristics...")
                 self._update_stage_progress('noise_analysis', 0.0, "🔍 Analyzing noise characteristics...")
@@ -3713,7 +4128,9 @@ class WaveformAnalyzer(QObject):
                 # Step 2: Signal preprocessing
                 print("\n🔧 STEP 2: Signal preprocessing...")
                 self._update_stage_progress('preprocessing', 0.0, "🔧 Preprocessing signal...")
-                processed_signal = self._preprocess_signal()
+                self._begin_cached_analysis()
+                processed_signal = self._run_cached_stage(
+                    'preprocessed', self.PREPROCESSING_CONFIG_KEYS, self._preprocess_stage, signal_stage=True)
                 print(f"   ✅ Preprocessing complete - signal shape: {processed_signal.shape}")
                 print(
                     f"   📈 Signal stats: min={np.min(processed_signal):.6f}, max={np.max(processed_signal):.6f}, mean={np.mean(processed_signal):.6f}")
@@ -3727,7 +4144,8 @@ class WaveformAnalyzer(QObject):
                 else:
                     print("\n🎯 STEP 3: Multi-method onset detection (fallback mode - madmom not available)...")
                     self._update_stage_progress('onset_detection', 0.0, "🎯 Detecting onsets with fallback methods...")
-                onset_candidates = self._detect_onsets_multi_method(processed_signal)
+                onset_candidates = self._run_cached_stage(
+                    'onsets', self.ONSET_CONFIG_KEYS, lambda: self._detect_onsets_multi_method(processed_signal))
                 print(f"   ✅ Onset detection complete - found {len(onset_candidates)} candidates")
                 if len(onset_candidates) > 0:
                     candidate_times = [f"{c['time']:.3f}s" for c in onset_candidates[:5]]
@@ -3740,7 +4158,9 @@ class WaveformAnalyzer(QObject):
                 # Step 4: Peak refinement and filtering
                 print("\n🔍 STEP 4: Peak refinement and filtering...")
                 self._update_stage_progress('peak_refinement', 0.0, "🔍 Refining and filtering peaks...")
-                refined_peaks = self._refine_and_filter_peaks(onset_candidates, processed_signal)
+                refined_peaks = self._run_cached_stage(
+                    'refined', self._refinement_config_keys(),
+                    lambda: self._refine_stage(onset_candidates, processed_signal))
                 print(f"   ✅ Peak refinement complete - {len(refined_peaks)} peaks after refinement")
                 self._update_stage_progress('peak_refinement', 1.0, f"✅ Refined to {len(refined_peaks)} peaks",
                                             len(refined_peaks))
@@ -3750,7 +4170,9 @@ class WaveformAnalyzer(QObject):
                 self._update_stage_progress('classification', 0.0, "🥁 Classifying drum types...")
                 if self.config['drum_classification']:
                     print("   🔄 Running drum classification...")
-                    classified_peaks = self._classify_drum_hits(refined_peaks, processed_signal)
+                    classified_peaks = self._run_cached_stage(
+                        'classified', self.CLASSIFICATION_CONFIG_KEYS,
+                        lambda: self._classify_stage(refined_peaks, processed_signal))
                     print(f"   ✅ Classification complete - {len(classified_peaks)} classified peaks")
                     self._update_stage_progress('classification', 1.0,
                                                 f"✅ Classified {len(classified_peaks)} drum hits",
@@ -3761,6 +4183,8 @@ class WaveformAnalyzer(QObject):
                     self._update_stage_progress('classification', 1.0, "⏭️ Classification skipped (disabled)",
                                                 len(classified_peaks))
 
+                self._close_segment_pool()
+
                 # Step 6: Amplitude segment filtering
                 print("\n📏 STEP 6: Amplitude segment filtering...")
                 self._update_stage_progress('amplitude_filtering', 0.0, "📏 Filtering by amplitude segments...")
@@ -3783,6 +4207,10 @@ class WaveformAnalyzer(QObject):
                 self._update_stage_progress('final_validation', 1.0,
                                             f"✅ Validation complete - {len(self.peaks)} final peaks", len(self.peaks))
 
+                self.feature_plan_report = self.signal_processor.end_feature_plan()
+                reused = sum(self.feature_plan_report['reused'].values())
+                print(f"   ♻️ Feature plan: {self.feature_plan_report['ffts']} STFTs, {reused} features reused")
+
                 # Analysis complete
                 self.is_analyzed = True
                 self.is_processing = False
@@ -3881,6 +4309,8 @@ class WaveformAnalyzer(QObject):
                 logger.error(f"Error in waveform processing: {str(e)}")
                 import traceback
                 traceback.print_exc()
+                self.signal_processor.end_feature_plan()
+                self._close_segment_pool()
                 self.is_processing = False
                 self.peak_detection_complete.emit(False)
                 if callback:
@@ -3894,6 +4324,117 @@ class WaveformAnalyzer(QObject):
             print("🔄 Processing in main thread...")
             _process()
 
+    def _begin_cached_analysis(self) -> None:
+        """
+        Select the analysis cache for this run and root the stage keys at the audio hash.
+        """
+        self.analysis_cache_stages = {}
+        if not self.config.get('analysis_cache', True):
+            self._analysis_cache = None
+            return
+
+        self._analysis_cache = get_analysis_cache(self.config.get('analysis_cache_max_mb', 1000))
+        if self._audio_hash is None:
+            # librosa loads are hashed here, streaming loads while decoding
+            self._audio_hash = hash_audio(self.waveform_data[0], self.sample_rate)
+        self._stage_cache_key = self._audio_hash
+
+    def _refinement_config_keys(self) -> List[str]:
+        """Config keys peak refinement is keyed on (everything not owned by another stage)."""
+        owned = set(self.PREPROCESSING_CONFIG_KEYS) | set(self.ONSET_CONFIG_KEYS) | set(
+            self.CLASSIFICATION_CONFIG_KEYS) | set(self.CACHE_NEUTRAL_CONFIG_KEYS)
+        return [key for key in self.config if key not in owned]
+
+    def _run_cached_stage(self, stage: str, config_keys, compute, signal_stage: bool = False):
+        """
+        Load a stage output from the analysis cache or compute and store it.
+
+        Stage keys chain on the previous stage's key, so a changed setting
+        misses for its own stage and every stage after it.
+
+        Args:
+            stage: Stage name
+            config_keys: Config keys the stage reads
+            compute: Callable producing the stage output
+            signal_stage: True for numpy signal outputs, False for peak lists
+
+        Returns:
+            Stage output
+        """
+        cache = self._analysis_cache
+        if cache is None:
+            return compute()
+
+        libraries = {'librosa': LIBROSA_AVAILABLE, 'scipy': SCIPY_AVAILABLE,
+                     'sklearn': SKLEARN_AVAILABLE, 'madmom': MADMOM_AVAILABLE}
+        key = cache.stage_key(self._stage_cache_key, stage, self.config, config_keys, libraries)
+        self._stage_cache_key = key
+
+        cached = cache.load_array(key) if signal_stage else cache.load_peaks(key)
+        if cached is not None:
+            self.analysis_cache_stages[stage] = 'hit'
+            print(f"   ♻️ {stage} loaded from analysis cache")
+            return cached
+
+        result = compute()
+        if signal_stage:
+            cache.store_array(key, result)
+        else:
+            cache.store_peaks(key, result)
+        self.analysis_cache_stages[stage] = 'miss'
+        return result
+
+    def _segments(self) -> Optional[SegmentPool]:
+        """
+        Worker pool of a segmented analysis, started on first use.
+
+        Returns:
+            The pool, or None when the analysis runs serially (segmented_analysis
+            off, or the track fits in one chunk)
+        """
+        if not self.config.get('segmented_analysis', False):
+            return None
+        if self._segment_pool is None:
+            layout = segment_layout(len(self.waveform_data[0]), self.sample_rate, self.config['chunk_size_seconds'])
+            if len(layout) < 2:
+                return None
+            self._segment_pool = SegmentPool(self, self.config.get('segment_workers', 0))
+            print(f"   🧩 Segmented analysis: {len(layout)} segments on {self._segment_pool.workers} worker processes")
+        return self._segment_pool
+
+    def _close_segment_pool(self) -> None:
+        """Stop the workers of a segmented analysis."""
+        if self._segment_pool is not None:
+            self._segment_pool.close()
+            self._segment_pool = None
+
+    def _preprocess_stage(self) -> np.ndarray:
+        """Preprocess the track, segment by segment in a segmented analysis."""
+        pool = self._segments()
+        if pool is None or (self.config['noise_reduction'] and self.config['multi_stage_denoising']):
+            # The noise gate of multi-stage denoising is set from the whole track
+            return self._preprocess_signal()
+        return pool.preprocess(lambda done: self._update_stage_progress(
+            'preprocessing', done, f"🔧 Preprocessed {done:.0%} of the segments"))
+
+    def _refine_stage(self, onset_candidates: List[Dict[str, Any]], signal: np.ndarray) -> List[Dict[str, Any]]:
+        """Refine onset candidates, window by window in a segmented analysis."""
+        pool = self._segments()
+        if pool is None:
+            return self._refine_and_filter_peaks(onset_candidates, signal)
+        return pool.refine(onset_candidates, signal, lambda done: self._update_stage_progress(
+            'peak_refinement', done, f"🔍 Refined {done:.0%} of the segments"))
+
+    def _classify_stage(self, peaks: List[Dict[str, Any]], signal: np.ndarray) -> List[Dict[str, Any]]:
+        """Classify refined peaks, window by window in a segmented analysis."""
+        pool = self._segments()
+        if pool is None or self.drum_classifier is None or len(peaks) == 0:
+            return self._classify_drum_hits(peaks, signal)
+        if not np.shares_memory(signal, pool.processed):
+            pool.processed[:] = signal
+        return pool.classify(peaks, lambda done: self._update_stage_progress(
+            'classification', done, f"🥁 Classified {done:.0%} of the segments"))
+
     def _detect_spectral_peaks(self, signal: np.ndarray, sr: int) -> List[Dict[str, Any]]:
         """
         Detect peaks using spectral analysis.
@@ -3913,11 +4454,8 @@ class WaveformAnalyzer(QObject):
         hop_length = 512
 
         if LIBROSA_AVAILABLE:
-            stft = librosa.stft(signal, n_fft=n_fft, hop_length=hop_length)
-            mag_spec = np.abs(stft)
-
             # Calculate spectral flux
-            flux = self.signal_processor.spectral_flux(stft)
+            flux = self.signal_processor.features(sr).spectral_flux(signal, n_fft, hop_length)
 
             # Normalize
             if np.max(flux) > 0:
@@ -3957,25 +4495,30 @@ class WaveformAnalyzer(QObject):
         signal = self.waveform_data[0]
 
         # Divide signal into chunks for analysis
-        chunk_size = min(44100, len(signal))  # 1 second at 44.1kHz or smaller if signal is shorter
-        num_chunks = max(10, len(signal) // chunk_size)  # At least 10 chunks
+        num_chunks, step = self._noise_chunk_layout(len(signal))
 
-        # Analyze each chunk
-        noise_floors = []
-        for i in range(num_chunks):
-            start = i * (len(signal) // num_chunks)
-            end = (i + 1) * (len(signal) // num_chunks)
-            chunk = signal[start:end]
+        if (self._stream_noise_floors is not None and self._stream_noise_floors[0] == len(signal)
+                and len(self._stream_noise_floors[1]) == num_chunks):
+            # Already estimated block by block during the streaming load
+            noise_floors = self._stream_noise_floors[1]
+        else:
+            # Analyze each chunk
+            noise_floors = []
+            for i in range(num_chunks):
+                chunk = signal[i * step:(i + 1) * step]
 
-            # Estimate noise floor for this chunk
-            noise_floor = self._estimate_chunk_noise_floor(chunk, i)
-            noise_floors.append(noise_floor)
+                # Estimate noise floor for this chunk
+                noise_floor = self._estimate_chunk_noise_floor(chunk, i)
+                noise_floors.append(noise_floor)
 
         # Use the median of the chunk noise floors
         self.noise_floor = np.median(noise_floors)
 
         # Calculate dynamic range
-        signal_max = np.max(np.abs(signal))
+        if self.waveform_overview is not None and len(self.waveform_overview['max']):
+            signal_max = max(float(self.waveform_overview['max'].max()), -float(self.waveform_overview['min'].min()))
+        else:
+            signal_max = np.max(np.abs(signal))
         if self.noise_floor > 0:
             self.dynamic_range = signal_max / self.noise_floor
         else:
@@ -3983,6 +4526,20 @@ class WaveformAnalyzer(QObject):
 
         print(f"   📊 Noise analysis: floor={self.noise_floor:.6f}, dynamic_range={self.dynamic_range:.2f}")
 
+    @staticmethod
+    def _noise_chunk_layout(signal_length: int) -> Tuple[int, int]:
+        """
+        Chunking used by the noise analysis.
+
+        Returns:
+            Tuple of (number of chunks, samples per chunk)
+        """
+        chunk_size = min(44100, signal_length)  # 1 second at 44.1kHz or smaller if signal is shorter
+        if chunk_size == 0:
+            return 0, 0
+        num_chunks = max(10, signal_length // chunk_size)  # At least 10 chunks
+        return num_chunks, signal_length // num_chunks
+
     def _estimate_chunk_noise_floor(self, chunk: np.ndarray, chunk_num: int) -> float:
         """
         Estimate noise floor for a chunk of audio.
@@ -4035,38 +4592,47 @@ class WaveformAnalyzer(QObject):
 
         return float(noise_floor)
 
-    def _preprocess_signal(self) -> np.ndarray:
+    def _preprocess_signal(self, signal: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Preprocess signal for analysis.
 
+        Args:
+            signal: Signal to preprocess (default: the loaded track)
+
         Returns:
             Preprocessed signal
         """
-        if self.waveform_data is None or len(self.waveform_data) == 0:
-            return np.array([])
+        if signal is None:
+            if self.waveform_data is None or len(self.waveform_data) == 0:
+                return np.array([])
+            signal = self.waveform_data[0]
 
-        signal = self.waveform_data[0].copy()
+        signal = signal.copy()
 
         # Apply noise reduction if enabled
         if self.config['noise_reduction'] and self.noise_filter is not None:
             print("   🔄 Applying noise reduction...")
+            noisy = signal
             if self.config['multi_stage_denoising']:
                 signal = self.noise_filter.multi_stage_denoising(signal)
                 print("   ✅ Multi-stage denoising complete")
             else:
                 signal = self.noise_filter.apply_noise_reduction(signal)
                 print("   ✅ Basic noise reduction complete")
+            self.signal_processor.features(self.sample_rate).release(noisy)
 
         # Apply percussive separation if enabled
         if self.config['percussive_separation'] and LIBROSA_AVAILABLE:
             print("   🔄 Applying percussive/harmonic separation...")
             percussive, _ = self.signal_processor.percussive_harmonic_separation(signal, self.sample_rate)
+            self.signal_processor.features(self.sample_rate).release(signal)
             signal = percussive
             print("   ✅ Percussive separation complete")
 
         # Apply adaptive thresholding if enabled
         if self.config['adaptive_thresholding'] and SCIPY_AVAILABLE:
             print("   🔄 Applying adaptive thresholding...")
+            self.signal_processor.features(self.sample_rate).release(signal)
             signal = self.signal_processor.adaptive_threshold(signal)
             print("   ✅ Adaptive thresholding complete")
 
@@ -4085,30 +4651,17 @@ class WaveformAnalyzer(QObject):
         print("   🔄 Detecting onsets with multiple methods...")
         onset_candidates = []
 
+        # madmom stages share one in-memory signal (no temporary WAV files)
+        activations = {}
+        if MADMOM_AVAILABLE and (self.config['use_madmom_onset_detection'] or
+                                 self.config['use_madmom_beat_tracking']):
+            activations = self._madmom_activations(signal)
+
         # Method 1: madmom RNN-based onset detection (primary method)
         if MADMOM_AVAILABLE and self.config['use_madmom_onset_detection']:
             print("   🔄 Running madmom RNN-based onset detection...")
             try:
-                # Create a temporary file for madmom to process
-                # (madmom works best with file input rather than numpy arrays)
-                import tempfile
-                import soundfile as sf
-
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                    temp_path = temp_file.name
-
-                # Write signal to temporary file
-                sf.write(temp_path, signal, self.sample_rate)
-
-                # Process with madmom
-                act = self.onset_processor(temp_path)
-                onset_times = self.onset_peak_picker(act)
-
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
+                onset_times = self.onset_peak_picker(activations['onset'])
 
                 # Convert to onset candidates
                 for time in onset_times:
@@ -4131,25 +4684,7 @@ class WaveformAnalyzer(QObject):
         if MADMOM_AVAILABLE and self.config['use_madmom_beat_tracking']:
             print("   🔄 Running madmom beat tracking...")
             try:
-                # Create a temporary file for madmom to process
-                import tempfile
-                import soundfile as sf
-
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                    temp_path = temp_file.name
-
-                # Write signal to temporary file
-                sf.write(temp_path, signal, self.sample_rate)
-
-                # Process with madmom
-                act = self.beat_processor(temp_path)
-                beat_times = self.beat_tracker(act)
-
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
+                beat_times = self.beat_tracker(activations['beat'])
 
                 # Convert to onset candidates
                 for time in beat_times:
@@ -4188,7 +4723,8 @@ class WaveformAnalyzer(QObject):
             print("   🔄 Running multi-band onset detection...")
             try:
                 # Get onset functions for each band
-                onset_functions = self.signal_processor.multi_band_onset_detection(signal, self.sample_rate)
+                onset_functions = self.signal_processor.multi_band_onset_detection(
+                    signal, self.sample_rate, self.config.get('hz_band_edges', False))
 
                 # Process each band
                 for band_name, onset_function in onset_functions.items():
@@ -4238,7 +4774,7 @@ class WaveformAnalyzer(QObject):
             print("   🔄 Running librosa onset detection...")
             try:
                 # Use librosa's onset detection
-                onset_env = librosa.onset.onset_strength(y=signal, sr=self.sample_rate)
+                onset_env = self.signal_processor.features(self.sample_rate).onset_strength(signal)
                 onset_frames = librosa.onset.onset_detect(onset_envelope=onset_env, sr=self.sample_rate)
                 onset_times = librosa.frames_to_time(onset_frames, sr=self.sample_rate)
 
@@ -4267,6 +4803,42 @@ class WaveformAnalyzer(QObject):
             print("   ⚠️ No onset candidates found with any method")
             return []
 
+    def _madmom_activations(self, signal: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Compute the madmom activation functions for a signal once.
+
+        The signal is handed to madmom as an in-memory Signal (resampled to the
+        rate the RNN models expect) instead of being written to and decoded
+        from a temporary WAV file per processor. The result is kept for the
+        signal, so onset picking, beat tracking and any later consumer (e.g.
+        tempo estimation) reuse the same activations.
+
+        Args:
+            signal: Preprocessed signal
+
+        Returns:
+            Dictionary with 'onset' and/or 'beat' activation functions (100 fps)
+        """
+        cached = self._madmom_activation_cache
+        activations = cached[1] if cached is not None and cached[0] is signal else {}
+
+        wanted = []
+        if self.config['use_madmom_onset_detection'] and 'onset' not in activations:
+            wanted.append(('onset', self.onset_processor))
+        if self.config['use_madmom_beat_tracking'] and 'beat' not in activations:
+            wanted.append(('beat', self.beat_processor))
+
+        if wanted:
+            madmom_signal = to_madmom_signal(signal, self.sample_rate)
+            for name, processor in wanted:
+                try:
+                    activations[name] = processor(madmom_signal)
+                except Exception as e:
+                    logger.error(f"Error computing madmom {name} activation: {e}")
+
+        self._madmom_activation_cache = (signal, activations)
+        return activations
+
     def _cross_validate_detections(self, candidates: List[Dict[str, Any]], signal: np.ndarray, sr: int) -> List[
         Dict[str, Any]]:
         """
@@ -4476,11 +5048,32 @@ class WaveformAnalyzer(QObject):
             return abs(signal[sample_index])
         return 0.0
 
+    def _get_amplitudes_at_times(self, signal: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """
+        Get signal amplitudes at many times with one lookup.
+
+        Args:
+            signal: Input signal
+            times: Times in seconds
+
+        Returns:
+            Amplitude at each time (0.0 outside the signal)
+        """
+        sample_indices = (np.asarray(times, dtype=np.float64) * self.sample_rate).astype(np.int64)
+        inside = (sample_indices >= 0) & (sample_indices < len(signal))
+        amplitudes = np.zeros(len(sample_indices), dtype=signal.dtype)
+        amplitudes[inside] = np.abs(signal[sample_indices[inside]])
+        return amplitudes
+
     def _refine_and_filter_peaks(self, onset_candidates: List[Dict[str, Any]], signal: np.ndarray) -> List[
         Dict[str, Any]]:
         """
         Refine and filter peak candidates.
 
+        The stages work on one PeakSet (columns of the candidates); the
+        refined peaks are turned back into dicts for the cache and the
+        classification stage.
+
         Args:
             onset_candidates: List of onset candidates
             signal: Input signal
@@ -4491,6 +5084,30 @@ class WaveformAnalyzer(QObject):
         if len(onset_candidates) == 0:
             return []
 
+        # Cluster, refine and filter the candidates
+        filtered_peaks = self._filter_peak_candidates(PeakSet.from_dicts(onset_candidates), signal)
+
+        # Apply intelligent peak selection
+        selected_peaks = self._intelligent_peak_selection(filtered_peaks)
+
+        # Add quality metrics
+        peaks_with_metrics = self._add_quality_metrics(selected_peaks, signal)
+
+        return peaks_with_metrics.to_dicts()
+
+    def _filter_peak_candidates(self, onset_candidates: PeakSet, signal: np.ndarray,
+                                remove_isolated: bool = True) -> PeakSet:
+        """
+        Cluster onset candidates into peaks and filter them.
+
+        Args:
+            onset_candidates: Onset candidates
+            signal: Input signal
+            remove_isolated: Drop isolated peaks (segment workers leave this to the whole track)
+
+        Returns:
+            Filtered peaks
+        """
         # First, cluster and validate onsets
         clustered_peaks = self._cluster_and_validate_onsets(onset_candidates, signal)
 
@@ -4501,356 +5118,309 @@ class WaveformAnalyzer(QObject):
             refined_peaks = clustered_peaks
 
         # Apply traditional peak filtering
-        filtered_peaks = self._traditional_peak_filtering(refined_peaks, signal)
+        return self._traditional_peak_filtering(refined_peaks, signal, remove_isolated)
 
-        # Apply intelligent peak selection
-        selected_peaks = self._intelligent_peak_selection(filtered_peaks)
-
-        # Add quality metrics
-        peaks_with_metrics = self._add_quality_metrics(selected_peaks, signal)
-
-        return peaks_with_metrics
-
-    def _cluster_and_validate_onsets(self, onset_candidates: List[Dict[str, Any]], signal: np.ndarray) -> List[
-        Dict[str, Any]]:
+    def _cluster_and_validate_onsets(self, onset_candidates: PeakSet, signal: np.ndarray) -> PeakSet:
         """
         Cluster and validate onset candidates.
 
         Args:
-            onset_candidates: List of onset candidates
+            onset_candidates: Onset candidates
             signal: Input signal
 
         Returns:
-            List of clustered and validated onsets
+            Clustered and validated onsets, one per cluster in time order
         """
         if len(onset_candidates) == 0:
-            return []
+            return onset_candidates
 
         # Sort by time
-        sorted_candidates = sorted(onset_candidates, key=lambda x: x['time'])
-
-        # Initialize clusters
-        clusters = []
-        current_cluster = [sorted_candidates[0]]
+        sorted_candidates = onset_candidates.sort_by_time()
 
         # Cluster based on time proximity
-        min_distance = self.config['min_peak_distance']
+        starts = cluster_starts(sorted_candidates['time'], self.config['min_peak_distance'])
 
-        for i in range(1, len(sorted_candidates)):
-            if sorted_candidates[i]['time'] - current_cluster[-1]['time'] < min_distance:
-                current_cluster.append(sorted_candidates[i])
-            else:
-                clusters.append(current_cluster)
-                current_cluster = [sorted_candidates[i]]
+        # Merge each cluster into one onset
+        return self._intelligent_cluster_merge(sorted_candidates, starts, signal)
 
-        # Add the last cluster
-        if current_cluster:
-            clusters.append(current_cluster)
-
-        # Process each cluster
-        clustered_peaks = []
-
-        for cluster in clusters:
-            # For single-candidate clusters, just add the candidate
-            if len(cluster) == 1:
-                clustered_peaks.append(cluster[0])
-                continue
-
-            # For multi-candidate clusters, merge them
-            merged_peak = self._intelligent_cluster_merge(cluster, signal)
-            if merged_peak:
-                clustered_peaks.append(merged_peak)
-
-        return clustered_peaks
-
-    def _post_cluster_refinement(self, clustered_peaks: List[Dict[str, Any]], signal: np.ndarray) -> List[
-        Dict[str, Any]]:
+    def _post_cluster_refinement(self, clustered_peaks: PeakSet, signal: np.ndarray) -> PeakSet:
         """
         Apply post-clustering refinement to peaks.
 
         Args:
-            clustered_peaks: List of clustered peaks
+            clustered_peaks: Clustered peaks
             signal: Input signal
 
         Returns:
-            List of refined peaks
+            Refined peaks
         """
         if len(clustered_peaks) <= 1:
             return clustered_peaks
 
         # Sort by time
-        sorted_peaks = sorted(clustered_peaks, key=lambda x: x['time'])
-
-        # Apply adaptive distance clustering
-        refined_peaks = []
-        current_cluster = [sorted_peaks[0]]
+        sorted_peaks = clustered_peaks.sort_by_time()
+        amplitudes = self._get_amplitudes_at_times(signal, sorted_peaks['time'])
 
-        for i in range(1, len(sorted_peaks)):
-            # Calculate adaptive distance based on peak characteristics
-            adaptive_distance = self._calculate_adaptive_distance(current_cluster[-1], sorted_peaks[i], signal)
-
-            if sorted_peaks[i]['time'] - current_cluster[-1]['time'] < adaptive_distance:
-                current_cluster.append(sorted_peaks[i])
-            else:
-                # Select most prominent peak from cluster
-                selected_peak = self._select_most_prominent_peak(current_cluster, signal)
-                if selected_peak:
-                    refined_peaks.append(selected_peak)
-                current_cluster = [sorted_peaks[i]]
+        # Apply adaptive distance clustering: a peak joins the cluster of the peak before it
+        adaptive_distances = self._calculate_adaptive_distances(sorted_peaks, amplitudes)
+        starts = cluster_starts(sorted_peaks['time'], adaptive_distances)
 
-        # Process the last cluster
-        if current_cluster:
-            selected_peak = self._select_most_prominent_peak(current_cluster, signal)
-            if selected_peak:
-                refined_peaks.append(selected_peak)
-
-        return refined_peaks
+        # Select most prominent peak from each cluster
+        return sorted_peaks.take(self._select_most_prominent_peaks(sorted_peaks, starts, amplitudes))
 
-    def _select_most_prominent_peak(self, peak_candidates: List[Dict[str, Any]], signal: np.ndarray) -> Optional[
-        Dict[str, Any]]:
+    def _select_most_prominent_peaks(self, peaks: PeakSet, starts: np.ndarray, amplitudes: np.ndarray) -> np.ndarray:
         """
-        Select the most prominent peak from a list of candidates.
+        Select the most prominent peak of each cluster.
 
         Args:
-            peak_candidates: List of peak candidates
-            signal: Input signal
+            peaks: Peaks sorted by time
+            starts: First row of each cluster
+            amplitudes: Signal amplitude at each peak
 
         Returns:
-            Most prominent peak or None if no candidates
+            Row of the selected peak of each cluster
         """
-        if not peak_candidates:
-            return None
-
-        if len(peak_candidates) == 1:
-            return peak_candidates[0]
+        # Calculate score based on amplitude and confidence
+        scores = amplitudes.astype(np.float64) * peaks['confidence']
 
-        # Calculate prominence score for each candidate
-        scores = []
-
-        for peak in peak_candidates:
-            # Get amplitude at peak time
-            amplitude = self._get_amplitude_at_time(signal, peak['time'])
-
-            # Calculate score based on amplitude and confidence
-            score = amplitude * peak['confidence']
-
-            # Bonus for certain methods
-            if peak['method'] == 'madmom_rnn':
-                score *= 1.2  # Bonus for madmom RNN detections
-            elif peak['method'] == 'madmom_beat':
-                score *= 1.1  # Bonus for madmom beat detections
-            elif 'merged' in peak['method']:
-                score *= 1.15  # Bonus for merged detections
-
-            scores.append((peak, score))
+        # Bonus for certain methods
+        methods = peaks['method']
+        merged = peaks.label_mask('method', lambda method: 'merged' in method)
+        scores = np.where(methods == 'madmom_rnn', scores * 1.2,  # Bonus for madmom RNN detections
+                          np.where(methods == 'madmom_beat', scores * 1.1,  # Bonus for madmom beat detections
+                                   np.where(merged, scores * 1.15, scores)))  # Bonus for merged detections
 
         # Select peak with highest score
-        best_peak = max(scores, key=lambda x: x[1])[0]
-
-        return best_peak
+        return cluster_argmax(scores, starts)
 
-    def _calculate_adaptive_distance(self, onset1: Dict[str, Any], onset2: Dict[str, Any], signal: np.ndarray) -> float:
+    def _calculate_adaptive_distances(self, peaks: PeakSet, amplitudes: np.ndarray) -> np.ndarray:
         """
-        Calculate adaptive distance threshold between two onsets.
+        Calculate adaptive distance thresholds between consecutive onsets.
 
         Args:
-            onset1: First onset
-            onset2: Second onset
-            signal: Input signal
+            peaks: Onsets sorted by time
+            amplitudes: Signal amplitude at each onset
 
         Returns:
-            Adaptive distance threshold
+            Adaptive distance threshold for each onset and the one after it
         """
         # Base distance
         base_distance = self.config['cluster_refinement_distance']
 
         # Adjust based on onset characteristics
-        adjustments = 0.0
-
-        # Adjust based on methods
-        if onset1['method'] != onset2['method']:
-            # Different methods are more likely to be separate onsets
-            adjustments -= 0.005
+        adjustments = np.zeros(len(peaks) - 1)
 
-        # Adjust based on types
-        if 'type' in onset1 and 'type' in onset2 and onset1['type'] != onset2['type']:
-            # Different types are more likely to be separate onsets
-            adjustments -= 0.005
+        # Adjust based on methods: different methods are more likely to be separate onsets
+        methods = peaks['method']
+        adjustments = np.where(methods[1:] != methods[:-1], adjustments - 0.005, adjustments)
 
-        # Adjust based on amplitude difference
-        amp1 = self._get_amplitude_at_time(signal, onset1['time'])
-        amp2 = self._get_amplitude_at_time(signal, onset2['time'])
-        amp_diff = abs(amp1 - amp2)
+        # Adjust based on types: different types are more likely to be separate onsets
+        if 'type' in peaks:
+            has_type = peaks.has('type')
+            types = peaks['type']
+            different_types = has_type[1:] & has_type[:-1] & (types[1:] != types[:-1])
+            adjustments = np.where(different_types, adjustments - 0.005, adjustments)
 
-        if amp_diff > 0.3:
-            # Large amplitude difference suggests separate onsets
-            adjustments -= 0.005
+        # Adjust based on amplitude difference: a large one suggests separate onsets
+        amp_diff = np.abs(amplitudes[1:] - amplitudes[:-1]).astype(np.float64)
+        adjustments = np.where(amp_diff > 0.3, adjustments - 0.005, adjustments)
 
         # Apply adjustments
         adjusted_distance = base_distance + adjustments
 
         # Ensure minimum distance
-        return max(0.015, adjusted_distance)
+        return np.where(adjusted_distance > 0.015, adjusted_distance, 0.015)
 
-    def _intelligent_cluster_merge(self, cluster: List[Dict[str, Any]], signal: np.ndarray) -> Optional[Dict[str, Any]]:
+    def _primary_drum_type(self, unique_drum_types: set) -> Optional[str]:
         """
-        Intelligently merge a cluster of onset candidates with drum-specific optimizations.
+        Primary drum type of a cluster with several drum types.
 
         Args:
-            cluster: List of onset candidates in a cluster
-            signal: Input signal
+            unique_drum_types: Drum types detected in the cluster
 
         Returns:
-            Merged onset or None if cluster is empty
+            The highest priority drum type, or None if the cluster is not a multi-drum hit
         """
-        if not cluster:
+        # If we have multiple drum types in the same cluster, this might be a complex hit
+        # (e.g., kick + hi-hat played simultaneously)
+        if len(unique_drum_types) <= 1 or 'generic' in unique_drum_types:
             return None
 
-        if len(cluster) == 1:
-            return cluster[0]
+        # This might be a complex drum hit - prioritize certain drum types
+        priority_order = {'kick': 3, 'snare': 2, 'tom': 1, 'hi-hat': 0, 'cymbal': 0}
 
-        # First, check if we have drum type information in the cluster
-        drum_types = [onset.get('type', 'generic') for onset in cluster if 'type' in onset]
+        # Find the highest priority drum type in the cluster
+        highest_priority = -1
+        primary_type = 'generic'
 
-        # If we have multiple drum types in the same cluster, this might be a complex hit
-        # (e.g., kick + hi-hat played simultaneously)
-        unique_drum_types = set(drum_types)
-
-        # Special handling for multi-drum hits
-        if len(unique_drum_types) > 1 and 'generic' not in unique_drum_types:
-            # This might be a complex drum hit - prioritize certain drum types
-            priority_order = {'kick': 3, 'snare': 2, 'tom': 1, 'hi-hat': 0, 'cymbal': 0}
+        for drum_type in unique_drum_types:
+            if drum_type in priority_order and priority_order[drum_type] > highest_priority:
+                highest_priority = priority_order[drum_type]
+                primary_type = drum_type
 
-            # Find the highest priority drum type in the cluster
-            highest_priority = -1
-            primary_type = 'generic'
+        return primary_type
 
-            for drum_type in unique_drum_types:
-                if drum_type in priority_order and priority_order[drum_type] > highest_priority:
-                    highest_priority = priority_order[drum_type]
-                    primary_type = drum_type
+    def _intelligent_cluster_merge(self, candidates: PeakSet, starts: np.ndarray, signal: np.ndarray) -> PeakSet:
+        """
+        Intelligently merge clusters of onset candidates with drum-specific optimizations.
 
-            # Find the best onset of the primary type
-            primary_onsets = [onset for onset in cluster if onset.get('type', 'generic') == primary_type]
-            if primary_onsets:
-                best_primary = max(primary_onsets, key=lambda x: x['confidence'])
+        Args:
+            candidates: Onset candidates sorted by time
+            starts: First row of each cluster
+            signal: Input signal
 
-                # Use the time from the best primary onset but boost confidence due to multiple detections
-                merged_onset = best_primary.copy()
-                merged_onset['confidence'] = min(0.95, best_primary['confidence'] + 0.1)
-                merged_onset['method'] = 'merged_multi_drum'
-                merged_onset['original_methods'] = [onset['method'] for onset in cluster]
-                merged_onset['drum_types_detected'] = list(unique_drum_types)
+        Returns:
+            One onset per cluster, in cluster order (single candidates are kept as they are)
+        """
+        size = len(candidates)
+        lengths = np.diff(np.append(starts, size))
+        ids = cluster_ids(starts, size)
+        times = candidates['time']
+        confidences = candidates['confidence'].astype(np.float64)
+        methods = candidates['method']
+        has_type = candidates.has('type')
+        types = candidates.get('type', 'generic')
+
+        # First, check if we have drum type information in the clusters: the drum types of each cluster
+        # as a row of flags, and the primary type of each distinct set of drum types
+        multi_drum = np.zeros(len(starts), dtype=bool)
+        best_primary = np.full(len(starts), size)
+        drum_types_detected = np.empty(len(starts), dtype=object)
+        if has_type.any():
+            type_codes, type_labels = candidates.factorize('type')
+            flags = np.zeros((size, len(type_labels)), dtype=bool)
+            flags[has_type, type_codes[has_type]] = True
+            type_sets, type_set_of_cluster = np.unique(np.logical_or.reduceat(flags, starts, axis=0), axis=0,
+                                                       return_inverse=True)
+            type_set_of_cluster = type_set_of_cluster.reshape(-1)
+            primary_types = np.empty(len(starts), dtype=object)
+            for index, type_set in enumerate(type_sets):
+                unique_drum_types = set(label for label, detected in zip(type_labels, type_set) if detected)
+                primary_type = self._primary_drum_type(unique_drum_types)
+                if primary_type is not None:
+                    for cluster in np.flatnonzero(type_set_of_cluster == index):
+                        primary_types[cluster] = primary_type
+                        drum_types_detected[cluster] = list(unique_drum_types)
 
-                return merged_onset
+            # Find the best onset of the primary type
+            primary_onsets = (types == primary_types[ids]) & (lengths[ids] > 1)
+            best_primary = cluster_argmax(confidences, starts, where=primary_onsets)
+            multi_drum = best_primary < size
 
         # Calculate weighted average time based on confidence, method, and drum type
-        weights = []
-
-        for onset in cluster:
-            weight = onset['confidence']
-
-            # Adjust weight based on method
-            if onset['method'] == 'madmom_rnn':
-                weight *= 1.4  # Highest weight for madmom RNN - increased from 1.3
-            elif onset['method'] == 'madmom_beat':
-                weight *= 1.2  # High weight for madmom beat
-            elif 'merged' in onset['method']:
-                weight *= 1.25  # High weight for already merged onsets
-            elif 'multi_band' in onset['method']:
-                weight *= 1.15  # Medium-high weight for multi-band - increased from 1.1
-
-                # Further adjust weight based on frequency band for multi-band detections
-                if 'multi_band_low' in onset['method']:
-                    # Low frequency band is good for kick drums
-                    weight *= 1.1
-                elif 'multi_band_mid' in onset['method']:
-                    # Mid frequency band is good for snares
-                    weight *= 1.05
-
-            # Adjust weight based on drum type if available
-            if 'type' in onset:
-                if onset['type'] == 'kick' or onset['type'] == 'snare':
-                    weight *= 1.2  # Prioritize kick and snare detections
-                elif onset['type'] == 'hi-hat':
-                    weight *= 1.1  # Slightly prioritize hi-hat detections
-
-            # Check if this onset has been verified as a transient
-            if 'transient_verified' in onset and onset['transient_verified']:
-                weight *= 1.2  # Prioritize verified transients
-
-            weights.append(weight)
+        weights = confidences.copy()
+
+        # Adjust weight based on method
+        madmom_rnn = methods == 'madmom_rnn'
+        madmom_beat = methods == 'madmom_beat'
+        merged_method = candidates.label_mask('method', lambda method: 'merged' in method)
+        multi_band = ~madmom_rnn & ~madmom_beat & ~merged_method & candidates.label_mask(
+            'method', lambda method: 'multi_band' in method)
+        weights = np.where(madmom_rnn, weights * 1.4,  # Highest weight for madmom RNN
+                           np.where(madmom_beat, weights * 1.2,  # High weight for madmom beat
+                                    np.where(merged_method, weights * 1.25,  # High weight for already merged onsets
+                                             np.where(multi_band, weights * 1.15, weights))))  # Medium-high: multi-band
+
+        # Further adjust weight based on frequency band for multi-band detections
+        band_low = multi_band & candidates.label_mask('method', lambda method: 'multi_band_low' in method)
+        band_mid = multi_band & ~band_low & candidates.label_mask('method', lambda method: 'multi_band_mid' in method)
+        weights = np.where(band_low, weights * 1.1,  # Low frequency band is good for kick drums
+                           np.where(band_mid, weights * 1.05, weights))  # Mid frequency band is good for snares
+
+        # Adjust weight based on drum type if available
+        weights = np.where((types == 'kick') | (types == 'snare'), weights * 1.2,  # Prioritize kick and snare
+                           np.where(types == 'hi-hat', weights * 1.1, weights))  # Slightly prioritize hi-hat
+
+        # Prioritize onsets verified as transients
+        weights = np.where(candidates.label_mask('transient_verified', bool), weights * 1.2, weights)
 
         # Normalize weights
-        total_weight = sum(weights)
-        if total_weight > 0:
-            weights = [w / total_weight for w in weights]
-        else:
-            weights = [1.0 / len(cluster)] * len(cluster)
+        total_weight = cluster_sum(weights, starts)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = np.where((total_weight > 0)[ids], weights / total_weight[ids], 1.0 / lengths[ids])
 
         # Calculate weighted average time
-        avg_time = sum(onset['time'] * weight for onset, weight in zip(cluster, weights))
+        avg_time = cluster_sum(times * weights, starts)
 
         # Find the onset with highest confidence
-        best_onset = max(cluster, key=lambda x: x['confidence'])
+        best_onset = cluster_argmax(confidences, starts)
 
         # For drum hits, we want to preserve the sharp attack, so bias toward the earliest detection
         # within a small window around the weighted average
-        earliest_within_window = None
         window_size = 0.01  # 10ms window
-
-        for onset in sorted(cluster, key=lambda x: x['time']):
-            if abs(onset['time'] - avg_time) <= window_size:
-                earliest_within_window = onset
-                break
+        within_window = np.abs(times - avg_time[ids]) <= window_size
+        earliest_within_window = np.minimum.reduceat(np.where(within_window, np.arange(size), size), starts)
 
         # Use the earliest detection within window if available, otherwise use weighted average
-        final_time = earliest_within_window['time'] if earliest_within_window else avg_time
+        final_time = np.where(earliest_within_window < size, times[np.minimum(earliest_within_window, size - 1)],
+                              avg_time)
 
         # Create merged onset with enhanced confidence calculation
-        confidence_boost = 0.05 * (len(cluster) - 1)  # Base boost from multiple detections
+        confidence_boost = 0.05 * (lengths - 1)  # Base boost from multiple detections
 
         # Additional boost if multiple detection methods agree
-        methods = set(onset['method'] for onset in cluster)
-        if len(methods) > 1:
-            confidence_boost += 0.05
+        several_methods = np.logical_or.reduceat(methods != methods[starts][ids], starts)
+        confidence_boost = np.where(several_methods, confidence_boost + 0.05, confidence_boost)
 
         # Additional boost if both madmom and traditional methods agree
-        has_madmom = any('madmom' in onset['method'] for onset in cluster)
-        has_traditional = any('madmom' not in onset['method'] for onset in cluster)
-        if has_madmom and has_traditional:
-            confidence_boost += 0.05
-
-        merged_onset = {
-            'time': final_time,
-            'amplitude': max(onset['amplitude'] for onset in cluster),
-            'confidence': min(0.95, best_onset['confidence'] + confidence_boost),
-            'method': 'merged',
-            'original_methods': [onset['method'] for onset in cluster],
-            'type': best_onset['type'] if 'type' in best_onset else 'generic'
-        }
-
-        return merged_onset
-
-    def _validate_temporal_consistency(self, peaks: List[Dict[str, Any]], signal: np.ndarray) -> List[Dict[str, Any]]:
+        madmom = candidates.label_mask('method', lambda method: 'madmom' in method)
+        madmom_and_traditional = np.logical_or.reduceat(madmom, starts) & np.logical_or.reduceat(~madmom, starts)
+        confidence_boost = np.where(madmom_and_traditional, confidence_boost + 0.05, confidence_boost)
+
+        method_lists = methods.tolist()
+        original_methods = np.fromiter((method_lists[start:start + length] for start, length in zip(starts, lengths)),
+                                       dtype=object, count=len(starts))
+
+        # Single candidates are kept as they are
+        single = lengths == 1
+        weighted = ~single & ~multi_drum
+
+        # Multi-drum hits: the best onset of the primary type with boosted confidence due to multiple detections
+        multi_drum_onsets = candidates.take(best_primary[multi_drum])
+        boosted = multi_drum_onsets['confidence'].astype(np.float64) + 0.1
+        multi_drum_onsets.set('confidence', np.where(boosted < 0.95, boosted, 0.95))
+        multi_drum_onsets.set('method', 'merged_multi_drum')
+        multi_drum_onsets.set('original_methods', original_methods[multi_drum])
+        multi_drum_onsets.set('drum_types_detected', drum_types_detected[multi_drum])
+
+        # Other clusters: the weighted average onset with the loudest amplitude
+        amplitudes = candidates['amplitude']
+        merged_onsets = candidates.take(cluster_argmax(amplitudes, starts)[weighted], names=('time', 'amplitude'))
+        confidence = confidences[best_onset[weighted]] + confidence_boost[weighted]
+        merged_onsets.set('time', final_time[weighted])
+        merged_onsets.set('confidence', np.where(confidence < 0.95, confidence, 0.95))
+        merged_onsets.set('method', 'merged')
+        merged_onsets.set('original_methods', original_methods[weighted])
+        merged_onsets.set('type', types[best_onset[weighted]])
+
+        # Back in cluster order
+        clusters = np.concatenate([np.flatnonzero(single), np.flatnonzero(multi_drum), np.flatnonzero(weighted)])
+        order = np.empty(len(clusters), dtype=np.intp)
+        order[clusters] = np.arange(len(clusters))
+        merged = PeakSet.concatenate([candidates.take(starts[single]), multi_drum_onsets, merged_onsets])
+        return merged.take(order)
+
+    def _validate_temporal_consistency(self, peaks: PeakSet, signal: np.ndarray) -> PeakSet:
         """
         Validate peaks based on temporal consistency with enhanced drum pattern recognition.
 
         Args:
-            peaks: List of peaks
+            peaks: Peaks
             signal: Input signal
 
         Returns:
-            List of temporally consistent peaks
+            Temporally consistent peaks sorted by time
         """
         if len(peaks) <= 2:
             return peaks
 
         # Sort by time
-        sorted_peaks = sorted(peaks, key=lambda x: x['time'])
+        sorted_peaks = peaks.sort_by_time()
+        times = sorted_peaks['time']
+        confidences = sorted_peaks['confidence'].astype(np.float64)
 
         # Calculate inter-onset intervals (IOIs)
-        iois = [sorted_peaks[i + 1]['time'] - sorted_peaks[i]['time'] for i in range(len(sorted_peaks) - 1)]
+        iois = np.diff(times)
 
         # Calculate IOI statistics
         if len(iois) >= 3:
@@ -4858,114 +5428,90 @@ class WaveformAnalyzer(QObject):
             ioi_std = np.std(iois)
 
             # Detect common drum pattern tempos (in seconds between beats)
-            # 60-180 BPM range converted to seconds between beats
-            tempo_range = [60 / bpm for bpm in range(60, 181)]
-
-            # Check if median IOI corresponds to a common drum tempo
-            # or a subdivision of a common tempo (half, quarter, etc.)
-            tempo_match = False
-            tempo_factor = 1.0
-
-            for tempo in tempo_range:
-                # Check if IOI matches tempo or subdivision
-                for division in [1, 2, 4]:
-                    expected_ioi = tempo / division
-                    if abs(median_ioi - expected_ioi) < 0.03:  # Within 30ms
-                        tempo_match = True
-                        tempo_factor = 1.1  # Boost confidence for peaks in a valid tempo
-                        break
-                if tempo_match:
-                    break
-
-            # Identify outliers with enhanced criteria
-            outliers = []
-            for i, ioi in enumerate(iois):
-                # Check if this IOI is an outlier based on standard deviation
-                if abs(ioi - median_ioi) > 1.5 * ioi_std:  # Reduced from 2.0 to 1.5 for stricter filtering
-                    # This IOI is an outlier
-                    # Mark the later peak as suspicious
-                    outliers.append(i + 1)
-
-                # Check if this IOI breaks a consistent pattern
-                if i > 0 and abs(ioi - iois[i - 1]) > 0.5 * median_ioi:
-                    # Sudden change in rhythm - mark as suspicious
-                    outliers.append(i + 1)
-
-            # Adjust confidence of outlier peaks
-            for i in outliers:
-                if i < len(sorted_peaks):
-                    sorted_peaks[i]['confidence'] *= 0.7  # Reduced from 0.8 to 0.7 for stronger penalty
-                    sorted_peaks[i]['temporal_outlier'] = True
-
-            # Boost confidence of peaks that fit the pattern
-            for i in range(len(sorted_peaks)):
-                if i not in outliers and i > 0 and i < len(sorted_peaks) - 1:
-                    # Check if this peak is part of a consistent pattern
-                    prev_ioi = sorted_peaks[i]['time'] - sorted_peaks[i - 1]['time']
-                    next_ioi = sorted_peaks[i + 1]['time'] - sorted_peaks[i]['time']
-
-                    # If both IOIs are similar, this is likely part of a pattern
-                    if abs(prev_ioi - next_ioi) < 0.1 * median_ioi:
-                        sorted_peaks[i]['confidence'] = min(0.95, sorted_peaks[i]['confidence'] * tempo_factor)
-                        sorted_peaks[i]['pattern_match'] = True
+            # 60-180 BPM range converted to seconds between beats, and their subdivisions (half, quarter)
+            expected_iois = (60 / np.arange(60, 181))[:, np.newaxis] / np.array([1, 2, 4])
+
+            # Check if median IOI corresponds to a common drum tempo or a subdivision (within 30ms)
+            tempo_match = np.any(np.abs(median_ioi - expected_iois) < 0.03)
+            tempo_factor = 1.1 if tempo_match else 1.0  # Boost confidence for peaks in a valid tempo
+
+            # Identify outliers with enhanced criteria: the later peak of an IOI is suspicious if the IOI
+            # is an outlier based on standard deviation (reduced from 2.0 to 1.5 for stricter filtering),
+            # and again if it breaks a consistent pattern (sudden change in rhythm)
+            outlier_counts = np.zeros(len(times), dtype=np.intp)
+            outlier_counts[1:] += np.abs(iois - median_ioi) > 1.5 * ioi_std
+            outlier_counts[2:] += np.abs(iois[1:] - iois[:-1]) > 0.5 * median_ioi
+
+            # Adjust confidence of outlier peaks (once per reason)
+            for count in (1, 2):
+                confidences = np.where(outlier_counts >= count, confidences * 0.7, confidences)  # Stronger penalty
+            temporal_outlier = outlier_counts > 0
+
+            # Boost confidence of peaks that fit the pattern: if both IOIs are similar, this is likely part of one
+            pattern_match = np.zeros(len(times), dtype=bool)
+            pattern_match[1:-1] = ~temporal_outlier[1:-1] & (np.abs(iois[:-1] - iois[1:]) < 0.1 * median_ioi)
+            boosted = confidences * tempo_factor
+            confidences = np.where(pattern_match, np.where(boosted < 0.95, boosted, 0.95), confidences)
 
             # Identify common drum patterns (e.g., kick-snare alternation)
-            if len(sorted_peaks) >= 4:
-                for i in range(len(sorted_peaks) - 3):
-                    # Check for kick-snare-kick-snare pattern
-                    if (sorted_peaks[i].get('type') == 'kick' and
-                            sorted_peaks[i + 1].get('type') == 'snare' and
-                            sorted_peaks[i + 2].get('type') == 'kick' and
-                            sorted_peaks[i + 3].get('type') == 'snare'):
-
-                        # Boost confidence for all peaks in this pattern
-                        for j in range(4):
-                            sorted_peaks[i + j]['confidence'] = min(0.95, sorted_peaks[i + j]['confidence'] * 1.15)
-                            sorted_peaks[i + j]['drum_pattern_match'] = True
+            drum_pattern_match = np.zeros(len(times), dtype=bool)
+            if len(times) >= 4:
+                # Check for kick-snare-kick-snare pattern
+                kick = sorted_peaks.label_mask('type', lambda drum_type: drum_type == 'kick')
+                snare = sorted_peaks.label_mask('type', lambda drum_type: drum_type == 'snare')
+                patterns = kick[:-3] & snare[1:-2] & kick[2:-1] & snare[3:]
+
+                # Boost confidence for all peaks in a pattern (once per pattern they are in)
+                pattern_counts = np.convolve(patterns, np.ones(4, dtype=np.intp))
+                for count in range(1, pattern_counts.max(initial=0) + 1):
+                    boosted = confidences * 1.15
+                    confidences = np.where(pattern_counts >= count, np.where(boosted < 0.95, boosted, 0.95),
+                                           confidences)
+                drum_pattern_match = pattern_counts > 0
+
+            sorted_peaks.set('confidence', confidences)
+            for name, mask in (('temporal_outlier', temporal_outlier), ('pattern_match', pattern_match),
+                               ('drum_pattern_match', drum_pattern_match)):
+                if mask.any():
+                    sorted_peaks.set(name, True, where=mask)
 
         # Apply temporal smoothing
         smoothed_peaks = self._apply_temporal_smoothing(sorted_peaks)
 
         return smoothed_peaks
 
-    def _apply_temporal_smoothing(self, peaks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _apply_temporal_smoothing(self, peaks: PeakSet) -> PeakSet:
         """
         Apply temporal smoothing to peak times.
 
         Args:
-            peaks: List of peaks
+            peaks: Peaks sorted by time
 
         Returns:
-            List of peaks with smoothed times
+            Peaks with smoothed times
         """
         if len(peaks) <= 2:
             return peaks
 
         # Copy peaks to avoid modifying originals
-        smoothed_peaks = peaks.copy()
+        smoothed_peaks = peaks.take(slice(None))
+        times = smoothed_peaks['time'].astype(np.float64)
 
-        # Apply light smoothing to times
-        for i in range(1, len(smoothed_peaks) - 1):
-            # Skip high-confidence peaks
-            if smoothed_peaks[i]['confidence'] > 0.9:
-                continue
-
-            # Skip peaks marked as temporal outliers
-            if 'temporal_outlier' in smoothed_peaks[i] and smoothed_peaks[i]['temporal_outlier']:
-                continue
+        # Skip high-confidence peaks and peaks marked as temporal outliers
+        smoothed = np.zeros(len(times), dtype=bool)
+        smoothed[1:-1] = ~(smoothed_peaks['confidence'][1:-1] > 0.9)
+        smoothed[1:-1] &= ~smoothed_peaks.get('temporal_outlier', False)[1:-1].astype(bool)
 
-            # Apply weighted average with neighbors
-            prev_time = smoothed_peaks[i - 1]['time']
-            curr_time = smoothed_peaks[i]['time']
-            next_time = smoothed_peaks[i + 1]['time']
+        # Apply light smoothing to times, weighting the current time more heavily
+        smoothed_times = times.copy()
+        smoothed_times[1:-1] = 0.8 * times[1:-1] + 0.1 * times[:-2] + 0.1 * times[2:]
+        smoothed_times = np.where(smoothed, smoothed_times, times)
 
-            # Weight current time more heavily
-            smoothed_time = 0.8 * curr_time + 0.1 * prev_time + 0.1 * next_time
+        # Each peak sees the smoothed time of the one before: redo the peaks that follow a smoothed peak in order
+        for i in np.flatnonzero(smoothed[1:] & smoothed[:-1]) + 1:
+            smoothed_times[i] = 0.8 * times[i] + 0.1 * smoothed_times[i - 1] + 0.1 * times[i + 1]
 
-            # Update time
-            smoothed_peaks[i]['time'] = smoothed_time
-
-        return smoothed_peaks
+        return smoothed_peaks.set('time', smoothed_times)
 
     def _select_best_from_cluster(self, cluster: List[Dict[str, Any]], signal: np.ndarray) -> Optional[Dict[str, Any]]:
         """
@@ -5052,54 +5598,16 @@ class WaveformAnalyzer(QObject):
             return peaks
 
         # Sort by time
-        sorted_peaks = sorted(peaks, key=lambda p: p.time)
+        order = np.argsort(np.array([p.time for p in peaks], dtype=np.float64), kind='stable')
+        sorted_peaks = [peaks[i] for i in order]
 
         # Group peaks that are close in time
-        clusters = []
-        current_cluster = [sorted_peaks[0]]
-
-        for i in range(1, len(sorted_peaks)):
-            if sorted_peaks[i].time - current_cluster[-1].time < min_distance:
-                current_cluster.append(sorted_peaks[i])
-            else:
-                clusters.append(current_cluster)
-                current_cluster = [sorted_peaks[i]]
+        starts = cluster_starts(np.array([p.time for p in sorted_peaks], dtype=np.float64), min_distance)
 
-        # Add the last cluster
-        if current_cluster:
-            clusters.append(current_cluster)
-
-        # Select most prominent peak from each cluster
-        clustered_peaks = []
-
-        for cluster in clusters:
-            selected_peak = self._select_most_prominent_from_cluster(cluster)
-            if selected_peak:
-                clustered_peaks.append(selected_peak)
-
-        return clustered_peaks
-
-    def _select_most_prominent_from_cluster(self, cluster_candidates: List[Peak]) -> Optional[Peak]:
-        """
-        Select the most prominent peak from a cluster.
-
-        Args:
-            cluster_candidates: List of peaks in a cluster
-
-        Returns:
-            Most prominent peak or None if cluster is empty
-        """
-        if not cluster_candidates:
-            return None
-
-        if len(cluster_candidates) == 1:
-            return cluster_candidates[0]
-
-        # Select peak with highest confidence * amplitude
-        scores = [(p, p.confidence * p.amplitude) for p in cluster_candidates]
-        best_peak = max(scores, key=lambda x: x[1])[0]
-
-        return best_peak
+        # Select peak with highest confidence * amplitude from each cluster
+        scores = (np.array([p.confidence for p in sorted_peaks], dtype=np.float64) *
+                  np.array([p.amplitude for p in sorted_peaks], dtype=np.float64))
+        return [sorted_peaks[i] for i in cluster_argmax(scores, starts)]
 
     def _set_clustered_peaks(self, clustered_peaks: List[Peak]):
         """
@@ -5115,26 +5623,30 @@ class WaveformAnalyzer(QObject):
         for peak_type in ['generic', 'kick', 'snare', 'hi-hat', 'cymbal', 'tom']:
             self.peak_data[peak_type] = [p for p in self.peaks if p.type == peak_type]
 
-    def _traditional_peak_filtering(self, onset_candidates: List[Dict[str, Any]], signal: np.ndarray) -> List[
-        Dict[str, Any]]:
+    def _traditional_peak_filtering(self, onset_candidates: PeakSet, signal: np.ndarray,
+                                    remove_isolated: bool = True) -> PeakSet:
         """
         Apply professional peak filtering techniques with adaptive thresholds.
 
         Args:
-            onset_candidates: List of onset candidates
+            onset_candidates: Onset candidates
             signal: Input signal
+            remove_isolated: Finish with _remove_isolated_peaks
 
         Returns:
-            List of filtered peaks
+            Filtered peaks
         """
         if len(onset_candidates) == 0:
-            return []
+            return onset_candidates
 
         print(f"   🔍 Starting peak filtering with {len(onset_candidates)} candidates")
 
         # Calculate adaptive confidence threshold based on signal characteristics
-        # and file duration
-        adaptive_threshold = self._calculate_adaptive_confidence_threshold(signal)
+        # and file duration (segment workers are given the whole track's threshold)
+        if self.confidence_threshold_override is not None:
+            adaptive_threshold = self.confidence_threshold_override
+        else:
+            adaptive_threshold = self._calculate_adaptive_confidence_threshold(signal)
 
         # For very large files, we need to be more selective to avoid memory issues
         # but still process the entire file
@@ -5143,8 +5655,9 @@ class WaveformAnalyzer(QObject):
                         f"using progressive filtering")
             print(f"   ⚠️ Large number of candidates ({len(onset_candidates)}), using progressive filtering")
 
-            # Sort by confidence first
-            sorted_by_confidence = sorted(onset_candidates, key=lambda x: x['confidence'], reverse=True)
+            # Sort by confidence first (stable: equal confidences keep their order)
+            confidences = onset_candidates['confidence']
+            sorted_by_confidence = np.argsort(-confidences, kind='stable')
 
             # Take the top candidates up to max_peaks
             high_confidence_candidates = sorted_by_confidence[:self.config['max_peaks']]
@@ -5154,38 +5667,35 @@ class WaveformAnalyzer(QObject):
             stricter_threshold = adaptive_threshold + 0.1  # Higher threshold for remaining candidates
 
             # Filter remaining candidates with stricter threshold
-            additional_candidates = [p for p in remaining_candidates if p['confidence'] >= stricter_threshold]
+            additional_candidates = remaining_candidates[confidences[remaining_candidates] >= stricter_threshold]
 
             # Combine high confidence candidates with additional filtered candidates
-            onset_candidates = high_confidence_candidates + additional_candidates
+            onset_candidates = onset_candidates.take(np.concatenate([high_confidence_candidates,
+                                                                     additional_candidates]))
 
             print(f"   ✅ Progressive filtering: kept {len(high_confidence_candidates)} high confidence + "
                   f"{len(additional_candidates)} additional candidates")
 
         # Apply adaptive confidence threshold
-        filtered_peaks = [p for p in onset_candidates if p['confidence'] >= adaptive_threshold]
+        filtered_peaks = onset_candidates.take(onset_candidates['confidence'] >= adaptive_threshold)
         print(f"   ✅ After confidence filtering (threshold={adaptive_threshold:.2f}): {len(filtered_peaks)} peaks")
 
         # Filter by transient detection if enabled
         if self.config['transient_filtering']:
-            transient_filtered = []
-            for peak in filtered_peaks:
-                # Use the simpler transient detection method for more reliable results
-                if self._is_genuine_transient(signal, peak['time']):
-                    peak['transient_verified'] = True
-                    transient_filtered.append(peak)
-                elif peak['confidence'] > 0.75:  # Very high threshold for non-transients
-                    # Keep only very high-confidence peaks even if transient detection fails
-                    peak['transient_verified'] = False
-                    transient_filtered.append(peak)
-            filtered_peaks = transient_filtered
+            # Use the simpler transient detection method for more reliable results
+            verified = np.array([bool(self._is_genuine_transient(signal, peak_time))
+                                 for peak_time in filtered_peaks['time'].tolist()], dtype=bool)
+            filtered_peaks.set('transient_verified', verified)
+            # Keep only very high-confidence peaks even if transient detection fails
+            filtered_peaks = filtered_peaks.take(verified | (filtered_peaks['confidence'] > 0.75))
             print(f"   ✅ After transient filtering: {len(filtered_peaks)} peaks")
 
         # Additional filtering based on peak amplitude
-        amplitude_filtered = []
-        for peak in filtered_peaks:
+        amplitude_filtered = np.zeros(len(filtered_peaks), dtype=bool)
+        for index, (peak_time, confidence) in enumerate(zip(filtered_peaks['time'].tolist(),
+                                                            filtered_peaks['confidence'].tolist())):
             # Get amplitude at peak time
-            sample_index = int(peak['time'] * self.sample_rate)
+            sample_index = int(peak_time * self.sample_rate)
             if 0 <= sample_index < len(signal):
                 # Calculate local amplitude with a smaller window focused on the transient
                 pre_window_size = min(512, sample_index)
@@ -5204,66 +5714,65 @@ class WaveformAnalyzer(QObject):
 
                     # Only keep peaks with significant amplitude increase
                     if amplitude_increase > 0.15:  # Significant increase for drum hits
-                        amplitude_filtered.append(peak)
-                    elif post_max > 0.25 and peak['confidence'] > 0.7:  # High absolute amplitude and good confidence
-                        amplitude_filtered.append(peak)
-                    elif peak['confidence'] > 0.85:  # Very high confidence can override amplitude check
-                        amplitude_filtered.append(peak)
+                        amplitude_filtered[index] = True
+                    elif post_max > 0.25 and confidence > 0.7:  # High absolute amplitude and good confidence
+                        amplitude_filtered[index] = True
+                    elif confidence > 0.85:  # Very high confidence can override amplitude check
+                        amplitude_filtered[index] = True
                 else:
                     # If we can't check amplitude properly, rely on confidence
-                    if peak['confidence'] > 0.75:
-                        amplitude_filtered.append(peak)
+                    if confidence > 0.75:
+                        amplitude_filtered[index] = True
             else:
                 # If index is out of bounds, rely on confidence
-                if peak['confidence'] > 0.75:
-                    amplitude_filtered.append(peak)
+                if confidence > 0.75:
+                    amplitude_filtered[index] = True
 
-        print(f"   ✅ After amplitude filtering: {len(amplitude_filtered)} peaks")
+        filtered_peaks = filtered_peaks.take(amplitude_filtered)
+        print(f"   ✅ After amplitude filtering: {len(filtered_peaks)} peaks")
 
         # Filter out peaks at the very beginning of the track (first 1 second)
         # This helps remove false positives that often appear at the start
-        start_filtered = [p for p in amplitude_filtered if p['time'] > 1.0]
+        start_filtered = filtered_peaks.take(filtered_peaks['time'] > 1.0)
         print(f"   ✅ After removing early peaks: {len(start_filtered)} peaks")
 
+        if not remove_isolated:
+            return start_filtered
+        return self._remove_isolated_peaks(start_filtered)
+
+    def _remove_isolated_peaks(self, peaks: PeakSet) -> PeakSet:
+        """
+        Drop peaks far from both neighbours relative to the median peak interval.
+
+        Args:
+            peaks: Filtered peaks
+
+        Returns:
+            Peaks without the isolated low-confidence ones (sorted by time if there are more than two)
+        """
         # Improved filtering for isolated peaks
-        if len(start_filtered) > 2:
-            # Sort by time
-            sorted_peaks = sorted(start_filtered, key=lambda x: x['time'])
+        if len(peaks) <= 2:
+            return peaks
 
-            # Calculate time differences between consecutive peaks
-            time_diffs = [sorted_peaks[i + 1]['time'] - sorted_peaks[i]['time'] for i in range(len(sorted_peaks) - 1)]
+        # Sort by time
+        sorted_peaks = peaks.sort_by_time()
 
-            # Calculate median time difference as a reference for rhythm
-            if time_diffs:
-                median_diff = np.median(time_diffs)
+        # Calculate time differences between consecutive peaks
+        time_diffs = np.diff(sorted_peaks['time'])
 
-                # Filter out isolated peaks
-                non_isolated = []
-                for i, peak in enumerate(sorted_peaks):
-                    is_isolated = False
-
-                    # Check if this peak is isolated (far from neighbors)
-                    if i == 0:  # First peak
-                        if len(sorted_peaks) > 1 and sorted_peaks[1]['time'] - peak['time'] > 3 * median_diff:
-                            is_isolated = True
-                    elif i == len(sorted_peaks) - 1:  # Last peak
-                        if peak['time'] - sorted_peaks[i - 1]['time'] > 3 * median_diff:
-                            is_isolated = True
-                    else:  # Middle peaks
-                        if (peak['time'] - sorted_peaks[i - 1]['time'] > 3 * median_diff and
-                                sorted_peaks[i + 1]['time'] - peak['time'] > 3 * median_diff):
-                            is_isolated = True
-
-                    # Keep non-isolated peaks or high confidence isolated peaks
-                    if not is_isolated or peak['confidence'] > 0.85:
-                        non_isolated.append(peak)
-
-                print(f"   ✅ After removing isolated peaks: {len(non_isolated)} peaks")
-                return non_isolated
-            else:
-                return sorted_peaks
-        else:
-            return start_filtered
+        # Calculate median time difference as a reference for rhythm
+        median_diff = np.median(time_diffs)
+
+        # A peak is isolated if it is far from its neighbours (the first and last have one)
+        far_from_previous = np.concatenate([[True], time_diffs > 3 * median_diff])
+        far_from_next = np.concatenate([time_diffs > 3 * median_diff, [True]])
+        is_isolated = far_from_previous & far_from_next
+
+        # Keep non-isolated peaks or high confidence isolated peaks
+        non_isolated = sorted_peaks.take(~is_isolated | (sorted_peaks['confidence'] > 0.85))
+
+        print(f"   ✅ After removing isolated peaks: {len(non_isolated)} peaks")
+        return non_isolated
 
     def _calculate_adaptive_confidence_threshold(self, signal: np.ndarray) -> float:
         """
@@ -5318,8 +5827,8 @@ class WaveformAnalyzer(QObject):
                         # Calculate spectrogram
                         n_fft = 2048
                         hop_length = 512
-                        stft = librosa.stft(signal, n_fft=n_fft, hop_length=hop_length)
-                        mag_spec = np.abs(stft)
+                        mag_spec = self.signal_processor.features(self.sample_rate).magnitude(
+                            signal, n_fft, hop_length)
 
                         # Calculate SNR in frequency bands relevant to drums
                         drum_bands = {
@@ -5503,8 +6012,8 @@ class WaveformAnalyzer(QObject):
                         # Calculate spectrogram
                         n_fft = 2048
                         hop_length = 512
-                        stft = librosa.stft(signal, n_fft=n_fft, hop_length=hop_length)
-                        mag_spec = np.abs(stft)
+                        mag_spec = self.signal_processor.features(self.sample_rate).magnitude(
+                            signal, n_fft, hop_length)
 
                         # Calculate spectral flux (difference between consecutive frames)
                         diff = np.diff(mag_spec, axis=1)
@@ -5602,8 +6111,7 @@ class WaveformAnalyzer(QObject):
                     # Calculate spectral statistics
                     n_fft = 2048
                     hop_length = 512
-                    stft = librosa.stft(signal, n_fft=n_fft, hop_length=hop_length)
-                    mag_spec = np.abs(stft)
+                    mag_spec = self.signal_processor.features(self.sample_rate).magnitude(signal, n_fft, hop_length)
 
                     # Calculate spectral centroid and its variation over time
                     if mag_spec.shape[1] > 0:
@@ -5825,21 +6333,21 @@ class WaveformAnalyzer(QObject):
 
         return filtered_peaks
 
-    def _intelligent_peak_selection(self, peaks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _intelligent_peak_selection(self, peaks: PeakSet) -> PeakSet:
         """
         Apply intelligent peak selection.
 
         Args:
-            peaks: List of peaks
+            peaks: Peaks
 
         Returns:
-            List of selected peaks
+            Selected peaks sorted by time
         """
         if len(peaks) == 0:
-            return []
+            return peaks
 
         # Sort by time
-        sorted_peaks = sorted(peaks, key=lambda x: x['time'])
+        sorted_peaks = peaks.sort_by_time()
 
         # Apply temporal consistency validation
         if self.config['temporal_consistency']:
@@ -5847,11 +6355,11 @@ class WaveformAnalyzer(QObject):
 
         # Limit to maximum number of peaks
         if len(sorted_peaks) > self.config['max_peaks']:
-            # Sort by confidence and take top N
-            sorted_by_confidence = sorted(sorted_peaks, key=lambda x: x['confidence'], reverse=True)
-            sorted_peaks = sorted_by_confidence[:self.config['max_peaks']]
+            # Sort by confidence (stable) and take top N
+            sorted_by_confidence = np.argsort(-sorted_peaks['confidence'], kind='stable')
+            sorted_peaks = sorted_peaks.take(sorted_by_confidence[:self.config['max_peaks']])
             # Re-sort by time
-            sorted_peaks = sorted(sorted_peaks, key=lambda x: x['time'])
+            sorted_peaks = sorted_peaks.sort_by_time()
 
         return sorted_peaks
 
@@ -5872,33 +6380,38 @@ class WaveformAnalyzer(QObject):
         # For now, return a default score
         return 0.8
 
-    def _add_quality_metrics(self, peaks: List[Dict[str, Any]], signal: np.ndarray) -> List[Dict[str, Any]]:
+    def _add_quality_metrics(self, peaks: PeakSet, signal: np.ndarray) -> PeakSet:
         """
         Add quality metrics to peaks.
 
         Args:
-            peaks: List of peaks
+            peaks: Peaks
             signal: Input signal
 
         Returns:
-            List of peaks with quality metrics
+            The peaks with precise_time, snr and spectral_centroid columns
         """
         if len(peaks) == 0:
-            return []
+            return peaks
+
+        metrics = {'precise_time': [], 'snr': [], 'spectral_centroid': []}
+        for peak_time in peaks['time'].tolist():
+            peak = {'time': peak_time}
 
-        for peak in peaks:
             # Add sub-sample timing
             if self.config['confidence_scoring']:
-                peak['precise_time'] = self._calculate_sub_sample_timing(peak, signal)
+                metrics['precise_time'].append(self._calculate_sub_sample_timing(peak, signal))
             else:
-                peak['precise_time'] = peak['time']
+                metrics['precise_time'].append(peak_time)
 
             # Add SNR estimate
-            peak['snr'] = self._estimate_peak_snr(peak, signal)
+            metrics['snr'].append(self._estimate_peak_snr(peak, signal))
 
             # Add spectral centroid
-            peak['spectral_centroid'] = self._calculate_peak_spectral_centroid(peak, signal)
+            metrics['spectral_centroid'].append(self._calculate_peak_spectral_centroid(peak, signal))
 
+        for name, values in metrics.items():
+            peaks.set(name, np.fromiter(values, dtype=object, count=len(values)))
         return peaks
 
     def _calculate_sub_sample_timing(self, peak: Dict[str, Any], signal: np.ndarray) -> float:
@@ -6324,13 +6837,15 @@ class WaveformAnalyzer(QObject):
 
         return is_transient
 
-    def _classify_drum_hits(self, peaks: List[Dict[str, Any]], signal: np.ndarray) -> List[Dict[str, Any]]:
+    def _classify_drum_hits(self, peaks: List[Dict[str, Any]], signal: np.ndarray,
+                            first_index: int = 0) -> List[Dict[str, Any]]:
         """
         Classify drum hits with enhanced accuracy and contextual awareness.
 
         Args:
             peaks: List of peaks
             signal: Input signal
+            first_index: Index of the first peak among all peaks of the track (for segments)
 
         Returns:
             List of classified peaks
@@ -6345,7 +6860,8 @@ class WaveformAnalyzer(QObject):
         peak_times = [p['time'] for p in sorted_peaks]
 
         # Classify with context
-        classifications = self.drum_classifier.classify_with_context(signal, self.sample_rate, peak_times)
+        classifications = self.drum_classifier.classify_with_context(signal, self.sample_rate, peak_times,
+                                                                     first_index)
 
         # Update peaks with classifications
         classified_peaks = []
@@ -6687,37 +7203,30 @@ class WaveformAnalyzer(QObject):
 
         # For very large datasets, use a more efficient approach
         is_large_dataset = len(peaks) > 1000
+        peak_set = PeakSet.from_dicts(peaks)
 
         # First, identify peaks with high prominence/amplitude that should always be kept
         # This ensures we don't miss obvious peaks in the waveform
-        high_prominence_peaks = []
-        standard_peaks = []
-
-        # Calculate amplitude statistics for all peaks
-        amplitudes = [p.get('amplitude', 0.0) for p in peaks]
-        if amplitudes:
-            median_amplitude = np.median(amplitudes)
-            max_amplitude = np.max(amplitudes)
-            # Dynamic threshold based on signal characteristics
-            prominence_threshold = max(0.5, median_amplitude * 2.0)
-            print(
-                f"   ℹ️ Amplitude stats: median={median_amplitude:.3f}, max={max_amplitude:.3f}, prominence threshold={prominence_threshold:.3f}")
-        else:
-            prominence_threshold = 0.5
+        # (thresholds are compared in float64, as they were against each peak's amplitude)
+        amplitudes = peak_set.get('amplitude', 0.0)
+        median_amplitude = np.median(amplitudes)
+        max_amplitude = np.max(amplitudes)
+        # Dynamic threshold based on signal characteristics
+        prominence_threshold = max(0.5, median_amplitude * 2.0)
+        print(
+            f"   ℹ️ Amplitude stats: median={median_amplitude:.3f}, max={max_amplitude:.3f}, prominence threshold={prominence_threshold:.3f}")
 
-        # Separate peaks into high prominence and standard categories
-        for p in peaks:
-            # Check if this peak has high amplitude or was marked as rescued
-            if (p.get('amplitude', 0.0) >= prominence_threshold or
-                    p.get('rescued', False) or
-                    p.get('amplitude_verified', False)):
-                # Boost confidence for high prominence peaks
-                p_copy = p.copy()
-                p_copy['confidence'] = min(0.98, p.get('confidence', 0.8) * 1.1)
-                p_copy['high_prominence'] = True
-                high_prominence_peaks.append(p_copy)
-            else:
-                standard_peaks.append(p)
+        # Separate peaks into high prominence and standard categories: high amplitude or marked as rescued
+        high_prominence = ((amplitudes.astype(np.float64) >= prominence_threshold) |
+                           peak_set.get('rescued', False).astype(bool) |
+                           peak_set.get('amplitude_verified', False).astype(bool))
+
+        # Boost confidence for high prominence peaks
+        boosted = peak_set.get('confidence', 0.8).astype(np.float64) * 1.1
+        standard_confidences = peak_set.get('confidence', 0.0).astype(np.float64)
+        if high_prominence.any():
+            peak_set.set('confidence', np.where(boosted < 0.98, boosted, 0.98), where=high_prominence)
+            peak_set.set('high_prominence', True, where=high_prominence)
 
         # Apply adaptive confidence threshold based on dataset size
         if is_large_dataset:
@@ -6728,227 +7237,134 @@ class WaveformAnalyzer(QObject):
             final_confidence_threshold = 0.58  # Lowered from 0.60
 
         # Apply the confidence threshold filter to standard peaks only
-        filtered_standard_peaks = [p for p in standard_peaks if p.get('confidence', 0.0) >= final_confidence_threshold]
+        filtered_standard = ~high_prominence & (standard_confidences >= final_confidence_threshold)
 
-        # Combine high prominence peaks with filtered standard peaks
-        filtered_peaks = high_prominence_peaks + filtered_standard_peaks
+        # Combine high prominence peaks with filtered standard peaks, sorted by time for further processing
+        filtered_peaks = peak_set.take(np.concatenate([np.flatnonzero(high_prominence),
+                                                       np.flatnonzero(filtered_standard)])).sort_by_time()
 
         # Log the results
         print(f"   ✅ After final confidence filtering: {len(filtered_peaks)} peaks")
-        print(f"   ℹ️ High prominence peaks preserved: {len(high_prominence_peaks)}")
-
-        # Sort by time for further processing
-        filtered_peaks = sorted(filtered_peaks, key=lambda p: p.get('time', 0.0))
+        print(f"   ℹ️ High prominence peaks preserved: {int(high_prominence.sum())}")
 
         # For empty or very small datasets, skip further filtering
         if len(filtered_peaks) <= 3:
             print("   ℹ️ Too few peaks for rhythm analysis, skipping")
-            time_sorted = sorted(filtered_peaks, key=lambda p: p['time'])
         else:
-            # Sort by time for temporal analysis
-            time_sorted = sorted(filtered_peaks, key=lambda p: p['time'])
-
             # Calculate time differences between consecutive peaks
-            time_diffs = [time_sorted[i + 1]['time'] - time_sorted[i]['time'] for i in range(len(time_sorted) - 1)]
+            times = filtered_peaks['time']
+            time_diffs = np.diff(times)
 
-            if time_diffs:
-                # Find the median time difference
-                median_diff = np.median(time_diffs)
+            # Find the median time difference
+            median_diff = np.median(time_diffs)
 
-                # Advanced tempo detection
-                # Use histogram analysis to find the most common intervals
-                if len(time_diffs) > 10:
-                    try:
-                        # Create histogram of time differences
-                        hist, bin_edges = np.histogram(time_diffs, bins=50)
-                        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
-
-                        # Find the most common interval
-                        most_common_idx = np.argmax(hist)
-                        most_common_interval = bin_centers[most_common_idx]
-
-                        # Refine with nearby values for better accuracy
-                        common_intervals = []
-                        for i, count in enumerate(hist):
-                            if count > max(1, hist[most_common_idx] * 0.5):
-                                common_intervals.append(bin_centers[i])
-
-                        # Calculate average of common intervals
-                        if common_intervals:
-                            refined_interval = np.mean(common_intervals)
-                        else:
-                            refined_interval = most_common_interval
+            # Advanced tempo detection
+            # Use histogram analysis to find the most common intervals
+            if len(time_diffs) > 10:
+                try:
+                    # Create histogram of time differences
+                    hist, bin_edges = np.histogram(time_diffs, bins=50)
+                    bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
 
-                        # Use this as our beat duration estimate
-                        beat_duration = refined_interval
-                    except Exception as e:
-                        logger.warning(f"Error in histogram analysis: {e}, falling back to median")
-                        beat_duration = median_diff
-                else:
-                    # For small datasets, use simpler approach
-                    # Try to detect tempo and rhythmic patterns
-                    # Common beat divisions in music: quarter notes, eighth notes, sixteenth notes
-                    possible_beat_divisions = [1.0, 0.5, 0.25]
-
-                    # Estimate beat duration (in seconds)
-                    beat_duration_candidates = []
-                    for division in possible_beat_divisions:
-                        beat_duration_candidates.append(median_diff / division)
-
-                    # Find the most likely beat duration (between 0.3s and 1.0s, or 60-200 BPM)
-                    beat_duration = median_diff  # Default to median
-                    for candidate in beat_duration_candidates:
-                        if 0.3 <= candidate <= 1.0:
-                            beat_duration = candidate
-                            break
+                    # Find the most common interval
+                    most_common_idx = np.argmax(hist)
+                    most_common_interval = bin_centers[most_common_idx]
 
-                # Calculate tempo in BPM
-                if beat_duration > 0:
-                    estimated_tempo = 60.0 / beat_duration
-                    print(f"   ℹ️ Estimated tempo: {estimated_tempo:.1f} BPM (beat duration: {beat_duration:.3f}s)")
-                else:
-                    estimated_tempo = 120.0  # Default fallback
-                    beat_duration = 0.5
-                    print(f"   ⚠️ Could not estimate tempo, using default: {estimated_tempo} BPM")
-
-                # Store tempo information for later use
-                self._estimated_tempo = estimated_tempo
-                self._beat_duration = beat_duration
-
-                # Identify peaks that fit into the rhythmic grid
-                rhythm_filtered = []
-
-                # For large datasets, use a more efficient approach
-                if is_large_dataset:
-                    # Process in chunks to avoid memory issues
-                    chunk_size = 500
-                    for chunk_start in range(0, len(time_sorted), chunk_size):
-                        chunk_end = min(chunk_start + chunk_size, len(time_sorted))
-                        chunk = time_sorted[chunk_start:chunk_end]
-
-                        # Process this chunk
-                        for i, peak in enumerate(chunk):
-                            # Get global index for neighbor lookups
-                            global_idx = chunk_start + i
-
-                            # Default to keeping the peak
-                            keep_peak = True
-
-                            # CRITICAL: Always keep high prominence peaks regardless of rhythm
-                            if peak.get('high_prominence', False) or peak.get('rescued', False) or peak.get(
-                                    'amplitude_verified', False):
-                                keep_peak = True
-                                # Skip further checks - we always want to keep these peaks
-                            else:
-                                # For peaks in the middle of the sequence
-                                if global_idx > 0 and global_idx < len(time_sorted) - 1:
-                                    prev_peak = time_sorted[global_idx - 1]
-                                    next_peak = time_sorted[global_idx + 1]
-
-                                    prev_diff = peak['time'] - prev_peak['time']
-                                    next_diff = next_peak['time'] - peak['time']
-
-                                    # Check if this peak fits the rhythmic grid
-                                    # Calculate how close this peak is to a beat division
-                                    beat_position = (peak['time'] % beat_duration) / beat_duration
-                                    grid_fit = min(beat_position, 1.0 - beat_position)
-
-                                    # If peak is far from the grid and isolated, it might be a false positive
-                                    # But be less strict than before
-                                    if grid_fit > 0.25 and prev_diff > 2.5 * median_diff and next_diff > 2.5 * median_diff:
-                                        # Only keep if it has decent confidence or is a verified transient
-                                        if peak.get('confidence', 0) < 0.75 and not peak.get('transient_verified',
-                                                                                             False):
-                                            keep_peak = False
-
-                                    # If peak is very isolated (far from neighbors), be more strict but still reasonable
-                                    if prev_diff > 3.5 * median_diff and next_diff > 3.5 * median_diff:
-                                        # Only keep if it has good confidence
-                                        if peak.get('confidence', 0) < 0.8:
-                                            keep_peak = False
-
-                            # Always keep peaks with good confidence
-                            if peak.get('confidence', 0) > 0.85:  # Lowered from 0.9
-                                keep_peak = True
-
-                            # Always keep verified transients with decent confidence
-                            if peak.get('transient_verified', False) and peak.get('confidence',
-                                                                                  0) > 0.7:  # Lowered from 0.75
-                                keep_peak = True
-
-                            # Always keep peaks with moderate amplitude
-                            if peak.get('amplitude', 0) > 0.6:  # Lowered from 0.8
-                                keep_peak = True
-
-                            # Always keep peaks in high or very high segments
-                            if peak.get('segment_type') in ['high', 'very_high']:
-                                keep_peak = True
-
-                            if keep_peak:
-                                rhythm_filtered.append(peak)
-                else:
-                    # For smaller datasets, use the enhanced approach
-                    for i, peak in enumerate(time_sorted):
-                        # Default to keeping the peak
-                        keep_peak = True
-
-                        # CRITICAL: Always keep high prominence peaks regardless of rhythm
-                        if peak.get('high_prominence', False) or peak.get('rescued', False) or peak.get(
-                                'amplitude_verified', False):
-                            keep_peak = True
-                            # Skip further checks - we always want to keep these peaks
-                        else:
-                            # For peaks in the middle of the sequence
-                            if i > 0 and i < len(time_sorted) - 1:
-                                prev_diff = peak['time'] - time_sorted[i - 1]['time']
-                                next_diff = time_sorted[i + 1]['time'] - peak['time']
-
-                                # Check if this peak fits the rhythmic grid
-                                # Calculate how close this peak is to a beat division
-                                beat_position = (peak['time'] % beat_duration) / beat_duration
-                                grid_fit = min(beat_position, 1.0 - beat_position)
-
-                                # If peak is far from the grid and isolated, it might be a false positive
-                                # But be less strict than before
-                                if grid_fit > 0.25 and prev_diff > 2.5 * median_diff and next_diff > 2.5 * median_diff:
-                                    # Only keep if it has decent confidence or is a verified transient
-                                    if peak.get('confidence', 0) < 0.75 and not peak.get('transient_verified', False):
-                                        keep_peak = False
-
-                                # If peak is very isolated (far from neighbors), be more strict but still reasonable
-                                if prev_diff > 3.5 * median_diff and next_diff > 3.5 * median_diff:
-                                    # Only keep if it has good confidence
-                                    if peak.get('confidence', 0) < 0.8:
-                                        keep_peak = False
-
-                        # Always keep peaks with good confidence
-                        if peak.get('confidence', 0) > 0.85:  # Lowered from 0.9
-                            keep_peak = True
-
-                        # Always keep verified transients with decent confidence
-                        if peak.get('transient_verified', False) and peak.get('confidence',
-                                                                              0) > 0.7:  # Lowered from 0.75
-                            keep_peak = True
-
-                        # Always keep peaks with moderate amplitude
-                        if peak.get('amplitude', 0) > 0.6:  # Added this check
-                            keep_peak = True
-
-                        # Always keep peaks in high or very high segments
-                        if peak.get('segment_type') in ['high', 'very_high']:
-                            keep_peak = True
-
-                        if keep_peak:
-                            rhythm_filtered.append(peak)
-
-                filtered_peaks = rhythm_filtered
-                print(f"   ✅ After rhythm filtering: {len(filtered_peaks)} peaks")
+                    # Refine with nearby values for better accuracy
+                    common_intervals = bin_centers[hist > max(1, hist[most_common_idx] * 0.5)]
+
+                    # Calculate average of common intervals
+                    if len(common_intervals):
+                        refined_interval = np.mean(common_intervals)
+                    else:
+                        refined_interval = most_common_interval
+
+                    # Use this as our beat duration estimate
+                    beat_duration = refined_interval
+                except Exception as e:
+                    logger.warning(f"Error in histogram analysis: {e}, falling back to median")
+                    beat_duration = median_diff
+            else:
+                # For small datasets, use simpler approach
+                # Try to detect tempo and rhythmic patterns
+                # Common beat divisions in music: quarter notes, eighth notes, sixteenth notes
+                possible_beat_divisions = [1.0, 0.5, 0.25]
+
+                # Estimate beat duration (in seconds)
+                beat_duration_candidates = []
+                for division in possible_beat_divisions:
+                    beat_duration_candidates.append(median_diff / division)
+
+                # Find the most likely beat duration (between 0.3s and 1.0s, or 60-200 BPM)
+                beat_duration = median_diff  # Default to median
+                for candidate in beat_duration_candidates:
+                    if 0.3 <= candidate <= 1.0:
+                        beat_duration = candidate
+                        break
+
+            # Calculate tempo in BPM
+            if beat_duration > 0:
+                estimated_tempo = 60.0 / beat_duration
+                print(f"   ℹ️ Estimated tempo: {estimated_tempo:.1f} BPM (beat duration: {beat_duration:.3f}s)")
+            else:
+                estimated_tempo = 120.0  # Default fallback
+                beat_duration = 0.5
+                print(f"   ⚠️ Could not estimate tempo, using default: {estimated_tempo} BPM")
+
+            # Store tempo information for later use
+            self._estimated_tempo = estimated_tempo
+            self._beat_duration = beat_duration
+
+            # Identify peaks that fit into the rhythmic grid (the same rules for any number of peaks)
+            confidences = filtered_peaks.get('confidence', 0.0).astype(np.float64)
+            transient_verified = filtered_peaks.get('transient_verified', False).astype(bool)
+
+            # CRITICAL: Always keep high prominence peaks regardless of rhythm
+            protected = (filtered_peaks.get('high_prominence', False).astype(bool) |
+                         filtered_peaks.get('rescued', False).astype(bool) |
+                         filtered_peaks.get('amplitude_verified', False).astype(bool))
+
+            # Rhythm checks apply to the peaks in the middle of the sequence
+            prev_diff = np.concatenate([[np.inf], time_diffs])
+            next_diff = np.concatenate([time_diffs, [np.inf]])
+            middle = np.zeros(len(filtered_peaks), dtype=bool)
+            middle[1:-1] = True
+
+            # Check if each peak fits the rhythmic grid
+            # Calculate how close each peak is to a beat division
+            beat_position = (times % beat_duration) / beat_duration
+            grid_fit = np.minimum(beat_position, 1.0 - beat_position)
+
+            # If peak is far from the grid and isolated, it might be a false positive
+            # But be less strict than before: only keep it if it has decent confidence or is a verified transient
+            off_grid = ((grid_fit > 0.25) & (prev_diff > 2.5 * median_diff) & (next_diff > 2.5 * median_diff) &
+                        (confidences < 0.75) & ~transient_verified)
+
+            # If peak is very isolated (far from neighbors), be more strict but still reasonable
+            very_isolated = (prev_diff > 3.5 * median_diff) & (next_diff > 3.5 * median_diff) & (confidences < 0.8)
+
+            keep_peak = ~(middle & ~protected & (off_grid | very_isolated))
+
+            # Always keep peaks with good confidence
+            keep_peak |= confidences > 0.85  # Lowered from 0.9
+
+            # Always keep verified transients with decent confidence
+            keep_peak |= transient_verified & (confidences > 0.7)  # Lowered from 0.75
+
+            # Always keep peaks with moderate amplitude
+            keep_peak |= filtered_peaks.get('amplitude', 0.0).astype(np.float64) > 0.6  # Lowered from 0.8
+
+            # Always keep peaks in high or very high segments
+            keep_peak |= filtered_peaks.label_mask('segment_type', lambda segment: segment in ('high', 'very_high'))
+
+            filtered_peaks = filtered_peaks.take(keep_peak)
+            print(f"   ✅ After rhythm filtering: {len(filtered_peaks)} peaks")
 
         # Convert to Peak objects with professional error handling
         peak_objects = []
         conversion_errors = 0
 
-        for p in filtered_peaks:
+        for p in filtered_peaks.to_dicts():
             try:
                 # Use precise time if available, with additional timing refinement
                 # This ensures peaks align exactly with the actual drum hits
@@ -7269,6 +7685,12 @@ class WaveformAnalyzer(QObject):
             'analysis_time': self.analysis_time,
             'is_analyzed': self.is_analyzed,
             'is_drum_stem': self.is_drum_stem,
+            'analysis_cache': {
+                'enabled': self._analysis_cache is not None,
+                'stages': dict(self.analysis_cache_stages),
+                **(self._analysis_cache.get_stats() if self._analysis_cache is not None else {})
+            },
+            'feature_plan': dict(self.feature_plan_report),
             'peak_types': {
                 'generic': len([p for p in self.peaks if p.type == 'generic']),
                 'kick': len([p for p in self.peaks if p.type == 'kick']),
@@ -7480,31 +7902,52 @@ class WaveformAnalyzer(QObject):
         start_time = offset
         end_time = offset + visible_duration
 
-        # Find peaks in visible range
-        visible_peaks = [p for p in self.peaks if start_time <= p.time <= end_time]
+        # Find peaks in visible range (binary search over the time-sorted index)
+        index = self.get_peak_index()
+        first, last = index.span(start_time, end_time)
+        x_positions = ((index.keys[first:last] - start_time) / visible_duration * width).astype(int).tolist()
 
         # Create markers
         markers = []
+        center_y = height // 2
+        colors = {}
 
-        for peak in visible_peaks:
-            # Calculate x position
-            x_pos = int((peak.time - start_time) / visible_duration * width)
+        for peak, x_pos in zip(index.peaks[first:last], x_positions):
+            color = colors.get(peak.type)
+            if color is None:
+                color = colors[peak.type] = self._get_color_for_peak_type(peak.type)
 
             # Create marker
             marker = {
                 'x': x_pos,
-                'y': height // 2,  # Center vertically
+                'y': center_y,  # Center vertically
                 'time': peak.time,
                 'amplitude': peak.amplitude,
                 'confidence': peak.confidence,
                 'type': peak.type,
-                'color': self._get_color_for_peak_type(peak.type)
+                'color': color
             }
 
             markers.append(marker)
 
         return markers
 
+    def get_peak_index(self) -> PeakIndex:
+        """
+        Time-sorted index of self.peaks.
+
+        Rebuilt when self.peaks is replaced or changes length, so every
+        assignment of a new peak list is picked up without hooks.
+
+        Returns:
+            PeakIndex keyed by peak time
+        """
+        if (self._peak_index is None or self._peak_index_source is not self.peaks
+                or len(self._peak_index) != len(self.peaks)):
+            self._peak_index = PeakIndex(self.peaks)
+            self._peak_index_source = self.peaks
+        return self._peak_index
+
     def _get_color_for_peak_type(self, peak_type: str) -> Tuple[int, int, int]:
         """
         Get color for peak type.
@@ -7568,24 +8011,21 @@ class WaveformAnalyzer(QObject):
             # Calculate number of samples per pixel
             samples_per_pixel = len(visible_signal) // width
 
-            # For each pixel, find min and max values
-            points = []
-            for i in range(width):
-                start_idx = i * samples_per_pixel
-                end_idx = min(start_idx + samples_per_pixel, len(visible_signal))
-
-                if start_idx < end_idx:
-                    chunk = visible_signal[start_idx:end_idx]
-                    min_val = np.min(chunk)
-                    max_val = np.max(chunk)
+            # For each pixel, find min and max values (from the pyramid, cost proportional to width)
+            pyramid = self.waveform_pyramid
+            if pyramid is None or pyramid.samples is not signal:
+                pyramid = self.waveform_pyramid = WaveformPyramid(signal)
+            columns = pyramid.columns(start_sample, samples_per_pixel, width, end_sample)
 
-                    # Convert to y coordinates
-                    y_min = int((1 - min_val) * height / 2)
-                    y_max = int((1 - max_val) * height / 2)
+            # Convert to y coordinates
+            y_min = ((1 - columns.min) * height / 2).astype(int)
+            y_max = ((1 - columns.max) * height / 2).astype(int)
 
-                    # Add points
-                    points.append((i, y_min))
-                    points.append((i, y_max))
+            # Add points
+            points = []
+            for i, (low, high) in enumerate(zip(y_min.tolist(), y_max.tolist())):
+                points.append((i, low))
+                points.append((i, high))
 
             return points
         else:
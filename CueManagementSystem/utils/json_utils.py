@@ -89,6 +89,15 @@ class NumpyJSONEncoder(json.JSONEncoder):
             elif isinstance(obj, range):
                 return {'_type': 'range', 'start': obj.start, 'stop': obj.stop, 'step': obj.step}
 
+            # Handle dataclasses (slotted ones have no __dict__)
+            elif hasattr(obj, '__dataclass_fields__'):
+                return {
+                    '_type': 'object',
+                    'class': obj.__class__.__name__,
+                    'data': {field: getattr(obj, field) for field in obj.__dataclass_fields__
+                             if not field.startswith('_')}
+                }
+
             # Handle objects with __dict__ (custom classes)
             elif hasattr(obj, '__dict__'):
                 return {
@@ -258,7 +267,8 @@ def clean_data_for_json(data: Any) -> Any:
         return f"<callable: {data.__name__ if hasattr(data, '__name__') else str(data)}>"
     elif hasattr(data, '__dataclass_fields__'):
         # Handle dataclass objects by converting to dict
-        return {field: clean_data_for_json(getattr(data, field)) for field in data.__dataclass_fields__}
+        return {field: clean_data_for_json(getattr(data, field)) for field in data.__dataclass_fields__
+                if not field.startswith('_')}
     elif hasattr(data, '__dict__'):
         # Handle custom objects with __dict__ attribute
         return {key: clean_data_for_json(value) for key, value in data.__dict__.items() if not key.startswith('_')}
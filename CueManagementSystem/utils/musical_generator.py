@@ -22,6 +22,7 @@ import random
 import json
 import os
 from typing import List, Dict, Any, Optional, Tuple, Union
+from contextlib import nullcontext
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -411,16 +412,12 @@ class MusicalGenerator(QWidget):
             print(f"🔧 Generated {len(cues)} cues, updating table")
 
             # Update progress for table operations
-            self._set_status(f"Clearing existing cues...", "processing")
+            self._set_status(f"Replacing cues in table...", "processing")
 
-            # Clear existing cues from table
-            self._clear_cue_table()
-
-            # Update progress for adding cues
-            self._set_status(f"Adding {len(cues)} cues to table...", "processing")
-
-            # Add new cues to table
-            self._add_cues_to_table(cues)
+            # Clear existing cues and add the new ones as one table update and LED refresh
+            with self._bulk_table_edit():
+                self._clear_cue_table()
+                self._add_cues_to_table(cues)
 
             # Store generated cues
             self.last_generated_cues = cues
@@ -727,6 +724,13 @@ class MusicalGenerator(QWidget):
 
         return assignments
 
+    def _bulk_table_edit(self):
+        """Context collecting cue table edits into one update (no-op without a bulk-capable table)"""
+        model = getattr(self.cue_table, 'model', None)
+        if hasattr(model, 'bulk_edit'):
+            return model.bulk_edit()
+        return nullcontext()
+
     def _clear_cue_table(self):
         """Clear existing cues from the cue table"""
         if self.cue_table and hasattr(self.cue_table, 'delete_all_cues'):
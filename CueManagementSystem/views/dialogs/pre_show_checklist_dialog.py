@@ -712,9 +712,9 @@ class PreShowChecklistDialog(QDialog):
         Returns:
             tuple: (success: bool, message: str, show_file: str)
         """
+        import io
         import paramiko
-        import json
-        import time
+        from raspberry_pi.show_format import PackedShow, SHOW_UPLOAD_PATH
 
         try:
             print(f"[Upload] Starting upload of {len(cues)} cues")
@@ -727,15 +727,20 @@ class PreShowChecklistDialog(QDialog):
 
             print(f"[Upload] Normalized {len(normalized_cues)} cues")
 
-            # Create JSON data (same format as system_mode_controller)
-            show_data = {"cues": normalized_cues}
-            show_json = json.dumps(show_data)  # No indent - same as system_mode_controller
+            # Encode the packed binary show (cue table + precomputed register frames)
+            try:
+                packet = system_mode.shift_register_formatter.format_show(normalized_cues)
+            except ValueError as e:
+                print(f"[Upload] Show encoding failed: {e}")
+                return False, f"❌ Show could not be encoded: {str(e)}", ""
 
-            print(f"[Upload] JSON size: {len(show_json)} bytes")
+            show_bytes = packet.register_data
+            print(f"[Upload] Packed show size: {len(show_bytes)} bytes, "
+                  f"{packet.metadata['frame_count']} frames")
 
             # Use fixed filename for pre-uploaded show
             # This matches what execute_show expects
-            show_file = "/tmp/show_data.json"
+            show_file = SHOW_UPLOAD_PATH
 
             # Get connection settings
             connection_settings = system_mode.connection_settings
@@ -756,61 +761,41 @@ class PreShowChecklistDialog(QDialog):
 
             print(f"[Upload] Connected successfully")
 
-            # Upload show data - USE EXACT SAME METHOD AS system_mode_controller
-            create_file_cmd = f"echo '{show_json}' > {show_file}"
+            # Upload show data over SFTP (binary, no shell quoting or argv limits)
             print(f"[Upload] Creating file: {show_file}")
-
-            stdin, stdout, stderr = ssh.exec_command(create_file_cmd, timeout=10)
-            exit_status = stdout.channel.recv_exit_status()
-
-            if exit_status != 0:
-                error = stderr.read().decode()
-                print(f"[Upload] File creation failed: {error}")
+            sftp = ssh.open_sftp()
+            try:
+                sftp.putfo(io.BytesIO(show_bytes), show_file)
+            except Exception as e:
+                print(f"[Upload] File creation failed: {e}")
+                sftp.close()
                 ssh.close()
-                return False, f"Failed to create show file: {error}", ""
+                return False, f"Failed to create show file: {str(e)}", ""
 
             print(f"[Upload] File created successfully")
 
             # === COMPREHENSIVE VALIDATION PHASE ===
             print("\n[Validation] Starting comprehensive validation...")
 
-            # 1. Check file exists
-            check_cmd = f"test -f {show_file} && echo 'exists' || echo 'missing'"
-            stdin, stdout, stderr = ssh.exec_command(check_cmd, timeout=5)
-            result = stdout.read().decode().strip()
-
-            print(f"[Validation] ✓ File exists check: {result}")
-
-            if result != 'exists':
+            # 1. Check file exists and get actual file size
+            try:
+                actual_size = sftp.stat(show_file).st_size
+                print(f"[Validation] ✓ File exists, size: {actual_size} bytes")
+            except IOError:
+                sftp.close()
                 ssh.close()
                 return False, "❌ Show file was not created on Pi", ""
 
-            # 2. Get actual file size
-            size_cmd = f"wc -c < {show_file}"
-            stdin, stdout, stderr = ssh.exec_command(size_cmd, timeout=5)
-            actual_size_str = stdout.read().decode().strip()
-
-            try:
-                actual_size = int(actual_size_str)
-                print(f"[Validation] ✓ File size: {actual_size} bytes")
-            except ValueError:
-                print(f"[Validation] ❌ Could not parse file size: {actual_size_str}")
+            if actual_size != len(show_bytes):
+                sftp.close()
                 ssh.close()
-                return False, f"❌ Invalid file size: {actual_size_str}", ""
+                return False, f"❌ File size mismatch: uploaded {actual_size}, expected {len(show_bytes)}", ""
 
-            # 3. Download file back for validation (avoids SSH escaping issues)
+            # 2. Download file back for validation
             print("[Validation] Downloading file for local validation...")
-            sftp = ssh.open_sftp()
-
-            # Expand ~ to actual home directory
-            expand_cmd = f"echo {show_file}"
-            stdin, stdout, stderr = ssh.exec_command(expand_cmd, timeout=5)
-            expanded_path = stdout.read().decode().strip()
-            print(f"[Validation] Expanded path: {expanded_path}")
-
             try:
-                with sftp.file(expanded_path, 'r') as f:
-                    downloaded_content = f.read().decode('utf-8')
+                with sftp.file(show_file, 'rb') as f:
+                    downloaded_content = f.read()
                 print(f"[Validation] ✓ Downloaded {len(downloaded_content)} bytes")
             except Exception as e:
                 print(f"[Validation] ❌ Download failed: {e}")
@@ -820,97 +805,35 @@ class PreShowChecklistDialog(QDialog):
 
             sftp.close()
 
-            # 4. Parse JSON locally (no SSH escaping issues)
-            print("[Validation] Parsing JSON structure...")
+            # 3. Decode with the same reader the Pi uses (header, sizes, CRC-32)
+            print("[Validation] Decoding packed show...")
             try:
-                validated_data = json.loads(downloaded_content)
-                print("[Validation] ✓ JSON is valid")
-            except json.JSONDecodeError as e:
-                print(f"[Validation] ❌ Invalid JSON: {e}")
+                validated_show = PackedShow(downloaded_content)
+                validated_cues = validated_show.cues()
+                print("[Validation] ✓ Packed show is valid (checksum OK)")
+            except ValueError as e:
+                print(f"[Validation] ❌ Invalid packed show: {e}")
                 ssh.close()
-                return False, f"❌ Invalid JSON structure: {str(e)}", ""
+                return False, f"❌ Invalid packed show: {str(e)}", ""
 
-            # 5. Check required fields
-            print("[Validation] Checking required fields...")
-            if 'cues' not in validated_data:
-                ssh.close()
-                return False, "❌ Missing 'cues' field in uploaded data", ""
-            print("[Validation] ✓ Required fields present")
-
-            # 6. Verify cue count
+            # 4. Verify cue count
             print("[Validation] Verifying cue count...")
-            uploaded_cue_count = len(validated_data['cues'])
+            uploaded_cue_count = validated_show.cue_count
             expected_cue_count = len(normalized_cues)
             if uploaded_cue_count != expected_cue_count:
                 ssh.close()
                 return False, f"❌ Cue count mismatch: uploaded {uploaded_cue_count}, expected {expected_cue_count}", ""
             print(f"[Validation] ✓ Cue count matches: {uploaded_cue_count}")
 
-            # 7. Verify each cue has required fields based on type
-            print("[Validation] Validating cue structure...")
-            for i, cue in enumerate(validated_data['cues']):
-                cue_type = cue.get('type', '')
-
-                # Check base required fields
-                if 'type' not in cue:
-                    ssh.close()
-                    return False, f"❌ Cue {i + 1} missing required field: type", ""
-                if 'time' not in cue:
-                    ssh.close()
-                    return False, f"❌ Cue {i + 1} missing required field: time", ""
-
-                # Check type-specific fields
-                if cue_type == 'SINGLE SHOT':
-                    if 'output' not in cue:
-                        ssh.close()
-                        return False, f"❌ Cue {i + 1} (SINGLE SHOT) missing required field: output", ""
-
-                elif cue_type == 'DOUBLE SHOT':
-                    if 'output1' not in cue:
-                        ssh.close()
-                        return False, f"❌ Cue {i + 1} (DOUBLE SHOT) missing required field: output1", ""
-                    if 'output2' not in cue:
-                        ssh.close()
-                        return False, f"❌ Cue {i + 1} (DOUBLE SHOT) missing required field: output2", ""
-
-                elif cue_type == 'SINGLE RUN':
-                    if 'start_output' not in cue:
-                        ssh.close()
-                        return False, f"❌ Cue {i + 1} (SINGLE RUN) missing required field: start_output", ""
-                    if 'end_output' not in cue:
-                        ssh.close()
-                        return False, f"❌ Cue {i + 1} (SINGLE RUN) missing required field: end_output", ""
-                    if 'delay' not in cue:
-                        ssh.close()
-                        return False, f"❌ Cue {i + 1} (SINGLE RUN) missing required field: delay", ""
-
-                elif cue_type == 'DOUBLE RUN':
-                    if 'start_output1' not in cue:
-                        ssh.close()
-                        return False, f"❌ Cue {i + 1} (DOUBLE RUN) missing required field: start_output1", ""
-                    if 'end_output1' not in cue:
-                        ssh.close()
-                        return False, f"❌ Cue {i + 1} (DOUBLE RUN) missing required field: end_output1", ""
-                    if 'start_output2' not in cue:
-                        ssh.close()
-                        return False, f"❌ Cue {i + 1} (DOUBLE RUN) missing required field: start_output2", ""
-                    if 'end_output2' not in cue:
-                        ssh.close()
-                        return False, f"❌ Cue {i + 1} (DOUBLE RUN) missing required field: end_output2", ""
-                    if 'delay' not in cue:
-                        ssh.close()
-                        return False, f"❌ Cue {i + 1} (DOUBLE RUN) missing required field: delay", ""
-
-            print(f"[Validation] ✓ All {uploaded_cue_count} cues have required fields")
-
-            # 8. Verify cue types are valid
-            print("[Validation] Validating cue types...")
-            valid_types = ['SINGLE SHOT', 'DOUBLE SHOT', 'SINGLE RUN', 'DOUBLE RUN']
-            for i, cue in enumerate(validated_data['cues']):
-                if cue['type'] not in valid_types:
+            # 5. Verify the cue table round-trips
+            print("[Validation] Validating cue table...")
+            for i, (cue, expected) in enumerate(zip(validated_cues, normalized_cues)):
+                mismatched = [key for key, value in cue.items()
+                              if key != 'duration' and expected.get(key, value) != value]
+                if mismatched:
                     ssh.close()
-                    return False, f"❌ Cue {i + 1} has invalid type: {cue['type']}", ""
-            print(f"[Validation] ✓ All cue types are valid")
+                    return False, f"❌ Cue {i + 1} ({cue['type']}) mismatch in: {', '.join(mismatched)}", ""
+            print(f"[Validation] ✓ All {uploaded_cue_count} cues match")
 
             print("\n[Validation] === ALL VALIDATION CHECKS PASSED ===\n")
 
@@ -922,8 +845,8 @@ class PreShowChecklistDialog(QDialog):
                 f"✅ Show uploaded and validated successfully!\n\n"
                 f"✓ Cues: {uploaded_cue_count}\n"
                 f"✓ File size: {size_kb:.1f} KB\n"
-                f"✓ JSON structure: Valid\n"
-                f"✓ All required fields: Present\n"
+                f"✓ Frames: {validated_show.frame_count}\n"
+                f"✓ Packed show checksum: Valid\n"
                 f"✓ All cue types: Valid\n"
                 f"✓ Location: {show_file}"
             )
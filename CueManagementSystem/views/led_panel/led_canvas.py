@@ -0,0 +1,280 @@
+"""
+LED Canvas
+==========
+
+Single Qt widget drawing a block of numbered LEDs from a NumPy state array.
+
+Replaces one LedWidget per output. Every LED state is a small integer code
+in an array indexed by LED number (shareable between canvases), the LED body
+is rendered once per state and cell size into a sprite pixmap and the numbers
+once per canvas size into a number layer. A paint draws the sprites of the
+LEDs inside the dirty region and the number layer on top; state changes
+only schedule repaints of the cells that changed.
+
+Features:
+- NumPy LED state array (one code per LED number)
+- Cached sprite pixmaps per state and a cached number layer
+- Dirty-rect partial repaints
+- LedWidget-compatible per-LED handles (setState, is_active, cue_type)
+- Bulk state updates from cue data or per-LED state changes
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QRect
+from PySide6.QtGui import QPainter, QColor, QPixmap
+
+from models.cue_store import parse_outputs
+from views.led_panel.led_widget import draw_active_led, draw_inactive_led, draw_led_number
+
+# Cue type of every state code (0 = off); unknown cue types get codes as they are first seen
+LED_STATE_TYPES: List[Optional[str]] = [None, "SINGLE SHOT", "DOUBLE SHOT", "SINGLE RUN", "DOUBLE RUN"]
+_LED_STATE_CODES: Dict[Optional[str], int] = {cue_type: code for code, cue_type in enumerate(LED_STATE_TYPES)}
+
+# Above this many changed LEDs a single full repaint is cheaper than one dirty rect per LED
+FULL_REPAINT_THRESHOLD = 64
+
+
+def led_state_code(cue_type: Optional[str]) -> int:
+    """State code of an LED lit for cue_type (0 for None)"""
+    code = _LED_STATE_CODES.get(cue_type)
+    if code is None:
+        code = _LED_STATE_CODES[cue_type] = len(LED_STATE_TYPES)
+        LED_STATE_TYPES.append(cue_type)
+    return code
+
+
+def cue_data_states(cue_data, led_count: int) -> np.ndarray:
+    """
+    LED states lit by a list of cues
+
+    Args:
+        cue_data: Cue rows from the table model (TYPE at index 1, OUTPUTS at index 2)
+        led_count: Highest LED number
+
+    Returns:
+        State codes indexed by LED number (later cues override earlier ones on shared outputs)
+    """
+    states = np.zeros(led_count + 1, dtype=np.int16)
+    for cue in cue_data or ():
+        if not cue or len(cue) < 3:
+            continue
+        try:
+            outputs = np.array(parse_outputs(cue[2]), dtype=np.int64)
+        except (ValueError, AttributeError, TypeError) as e:
+            print(f"Error processing outputs: {e}")
+            continue
+        states[outputs[(outputs >= 1) & (outputs <= led_count)]] = led_state_code(cue[1])
+    return states
+
+
+class LedHandle:
+    """One LED of a canvas, with the LedWidget interface used by the grids' callers"""
+
+    __slots__ = ('canvas', 'number')
+
+    def __init__(self, canvas: 'LedCanvas', number: int):
+        self.canvas = canvas
+        self.number = number
+
+    def setState(self, cue_type=None):
+        """Set LED state based on cue type"""
+        self.canvas.set_state(self.number, cue_type)
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self.canvas.states[self.number])
+
+    @is_active.setter
+    def is_active(self, active: bool):
+        if not active:
+            self.canvas.set_state(self.number, None)
+
+    @property
+    def cue_type(self) -> Optional[str]:
+        return LED_STATE_TYPES[self.canvas.states[self.number]]
+
+    @cue_type.setter
+    def cue_type(self, cue_type: Optional[str]):
+        self.canvas.set_state(self.number, cue_type)
+
+    def update(self):
+        self.canvas.update_leds([self.number])
+
+    def repaint(self):
+        self.canvas.repaint(self.canvas.led_rect(self.number))
+
+
+class LedCanvas(QWidget):
+    """
+    Grid of numbered LEDs painted by one widget
+
+    Args:
+        led_numbers: LED number of every grid cell (rows x columns, 0 = empty cell)
+        states: State array indexed by LED number to draw from (default: a new one)
+        spacing: Pixels between cells
+        margin: Pixels around the grid
+        background: Color behind the LEDs
+    """
+
+    def __init__(self, led_numbers, states: Optional[np.ndarray] = None, spacing: int = 2, margin: int = 2,
+                 background: str = "#1a1a2e", parent=None):
+        super().__init__(parent)
+        self.led_numbers = np.asarray(led_numbers, dtype=np.int64)
+        self.rows, self.cols = self.led_numbers.shape
+        self.states = states if states is not None else np.zeros(self.led_numbers.max() + 1, dtype=np.int16)
+        self.spacing = spacing
+        self.margin = margin
+        self.background = QColor(background)
+
+        # Cells holding an LED, in row-major order, and the cell of every LED number
+        cells = np.flatnonzero(self.led_numbers.ravel() > 0)
+        self._slot_numbers = self.led_numbers.ravel()[cells]
+        self._slot_rows, self._slot_cols = np.divmod(cells, self.cols)
+        self._slot_of = np.full(self.led_numbers.max() + 1, -1, dtype=np.int64)
+        self._slot_of[self._slot_numbers] = np.arange(len(cells))
+
+        self.leds: Dict[int, LedHandle] = {number: LedHandle(self, number) for number in self._slot_numbers.tolist()}
+
+        # Cell geometry and the pixmaps cached for it
+        self._x = np.zeros(len(cells), dtype=np.int64)
+        self._y = np.zeros(len(cells), dtype=np.int64)
+        self._cell_size = (0, 0)
+        self._sprites: Dict[int, QPixmap] = {}
+        self._number_layer: Optional[QPixmap] = None
+
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self._layout_cells()
+
+    def _layout_cells(self):
+        """Cell positions for the current size (all cells share one size, so one sprite per state fits all)"""
+        cell_width = max(1.0, (self.width() - 2 * self.margin - (self.cols - 1) * self.spacing) / self.cols)
+        cell_height = max(1.0, (self.height() - 2 * self.margin - (self.rows - 1) * self.spacing) / self.rows)
+        column_x = (self.margin + np.arange(self.cols) * (cell_width + self.spacing)).astype(np.int64)
+        row_y = (self.margin + np.arange(self.rows) * (cell_height + self.spacing)).astype(np.int64)
+
+        self._x = column_x[self._slot_cols]
+        self._y = row_y[self._slot_rows]
+        self._cell_size = (int(cell_width), int(cell_height))
+        self._sprites.clear()
+        self._number_layer = None
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._layout_cells()
+
+    def led_rect(self, number: int) -> QRect:
+        """Cell of an LED in widget coordinates"""
+        slot = self._slot_of[number]
+        return QRect(int(self._x[slot]), int(self._y[slot]), *self._cell_size)
+
+    def _new_pixmap(self, width: int, height: int) -> QPixmap:
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(max(1, round(width * ratio)), max(1, round(height * ratio)))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        return pixmap
+
+    def _sprite(self, code: int) -> QPixmap:
+        """LED body in one state at the current cell size"""
+        sprite = self._sprites.get(code)
+        if sprite is None:
+            sprite = self._new_pixmap(*self._cell_size)
+            painter = QPainter(sprite)
+            painter.setRenderHint(QPainter.Antialiasing)
+            # Same margin for the border as a LedWidget
+            rect = QRect(0, 0, *self._cell_size).adjusted(2, 2, -2, -2)
+            if code == 0:
+                draw_inactive_led(painter, rect)
+            else:
+                draw_active_led(painter, rect, LED_STATE_TYPES[code])
+            painter.end()
+            self._sprites[code] = sprite
+        return sprite
+
+    def _numbers(self) -> QPixmap:
+        """Every LED number at its cell (drawn over the sprites)"""
+        if self._number_layer is None:
+            layer = self._new_pixmap(self.width(), self.height())
+            painter = QPainter(layer)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setFont(self.font())
+            width, height = self._cell_size
+            for x, y, number in zip(self._x.tolist(), self._y.tolist(), self._slot_numbers.tolist()):
+                draw_led_number(painter, QRect(x, y, width, height).adjusted(2, 2, -2, -2), number)
+            painter.end()
+            self._number_layer = layer
+        return self._number_layer
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), self.background)
+
+        # LEDs whose cell intersects one of the dirty rectangles, each drawn from its state's sprite
+        width, height = self._cell_size
+        dirty = np.zeros(len(self._x), dtype=bool)
+        for rect in event.region():
+            dirty |= ((self._x <= rect.right()) & (self._x + width > rect.left())
+                      & (self._y <= rect.bottom()) & (self._y + height > rect.top()))
+        slots = np.flatnonzero(dirty)
+        codes = self.states[self._slot_numbers[slots]]
+        sprites = {code: self._sprite(code) for code in np.unique(codes).tolist()}
+        for x, y, code in zip(self._x[slots].tolist(), self._y[slots].tolist(), codes.tolist()):
+            painter.drawPixmap(x, y, sprites[code])
+
+        painter.drawPixmap(0, 0, self._numbers())
+        painter.end()
+
+    def set_state(self, number: int, cue_type: Optional[str] = None):
+        """Set one LED's state based on cue type (None: off)"""
+        code = led_state_code(cue_type)
+        if self.states[number] != code:
+            self.states[number] = code
+            self.update(self.led_rect(number))
+
+    def set_states(self, states: np.ndarray):
+        """
+        Set the state of every LED of this canvas at once
+
+        Args:
+            states: State codes indexed by LED number (entries of other canvases are ignored)
+        """
+        numbers = self._slot_numbers
+        changed = numbers[self.states[numbers] != states[numbers]]
+        self.states[numbers] = states[numbers]
+        self.update_leds(changed)
+
+    def set_led_states(self, numbers, codes):
+        """
+        Set the state of some LEDs
+
+        Args:
+            numbers: LED numbers (LEDs of other canvases are ignored)
+            codes: State code of each LED
+        """
+        numbers = np.asarray(numbers, dtype=np.int64)
+        codes = np.asarray(codes, dtype=np.int16)
+        own = (numbers >= 0) & (numbers < len(self._slot_of))
+        own[own] = self._slot_of[numbers[own]] >= 0
+        numbers, codes = numbers[own], codes[own]
+        changed = numbers[self.states[numbers] != codes]
+        self.states[numbers] = codes
+        self.update_leds(changed)
+
+    def clear(self):
+        """Turn every LED of this canvas off"""
+        self.set_states(np.zeros_like(self.states))
+
+    def update_leds(self, numbers):
+        """Schedule a repaint of the cells of some LEDs"""
+        if len(numbers) > FULL_REPAINT_THRESHOLD:
+            self.update()
+            return
+        for number in numbers:
+            self.update(self.led_rect(number))
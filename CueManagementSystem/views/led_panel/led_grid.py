@@ -18,9 +18,10 @@ Version: 1.0.0
 License: MIT
 """
 
-from PySide6.QtWidgets import QWidget, QGridLayout, QSizePolicy
+import numpy as np
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QSizePolicy
 from PySide6.QtCore import Qt, QSize
-from views.led_panel.led_widget import LedWidget
+from views.led_panel.led_canvas import LedCanvas, cue_data_states
 from views.led_panel.led_animations import LedAnimationController
 
 class LedGrid(QWidget):
@@ -40,25 +41,16 @@ class LedGrid(QWidget):
 
     def setup_ui(self):
         # Create main layout
-        layout = QGridLayout(self)
-        layout.setSpacing(2)
-        layout.setContentsMargins(2, 2, 2, 2)
-
-        # Create LED grid
-        led_number = 1
-        for row in range(self.rows):
-            for col in range(self.cols):
-                led = LedWidget(led_number)
-                led.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-                layout.addWidget(led, row, col)
-                self.leds[led_number] = led
-                led_number += 1
-
-        # Set stretch factors
-        for i in range(self.cols):
-            layout.setColumnStretch(i, 1)
-        for i in range(self.rows):
-            layout.setRowStretch(i, 1)
+        layout = QVBoxLayout(self)
+        layout.setSpacing(0)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # Create LED grid: one canvas paints all LEDs, numbered row by row
+        led_numbers = np.arange(1, self.rows * self.cols + 1).reshape(self.rows, self.cols)
+        self.canvas = LedCanvas(led_numbers, spacing=2, margin=2)
+        self.canvas.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        layout.addWidget(self.canvas)
+        self.leds = self.canvas.leds
 
         self.setLayout(layout)
 
@@ -79,17 +71,6 @@ class LedGrid(QWidget):
         """Provide a reasonable minimum size"""
         return QSize(500, 400)
 
-    def resizeEvent(self, event):
-        """Handle resize events to maintain LED aspect ratio"""
-        super().resizeEvent(event)
-        width = event.size().width() // self.cols
-        height = event.size().height() // self.rows
-        size = min(width, height)
-
-        # Update minimum size for LEDs
-        for led in self.leds.values():
-            led.setMinimumSize(size, size)
-
     def updateFromCueData(self, cue_data, force_refresh=False):
         """Update LEDs based on cue data from table
         
@@ -97,39 +78,20 @@ class LedGrid(QWidget):
             cue_data: List of cues from the table model
             force_refresh: Force complete refresh of all LEDs (default: False)
         """
-        # Reset all LEDs to inactive state - ensure ALL LEDs are properly cleared
-        for led_number in self.leds:
-            self.leds[led_number].setState(None)
-            self.leds[led_number].is_active = False
-            self.leds[led_number].cue_type = None
-            
-        # Force all LEDs to be redrawn
-        self.update()
-    
-        # Update LEDs based on cue data
-        for cue in cue_data:
-            cue_type = cue[1]  # TYPE is still at index 1
-            outputs = cue[2]  # OUTPUTS is now at index 2 (was 3)
-    
-            # Parse outputs string into list of numbers
-            try:
-                # Handle different output formats
-                output_list = []
-                if ";" in outputs:  # Handle double run format with semicolons
-                    for pair in outputs.split(";"):
-                        for value in pair.split(","):
-                            if value.strip() and value.strip().isdigit():
-                                output_list.append(int(value.strip()))
-                else:  # Handle regular comma-separated format
-                    output_list = [int(x.strip()) for x in outputs.split(',') if x.strip().isdigit()]
-                
-                # Set LEDs active based on outputs
-                for output in output_list:
-                    if output in self.leds:
-                        self.leds[output].setState(cue_type)
-            except (ValueError, AttributeError) as e:
-                print(f"Error processing outputs: {e}")
-                continue
+        # All LEDs not lit by a cue are cleared; only LEDs whose state changed are repainted
+        self.canvas.set_states(cue_data_states(cue_data, self.rows * self.cols))
+        if force_refresh:
+            self.canvas.update()
+
+    def apply_led_changes(self, numbers, codes, cue_data=None):
+        """Set the state of the LEDs of edited cues
+
+        Args:
+            numbers: LED numbers whose state may have changed
+            codes: LED state code of each (from the cue table's output index)
+            cue_data: Full cue list after the edit (not needed by the grid)
+        """
+        self.canvas.set_led_states(numbers, codes)
 
     def handle_cue_selection(self, cue_data=None):
         """Handle cue selection from table"""
@@ -144,10 +106,4 @@ class LedGrid(QWidget):
         self.animation_controller.stop_animation()
         
         # Reset all LEDs
-        for led_number in self.leds:
-            self.leds[led_number].setState(None)
-            self.leds[led_number].is_active = False
-            self.leds[led_number].cue_type = None
-            
-        # Force update
-        self.update()
\ No newline at end of file
+        self.canvas.clear()
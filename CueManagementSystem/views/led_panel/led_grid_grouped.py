@@ -22,7 +22,8 @@ from PySide6.QtWidgets import (QWidget, QGridLayout, QFrame, QSizePolicy,
                                QVBoxLayout, QHBoxLayout, QLabel, QScrollArea, QApplication)
 from PySide6.QtCore import Qt, QSize, QPoint, QRect, Signal, QMimeData, QTimer
 from PySide6.QtGui import QPainter, QColor, QPen, QDrag, QPixmap
-from views.led_panel.led_widget import LedWidget
+import numpy as np
+from views.led_panel.led_canvas import LedCanvas, cue_data_states
 from views.led_panel.led_animations import LedAnimationController
 from views.led_panel.enhanced_drag_drop import EnhancedDragDropManager
 import math
@@ -33,10 +34,11 @@ class LedGroup(QFrame):
 
     group_moved = Signal(int, int)  # Signal emitted when group is moved (from_pos, to_pos)
 
-    def __init__(self, group_id, start_led_number, parent=None):
+    def __init__(self, group_id, start_led_number, parent=None, states=None):
         super().__init__(parent)
         self.group_id = group_id
         self.start_led_number = start_led_number
+        self.states = states  # LED state array shared by all groups of a grid (None: own array)
         self.leds = {}
         self.is_dragging = False
         self.drag_start_position = QPoint()
@@ -68,26 +70,22 @@ class LedGroup(QFrame):
 
         # Group header removed - cleaner appearance
 
-        # LED grid (5 columns x 10 rows = 50 LEDs)
-        grid_widget = QWidget()
-        grid_layout = QGridLayout(grid_widget)
-        grid_layout.setSpacing(0)  # No spacing between LEDs
-        grid_layout.setContentsMargins(0, 0, 0, 0)  # No margins around the grid
+        # LED grid (5 columns x 10 rows = 50 LEDs), painted by one canvas.
+        # LED order: bottom-to-top in each column, then next column
+        rows = np.arange(10)[:, None]
+        cols = np.arange(5)[None, :]
+        led_numbers = self.start_led_number + cols * 10 + (9 - rows)
+        if self.states is None:
+            self.states = np.zeros(led_numbers.max() + 1, dtype=np.int16)
 
-        led_number = self.start_led_number
-        # Change LED order: bottom-to-top in each column, then next column
-        for col in range(5):  # 5 columns first
-            for row in range(9, -1, -1):  # 10 rows, bottom to top (9 to 0)
-                led = LedWidget(led_number)
-                # Make LEDs expand to fill available space like standard mode
-                led.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-                led.setMinimumSize(20, 20)  # Larger minimum size
+        # No spacing between LEDs and no margins around the grid
+        self.canvas = LedCanvas(led_numbers, states=self.states, spacing=0, margin=0)
+        # Make LEDs expand to fill available space like standard mode (20x20 minimum per LED)
+        self.canvas.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.canvas.setMinimumSize(5 * 20, 10 * 20)
+        self.leds = self.canvas.leds
 
-                grid_layout.addWidget(led, row, col)
-                self.leds[led_number] = led
-                led_number += 1
-
-        layout.addWidget(grid_widget)
+        layout.addWidget(self.canvas)
 
         # Set size policies
         self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
@@ -152,42 +150,8 @@ class LedGroup(QFrame):
 
     def update_led_states(self, cue_data_list):
         """Update LED states based on cue data (matches standard view behavior)"""
-        # Reset all LEDs in this group first
-        for led in self.leds.values():
-            led.setState(None)
-            led.is_active = False
-            led.cue_type = None
-
-        if not cue_data_list:
-            return
-
-        # Process all cues in the list (same logic as standard view)
-        for cue_data in cue_data_list:
-            if not cue_data or len(cue_data) < 3:
-                continue
-
-            cue_type = cue_data[1]  # TYPE is at index 1
-            outputs = cue_data[2]  # OUTPUTS is at index 2
-
-            try:
-                # Parse outputs string into list of numbers (same as standard view)
-                output_list = []
-                if ";" in outputs:  # Handle double run format with semicolons
-                    for pair in outputs.split(";"):
-                        for value in pair.split(","):
-                            if value.strip() and value.strip().isdigit():
-                                output_list.append(int(value.strip()))
-                else:  # Handle regular comma-separated format
-                    output_list = [int(x.strip()) for x in outputs.split(',') if x.strip().isdigit()]
-
-                # Set LEDs active based on outputs (only for LEDs in this group)
-                for output in output_list:
-                    if output in self.leds:
-                        self.leds[output].setState(cue_type)
-
-            except (ValueError, AttributeError) as e:
-                print(f"Error processing outputs in group {self.group_id}: {e}")
-                continue
+        # LEDs of this group not lit by a cue are reset (same logic as standard view)
+        self.canvas.set_states(cue_data_states(cue_data_list, len(self.states) - 1))
 
 
 class LedGridGrouped(QScrollArea):
@@ -204,6 +168,8 @@ class LedGridGrouped(QScrollArea):
 
         self.led_groups = []
         self.group_positions = {}  # {group_id: (row, col)}
+        self.led_states = np.zeros(self.total_leds + 1, dtype=np.int16)  # State of every LED, by number
+        self._all_leds = {}
         self.animation_controller = None
 
         # Configure scroll area
@@ -256,10 +222,11 @@ class LedGridGrouped(QScrollArea):
         """Create 20 LED groups of 50 LEDs each"""
         for group_id in range(self.total_groups):
             start_led = (group_id * 50) + 1
-            group = LedGroup(group_id, start_led, self)
+            group = LedGroup(group_id, start_led, self, states=self.led_states)
             group.group_moved.connect(self.handle_group_move)
             group.enhanced_drag_manager = self.enhanced_drag_manager  # Connect to enhanced manager
             self.led_groups.append(group)
+            self._all_leds.update(group.leds)
 
     def arrange_groups(self):
         """Arrange groups in snake pattern: bottom-left, up, right, down, left"""
@@ -324,11 +291,8 @@ class LedGridGrouped(QScrollArea):
         self.update()
 
     def get_all_leds(self):
-        """Get dictionary of all LEDs {led_number: led_widget}"""
-        all_leds = {}
-        for group in self.led_groups:
-            all_leds.update(group.leds)
-        return all_leds
+        """Get dictionary of all LEDs {led_number: led_handle} (built once, groups never change their LEDs)"""
+        return self._all_leds
 
     @property
     def leds(self):
@@ -337,51 +301,25 @@ class LedGridGrouped(QScrollArea):
 
     def updateFromCueData(self, cue_data, force_refresh=False):
         """Update LEDs based on cue data from table (matches standard view exactly)"""
-        print(f"Grouped view updateFromCueData called with: {cue_data}")
+        print(f"Grouped view updateFromCueData called with {len(cue_data) if cue_data else 0} cues")
 
-        # Reset all LEDs first
+        # Parse every cue once; each group repaints only its LEDs whose state changed
+        states = cue_data_states(cue_data, self.total_leds)
         for group in self.led_groups:
-            for led in group.leds.values():
-                led.setState(None)
-                led.is_active = False
-                led.cue_type = None
-
-        # Force update
-        self.update()
-
-        # Update LEDs based on cue data (same logic as standard view)
-        if cue_data:
-            for cue in cue_data:
-                cue_type = cue[1]  # TYPE is at index 1
-                outputs = cue[2]  # OUTPUTS is at index 2
-
-                print(f"Processing cue: type={cue_type}, outputs={outputs}")
-
-                try:
-                    # Parse outputs string into list of numbers (same as standard view)
-                    output_list = []
-                    if ";" in outputs:  # Handle double run format with semicolons
-                        for pair in outputs.split(";"):
-                            for value in pair.split(","):
-                                if value.strip() and value.strip().isdigit():
-                                    output_list.append(int(value.strip()))
-                    else:  # Handle regular comma-separated format
-                        output_list = [int(x.strip()) for x in outputs.split(',') if x.strip().isdigit()]
-
-                    print(f"Parsed outputs: {output_list}")
-
-                    # Set LEDs active based on outputs
-                    for output in output_list:
-                        # Find which group contains this LED
-                        for group in self.led_groups:
-                            if output in group.leds:
-                                print(f"Setting LED {output} to {cue_type} in group {group.group_id}")
-                                group.leds[output].setState(cue_type)
-                                break
-
-                except (ValueError, AttributeError) as e:
-                    print(f"Error processing outputs: {e}")
-                    continue
+            group.canvas.set_states(states)
+            if force_refresh:
+                group.canvas.update()
+
+    def apply_led_changes(self, numbers, codes, cue_data=None):
+        """Set the state of the LEDs of edited cues
+
+        Args:
+            numbers: LED numbers whose state may have changed
+            codes: LED state code of each (from the cue table's output index)
+            cue_data: Full cue list after the edit (not needed by the grid)
+        """
+        for group in self.led_groups:
+            group.canvas.set_led_states(numbers, codes)
 
     def handle_cue_selection(self, cue_data=None):
         """Handle cue selection from table"""
@@ -134,6 +134,11 @@ class MainWindow(QMainWindow):
         from controllers.firework_visualizer_bridge_controller import FireworkVisualizerBridge
         self.firework_visualizer_bridge = FireworkVisualizerBridge(self)
 
+        # Preview clocks follow the music player's position
+        self.preview_controller.set_media_player(self.music_manager.player)
+        self.vr_preview_controller.set_media_player(self.music_manager.player)
+        self.firework_visualizer_bridge.set_media_player(self.music_manager.player)
+
         # Connect preview controller signals
         self.preview_controller.preview_started.connect(self.handle_preview_started)
         self.preview_controller.preview_ended.connect(self.handle_preview_ended)
@@ -1634,18 +1639,8 @@ class MainWindow(QMainWindow):
             )
 
             if confirm == QMessageBox.Yes:
-                # Clear existing cues
-                self.cue_table.delete_all_cues()
-
-                # Add the new cues to the table
-                for cue in generated_cues:
-                    self.cue_table.model._data.append(cue)
-
-                # Update the table view
-                self.cue_table.model.layoutChanged.emit()
-
-                # Update LED panel with force refresh
-                self.led_panel.updateFromCueData(self.cue_table.model._data, force_refresh=True)
+                # Replace the existing cues (one model reset and one LED refresh)
+                self.cue_table.model.set_cues(generated_cues)
 
                 QMessageBox.information(self, "Show Generated",
                                         f"Successfully generated a {config_data.duration_minutes}:{config_data.duration_seconds:02d} show "
@@ -1734,7 +1729,7 @@ class MainWindow(QMainWindow):
         """
         try:
             # Load cues into the preview controller
-            self.preview_controller.load_cues(self.cue_table.model._data)
+            self.preview_controller.load_cues(self.cue_table.model.cue_store)
 
             # Play music if selected
             if music_file_info:
@@ -1834,7 +1829,7 @@ class MainWindow(QMainWindow):
 
             # Start VR preview with countdown
             self.vr_preview_controller.start_preview(
-                self.cue_table.model._data,
+                self.cue_table.model.cue_store,
                 music_file_info
             )
 
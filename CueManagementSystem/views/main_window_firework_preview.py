@@ -34,7 +34,7 @@ def _start_firework_visualizer_preview(self, music_file_info):
 
         # Start the visualizer
         success = self.firework_visualizer_bridge.start_visualizer(
-            self.cue_table.model._data,
+            self.cue_table.model.cue_store,
             music_file_info
         )
 
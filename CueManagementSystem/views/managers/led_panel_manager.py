@@ -319,6 +319,21 @@ class LedPanelManager(QWidget):
         if current_grid:
             current_grid.updateFromCueData(cue_data, force_refresh)
 
+    def apply_led_changes(self, numbers, codes, cue_data=None):
+        """
+        Update only the LEDs of edited cues in the current LED grid
+
+        Args:
+            numbers: LED numbers whose state may have changed
+            codes: LED state code of each
+            cue_data: The full cue list after the edit (kept for view switches)
+        """
+        if cue_data is not None:
+            self.current_cue_data = cue_data
+        current_grid = self.get_current_grid()
+        if current_grid:
+            current_grid.apply_led_changes(numbers, codes)
+
     def handle_cue_selection(self, cue_data=None):
         """Handle cue selection from table"""
         self.current_cue_data = cue_data
@@ -7,7 +7,7 @@ Manages synchronization between audio playback, LED panel states, and timeline p
 Features:
 - Audio-LED synchronization
 - Real-time timeline scrubbing
-- Optimized LED state updates
+- Optimized LED state updates (only LEDs of cues passed since the last position)
 - Playback position tracking
 - State caching for performance
 - Smooth scrubbing experience
@@ -155,20 +155,21 @@ class PreviewStateManager(QObject):
         if not preview_anim_controller:
             return
 
+        if instant:
+            # Set states directly, changing only LEDs of cues passed since the last position
+            self.preview_controller.show_led_state_at_time(time)
+            return
+
         # Clear all LEDs first
         preview_anim_controller.clear_all_leds()
 
         # Get all cues that should be active at this time
         active_cues = self.preview_controller.get_active_cues_at_time(time)
 
-        # Light up LEDs for active cues
+        # Light up LEDs for active cues with normal animation (for regular playback)
         for cue in active_cues:
-            if instant:
-                # Set state directly without animation (for scrubbing)
-                preview_anim_controller.set_led_state_instant(cue)
-            else:
-                # Use normal animation (for regular playback)
-                preview_anim_controller.start_animation(cue)
+            preview_anim_controller.start_animation(cue)
+        self.preview_controller.forget_led_state()
 
     def calculate_active_cues_at_time(self, time: float) -> List[Any]:
         """
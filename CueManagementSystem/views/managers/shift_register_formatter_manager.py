@@ -11,6 +11,7 @@ Features:
 - Test pattern generation
 - Emergency stop functionality
 - Data validation
+- Packed binary show encoding (raspberry_pi/show_format.py)
 
 Author: Michael Lyman
 Version: 1.0.0
@@ -26,6 +27,8 @@ from datetime import datetime
 import hashlib
 import logging
 
+from raspberry_pi import show_compiler, show_format
+
 
 class CueType(Enum):
     """Firework cue types"""
@@ -435,6 +438,55 @@ class ShiftRegisterFormatter:
         self.logger.debug(f"Generated register data: {register_data.hex()}")
         return register_data
 
+    def format_show(self, show_cues: List[Dict[str, Any]]) -> ShiftRegisterPacket:
+        """
+        Encode a whole show into the packed binary show format
+
+        Cues that land on the same timestamp are merged into one frame and
+        only the chains a frame changes are stored (outputs stay ON for the
+        rest of the show, as in show mode on the Pi).
+
+        Args:
+            show_cues: Cues in Pi format (see SystemMode.normalize_cue_for_pi)
+
+        Returns:
+            ShiftRegisterPacket: register_data holds the complete show file
+        """
+        registers = show_format.NUM_CHAINS * show_format.REGISTERS_PER_CHAIN
+        if self.config.num_registers != registers:
+            raise ValueError(f"Packed shows need {registers} registers, "
+                             f"formatter has {self.config.num_registers}")
+
+        # Same expansion and frame merging as on the Pi, so the two can't drift apart
+        compiled = show_compiler.compile_show({'cues': show_cues})
+        frames = [
+            (compiled.times_ns[frame],
+             compiled.chain_masks[frame],
+             b''.join(compiled.chain_image(frame, chain)
+                      for chain in range(show_format.NUM_CHAINS) if compiled.chain_masks[frame] & (1 << chain)))
+            for frame in range(compiled.frame_count)
+        ]
+
+        show_data = show_format.pack_show(show_cues, frames)
+        timestamp = time.time()
+
+        packet = ShiftRegisterPacket(
+            packet_id=f"show_{int(timestamp * 1000)}",
+            timestamp=timestamp,
+            register_data=show_data,
+            checksum=self._calculate_checksum(show_data, timestamp),
+            metadata={
+                'format': show_format.MAGIC.decode('ascii'),
+                'format_version': show_format.FORMAT_VERSION,
+                'cue_count': len(show_cues),
+                'frame_count': len(frames),
+                'size_bytes': len(show_data)
+            }
+        )
+
+        self.logger.info(f"Formatted show: {len(show_cues)} cues, {len(frames)} frames, {len(show_data)} bytes")
+        return packet
+
     def _calculate_checksum(self, data: bytes, timestamp: float) -> str:
         """Calculate checksum for data integrity verification"""
         # Combine data and timestamp for checksum
@@ -160,14 +160,8 @@ class ShowManager:
                     cue.append(cue_dict["duration"])
                 cues.append(cue)
 
-            # Clear existing cues
-            self.cue_table_view.model.beginResetModel()
-            self.cue_table_view.model._data = []
-            self.cue_table_view.model.endResetModel()
-
-            # Update with new cues
+            # Replace the existing cues (one model reset and one LED refresh)
             self._update_cue_table(cues)
-            self.led_panel.updateFromCueData(cues, force_refresh=True)
 
             QMessageBox.information(self.main_window, "Load Successful", "Show loaded successfully!")
         except Exception as e:
@@ -243,14 +237,8 @@ class ShowManager:
             if not cues:
                 raise ValueError("No cues found in the CSV file.")
 
-            # Clear existing cues
-            self.cue_table_view.model.beginResetModel()
-            self.cue_table_view.model._data = []
-            self.cue_table_view.model.endResetModel()
-
-            # Update with new cues
+            # Replace the existing cues (one model reset and one LED refresh)
             self._update_cue_table(cues)
-            self.led_panel.updateFromCueData(cues, force_refresh=True)
 
             QMessageBox.information(self.main_window, "Import Successful", f"Show imported from {filepath}")
         except Exception as e:
@@ -259,7 +247,7 @@ class ShowManager:
     def _get_cues_from_table(self) -> List[Cue]:
         """Retrieves cue data from the cue table."""
         try:
-            return self.cue_table_view.model._data.copy()  # Access data directly for now
+            return list(self.cue_table_view.model.cue_store.rows)
         except Exception as e:
             self._handle_error(f"Error getting cues from table: {e}")
             return []
@@ -267,10 +255,7 @@ class ShowManager:
     def _update_cue_table(self, cues: List):
         """Updates the cue table with the given cue data."""
         try:
-            table_model = self.cue_table_view.model
-            table_model.beginResetModel()
-            table_model._data = cues  # Update the model's data directly
-            table_model.endResetModel()
+            self.cue_table_view.model.set_cues(cues)
         except Exception as e:
             self._handle_error(f"Error updating cue table: {e}")
 
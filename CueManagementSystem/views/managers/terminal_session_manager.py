@@ -30,9 +30,11 @@ from collections import deque
 import paramiko
 from PySide6.QtCore import QObject, Signal, QTimer, QSettings
 
+from controllers.ssh_session_pool import SSHSessionPool, get_session_pool
+
 
 class SSHConnection:
-    """Manages a single SSH connection with keepalive and health monitoring"""
+    """Terminal view of the shared SSH session pool (PTY channel plus health monitoring)"""
 
     def __init__(self, host: str, port: int, username: str, password: str):
         self.host = host
@@ -40,6 +42,7 @@ class SSHConnection:
         self.username = username
         self.password = password
 
+        self.pool: Optional[SSHSessionPool] = None
         self.client: Optional[paramiko.SSHClient] = None
         self.channel: Optional[paramiko.Channel] = None
         self.connected = False
@@ -60,40 +63,10 @@ class SSHConnection:
         print(f"[DEBUG] SSHConnection.connect() called for {self.username}@{self.host}")
 
         try:
-            # Close existing connection if any (without lock to avoid deadlock)
-            if self.client:
-                print("[DEBUG] Closing existing client")
-                try:
-                    self.client.close()
-                except:
-                    pass
-                self.client = None
-
-            # Create new SSH client
-            print("[DEBUG] Creating new SSH client")
-            self.client = paramiko.SSHClient()
-            self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-            # Connect with timeout
-            print(f"[DEBUG] Connecting to {self.host}:{self.port}")
-            self.client.connect(
-                hostname=self.host,
-                port=self.port,
-                username=self.username,
-                password=self.password,
-                timeout=self.connection_timeout,
-                banner_timeout=self.connection_timeout,
-                auth_timeout=self.connection_timeout,
-                look_for_keys=False,
-                allow_agent=False
-            )
-
-            print("[DEBUG] Connection successful, enabling keepalive")
-
-            # Enable keepalive
-            transport = self.client.get_transport()
-            if transport:
-                transport.set_keepalive(self.keepalive_interval)
+            # Reuse the transport SystemMode and the watchdog already hold
+            print(f"[DEBUG] Attaching to pooled SSH transport for {self.host}:{self.port}")
+            self.pool = get_session_pool(self.host, self.port, self.username, self.password)
+            self.client = self.pool.client()
 
             self.connected = True
             self.last_activity = time.time()
@@ -119,9 +92,9 @@ class SSHConnection:
                 self.channel.close()
                 self.channel = None
 
-            if self.client:
-                self.client.close()
-                self.client = None
+            # The transport stays up for the other users of the pool
+            self.client = None
+            self.pool = None
 
             self.connected = False
             print("[DEBUG] Disconnected successfully")
@@ -132,20 +105,15 @@ class SSHConnection:
 
     def is_alive(self) -> bool:
         """Check if connection is still alive"""
-        if not self.connected or not self.client:
+        if not self.connected or not self.pool:
             return False
 
         try:
-            transport = self.client.get_transport()
-            if not transport or not transport.is_active():
+            # The pool's transport sends its own keepalives
+            if not self.pool.is_connected():
                 self.connected = False
                 return False
 
-            # Send keepalive if needed
-            if time.time() - self.last_activity > self.keepalive_interval:
-                transport.send_ignore()
-                self.last_activity = time.time()
-
             return True
 
         except Exception:
@@ -171,18 +139,10 @@ class SSHConnection:
 
         try:
             print(f"[DEBUG] Executing command via SSH: {command}")
-            stdin, stdout, stderr = self.client.exec_command(
-                command,
-                timeout=timeout,
-                get_pty=False  # Don't allocate PTY for simple commands
-            )
-
-            print("[DEBUG] Reading stdout")
-            stdout_data = stdout.read().decode('utf-8', errors='replace')
+            # Own channel on the pooled transport, no PTY for simple commands
+            _, stdout_data, stderr_data = self.pool.exec_command(command, timeout=timeout, label="terminal")
             print(f"[DEBUG] stdout: {stdout_data[:100]}...")
 
-            print("[DEBUG] Reading stderr")
-            stderr_data = stderr.read().decode('utf-8', errors='replace')
             if stderr_data:
                 print(f"[DEBUG] stderr: {stderr_data[:100]}...")
 
@@ -216,12 +176,8 @@ class SSHConnection:
                 if self.channel:
                     self.channel.close()
 
-                # Open new channel with PTY
-                self.channel = self.client.invoke_shell(
-                    term=term,
-                    width=width,
-                    height=height
-                )
+                # Open new channel with PTY on the pooled transport
+                self.channel = self.pool.open_pty(term=term, width=width, height=height)
 
                 # Set non-blocking mode
                 self.channel.setblocking(0)
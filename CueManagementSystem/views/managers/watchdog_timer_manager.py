@@ -174,28 +174,21 @@ class WatchdogTimer(QObject):
             True if connection works, False otherwise
         """
         try:
-            import paramiko
+            from controllers.ssh_session_pool import get_session_pool
 
             # Get connection settings
-            host = self.system_mode_controller.host
-            username = self.system_mode_controller.username
-            password = self.system_mode_controller.password
+            settings = getattr(self.system_mode_controller, 'connection_settings', None) or {}
+            host = settings.get('host', getattr(self.system_mode_controller, 'host', None))
+            port = settings.get('port', 22)
+            username = settings.get('username', getattr(self.system_mode_controller, 'username', None))
+            password = settings.get('password', getattr(self.system_mode_controller, 'password', None))
 
             if not all([host, username, password]):
                 return False
 
-            # Create temporary connection
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(host, username=username, password=password, timeout=3)
-
-            # Test with echo command
-            stdin, stdout, stderr = ssh.exec_command("echo 'watchdog_ping'", timeout=3)
-            result = stdout.read().decode().strip()
-
-            ssh.close()
-
-            return result == "watchdog_ping"
+            # Ping on its own channel of the shared transport (no handshake per check)
+            healthy, _ = get_session_pool(host, port, username, password).health_check(timeout=3)
+            return healthy
 
         except Exception as e:
             self._log_event(f"Simple connection test failed: {str(e)}", "error")
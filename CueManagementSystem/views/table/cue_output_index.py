@@ -0,0 +1,158 @@
+"""
+Cue Output Index
+================
+
+Output to cue reverse index of the cue table, for incremental LED panel updates.
+
+Every cue row's outputs come from the cue store's record of the row, parsed
+once per edit. The index keeps the outputs and LED state code of each row,
+the rows lighting each output and the table position of each row. When one cue is
+added, edited, moved or removed, only its old and new outputs need a new
+LED state. That state comes from the last cue in table order that still
+lights the output, the same rule a full update from the cue list uses.
+
+Features:
+- Output -> cues reverse index maintained across add/update/remove/move
+- LED states of a set of outputs resolved without re-parsing other cues
+- Row identity check to detect a cue list replaced behind the model's back
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+import numpy as np
+
+from models.cue_store import CueStore
+from views.led_panel.led_canvas import led_state_code
+
+
+class CueOutputIndex:
+    """
+    Outputs of every cue row and the cue rows of every output
+
+    Args:
+        led_count: Highest output number shown on the LED panel (other outputs are ignored)
+        store: Cue store whose parsed records to use (default: parse rows as they are added)
+    """
+
+    def __init__(self, led_count: int = 1000, store: CueStore = None):
+        self.led_count = led_count
+        self.store = store if store is not None else CueStore()
+        self.rows: List[list] = []  # Indexed rows in table order (held, so their ids stay unique)
+        self._positions: Dict[int, int] = {}
+        self._outputs: Dict[int, FrozenSet[int]] = {}
+        self._codes: Dict[int, int] = {}
+        self._cues: Dict[int, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def matches(self, rows) -> bool:
+        """Whether the index holds exactly these row objects in this order"""
+        return len(rows) == len(self.rows) and all(a is b for a, b in zip(rows, self.rows))
+
+    def rebuild(self, rows):
+        """Index a whole cue list"""
+        self.rows = list(rows)
+        self._positions = {id(row): position for position, row in enumerate(self.rows)}
+        self._outputs.clear()
+        self._codes.clear()
+        self._cues.clear()
+        for row in self.rows:
+            self._link(row)
+
+    def outputs_of(self, position: int) -> FrozenSet[int]:
+        """Outputs lit by the cue at a table position"""
+        return self._outputs[id(self.rows[position])]
+
+    def all_outputs(self) -> FrozenSet[int]:
+        """Outputs lit by any indexed cue"""
+        return frozenset(self._cues)
+
+    def _parse(self, row) -> FrozenSet[int]:
+        if not row or len(row) < 3:
+            return frozenset()
+        outputs = self.store.record(row).outputs.tolist()
+        return frozenset(output for output in outputs if 1 <= output <= self.led_count)
+
+    def _link(self, row) -> FrozenSet[int]:
+        key = id(row)
+        outputs = self._parse(row)
+        self._outputs[key] = outputs
+        self._codes[key] = led_state_code(row[1]) if outputs else 0
+        for output in outputs:
+            self._cues.setdefault(output, set()).add(key)
+        return outputs
+
+    def _unlink(self, row) -> FrozenSet[int]:
+        key = id(row)
+        outputs = self._outputs.pop(key)
+        del self._codes[key]
+        for output in outputs:
+            cues = self._cues[output]
+            cues.discard(key)
+            if not cues:
+                del self._cues[output]
+        return outputs
+
+    def _renumber(self, start: int, stop: int):
+        """Refresh the stored positions of the rows in [start, stop)"""
+        for position in range(start, min(stop, len(self.rows))):
+            self._positions[id(self.rows[position])] = position
+
+    def insert(self, position: int, row) -> FrozenSet[int]:
+        """Add a row at a table position; returns its outputs"""
+        self.rows.insert(position, row)
+        self._renumber(position, len(self.rows))
+        return self._link(row)
+
+    def remove(self, position: int) -> FrozenSet[int]:
+        """Remove the row at a table position; returns its outputs"""
+        row = self.rows.pop(position)
+        del self._positions[id(row)]
+        self._renumber(position, len(self.rows))
+        return self._unlink(row)
+
+    def replace(self, position: int, row) -> Tuple[FrozenSet[int], FrozenSet[int]]:
+        """Replace the row at a table position; returns the old and the new outputs"""
+        old_row = self.rows[position]
+        del self._positions[id(old_row)]
+        old_outputs = self._unlink(old_row)
+        self.rows[position] = row
+        self._positions[id(row)] = position
+        return old_outputs, self._link(row)
+
+    def move(self, source: int, destination: int) -> FrozenSet[int]:
+        """
+        Move a row (destination as in list.insert after the pop)
+
+        Only the moved cue changes order relative to other cues, so only its
+        outputs can change state; those are returned.
+        """
+        row = self.rows.pop(source)
+        self.rows.insert(destination, row)
+        self._renumber(min(source, destination), max(source, destination) + 1)
+        return self._outputs[id(row)]
+
+    def resolve(self, outputs) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        LED states of some outputs
+
+        Args:
+            outputs: Output numbers to resolve
+
+        Returns:
+            Sorted output numbers and the state code of each (the last cue in
+            table order lighting an output wins, 0 when no cue lights it)
+        """
+        numbers = np.array(sorted(outputs), dtype=np.int64)
+        codes = np.zeros(len(numbers), dtype=np.int16)
+        positions = self._positions
+        for i, output in enumerate(numbers.tolist()):
+            cues = self._cues.get(output)
+            if cues:
+                codes[i] = self._codes[max(cues, key=positions.__getitem__)]
+        return numbers, codes
@@ -19,17 +19,45 @@ Version: 1.0.0
 License: MIT
 """
 
+from contextlib import contextmanager
+
 from PySide6.QtWidgets import QTableView, QHeaderView, QAbstractItemView, QStyleOptionHeader, QDialog, QWidget, QMenu
 from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
 from PySide6.QtGui import QColor, QDropEvent, QPainter, QAction
 from views.dialogs.cue_editor_dialog import CueEditorDialog
 from views.dialogs.excalibur_shell_selector_dialog import ExcaliburShellSelector
+from models.cue_store import CueStore
+from views.table.cue_output_index import CueOutputIndex
+
+# Item roles looked up once: data() runs for every painted cell and Qt enum attribute access is slow
+_DISPLAY_ROLE = Qt.DisplayRole
+_TEXT_ALIGNMENT_ROLE = Qt.TextAlignmentRole
+_BACKGROUND_ROLE = Qt.BackgroundRole
+_FOREGROUND_ROLE = Qt.ForegroundRole
+
+
+class _BulkEdit:
+    """Edits collected by CueTableModel.bulk_edit() until the block ends"""
+
+    __slots__ = ('incremental', 'changed', 'reset', 'old_outputs', 'new_outputs')
+
+    def __init__(self, incremental):
+        self.incremental = incremental  # False: the LED panel needs a full refresh
+        self.changed = False  # Rows were added, updated, removed or moved
+        self.reset = False  # The cue list was replaced by set_cues
+        self.old_outputs = set()
+        self.new_outputs = set()
 
 
 class CueTableModel(QAbstractTableModel):
+    cue_outputs_changed = Signal(object, object)  # Signal emits (old outputs, new outputs) of an edited cue
+
     def __init__(self):
         super().__init__()
         self._data = []
+        self.cue_store = CueStore(self._data)  # Parsed rows, read by painting, preview and visualizers
+        self._output_index = CueOutputIndex(store=self.cue_store)
+        self._bulk = None  # Open bulk_edit(), if any
         self._headers = [
             "CUE #",
             "TYPE",
@@ -47,6 +75,14 @@ class CueTableModel(QAbstractTableModel):
             "DOUBLE RUN": QColor("#FFA500")
         }
 
+        # Every edit (and every direct change of _data) is followed by one of these
+        self.layoutChanged.connect(self._sync_cue_store)
+        self.modelReset.connect(self._sync_cue_store)
+
+    def _sync_cue_store(self, *args):
+        """Parse new or replaced rows into the cue store"""
+        self.cue_store.sync(self._data)
+
     def rowCount(self, parent=None):
         return 1000
 
@@ -57,7 +93,7 @@ class CueTableModel(QAbstractTableModel):
         row = index.row()
         col = index.column()
 
-        if role == Qt.DisplayRole:
+        if role == _DISPLAY_ROLE:
             if row < len(self._data):
                 # CUE # (column 0)
                 if col == 0:
@@ -67,14 +103,9 @@ class CueTableModel(QAbstractTableModel):
                 elif col == 1:
                     return str(self._data[row][1])
 
-                # # OF OUTPUTS (column 2) - Calculated from OUTPUTS
+                # # OF OUTPUTS (column 2) - Calculated from OUTPUTS when the cue was edited
                 elif col == 2:
-                    outputs = self._data[row][2]  # Get OUTPUTS column
-                    try:
-                        num_outputs = len(outputs.split(',')) if outputs else 0
-                        return str(num_outputs)
-                    except:
-                        return "0"
+                    return str(self.cue_store.record_at(row).output_count)
 
                 # OUTPUTS (column 3)
                 elif col == 3:
@@ -87,34 +118,13 @@ class CueTableModel(QAbstractTableModel):
                         return f"{value:.2f}s"
                     return str(value)
 
-                # DURATION (column 5) - Calculated from TYPE, OUTPUTS, and DELAY
+                # DURATION (column 5) - Calculated from TYPE, OUTPUTS, and DELAY when the cue was edited
                 elif col == 5:
-                    cue_type = self._data[row][1]  # Get TYPE
-                    delay = self._data[row][3]  # Get DELAY
-                    outputs = self._data[row][2]  # Get OUTPUTS
-
-                    # For SHOT types, duration is 0
-                    if "SHOT" in cue_type:
-                        return "0.00s"
-                    # For RUN types, calculate duration
-                    else:
-                        try:
-                            num_outputs = len(outputs.split(',')) if outputs else 0
-                            # Duration = (number of outputs - 1) * delay
-                            duration = (num_outputs - 1) * float(delay)
-                            return f"{duration:.2f}s"
-                        except:
-                            return "0.00s"
+                    return self.cue_store.record_at(row).duration_display
 
                 # EXECUTE TIME (column 6)
                 elif col == 6:
-                    value = self._data[row][4]  # Get EXECUTE TIME
-                    if '.' in value:
-                        minutes, seconds = value.split(':')
-                        return f"{minutes}:{seconds}"
-                    else:
-                        minutes, seconds = value.split(':')
-                        return f"{minutes}:{seconds}.00"
+                    return self.cue_store.record_at(row).execute_display
 
                 # VISUAL EFFECT (column 7)
                 elif col == 7:
@@ -133,15 +143,15 @@ class CueTableModel(QAbstractTableModel):
                 return str(self._data[row][col])
             return ""
 
-        elif role == Qt.TextAlignmentRole:
+        elif role == _TEXT_ALIGNMENT_ROLE:
             return Qt.AlignCenter
 
-        elif role == Qt.BackgroundRole:
+        elif role == _BACKGROUND_ROLE:
             if row % 2 == 0:
                 return QColor("#1a1a2e")
             return QColor("#252540")
 
-        elif role == Qt.ForegroundRole:
+        elif role == _FOREGROUND_ROLE:
             if row < len(self._data):
                 cue_type = self._data[row][1]  # Get TYPE
                 return self._colors.get(cue_type, QColor("#FFFFFF"))
@@ -185,20 +195,21 @@ class CueTableModel(QAbstractTableModel):
                 return False
 
             # Perform the move
+            indexed = self._prepare_output_index()
             self.beginMoveRows(QModelIndex(), sourceRow, sourceRow,
                                QModelIndex(), destinationRow)
 
             data = self._data.pop(sourceRow)
-            if destinationRow > sourceRow:
-                self._data.insert(destinationRow - 1, data)
-            else:
-                self._data.insert(destinationRow, data)
+            insert_row = destinationRow - 1 if destinationRow > sourceRow else destinationRow
+            self._data.insert(insert_row, data)
 
             self.endMoveRows()
             print("Move completed successfully")
 
-            # Emit that the layout has changed
-            self.layoutChanged.emit()
+            # Emit that the layout has changed. The moved cue now wins or loses
+            # its shared outputs against the cues it passed
+            outputs = self._output_index.move(sourceRow, insert_row)
+            self._finish_edit(outputs, outputs, indexed)
             return True
 
         except Exception as e:
@@ -207,42 +218,122 @@ class CueTableModel(QAbstractTableModel):
 
     def add_cue(self, cue_data):
         """Add a new cue to the model"""
+        indexed = self._prepare_output_index()
         self._data.append(cue_data)
-        self.layoutChanged.emit()  # Notify views of changes
-        self.update_led_panel()
+        self._finish_edit(frozenset(), self._output_index.insert(len(self._data) - 1, cue_data), indexed)
 
     def add_cues_batch(self, cue_data_list):
         """Add multiple cues efficiently with single UI update"""
         if not cue_data_list:
             return
 
-        # Add all cues to data without triggering updates
-        self._data.extend(cue_data_list)
-
-        # Single UI update for all cues
-        self.layoutChanged.emit()
-        self.update_led_panel()
+        # Add all cues to data; views and LEDs are updated once, when the bulk edit ends
+        with self.bulk_edit():
+            for cue_data in cue_data_list:
+                self.add_cue(cue_data)
 
     def update_cue(self, index, cue_data):
         """Update an existing cue"""
         if 0 <= index < len(self._data):
+            indexed = self._prepare_output_index()
             self._data[index] = cue_data
-            self.layoutChanged.emit()
-            self.update_led_panel()
+            self._finish_edit(*self._output_index.replace(index, cue_data), indexed)
 
     def remove_cue(self, cue_number):
         """Remove a cue by its number"""
-        self._data = [cue for cue in self._data if cue[0] != cue_number]
-        self.layoutChanged.emit()
-        self.update_led_panel()
+        indexed = self._prepare_output_index()
+        outputs = set()
+        for row in reversed([row for row, cue in enumerate(self._data) if cue[0] == cue_number]):
+            del self._data[row]
+            outputs |= self._output_index.remove(row)
+        self._finish_edit(frozenset(outputs), frozenset(), indexed)
+
+    def set_cues(self, cues):
+        """Replace every cue (show loads and imports) with one model reset and one full LED refresh"""
+        with self.bulk_edit():
+            old_outputs = self._output_index.all_outputs()
+            self.beginResetModel()
+            self._data = list(cues)
+            self.endResetModel()
+            self._output_index.rebuild(self._data)
+            self._bulk.reset = True
+            self._bulk.old_outputs |= old_outputs
+
+    @contextmanager
+    def bulk_edit(self):
+        """
+        Collect cue edits into one table update and one LED panel refresh
+
+        Inside the block add_cue, add_cues_batch, update_cue, remove_cue and
+        set_cues change the cue list without notifying anyone. When the block
+        ends, views get one layoutChanged (set_cues resets the model instead)
+        and the LED panel one update: only the LEDs of the edited cues, or
+        all of them after set_cues. Nested blocks join the outermost one.
+        """
+        if self._bulk is not None:
+            yield self
+            return
 
-    def update_led_panel(self, force_refresh=False):
+        self._bulk = _BulkEdit(self._prepare_output_index())
+        try:
+            yield self
+        finally:
+            bulk, self._bulk = self._bulk, None
+            if bulk.changed:
+                self.layoutChanged.emit()
+            if bulk.reset:
+                self.cue_outputs_changed.emit(frozenset(bulk.old_outputs), self._output_index.all_outputs())
+                self.update_led_panel(force_refresh=True)
+            elif bulk.changed:
+                self._cue_outputs_edited(frozenset(bulk.old_outputs), frozenset(bulk.new_outputs), bulk.incremental)
+
+    def _finish_edit(self, old_outputs, new_outputs, incremental):
+        """Notify views and the LED panel of an edit, or add it to the open bulk edit"""
+        if self._bulk is not None:
+            self._bulk.old_outputs |= old_outputs
+            self._bulk.new_outputs |= new_outputs
+            self._bulk.changed = True
+            return
+        self.layoutChanged.emit()  # Notify views of changes
+        self._cue_outputs_edited(old_outputs, new_outputs, incremental)
+
+    def _prepare_output_index(self):
+        """
+        Check the output index still describes the cue list before an edit
+
+        The cue list is also replaced or re-sorted directly (show loads, the
+        main window's cue editor). The index is rebuilt then and the edit
+        updates the LED panel in full.
+
+        Returns:
+            True if the edit can update the LED panel incrementally
+        """
+        if self._bulk is not None:
+            return True  # Checked when the bulk edit began; its edits keep the index in step
+        if self._output_index.matches(self._data):
+            return True
+        self._output_index.rebuild(self._data)
+        return False
+
+    def _cue_outputs_edited(self, old_outputs, new_outputs, incremental=True):
+        """Notify listeners of a cue edit and update the LEDs of its outputs (all LEDs if not incremental)"""
+        self.cue_outputs_changed.emit(old_outputs, new_outputs)
+        self.update_led_panel(outputs=old_outputs | new_outputs if incremental else None)
+
+    def update_led_panel(self, force_refresh=False, outputs=None):
         """Update LED panel with current data
 
         Args:
             force_refresh: Force complete refresh of all LEDs (default: False)
+            outputs: Only update the LEDs of these outputs (default: all, re-parsing every cue)
         """
-        if hasattr(self, 'led_panel'):
+        if not hasattr(self, 'led_panel'):
+            return
+        if outputs is not None and not force_refresh and hasattr(self.led_panel, 'apply_led_changes'):
+            numbers, codes = self._output_index.resolve(outputs)
+            self.led_panel.apply_led_changes(numbers, codes, cue_data=self._data)
+        else:
+            self._prepare_output_index()
             self.led_panel.updateFromCueData(self._data, force_refresh=force_refresh)
 
 
@@ -790,13 +881,7 @@ class CueTableView(QTableView):
         if not self.model._data:
             return False
 
-        # Clear the data
-        self.model._data = []
-
-        # Notify views of the change
-        self.model.layoutChanged.emit()
-
-        # Update LED panel
-        self.model.update_led_panel(force_refresh=True)
+        # Clear the data: one model reset and one LED refresh
+        self.model.set_cues([])
 
         return True
\ No newline at end of file
@@ -21,12 +21,14 @@ from enum import Enum
 import colorsys
 from dataclasses import dataclass
 import logging
-from PySide6.QtGui import QColor, QLinearGradient, QRadialGradient, QConicalGradient
+from PySide6.QtGui import QColor, QImage, QLinearGradient, QRadialGradient, QConicalGradient
 from PySide6.QtCore import Qt
 import time
 from scipy import signal
 from scipy.ndimage import gaussian_filter1d
 
+from utils.audio.waveform_pyramid import ColumnStats, WaveformPyramid
+
 logger = logging.getLogger(__name__)
 
 
@@ -69,6 +71,49 @@ class RenderingConfig:
     show_phase_correlation: bool = False  # Not needed for drums
 
 
+@dataclass
+class RenderedWaveform:
+    """Rendered waveform as per-column arrays (one entry per pixel column and channel)"""
+    x: np.ndarray  # column x positions
+    top: np.ndarray  # y of the upper edge
+    bottom: np.ndarray  # y of the lower edge
+    rgba: Optional[np.ndarray] = None  # uint32 QColor.rgba() values (0xAARRGGBB), None = no column colors
+    channels: int = 1  # 2 for separated stereo (left/right columns interleaved)
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def to_points(self) -> List[Tuple[float, float, float, Optional[QColor]]]:
+        """(x, y_top, y_bottom, color) tuples, one QColor per column"""
+        if self.rgba is None:
+            colors = [None] * len(self)
+        else:
+            colors = [QColor.fromRgba(value) for value in self.rgba.tolist()]
+        return list(zip(self.x.tolist(), self.top.tolist(), self.bottom.tolist(), colors))
+
+
+def pack_rgba(red, green, blue, alpha=255) -> np.ndarray:
+    """Pack 0-255 channel values (scalars or arrays) into QColor.rgba() values"""
+    red, green, blue, alpha = (np.clip(np.asarray(channel, dtype=np.int64), 0, 255).astype(np.uint32)
+                               for channel in (red, green, blue, alpha))
+    return (alpha << 24) | (red << 16) | (green << 8) | blue
+
+
+def hsv_to_rgb(hue: np.ndarray, saturation: np.ndarray, value: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Vectorized colorsys.hsv_to_rgb"""
+    hue, saturation, value = np.broadcast_arrays(*(np.asarray(c, dtype=np.float64) for c in (hue, saturation, value)))
+    sector = np.floor(hue * 6.0)
+    fraction = hue * 6.0 - sector
+    p = value * (1.0 - saturation)
+    q = value * (1.0 - saturation * fraction)
+    t = value * (1.0 - saturation * (1.0 - fraction))
+    sector = sector.astype(np.int64) % 6
+    red = np.choose(sector, [value, q, p, p, t, value])
+    green = np.choose(sector, [t, value, value, q, p, p])
+    blue = np.choose(sector, [p, p, t, value, value, q])
+    return red, green, blue
+
+
 class ProfessionalWaveformRenderer:
     """
     Professional-grade waveform renderer with advanced visualization techniques
@@ -86,13 +131,46 @@ class ProfessionalWaveformRenderer:
         self._render_cache = {}
         self._cache_max_size = 50  # Limit cache size to prevent memory issues
 
+        # Level-of-detail pyramids by id() of the signal they summarise (each keeps its signal alive)
+        self._pyramids: Dict[int, WaveformPyramid] = {}
+        self._pyramid_max_count = 4
+
         # Color palettes
         self._color_palettes = self._initialize_color_palettes()
 
     def _get_cache_key(self, audio_data, sample_rate, width, height, offset, zoom, mode, color_scheme):
         """Generate cache key for rendered data"""
-        data_hash = hash(audio_data.tobytes() if hasattr(audio_data, 'tobytes') else str(audio_data))
-        return f"{data_hash}_{sample_rate}_{width}_{height}_{offset:.3f}_{zoom:.3f}_{mode}_{color_scheme}"
+        if isinstance(audio_data, list) and len(audio_data) > 0 and isinstance(audio_data[0], np.ndarray):
+            audio_data = audio_data[0]
+        pyramid = self._pyramids.get(id(audio_data))
+        if pyramid is not None and pyramid.samples is audio_data:
+            # Signals with a pyramid are keyed by it instead of hashing every sample on each repaint
+            data_hash = f"pyramid{pyramid.token}"
+        else:
+            data_hash = hash(audio_data.tobytes() if hasattr(audio_data, 'tobytes') else str(audio_data))
+        config = self.config
+        settings = (f"{config.smoothing_factor}_{config.dynamic_range_db}_{config.frequency_bands}_"
+                    f"{config.spectral_resolution}_{config.envelope_attack}_{config.envelope_release}_"
+                    f"{config.stereo_separation}")
+        return f"{data_hash}_{sample_rate}_{width}_{height}_{offset:.9f}_{zoom:.9f}_{mode}_{color_scheme}_{settings}"
+
+    def set_pyramid(self, pyramid: Optional[WaveformPyramid]):
+        """Use a pyramid built elsewhere (e.g. WaveformAnalyzer.waveform_pyramid) for its signal"""
+        if pyramid is not None and self._pyramids.get(id(pyramid.samples)) is not pyramid:
+            self._store_pyramid(pyramid)
+
+    def _get_pyramid(self, audio_data: np.ndarray) -> WaveformPyramid:
+        """Pyramid of audio_data, built on first use"""
+        pyramid = self._pyramids.get(id(audio_data))
+        if pyramid is None or pyramid.samples is not audio_data:
+            pyramid = WaveformPyramid(audio_data)
+            self._store_pyramid(pyramid)
+        return pyramid
+
+    def _store_pyramid(self, pyramid: WaveformPyramid):
+        self._pyramids[id(pyramid.samples)] = pyramid
+        while len(self._pyramids) > self._pyramid_max_count:
+            self._pyramids.pop(next(iter(self._pyramids)))
 
     def _manage_cache_size(self, cache_dict):
         """Keep cache size under control"""
@@ -191,11 +269,11 @@ class ProfessionalWaveformRenderer:
             stops.append((i / 6.0, color))
         return stops
 
-    def render_waveform_points(self, audio_data: Union[np.ndarray, List], sample_rate: int,
-                               width: int, height: int, offset: float = 0.0,
-                               zoom: float = 1.0) -> List[Tuple[float, float, float, Optional[QColor]]]:
+    def render_waveform(self, audio_data: Union[np.ndarray, List], sample_rate: int,
+                        width: int, height: int, offset: float = 0.0,
+                        zoom: float = 1.0) -> 'RenderedWaveform':
         """
-        Generate professional waveform visualization points with caching
+        Render the visible part of the waveform to per-column arrays with caching
 
         Args:
             audio_data: Audio samples (mono or stereo) - can be numpy array or list
@@ -206,13 +284,8 @@ class ProfessionalWaveformRenderer:
             zoom: Zoom factor (1.0 = normal)
 
         Returns:
-            List of (x, y_top, y_bottom, color) tuples for rendering
+            RenderedWaveform with x, top, bottom and packed color arrays
         """
-        # Check cache first for performance
-        cache_key = self._get_cache_key(audio_data, sample_rate, width, height, offset, zoom,
-                                        self.config.mode, self.config.color_scheme)
-        if cache_key in self._render_cache:
-            return self._render_cache[cache_key]
         # Handle your analyzer's specific data format: [numpy_array] (list containing numpy array)
         if isinstance(audio_data, list):
             if len(audio_data) > 0 and isinstance(audio_data[0], np.ndarray):
@@ -222,6 +295,12 @@ class ProfessionalWaveformRenderer:
                 # Regular list of numbers
                 audio_data = np.array(audio_data)
 
+        # Check cache first for performance
+        cache_key = self._get_cache_key(audio_data, sample_rate, width, height, offset, zoom,
+                                        self.config.mode, self.config.color_scheme)
+        if cache_key in self._render_cache:
+            return self._render_cache[cache_key]
+
         # Handle different data structures from your analyzer
         if hasattr(audio_data, 'shape'):
             if len(audio_data.shape) == 1:
@@ -259,9 +338,22 @@ class ProfessionalWaveformRenderer:
             audio_data = np.array(audio_data).flatten()
             return self._render_mono_waveform(audio_data, sample_rate, width, height, offset, zoom)
 
+    def render_waveform_points(self, audio_data: Union[np.ndarray, List], sample_rate: int,
+                               width: int, height: int, offset: float = 0.0,
+                               zoom: float = 1.0) -> List[Tuple[float, float, float, Optional[QColor]]]:
+        """
+        Generate professional waveform visualization points with caching
+
+        Tuple form of render_waveform (one QColor per column); drawing code
+        should use render_waveform and render_waveform_image instead.
+
+        Returns:
+            List of (x, y_top, y_bottom, color) tuples for rendering
+        """
+        return self.render_waveform(audio_data, sample_rate, width, height, offset, zoom).to_points()
+
     def _render_mono_waveform(self, audio_data: np.ndarray, sample_rate: int,
-                              width: int, height: int, offset: float, zoom: float) -> List[
-        Tuple[float, float, float, Optional[QColor]]]:
+                              width: int, height: int, offset: float, zoom: float) -> 'RenderedWaveform':
         """Render mono waveform with selected mode and caching"""
 
         # Calculate visible range
@@ -301,15 +393,34 @@ class ProfessionalWaveformRenderer:
 
         return result
 
+    def _visible_columns(self, audio_data: np.ndarray, start_sample: int, end_sample: int,
+                         width: int, samples_per_pixel: int) -> ColumnStats:
+        """Per-pixel min/max/RMS of the visible range from the level-of-detail pyramid"""
+        return self._get_pyramid(audio_data).columns(start_sample, samples_per_pixel, width, end_sample)
+
+    def _smooth(self, values: np.ndarray) -> np.ndarray:
+        """
+        Smooth consecutive columns with the configured one-pole IIR filter
+
+        y[0] = x[0], y[n] = (1 - a) * y[n - 1] + a * x[n] with a = smoothing_factor
+        """
+        factor = self.config.smoothing_factor
+        if factor <= 0 or len(values) < 2:
+            return values
+        values = np.asarray(values, dtype=np.float64)
+        return signal.lfilter([factor], [1.0, factor - 1.0], values, zi=[(1.0 - factor) * values[0]])[0]
+
+    @staticmethod
+    def _to_screen(values: np.ndarray, center_y: float, scale: float, height: int) -> np.ndarray:
+        """Amplitudes to y coordinates, clamped to the widget"""
+        return np.clip(center_y - np.asarray(values, dtype=np.float64) * scale, 0.0, float(height))
+
     def _render_rms_envelope(self, audio_data: np.ndarray, start_sample: int, end_sample: int,
-                             width: int, height: int, samples_per_pixel: int) -> List[
-        Tuple[float, float, float, Optional[QColor]]]:
+                             width: int, height: int, samples_per_pixel: int) -> 'RenderedWaveform':
         """Render waveform using RMS envelope for better visual representation"""
-        points = []
         center_y = height / 2
         # Calculate amplitude scale based on dynamic range setting
         # Convert dB to linear scale: higher dB = more sensitive to quiet sounds
-        db_factor = self.config.dynamic_range_db / 60.0  # Normalize to 60dB reference
         amplitude_scale = height * 0.45 * (60.0 / self.config.dynamic_range_db)  # Inverse relationship
 
         if hasattr(self, '_debug_printed') and not self._debug_printed:
@@ -317,198 +428,111 @@ class ProfessionalWaveformRenderer:
                 f"🔧 DYNAMIC RANGE: Using {self.config.dynamic_range_db:.1f} dB, amplitude_scale={amplitude_scale:.2f}")
             self._debug_printed = True
 
-        # RMS window size
-        rms_window = self.config.rms_window_size
-
-        for pixel_x in range(width):
-            sample_start = start_sample + int(pixel_x * samples_per_pixel)
-            sample_end = min(end_sample, sample_start + samples_per_pixel)
-
-            if sample_start >= len(audio_data):
-                break
-
-            # Get pixel data
-            pixel_data = audio_data[sample_start:sample_end]
-            if len(pixel_data) == 0:
-                points.append((float(pixel_x), float(center_y), float(center_y), None))
-                continue
-
-            # Calculate RMS value
-            rms_value = np.sqrt(np.mean(pixel_data ** 2))
-
-            # Calculate peak values for envelope
-            max_val = np.max(np.abs(pixel_data))
-
-            # Apply smoothing
-            if self.config.smoothing_factor > 0 and len(points) > 0:
-                # Get previous peak value from the last point
-                prev_peak_y = points[-1][1]
-                prev_max = (center_y - prev_peak_y) / amplitude_scale
+        # Per-pixel RMS and peak values from the level-of-detail pyramid
+        columns = self._visible_columns(audio_data, start_sample, end_sample, width, samples_per_pixel)
+        rms_values = columns.rms.astype(np.float64)
+        peak_values = self._smooth(columns.peak)
 
-                # Apply smoothing to both RMS and peak values
-                original_rms = rms_value
-                original_max = max_val
-                rms_value = (prev_max * 0.8) * (
-                        1 - self.config.smoothing_factor) + rms_value * self.config.smoothing_factor
-                max_val = prev_max * (1 - self.config.smoothing_factor) + max_val * self.config.smoothing_factor
+        # Smoothed RMS follows 80% of the previous smoothed peak
+        factor = self.config.smoothing_factor
+        if factor > 0 and len(columns) > 1:
+            rms_values[1:] = peak_values[:-1] * 0.8 * (1 - factor) + rms_values[1:] * factor
 
-                if pixel_x == 0:  # Debug print only for first pixel to avoid spam
-                    print(
-                        f"🔧 RMS SMOOTHING APPLIED: factor={self.config.smoothing_factor:.3f}, rms: {original_rms:.4f}→{rms_value:.4f}, peak: {original_max:.4f}→{max_val:.4f}")
+        # Convert to screen coordinates, mirrored around the center
+        peak_y = self._to_screen(peak_values, center_y, amplitude_scale, height)
 
-            # Convert to screen coordinates
-            rms_y = center_y - (rms_value * amplitude_scale)
-            peak_y = center_y - (max_val * amplitude_scale)
-
-            # Ensure bounds
-            rms_y = max(0.0, min(float(height), rms_y))
-            peak_y = max(0.0, min(float(height), peak_y))
-
-            # Color based on energy level
-            color = self._get_energy_color(rms_value)
-
-            points.append((float(pixel_x), float(peak_y), float(center_y + (center_y - peak_y)), color))
-
-        return points
+        # Color based on energy level
+        return RenderedWaveform(np.arange(len(columns), dtype=np.float64), peak_y, center_y + (center_y - peak_y),
+                                self._energy_colors(rms_values))
 
     def _render_spectral_color(self, audio_data: np.ndarray, sample_rate: int, start_sample: int, end_sample: int,
-                               width: int, height: int, samples_per_pixel: int) -> List[
-        Tuple[float, float, float, Optional[QColor]]]:
+                               width: int, height: int, samples_per_pixel: int) -> 'RenderedWaveform':
         """Render waveform with frequency-based coloring"""
-        points = []
         center_y = height / 2
         # Calculate amplitude scale based on dynamic range setting
         amplitude_scale = height * 0.45 * (60.0 / self.config.dynamic_range_db)
 
-        # STFT parameters
-        n_fft = self.config.spectral_resolution
-        hop_length = max(1, samples_per_pixel // 4)
-
-        for pixel_x in range(width):
-            sample_start = start_sample + int(pixel_x * samples_per_pixel)
-            sample_end = min(end_sample, sample_start + samples_per_pixel)
-
-            if sample_start >= len(audio_data):
-                break
-
-            pixel_data = audio_data[sample_start:sample_end]
-            if len(pixel_data) == 0:
-                points.append((float(pixel_x), float(center_y), float(center_y), None))
-                continue
-
-            # Calculate amplitude
-            max_val = np.max(np.abs(pixel_data))
-            min_val = np.min(pixel_data)
-
-            # Calculate spectral centroid for coloring
-            if len(pixel_data) >= n_fft:
-                try:
-                    # Pad data if necessary
-                    if len(pixel_data) < n_fft:
-                        pixel_data = np.pad(pixel_data, (0, n_fft - len(pixel_data)))
-
-                    spectral_centroid = librosa.feature.spectral_centroid(
-                        y=pixel_data, sr=sample_rate, n_fft=min(n_fft, len(pixel_data))
-                    )[0, 0]
-
-                    # Normalize spectral centroid to 0-1 range
-                    normalized_centroid = min(1.0, spectral_centroid / (sample_rate / 4))
-
-                except Exception as e:
-                    normalized_centroid = 0.5  # Default to middle frequency
-            else:
-                normalized_centroid = 0.5
-
-            # Convert to screen coordinates
-            y_top = center_y - (max_val * amplitude_scale)
-            y_bottom = center_y - (min_val * amplitude_scale)
-
-            # Apply smoothing if enabled
-            if self.config.smoothing_factor > 0 and len(points) > 0:
-                prev_y_top = points[-1][1]
-                prev_y_bottom = points[-1][2]
-                # Convert back to amplitude for smoothing
-                prev_max = (center_y - prev_y_top) / amplitude_scale
-                prev_min = (center_y - prev_y_bottom) / amplitude_scale
+        columns = self._visible_columns(audio_data, start_sample, end_sample, width, samples_per_pixel)
 
-                # Apply smoothing
-                max_val = prev_max * (1 - self.config.smoothing_factor) + max_val * self.config.smoothing_factor
-                min_val = prev_min * (1 - self.config.smoothing_factor) + min_val * self.config.smoothing_factor
+        # Spectral centroid of every column for coloring
+        centroids = self._column_centroids(audio_data, sample_rate, columns.starts, samples_per_pixel, end_sample)
 
-                # Recalculate screen coordinates with smoothed values
-                y_top = center_y - (max_val * amplitude_scale)
-                y_bottom = center_y - (min_val * amplitude_scale)
+        # Smoothed amplitude envelope
+        max_values = self._smooth(columns.peak)
+        min_values = self._smooth(columns.min)
 
-            # Ensure bounds
-            y_top = max(0.0, min(float(height), y_top))
-            y_bottom = max(0.0, min(float(height), y_bottom))
+        y_top = self._to_screen(max_values, center_y, amplitude_scale, height)
+        y_bottom = self._to_screen(min_values, center_y, amplitude_scale, height)
 
-            # Color based on spectral centroid
-            color = self._get_spectral_color(normalized_centroid, max_val)
+        # Color based on spectral centroid
+        return RenderedWaveform(np.arange(len(columns), dtype=np.float64), y_top, y_bottom,
+                                self._spectral_colors(centroids, max_values))
 
-            points.append((float(pixel_x), float(y_top), float(y_bottom), color))
+    def _column_centroids(self, audio_data: np.ndarray, sample_rate: int, starts: np.ndarray,
+                          samples_per_pixel: int, end_sample: int) -> np.ndarray:
+        """
+        Normalized spectral centroid (0-1) of the first STFT frame of every column
 
-        return points
+        Same frame as librosa.feature.spectral_centroid(y=column)[0, 0]: n_fft
+        samples centered on the column start (zero padded in front), periodic
+        Hann window. Columns shorter than n_fft get 0.5.
+        """
+        n_fft = self.config.spectral_resolution
+        centroids = np.full(len(starts), 0.5)
+        lengths = np.minimum(starts + samples_per_pixel, end_sample) - starts
+        eligible = np.flatnonzero(lengths >= n_fft)
+        if len(eligible) == 0:
+            return centroids
+
+        try:
+            half = n_fft // 2
+            window = signal.get_window('hann', n_fft, fftbins=True)
+            frequencies = np.fft.rfftfreq(n_fft, d=1.0 / sample_rate)
+            frames = np.zeros((len(eligible), n_fft))
+            frames[:, half:] = audio_data[starts[eligible, np.newaxis] + np.arange(n_fft - half)]
+            frames *= window
+            magnitudes = np.abs(np.fft.rfft(frames, axis=1))
+
+            norm = magnitudes.sum(axis=1)
+            norm[norm < np.finfo(np.float32).tiny] = 1.0
+            centroid = (magnitudes @ frequencies) / norm
+
+            # Normalize spectral centroid to 0-1 range
+            centroids[eligible] = np.minimum(1.0, centroid / (sample_rate / 4))
+        except Exception as e:
+            self.logger.debug(f"Spectral centroid calculation failed: {e}")
+        return centroids
 
     def _render_dual_layer(self, audio_data: np.ndarray, start_sample: int, end_sample: int,
-                           width: int, height: int, samples_per_pixel: int) -> List[
-        Tuple[float, float, float, Optional[QColor]]]:
+                           width: int, height: int, samples_per_pixel: int) -> 'RenderedWaveform':
         """Render waveform with dual layer (RMS + peaks)"""
-        points = []
         center_y = height / 2
         # Calculate amplitude scale based on dynamic range setting
         amplitude_scale = height * 0.45 * (60.0 / self.config.dynamic_range_db)
 
-        for pixel_x in range(width):
-            sample_start = start_sample + int(pixel_x * samples_per_pixel)
-            sample_end = min(end_sample, sample_start + samples_per_pixel)
-
-            if sample_start >= len(audio_data):
-                break
-
-            pixel_data = audio_data[sample_start:sample_end]
-            if len(pixel_data) == 0:
-                points.append((float(pixel_x), float(center_y), float(center_y), None))
-                continue
-
-            # Calculate both RMS and peak values
-            rms_value = np.sqrt(np.mean(pixel_data ** 2))
-            max_val = np.max(np.abs(pixel_data))
-
-            # Apply smoothing if enabled
-            if self.config.smoothing_factor > 0 and len(points) > 0:
-                prev_y_top = points[-1][1]
-                prev_y_bottom = points[-1][2]
-                # Convert back to amplitude for smoothing
-                prev_max = (center_y - prev_y_top) / amplitude_scale
-                prev_rms = (center_y - (prev_y_top + prev_y_bottom) / 2) / (amplitude_scale * 0.8)
-
-                # Apply smoothing
-                max_val = prev_max * (1 - self.config.smoothing_factor) + max_val * self.config.smoothing_factor
-                rms_value = prev_rms * (1 - self.config.smoothing_factor) + rms_value * self.config.smoothing_factor
-
-            # Convert to screen coordinates
-            rms_y = center_y - (rms_value * amplitude_scale * 0.8)  # RMS slightly smaller
-            peak_y = center_y - (max_val * amplitude_scale)
+        # Calculate both RMS and peak values
+        columns = self._visible_columns(audio_data, start_sample, end_sample, width, samples_per_pixel)
+        rms_values = columns.rms.astype(np.float64)
+        max_values = self._smooth(columns.peak)
 
-            # Ensure bounds
-            rms_y = max(0.0, min(float(height), rms_y))
-            peak_y = max(0.0, min(float(height), peak_y))
+        # The outline is symmetric, so the RMS recovered from the previous column is zero
+        factor = self.config.smoothing_factor
+        if factor > 0 and len(columns) > 1:
+            rms_values[1:] *= factor
 
-            # Color based on dynamic range
-            dynamic_range = max_val - rms_value if max_val > 0 else 0
-            color = self._get_dynamic_range_color(dynamic_range)
+        # Convert to screen coordinates
+        peak_y = self._to_screen(max_values, center_y, amplitude_scale, height)
 
-            # Use peak values for outline, RMS for fill
-            points.append((float(pixel_x), float(peak_y), float(center_y + (center_y - peak_y)), color))
+        # Color based on dynamic range
+        dynamic_range = np.where(max_values > 0, max_values - rms_values, 0.0)
 
-        return points
+        # Use peak values for outline, RMS for fill
+        return RenderedWaveform(np.arange(len(columns), dtype=np.float64), peak_y, center_y + (center_y - peak_y),
+                                self._dynamic_range_colors(dynamic_range))
 
     def _render_frequency_bands(self, audio_data: np.ndarray, sample_rate: int, start_sample: int, end_sample: int,
-                                width: int, height: int, samples_per_pixel: int) -> List[
-        Tuple[float, float, float, Optional[QColor]]]:
+                                width: int, height: int, samples_per_pixel: int) -> 'RenderedWaveform':
         """Render waveform with frequency band analysis"""
-        points = []
         center_y = height / 2
         # Calculate amplitude scale based on dynamic range setting
         amplitude_scale = height * 0.45 * (60.0 / self.config.dynamic_range_db)
@@ -521,85 +545,71 @@ class ProfessionalWaveformRenderer:
                 f"🔧 FREQUENCY BANDS: Using {self.config.frequency_bands} bands, freq_bands shape: {len(freq_bands) - 1}")
             self._freq_debug_printed = True
 
-        for pixel_x in range(width):
-            sample_start = start_sample + int(pixel_x * samples_per_pixel)
-            sample_end = min(end_sample, sample_start + samples_per_pixel)
-
-            if sample_start >= len(audio_data):
-                break
-
-            pixel_data = audio_data[sample_start:sample_end]
-            if len(pixel_data) == 0:
-                points.append((float(pixel_x), float(center_y), float(center_y), None))
-                continue
-
-            # Calculate amplitude
-            max_val = np.max(np.abs(pixel_data))
-            min_val = np.min(pixel_data)
-
-            # Analyze frequency content
-            if len(pixel_data) >= 64:  # Minimum for meaningful FFT
-                try:
-                    # Compute FFT
-                    fft = np.fft.rfft(pixel_data)
-                    freqs = np.fft.rfftfreq(len(pixel_data), 1 / sample_rate)
-                    magnitudes = np.abs(fft)
-
-                    # Find dominant frequency band
-                    band_energies = []
-                    for i in range(len(freq_bands) - 1):
-                        band_mask = (freqs >= freq_bands[i]) & (freqs < freq_bands[i + 1])
-                        band_energy = np.sum(magnitudes[band_mask])
-                        band_energies.append(band_energy)
-
-                    # Get dominant band
-                    if band_energies:
-                        dominant_band = np.argmax(band_energies)
-                        band_ratio = dominant_band / (len(freq_bands) - 1)
-                    else:
-                        band_ratio = 0.5
-
-                except Exception:
-                    band_ratio = 0.5
-            else:
-                band_ratio = 0.5
-
-            # Convert to screen coordinates
-            y_top = center_y - (max_val * amplitude_scale)
-            y_bottom = center_y - (min_val * amplitude_scale)
+        columns = self._visible_columns(audio_data, start_sample, end_sample, width, samples_per_pixel)
 
-            # Apply smoothing if enabled
-            if self.config.smoothing_factor > 0 and len(points) > 0:
-                prev_y_top = points[-1][1]
-                prev_y_bottom = points[-1][2]
-                # Convert back to amplitude for smoothing
-                prev_max = (center_y - prev_y_top) / amplitude_scale
-                prev_min = (center_y - prev_y_bottom) / amplitude_scale
+        # Dominant frequency band of every column
+        band_ratios = self._column_band_ratios(audio_data, sample_rate, columns.starts, samples_per_pixel,
+                                               end_sample, freq_bands)
 
-                # Apply smoothing
-                max_val = prev_max * (1 - self.config.smoothing_factor) + max_val * self.config.smoothing_factor
-                min_val = prev_min * (1 - self.config.smoothing_factor) + min_val * self.config.smoothing_factor
+        # Smoothed amplitude envelope
+        max_values = self._smooth(columns.peak)
+        min_values = self._smooth(columns.min)
 
-                # Recalculate screen coordinates with smoothed values
-                y_top = center_y - (max_val * amplitude_scale)
-                y_bottom = center_y - (min_val * amplitude_scale)
+        y_top = self._to_screen(max_values, center_y, amplitude_scale, height)
+        y_bottom = self._to_screen(min_values, center_y, amplitude_scale, height)
 
-            # Ensure bounds
-            y_top = max(0.0, min(float(height), y_top))
-            y_bottom = max(0.0, min(float(height), y_bottom))
+        # Color based on frequency band
+        return RenderedWaveform(np.arange(len(columns), dtype=np.float64), y_top, y_bottom,
+                                self._frequency_band_colors(band_ratios, max_values))
 
-            # Color based on frequency band
-            color = self._get_frequency_band_color(band_ratio, max_val)
-
-            points.append((float(pixel_x), float(y_top), float(y_bottom), color))
+    def _column_band_ratios(self, audio_data: np.ndarray, sample_rate: int, starts: np.ndarray,
+                            samples_per_pixel: int, end_sample: int, freq_bands: np.ndarray,
+                            max_batch_samples: int = 1 << 22) -> np.ndarray:
+        """
+        Dominant band index / band count of every column (0.5 for columns under 64 samples)
 
-        return points
+        Full columns are transformed together with one rfft per batch of rows;
+        a column clipped at the end of the view is transformed on its own.
+        """
+        band_count = len(freq_bands) - 1
+        ratios = np.full(len(starts), 0.5)
+        if len(starts) == 0:
+            return ratios
+        lengths = np.minimum(starts + samples_per_pixel, end_sample) - starts
+
+        def dominant_bands(rows: np.ndarray) -> np.ndarray:
+            frequencies = np.fft.rfftfreq(rows.shape[1], 1 / sample_rate)
+            magnitudes = np.abs(np.fft.rfft(rows, axis=1))
+            # Band i holds the bins with freq_bands[i] <= f < freq_bands[i + 1]
+            low = np.searchsorted(frequencies, freq_bands[:-1], side='left')
+            high = np.searchsorted(frequencies, freq_bands[1:], side='left')
+            energies = np.zeros((len(rows), band_count))
+            filled = np.flatnonzero(high > low)
+            if len(filled):
+                energies[:, filled] = np.add.reduceat(magnitudes[:, :high[filled[-1]]], low[filled], axis=1)
+            return np.argmax(energies, axis=1)
+
+        try:
+            full = np.flatnonzero(lengths == samples_per_pixel) if samples_per_pixel >= 64 else np.zeros(0, int)
+            batch_rows = max(1, max_batch_samples // samples_per_pixel)
+            for batch_start in range(0, len(full), batch_rows):
+                batch = full[batch_start:batch_start + batch_rows]
+                # Full columns are contiguous, so the batch is one reshaped slice
+                first = starts[batch[0]]
+                rows = np.asarray(audio_data[first:first + len(batch) * samples_per_pixel]).reshape(
+                    len(batch), samples_per_pixel)
+                ratios[batch] = dominant_bands(rows) / band_count
+
+            for index in np.flatnonzero((lengths != samples_per_pixel) & (lengths >= 64)):
+                rows = np.asarray(audio_data[starts[index]:starts[index] + lengths[index]])[np.newaxis, :]
+                ratios[index] = dominant_bands(rows)[0] / band_count
+        except Exception as e:
+            self.logger.debug(f"Frequency band analysis failed: {e}")
+        return ratios
 
     def _render_envelope_follower(self, audio_data: np.ndarray, start_sample: int, end_sample: int,
-                                  width: int, height: int, samples_per_pixel: int) -> List[
-        Tuple[float, float, float, Optional[QColor]]]:
+                                  width: int, height: int, samples_per_pixel: int) -> 'RenderedWaveform':
         """Render waveform using envelope follower"""
-        points = []
         center_y = height / 2
         # Calculate amplitude scale based on dynamic range setting
         amplitude_scale = height * 0.45 * (60.0 / self.config.dynamic_range_db)
@@ -608,202 +618,119 @@ class ProfessionalWaveformRenderer:
         attack_coeff = 1.0 - np.exp(-1.0 / (self.config.envelope_attack * 44100))
         release_coeff = 1.0 - np.exp(-1.0 / (self.config.envelope_release * 44100))
 
-        envelope = 0.0
+        # Calculate current amplitude
+        columns = self._visible_columns(audio_data, start_sample, end_sample, width, samples_per_pixel)
 
-        for pixel_x in range(width):
-            sample_start = start_sample + int(pixel_x * samples_per_pixel)
-            sample_end = min(end_sample, sample_start + samples_per_pixel)
-
-            if sample_start >= len(audio_data):
-                break
-
-            pixel_data = audio_data[sample_start:sample_end]
-            if len(pixel_data) == 0:
-                points.append((float(pixel_x), float(center_y), float(center_y), None))
-                continue
-
-            # Calculate current amplitude
-            current_amp = np.max(np.abs(pixel_data))
-
-            # Apply envelope follower
+        # Apply envelope follower (attack/release switch makes it non-linear, so this stays a scalar loop
+        # over the columns - no per-column numpy or Qt objects)
+        envelope_values = []
+        envelope = 0.0
+        for current_amp in columns.peak.tolist():
             if current_amp > envelope:
                 envelope += (current_amp - envelope) * attack_coeff
             else:
                 envelope += (current_amp - envelope) * release_coeff
+            envelope_values.append(envelope)
+        envelope_values = np.array(envelope_values, dtype=np.float64)
 
-            # Convert to screen coordinates
-            y_top = center_y - (envelope * amplitude_scale)
-            y_bottom = center_y + (envelope * amplitude_scale)
-
-            # Ensure bounds
-            y_top = max(0.0, min(float(height), y_top))
-            y_bottom = max(0.0, min(float(height), y_bottom))
-
-            # Color based on envelope level
-            color = self._get_envelope_color(envelope)
-
-            points.append((float(pixel_x), float(y_top), float(y_bottom), color))
+        # Convert to screen coordinates
+        y_top = self._to_screen(envelope_values, center_y, amplitude_scale, height)
+        y_bottom = self._to_screen(-envelope_values, center_y, amplitude_scale, height)
 
-        return points
+        # Color based on envelope level
+        return RenderedWaveform(np.arange(len(columns), dtype=np.float64), y_top, y_bottom,
+                                self._envelope_colors(envelope_values))
 
     def _render_basic_minmax(self, audio_data: np.ndarray, start_sample: int, end_sample: int,
-                             width: int, height: int, samples_per_pixel: int) -> List[
-        Tuple[float, float, float, Optional[QColor]]]:
+                             width: int, height: int, samples_per_pixel: int) -> 'RenderedWaveform':
         """Basic min/max rendering (fallback)"""
-        points = []
         center_y = height / 2
         # Calculate amplitude scale based on dynamic range setting
         amplitude_scale = height * 0.45 * (60.0 / self.config.dynamic_range_db)
 
-        for pixel_x in range(width):
-            sample_start = start_sample + int(pixel_x * samples_per_pixel)
-            sample_end = min(end_sample, sample_start + samples_per_pixel)
-
-            if sample_start >= len(audio_data):
-                break
-
-            pixel_data = audio_data[sample_start:sample_end]
-            if len(pixel_data) == 0:
-                points.append((float(pixel_x), float(center_y), float(center_y), None))
-                continue
-
-            max_val = np.max(pixel_data)
-            min_val = np.min(pixel_data)
-
-            # Apply smoothing if enabled
-            if self.config.smoothing_factor > 0 and len(points) > 0:
-                prev_y_top = points[-1][1]
-                prev_y_bottom = points[-1][2]
-                # Convert back to amplitude for smoothing
-                prev_max = (center_y - prev_y_top) / amplitude_scale
-                prev_min = (center_y - prev_y_bottom) / amplitude_scale
-
-                # Apply smoothing
-                max_val = prev_max * (1 - self.config.smoothing_factor) + max_val * self.config.smoothing_factor
-                min_val = prev_min * (1 - self.config.smoothing_factor) + min_val * self.config.smoothing_factor
-
-            # Convert to screen coordinates
-            y_top = center_y - (max_val * amplitude_scale)
-            y_bottom = center_y - (min_val * amplitude_scale)
-
-            # Ensure bounds
-            y_top = max(0.0, min(float(height), y_top))
-            y_bottom = max(0.0, min(float(height), y_bottom))
-
-            points.append((float(pixel_x), float(y_top), float(y_bottom), None))
+        # Per-pixel min/max from the level-of-detail pyramid
+        columns = self._visible_columns(audio_data, start_sample, end_sample, width, samples_per_pixel)
+        max_values = self._smooth(columns.max)
+        min_values = self._smooth(columns.min)
 
-        return points
+        # Convert to screen coordinates
+        return RenderedWaveform(np.arange(len(columns), dtype=np.float64),
+                                self._to_screen(max_values, center_y, amplitude_scale, height),
+                                self._to_screen(min_values, center_y, amplitude_scale, height))
 
-    def _get_energy_color(self, energy: float) -> QColor:
-        """Get color based on energy level"""
-        # Ensure we have the color scheme in our palettes
-        if self.config.color_scheme not in self._color_palettes:
-            # Fallback to a default color scheme
-            color_scheme = ColorScheme.PROFESSIONAL_DARK
-        else:
-            color_scheme = self.config.color_scheme
+    def _current_palette(self) -> Dict[str, Any]:
+        """Palette of the configured color scheme (PROFESSIONAL_DARK if unknown)"""
+        color_scheme = self.config.color_scheme if self.config.color_scheme in self._color_palettes else ColorScheme.PROFESSIONAL_DARK
+        return self._color_palettes[color_scheme]
 
-        palette = self._color_palettes[color_scheme]
+    def _palette_colors(self, names: List[str]) -> np.ndarray:
+        """Packed colors of palette entries, indexable by a per-column palette index"""
+        palette = self._current_palette()
+        return np.array([palette[name].rgba() for name in names], dtype=np.uint32)
 
+    def _energy_colors(self, energy: np.ndarray) -> np.ndarray:
+        """Colors based on energy level"""
         if self.config.color_scheme == ColorScheme.ENERGY_HEAT:
             # Heat map coloring
-            if energy < 0.1:
-                return QColor(64, 0, 0)
-            elif energy < 0.3:
-                return QColor(128, 32, 0)
-            elif energy < 0.6:
-                return QColor(255, 64, 0)
-            elif energy < 0.8:
-                return QColor(255, 128, 0)
-            else:
-                return QColor(255, 255, 128)
-        else:
-            # Use palette primary color with energy-based alpha
-            color = palette['primary']
-            alpha = int(128 + min(energy * 127, 127))  # Ensure alpha doesn't exceed 255
-            color.setAlpha(alpha)
-            return color
-
-    def _get_spectral_color(self, spectral_centroid: float, amplitude: float) -> QColor:
-        """Get color based on spectral centroid"""
+            heat = np.array([QColor(64, 0, 0).rgba(), QColor(128, 32, 0).rgba(), QColor(255, 64, 0).rgba(),
+                             QColor(255, 128, 0).rgba(), QColor(255, 255, 128).rgba()], dtype=np.uint32)
+            return heat[np.searchsorted([0.1, 0.3, 0.6, 0.8], energy, side='right')]
+
+        # Use palette primary color with energy-based alpha
+        primary = self._current_palette()['primary']
+        alpha = (128 + np.minimum(energy * 127, 127)).astype(np.int64)  # Ensure alpha doesn't exceed 255
+        return pack_rgba(primary.red(), primary.green(), primary.blue(), alpha)
+
+    def _spectral_colors(self, spectral_centroid: np.ndarray, amplitude: np.ndarray) -> np.ndarray:
+        """Colors based on spectral centroid"""
         if self.config.color_scheme == ColorScheme.SPECTRAL_RAINBOW:
             # Map spectral centroid to hue
-            hue = spectral_centroid
-            saturation = min(1.0, amplitude * 2)
+            saturation = np.minimum(1.0, amplitude * 2)
             value = 0.8 + (amplitude * 0.2)
 
-            rgb = colorsys.hsv_to_rgb(hue, saturation, value)
-            return QColor(int(rgb[0] * 255), int(rgb[1] * 255), int(rgb[2] * 255))
-        else:
-            # Use palette with spectral modulation
-            color_scheme = self.config.color_scheme if self.config.color_scheme in self._color_palettes else ColorScheme.PROFESSIONAL_DARK
-            palette = self._color_palettes[color_scheme]
-            base_color = palette['primary']
-
-            # Modulate color based on spectral centroid
-            r, g, b = base_color.red(), base_color.green(), base_color.blue()
-
-            if spectral_centroid < 0.33:  # Low frequencies - more red
-                r = min(255, int(r * (1 + spectral_centroid)))
-            elif spectral_centroid < 0.66:  # Mid frequencies - more green
-                g = min(255, int(g * (1 + spectral_centroid)))
-            else:  # High frequencies - more blue
-                b = min(255, int(b * (1 + spectral_centroid)))
-
-            return QColor(r, g, b)
-
-    def _get_dynamic_range_color(self, dynamic_range: float) -> QColor:
-        """Get color based on dynamic range"""
-        color_scheme = self.config.color_scheme if self.config.color_scheme in self._color_palettes else ColorScheme.PROFESSIONAL_DARK
-        palette = self._color_palettes[color_scheme]
-
-        if dynamic_range < 0.1:
-            return palette['secondary']  # Low dynamic range
-        elif dynamic_range < 0.5:
-            return palette['primary']  # Medium dynamic range
-        else:
-            return palette['accent']  # High dynamic range
-
-    def _get_frequency_band_color(self, band_ratio: float, amplitude: float) -> QColor:
-        """Get color based on dominant frequency band"""
-        if self.config.color_scheme == ColorScheme.FREQUENCY_BASED:
-            # Map frequency bands to colors
-            alpha = int(128 + min(amplitude * 127, 127))  # Ensure alpha doesn't exceed 255
-            if band_ratio < 0.2:  # Sub-bass/Bass
-                return QColor(255, 0, 0, alpha)
-            elif band_ratio < 0.4:  # Low-mid
-                return QColor(255, 128, 0, alpha)
-            elif band_ratio < 0.6:  # Mid
-                return QColor(255, 255, 0, alpha)
-            elif band_ratio < 0.8:  # High-mid
-                return QColor(128, 255, 0, alpha)
-            else:  # High/Presence
-                return QColor(0, 255, 255, alpha)
-        else:
-            color_scheme = self.config.color_scheme if self.config.color_scheme in self._color_palettes else ColorScheme.PROFESSIONAL_DARK
-            palette = self._color_palettes[color_scheme]
-            return palette['primary']
-
-    def _get_envelope_color(self, envelope: float) -> QColor:
-        """Get color based on envelope level"""
-        color_scheme = self.config.color_scheme if self.config.color_scheme in self._color_palettes else ColorScheme.PROFESSIONAL_DARK
-        palette = self._color_palettes[color_scheme]
-
-        # Interpolate between colors based on envelope level
-        if envelope < 0.33:
-            # Low level - use secondary color
-            return palette['secondary']
-        elif envelope < 0.66:
-            # Medium level - use primary color
-            return palette['primary']
-        else:
-            # High level - use accent color
-            return palette['accent']
+            red, green, blue = hsv_to_rgb(spectral_centroid, saturation, value)
+            return pack_rgba((red * 255).astype(np.int64), (green * 255).astype(np.int64),
+                             (blue * 255).astype(np.int64))
+
+        # Use palette with spectral modulation
+        base_color = self._current_palette()['primary']
+        red = np.full(len(spectral_centroid), base_color.red())
+        green = np.full(len(spectral_centroid), base_color.green())
+        blue = np.full(len(spectral_centroid), base_color.blue())
+
+        # Low frequencies - more red, mid frequencies - more green, high frequencies - more blue
+        low = spectral_centroid < 0.33
+        mid = ~low & (spectral_centroid < 0.66)
+        high = ~low & ~mid
+        red[low] = np.minimum(255, (red[low] * (1 + spectral_centroid[low])).astype(np.int64))
+        green[mid] = np.minimum(255, (green[mid] * (1 + spectral_centroid[mid])).astype(np.int64))
+        blue[high] = np.minimum(255, (blue[high] * (1 + spectral_centroid[high])).astype(np.int64))
+        return pack_rgba(red, green, blue)
+
+    def _dynamic_range_colors(self, dynamic_range: np.ndarray) -> np.ndarray:
+        """Colors based on dynamic range (low: secondary, medium: primary, high: accent)"""
+        colors = self._palette_colors(['secondary', 'primary', 'accent'])
+        return colors[np.searchsorted([0.1, 0.5], dynamic_range, side='right')]
+
+    def _frequency_band_colors(self, band_ratio: np.ndarray, amplitude: np.ndarray) -> np.ndarray:
+        """Colors based on dominant frequency band"""
+        if self.config.color_scheme != ColorScheme.FREQUENCY_BASED:
+            return np.full(len(band_ratio), self._current_palette()['primary'].rgba(), dtype=np.uint32)
+
+        # Map frequency bands to colors: sub-bass/bass, low-mid, mid, high-mid, high/presence
+        band_colors = np.array([[255, 0, 0], [255, 128, 0], [255, 255, 0], [128, 255, 0], [0, 255, 255]])
+        red, green, blue = band_colors[np.searchsorted([0.2, 0.4, 0.6, 0.8], band_ratio, side='right')].T
+        alpha = (128 + np.minimum(amplitude * 127, 127)).astype(np.int64)  # Ensure alpha doesn't exceed 255
+        return pack_rgba(red, green, blue, alpha)
+
+    def _envelope_colors(self, envelope: np.ndarray) -> np.ndarray:
+        """Colors based on envelope level (low: secondary, medium: primary, high: accent)"""
+        colors = self._palette_colors(['secondary', 'primary', 'accent'])
+        return colors[np.searchsorted([0.33, 0.66], envelope, side='right')]
 
     def get_gradient_for_scheme(self, width: int, height: int) -> QLinearGradient:
         """Get gradient for current color scheme"""
-        color_scheme = self.config.color_scheme if self.config.color_scheme in self._color_palettes else ColorScheme.PROFESSIONAL_DARK
-        palette = self._color_palettes[color_scheme]
+        palette = self._current_palette()
         gradient = QLinearGradient(0, 0, 0, height)
 
         for stop, color in palette['gradient_stops']:
@@ -811,31 +738,133 @@ class ProfessionalWaveformRenderer:
 
         return gradient
 
+    def _gradient_rows(self, height: int) -> np.ndarray:
+        """Straight-alpha RGBA (0-1) of the scheme gradient at the center of every row"""
+        stops = self._current_palette()['gradient_stops']
+        positions = [stop for stop, _ in stops]
+        channels = [[color.redF(), color.greenF(), color.blueF(), color.alphaF()] for _, color in stops]
+        rows = (np.arange(height) + 0.5) / max(height, 1)
+        return np.stack([np.interp(rows, positions, [c[i] for c in channels]) for i in range(4)], axis=1)
+
+    def render_waveform_image(self, rendered: 'RenderedWaveform', width: int, height: int,
+                              fill_opacity: float = 0.85, color_opacity: float = 0.7) -> QImage:
+        """
+        Rasterize rendered columns into a transparent ARGB32 (premultiplied) image
+
+        Same layers the widget used to paint with one QPainterPath and one pen
+        per pixel: the scheme gradient between the upper and lower edge, the
+        per-column colors over it and a one pixel outline along both edges.
+        Every layer is a vertical span per column, so a pixel is a column term
+        plus a row term and the image is built with array operations over the
+        rows the waveform covers.
+
+        Args:
+            rendered: Output of render_waveform
+            width: Image width in pixels
+            height: Image height in pixels
+            fill_opacity: Opacity of the gradient fill
+            color_opacity: Opacity of the per-column colors
+
+        Returns:
+            QImage to draw at the top-left corner of the waveform area
+        """
+        pixels = np.zeros((height, width), dtype=np.uint32)
+        if len(rendered) and width > 0 and height > 0:
+            # Premultiplied gradient per row in memory order of ARGB32 (blue, green, red, alpha)
+            gradient = self._gradient_rows(height).astype(np.float32)
+            fill_alpha = gradient[:, 3] * np.float32(fill_opacity)
+            row_terms = np.stack([gradient[:, 2], gradient[:, 1], gradient[:, 0], np.ones(height, np.float32)],
+                                 axis=1) * fill_alpha[:, np.newaxis] * 255
+            outline = QColor(self._current_palette()['primary']).lighter(120)
+            outline.setAlpha(255)
+
+            for channel in range(rendered.channels):
+                self._rasterize_channel(pixels, rendered, channel, row_terms, np.uint32(outline.rgba()),
+                                        color_opacity)
+
+        image = QImage(pixels.data, width, height, width * 4, QImage.Format_ARGB32_Premultiplied)
+        return image.copy()  # Detach from the numpy buffer
+
+    @staticmethod
+    def _rasterize_channel(pixels: np.ndarray, rendered: 'RenderedWaveform', channel: int, row_terms: np.ndarray,
+                           outline: np.uint32, color_opacity: float):
+        """Composite one channel of rendered columns into pixels (see render_waveform_image)"""
+        height, width = pixels.shape
+        x = rendered.x[channel::rendered.channels].astype(np.int64)
+        top = np.clip(rendered.top[channel::rendered.channels].astype(np.int64), 0, height - 1)
+        bottom = np.clip(rendered.bottom[channel::rendered.channels].astype(np.int64), 0, height - 1)
+        visible = (x >= 0) & (x < width)
+        if not np.any(visible):
+            return
+
+        # Outline: both edges joined to the previous column, closed through the center at both ends
+        previous_top = np.concatenate([top[:1], top[:-1]])
+        previous_bottom = np.concatenate([bottom[:1], bottom[:-1]])
+        spans = {
+            'upper': np.minimum(top, bottom), 'lower': np.maximum(top, bottom),
+            'top_low': np.minimum(top, previous_top), 'top_high': np.maximum(top, previous_top),
+            'bottom_low': np.minimum(bottom, previous_bottom), 'bottom_high': np.maximum(bottom, previous_bottom),
+        }
+        for end in (0, -1):
+            spans['top_low'][end] = min(spans['top_low'][end], spans['upper'][end])
+            spans['top_high'][end] = max(spans['top_high'][end], spans['lower'][end])
+
+        # Scatter per-column spans to image columns; columns without data get empty spans
+        x = x[visible]
+        columns = {}
+        for name, values in spans.items():
+            columns[name] = np.full(width, height if name in ('upper', 'top_low', 'bottom_low') else -1, np.int32)
+            columns[name][x] = values[visible]
+
+        first_row = int(min(columns['upper'].min(), columns['top_low'].min(), columns['bottom_low'].min()))
+        last_row = int(max(columns['lower'].max(), columns['top_high'].max(), columns['bottom_high'].max())) + 1
+        rows = np.arange(first_row, last_row, dtype=np.int32)[:, np.newaxis]
+        band = pixels[first_row:last_row]
+        inside = (rows >= columns['upper']) & (rows <= columns['lower'])
+
+        # Column colors over the gradient: value = color term (per column) + gradient term (per row) * (1 - alpha)
+        if rendered.rgba is not None:
+            colors = np.zeros(width, dtype=np.uint32)
+            colors[x] = rendered.rgba[channel::rendered.channels][visible]
+            color_bytes = colors.view(np.uint8).reshape(width, 4).astype(np.float32)
+            color_alpha = color_bytes[:, 3] / 255 * np.float32(color_opacity)
+            color_bytes[:, 3] = 255
+            column_terms = color_bytes * color_alpha[:, np.newaxis] + np.float32(0.5)
+            below = 1 - color_alpha
+            term = np.empty((last_row - first_row, width), dtype=np.float32)
+            filled = np.empty((last_row - first_row, width, 4), dtype=np.uint8)
+            for byte in range(4):
+                np.multiply(row_terms[first_row:last_row, byte, np.newaxis], below, out=term)
+                term += column_terms[:, byte]
+                filled[:, :, byte] = term
+            np.copyto(band, filled.view(np.uint32)[:, :, 0], where=inside)
+        else:
+            filled = np.ascontiguousarray((row_terms[first_row:last_row] + 0.5).astype(np.uint8)).view(np.uint32)
+            np.copyto(band, filled, where=inside)
+
+        edge = ((rows >= columns['top_low']) & (rows <= columns['top_high'])) | \
+               ((rows >= columns['bottom_low']) & (rows <= columns['bottom_high']))
+        np.copyto(band, outline, where=edge)
+
     def _render_stereo_separated(self, audio_data: np.ndarray, sample_rate: int,
-                                 width: int, height: int, offset: float, zoom: float) -> List[
-        Tuple[float, float, float, Optional[QColor]]]:
+                                 width: int, height: int, offset: float, zoom: float) -> 'RenderedWaveform':
         """Render stereo channels separately"""
         # Split stereo channels
         left_channel = audio_data[0] if audio_data.shape[0] == 2 else audio_data[:, 0]
         right_channel = audio_data[1] if audio_data.shape[0] == 2 else audio_data[:, 1]
 
         # Render each channel in its own half
-        left_points = self._render_mono_waveform(left_channel, sample_rate, width, height // 2, offset, zoom)
-        right_points = self._render_mono_waveform(right_channel, sample_rate, width, height // 2, offset, zoom)
-
-        # Combine points with offset for right channel
-        combined_points = []
-        for i in range(min(len(left_points), len(right_points))):
-            left_x, left_y_top, left_y_bottom, left_color = left_points[i]
-            right_x, right_y_top, right_y_bottom, right_color = right_points[i]
+        left = self._render_mono_waveform(left_channel, sample_rate, width, height // 2, offset, zoom)
+        right = self._render_mono_waveform(right_channel, sample_rate, width, height // 2, offset, zoom)
 
-            # Left channel in top half
-            combined_points.append((float(left_x), float(left_y_top), float(left_y_bottom), left_color))
+        # Interleave the channels, right channel in the bottom half (offset by height/2)
+        count = min(len(left), len(right))
 
-            # Right channel in bottom half (offset by height/2)
-            right_y_top_offset = right_y_top + height // 2
-            right_y_bottom_offset = right_y_bottom + height // 2
-            combined_points.append(
-                (float(right_x), float(right_y_top_offset), float(right_y_bottom_offset), right_color))
+        def interleave(left_values, right_values):
+            return np.stack([left_values[:count], right_values[:count]], axis=1).ravel()
 
-        return combined_points
\ No newline at end of file
+        rgba = None
+        if left.rgba is not None and right.rgba is not None:
+            rgba = interleave(left.rgba, right.rgba)
+        return RenderedWaveform(interleave(left.x, right.x), interleave(left.top, right.top + height // 2),
+                                interleave(left.bottom, right.bottom + height // 2), rgba, channels=2)
@@ -0,0 +1,161 @@
+"""
+Waveform Tile Cache
+===================
+
+Off-screen tiles of the waveform layer for WaveformView.
+
+The waveform is cut into tiles of TILE_WIDTH pixel columns in the renderer's
+own column space: at a given samples-per-column, tile N covers the samples
+from N * TILE_WIDTH * samples_per_column on. A tile stays valid while the
+zoom level, height, render mode, colors, settings and signal stay the same,
+so panning only renders the tiles that scroll into view and playhead or mouse
+marker repaints render no tiles at all.
+
+Features:
+- Tile keys by zoom level (samples per column), tile index, mode and color scheme
+- Thread-safe tile rendering to QImage (prefetching in a background thread)
+- LRU cache of QPixmap tiles with a memory budget
+
+Author: Michael Lyman
+Version: 1.0.0
+License: MIT
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PySide6.QtGui import QImage, QPixmap
+
+from views.waveform.enhanced_waveform_renderer import (
+    ColorScheme, ProfessionalWaveformRenderer, RenderedWaveform, WaveformRenderMode
+)
+
+# Pixel columns per tile
+TILE_WIDTH = 256
+
+# Columns rendered before a tile (and cropped) so smoothing continues across tile edges
+TILE_LEAD_COLUMNS = 32
+
+# Default memory budget of the tile cache
+DEFAULT_TILE_BUDGET_BYTES = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class TileKey:
+    """Identity of one rendered tile"""
+    samples_per_column: int  # zoom level
+    index: int  # tile number from the start of the track
+    mode: WaveformRenderMode
+    color_scheme: ColorScheme
+    height: int
+    settings: Tuple = ()  # signal identity and the rendering settings the tile depends on
+
+
+def samples_per_column(total_samples: int, width: int, zoom: float) -> int:
+    """Samples per pixel column of a view (same rounding as ProfessionalWaveformRenderer)"""
+    return max(1, int(total_samples / (width * zoom)))
+
+
+def render_tile_image(renderer: ProfessionalWaveformRenderer, audio_data: Any, sample_rate: int,
+                      total_samples: int, key: TileKey) -> Optional[QImage]:
+    """
+    Render one tile (safe to call outside the GUI thread)
+
+    The renderer config must match key.mode and key.color_scheme.
+
+    Args:
+        renderer: Renderer used for the tile
+        audio_data: Signal in any form render_waveform accepts
+        sample_rate: Sample rate in Hz
+        total_samples: Samples per channel of audio_data
+        key: Tile to render
+
+    Returns:
+        TILE_WIDTH x key.height image, or None if the tile starts after the end of the track
+    """
+    spc = key.samples_per_column
+    first_column = key.index * TILE_WIDTH
+    if first_column * spc >= total_samples:
+        return None
+
+    # Lead-in columns continue the smoothing from the previous tile; one extra column after the
+    # tile keeps its right edge open (the outline only closes at the real end of the track)
+    lead = min(TILE_LEAD_COLUMNS, first_column)
+    width = lead + TILE_WIDTH + 1
+    start_sample = (first_column - lead) * spc
+
+    # Offset and zoom that make the renderer start at start_sample with exactly spc samples per column
+    offset = (start_sample + 0.5) / total_samples
+    zoom = total_samples / (width * (spc + 0.5))
+    rendered = renderer.render_waveform(audio_data, sample_rate, width, key.height, offset, zoom)
+
+    shifted = RenderedWaveform(rendered.x - lead, rendered.top, rendered.bottom, rendered.rgba, rendered.channels)
+    return renderer.render_waveform_image(shifted, TILE_WIDTH, key.height)
+
+
+class WaveformTileCache:
+    """LRU cache of waveform tile pixmaps with a memory budget"""
+
+    def __init__(self, max_bytes: int = DEFAULT_TILE_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self._tiles: "OrderedDict[TileKey, QPixmap]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _pixmap_bytes(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def get(self, key: TileKey) -> Optional[QPixmap]:
+        """Cached tile (marked as most recently used), or None"""
+        pixmap = self._tiles.get(key)
+        if pixmap is None:
+            self.misses += 1
+            return None
+        self._tiles.move_to_end(key)
+        self.hits += 1
+        return pixmap
+
+    def put(self, key: TileKey, pixmap: QPixmap):
+        """Store a tile, evicting least recently used tiles over the budget"""
+        previous = self._tiles.pop(key, None)
+        if previous is not None:
+            self._bytes -= self._pixmap_bytes(previous)
+        self._tiles[key] = pixmap
+        self._bytes += self._pixmap_bytes(pixmap)
+
+        # The newest tile always stays, even if it alone exceeds the budget
+        while self._bytes > self.max_bytes and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self._bytes -= self._pixmap_bytes(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every tile"""
+        self._tiles.clear()
+        self._bytes = 0
+
+    def __contains__(self, key: TileKey) -> bool:
+        return key in self._tiles
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def size_bytes(self) -> int:
+        """Memory held by the cached tiles"""
+        return self._bytes
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache statistics"""
+        return {
+            'tiles': len(self._tiles),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
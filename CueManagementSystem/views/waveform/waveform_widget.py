@@ -2,43 +2,46 @@ from PySide6.QtWidgets import QWidget, QApplication, QMessageBox
 from PySide6.QtCore import Qt, Signal, QRect, QSize, QPoint, Slot, QTimer, QThread
 from PySide6.QtGui import (
     QPainter, QPen, QColor, QBrush, QLinearGradient,
-    QPainterPath, QFontMetrics, QFont
+    QPainterPath, QFontMetrics, QFont, QPixmap
 )
 import math
 import logging
 import time
 import numpy as np
+from dataclasses import replace
 from typing import Optional, List, Tuple, Dict, Any
 from views.waveform.enhanced_waveform_renderer import (
     ProfessionalWaveformRenderer, WaveformRenderMode, ColorScheme, RenderingConfig
 )
+from views.waveform.waveform_tiles import (
+    TILE_WIDTH, TileKey, WaveformTileCache, render_tile_image, samples_per_column
+)
+from utils.audio.peak_index import PeakIndex
 
 
 class BackgroundRenderer(QThread):
-    """Background thread for expensive rendering operations"""
-    rendering_complete = Signal(object)  # Emits rendered data
+    """Background thread for expensive rendering operations (prefetches waveform tiles)"""
+    tile_rendered = Signal(object, object)  # Emits (TileKey, QImage) per rendered tile
 
-    def __init__(self, renderer, audio_data, sample_rate, width, height, offset, zoom):
+    def __init__(self, renderer, audio_data, sample_rate, total_samples, tile_keys):
         super().__init__()
         self.renderer = renderer
         self.audio_data = audio_data
         self.sample_rate = sample_rate
-        self.width = width
-        self.height = height
-        self.offset = offset
-        self.zoom = zoom
+        self.total_samples = total_samples
+        self.tile_keys = list(tile_keys)
         self.should_stop = False
 
     def run(self):
         """Run the rendering in background"""
-        if not self.should_stop:
+        for key in self.tile_keys:
+            if self.should_stop:
+                break
             try:
-                result = self.renderer.render_waveform_points(
-                    self.audio_data, self.sample_rate,
-                    self.width, self.height, self.offset, self.zoom
-                )
-                if not self.should_stop:
-                    self.rendering_complete.emit(result)
+                image = render_tile_image(self.renderer, self.audio_data, self.sample_rate,
+                                          self.total_samples, key)
+                if image is not None and not self.should_stop:
+                    self.tile_rendered.emit(key, image)
             except Exception as e:
                 logging.error(f"Background rendering error: {e}")
 
@@ -122,10 +125,18 @@ class WaveformView(QWidget):
 
         # OPTIMIZATION: Performance improvements
         self.visible_peaks = []  # Only peaks in current view
+        self._visible_peak_positions = np.zeros(0, dtype=np.int64)  # Their positions in the detected peak index
         self.peak_cache: Dict[str, Any] = {}  # Cache rendered peak markers
-        self.waveform_cache = None  # Cache waveform rendering
-        self.last_render_time = 0
-        self.render_throttle = 0.016  # 60 FPS max
+
+        # Sample-sorted peak indexes (visible ranges and hit tests by binary search) and their marker
+        # geometry per zoom level
+        self._detected_peak_index: Optional[PeakIndex] = None
+        self._detected_peak_index_source: Optional[Tuple] = None
+        self._manual_peak_index: Optional[PeakIndex] = None
+        self._manual_peak_index_source: Optional[List] = None
+        self._top_peak_mask: Optional[Tuple] = None
+        self._peak_geometry: Dict[str, Tuple] = {}
+        self.waveform_cache = WaveformTileCache()  # Off-screen waveform tiles (LRU, memory budget)
 
         # SEGMENT-BASED: No artificial limits - show all segment-appropriate peaks
         self.max_visible_peaks = None  # No artificial limits
@@ -167,13 +178,16 @@ class WaveformView(QWidget):
         self.current_color_scheme = ColorScheme.PROFESSIONAL_DARK
         self.use_professional_rendering = True  # Always enabled
 
-        # Background rendering for performance
+        # Background rendering for performance: tiles next to the viewport are prefetched
+        # with a separate renderer so the painting renderer is never shared between threads
         self.background_renderer = None
+        self.prefetch_renderer = ProfessionalWaveformRenderer(replace(self.rendering_config))
         self.background_render_timer = QTimer()
         self.background_render_timer.setSingleShot(True)
         self.background_render_timer.timeout.connect(self._start_background_render)
         self.background_render_delay = 100  # 100ms delay before background render
-        self.cached_render_result = None
+        self.tile_prefetch_count = 2  # Tiles prefetched on each side of the viewport
+        self._pending_tile_prefetch = None  # (waveform data, total samples, tile keys)
 
         # Initialize warning tracking
         self._logged_warnings = {
@@ -214,23 +228,10 @@ class WaveformView(QWidget):
         self._init_logging()
 
     def smart_update(self):
-        """Smart update that uses background rendering for expensive operations"""
-        # Check if we need expensive rendering
-        complex_modes = [
-            WaveformRenderMode.SPECTRAL_COLOR,
-            WaveformRenderMode.FREQUENCY_BANDS,
-            WaveformRenderMode.HARMONIC_PERCUSSIVE
-        ]
-
-        if (self.current_render_mode in complex_modes and
-                self.analyzer and hasattr(self.analyzer, 'waveform_data') and
-                len(self.analyzer.waveform_data) > 100000):  # Large datasets
-
-            # Use background rendering for large, complex datasets
-            self.background_render_timer.start(self.background_render_delay)
-        else:
-            # Use immediate rendering for simple cases
-            self.update()
+        """Smart update after a rendering setting changed"""
+        # Tiles are keyed by the settings: the repaint renders the visible tiles for the new
+        # settings and the background renderer prefetches the ones around them
+        self.update()
 
     def _init_colors(self):
         """Initialize color scheme for the widget"""
@@ -587,15 +588,6 @@ class WaveformView(QWidget):
     @profile_method("paintEvent")
     def paintEvent(self, event) -> None:
         """Optimized paint event handler with performance improvements"""
-        start_time = time.time()
-
-        # OPTIMIZATION: Throttle rendering for performance
-        current_time = time.time()
-        if current_time - self.last_render_time < self.render_throttle:
-            return  # Skip this render to maintain 60 FPS
-
-        self.last_render_time = current_time
-
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing, False)  # Disable for performance
 
@@ -754,93 +746,80 @@ class WaveformView(QWidget):
                 if len(waveform_data) > 0:
                     self.logger.debug(f"First element type: {type(waveform_data[0])}")
 
-            # Get professional waveform points
-            points = self.professional_renderer.render_waveform_points(
-                waveform_data,
-                self.analyzer.sample_rate,
-                rect.width(),
-                rect.height(),
-                self.offset,
-                self.zoom_factor
-            )
+            # Reuse the analyzer's level-of-detail pyramid instead of building a second one
+            self.professional_renderer.set_pyramid(getattr(self.analyzer, 'waveform_pyramid', None))
 
-            if not points:
+            total_samples = self._waveform_sample_count(waveform_data)
+            if total_samples == 0:
                 self.logger.warning("No professional waveform points returned, falling back to basic rendering")
                 self._draw_basic_waveform(painter, rect)
                 return
 
-            # Get professional gradient
-            gradient = self.professional_renderer.get_gradient_for_scheme(rect.width(), rect.height())
-
-            # Create path for waveform
-            path = QPainterPath()
-            center_y = rect.top() + (rect.height() / 2)
-
-            if len(points) > 0:
-                # Start at the center
-                first_point = points[0]
-                path.moveTo(rect.left() + first_point[0], center_y)
-
-                # Add top edge with color information
-                for x, y_top, y_bottom, color in points:
-                    path.lineTo(rect.left() + int(float(x)), rect.top() + int(float(y_top)))
-
-                # Add right edge to center
-                if points:
-                    last_point = points[-1]
-                    path.lineTo(rect.left() + int(float(last_point[0])), center_y)
-
-                # Add bottom edge (in reverse)
-                for x, y_top, y_bottom, color in reversed(points):
-                    path.lineTo(rect.left() + int(float(x)), rect.top() + int(float(y_bottom)))
-
-                # Close path
-                path.lineTo(rect.left() + int(float(points[0][0])), center_y)
-
-                # Draw filled waveform with professional gradient
-                painter.setOpacity(0.85)
-                painter.fillPath(path, QBrush(gradient))
-
-                # Draw individual colored segments if colors are provided
-                if any(point[3] is not None for point in points):
-                    self._draw_colored_waveform_segments(painter, rect, points)
-
-                # Draw outline
-                painter.setOpacity(1.0)
-                # Get outline color with fallback
-                color_scheme = self.current_color_scheme if self.current_color_scheme in self.professional_renderer._color_palettes else ColorScheme.PROFESSIONAL_DARK
-                outline_color = self.professional_renderer._color_palettes[color_scheme]['primary']
-                outline_pen = QPen(outline_color.lighter(120), 1.0)
-                painter.setPen(outline_pen)
-                painter.drawPath(path)
+            # Visible tiles at this zoom level; the view starts inside the first one
+            spc = samples_per_column(total_samples, rect.width(), self.zoom_factor)
+            first_column = min(int(self.offset * total_samples), total_samples - 1) / spc
+            first_tile = int(first_column // TILE_WIDTH)
+            last_tile = int((first_column + rect.width() - 1) // TILE_WIDTH)
+
+            # Only tiles that are not cached yet (newly exposed by panning or zooming) are rendered
+            painter.save()
+            painter.setClipRect(rect)
+            for index in range(first_tile, last_tile + 1):
+                key = self._tile_key(spc, index, rect.height())
+                pixmap = self.waveform_cache.get(key)
+                if pixmap is None:
+                    image = render_tile_image(self.professional_renderer, waveform_data,
+                                              self.analyzer.sample_rate, total_samples, key)
+                    if image is None:
+                        break  # Past the end of the track
+                    pixmap = QPixmap.fromImage(image)
+                    self.waveform_cache.put(key, pixmap)
+                painter.drawPixmap(rect.left() + round(index * TILE_WIDTH - first_column), rect.top(), pixmap)
+            painter.restore()
+
+            self._schedule_tile_prefetch(waveform_data, total_samples, spc, first_tile, last_tile, rect.height())
 
         except Exception as e:
             self.logger.error(f"Error in professional waveform rendering: {e}", exc_info=True)
             self.logger.info("Falling back to basic waveform rendering")
             self._draw_basic_waveform(painter, rect)
 
-    def _draw_colored_waveform_segments(self, painter: QPainter, rect: QRect,
-                                        points: List[Tuple[float, float, float, Optional[QColor]]]) -> None:
-        """Draw individual colored segments for spectral/frequency-based rendering"""
-        painter.setOpacity(0.7)
-
-        for i, (x, y_top, y_bottom, color) in enumerate(points):
-            if color is not None:
-                # Draw vertical line segment with specific color
-                pen = QPen(color, 1.0)
-                painter.setPen(pen)
-
-                # Convert all coordinates to integers to avoid Qt drawing errors
-                x_pos = int(rect.left() + float(x))
-                y_top_pos = int(rect.top() + float(y_top))
-                y_bottom_pos = int(rect.top() + float(y_bottom))
-
-                # Ensure coordinates are within valid ranges
-                x_pos = max(0, min(x_pos, 32767))  # Qt coordinate limits
-                y_top_pos = max(0, min(y_top_pos, 32767))
-                y_bottom_pos = max(0, min(y_bottom_pos, 32767))
+    def _waveform_sample_count(self, waveform_data) -> int:
+        """Samples per channel of the analyzer's waveform data"""
+        if isinstance(waveform_data, list) and len(waveform_data) > 0 and isinstance(waveform_data[0], np.ndarray):
+            waveform_data = waveform_data[0]
+        shape = np.shape(waveform_data)
+        if len(shape) == 2:
+            return max(shape)  # [channels, samples] or [samples, channels]
+        return int(np.prod(shape))
+
+    def _tile_key(self, spc: int, index: int, height: int) -> TileKey:
+        """Key of a waveform tile for the current signal and rendering settings"""
+        config = self.rendering_config
+        waveform_data = self.analyzer.waveform_data
+        pyramid = getattr(self.analyzer, 'waveform_pyramid', None)
+        settings = (id(waveform_data), getattr(pyramid, 'token', None), self.analyzer.sample_rate,
+                    config.smoothing_factor, config.dynamic_range_db, config.frequency_bands,
+                    config.spectral_resolution, config.envelope_attack, config.envelope_release,
+                    config.stereo_separation)
+        return TileKey(spc, index, config.mode, config.color_scheme, height, settings)
+
+    def _schedule_tile_prefetch(self, waveform_data, total_samples: int, spc: int,
+                                first_tile: int, last_tile: int, height: int) -> None:
+        """Queue the uncached tiles next to the viewport for the background renderer"""
+        keys = []
+        for distance in range(1, self.tile_prefetch_count + 1):
+            for index in (last_tile + distance, first_tile - distance):
+                if index < 0 or index * TILE_WIDTH * spc >= total_samples:
+                    continue
+                key = self._tile_key(spc, index, height)
+                if key not in self.waveform_cache:
+                    keys.append(key)
 
-                painter.drawLine(x_pos, y_top_pos, x_pos, y_bottom_pos)
+        self._pending_tile_prefetch = (waveform_data, total_samples, keys) if keys else None
+        # Not restarted while pending, so continuous playback repaints cannot postpone it forever
+        if keys and not self.background_render_timer.isActive():
+            self.background_render_timer.start(self.background_render_delay)
 
     def _draw_basic_waveform(self, painter: QPainter, rect: QRect) -> None:
         """Draw basic waveform (fallback method)"""
@@ -1454,43 +1433,40 @@ class WaveformView(QWidget):
 
     @Slot()
     def _start_background_render(self):
-        """Start background rendering for expensive operations"""
+        """Start prefetching the queued waveform tiles in the background"""
         if not self.analyzer or not hasattr(self.analyzer, 'waveform_data') or self.analyzer.waveform_data is None:
             return
 
-        # Stop any existing background rendering
-        if self.background_renderer and self.background_renderer.isRunning():
-            self.background_renderer.stop()
-            self.background_renderer.wait(100)  # Wait up to 100ms
+        # One prefetch at a time; a finished prefetch picks up the tiles queued meanwhile
+        if self._pending_tile_prefetch is None or (
+                self.background_renderer and self.background_renderer.isRunning()):
+            return
+
+        waveform_data, total_samples, keys = self._pending_tile_prefetch
+        self._pending_tile_prefetch = None
 
-        # Only use background rendering for complex modes
-        complex_modes = [
-            WaveformRenderMode.SPECTRAL_COLOR,
-            WaveformRenderMode.FREQUENCY_BANDS,
-            WaveformRenderMode.HARMONIC_PERCUSSIVE
-        ]
+        # Skip tiles cached since, and tiles of settings changed since they were queued
+        keys = [key for key in keys if key not in self.waveform_cache and
+                key == self._tile_key(key.samples_per_column, key.index, key.height)]
+        if not keys or waveform_data is not self.analyzer.waveform_data:
+            return
 
-        if self.current_render_mode in complex_modes:
-            # Start background rendering
-            self.background_renderer = BackgroundRenderer(
-                self.professional_renderer,
-                self.analyzer.waveform_data,
-                self.analyzer.sample_rate,
-                self.width(),
-                self.height(),
-                self.offset,
-                self.zoom_factor
-            )
-            self.background_renderer.rendering_complete.connect(self._on_background_render_complete)
-            self.background_renderer.start()
-        else:
-            # For simple modes, render immediately
-            self.update()
+        self.prefetch_renderer.config = replace(self.rendering_config)
+        self.prefetch_renderer.set_pyramid(getattr(self.analyzer, 'waveform_pyramid', None))
+        self.background_renderer = BackgroundRenderer(
+            self.prefetch_renderer,
+            waveform_data,
+            self.analyzer.sample_rate,
+            total_samples,
+            keys
+        )
+        self.background_renderer.tile_rendered.connect(self._on_background_render_complete)
+        self.background_renderer.finished.connect(self._start_background_render)
+        self.background_renderer.start()
 
-    def _on_background_render_complete(self, result):
-        """Handle completion of background rendering"""
-        self.cached_render_result = result
-        self.update()  # Trigger a repaint with the new data
+    def _on_background_render_complete(self, key, image):
+        """Store a prefetched tile (QPixmaps can only be created in the GUI thread)"""
+        self.waveform_cache.put(key, QPixmap.fromImage(image))
 
     def _safe_update(self) -> None:
         """Thread-safe method to update the widget after peak detection completes"""
@@ -1533,7 +1509,13 @@ class WaveformView(QWidget):
         # OPTIMIZATION: Clear caches when setting new analyzer
         self.peak_cache.clear()
         self.visible_peaks.clear()
-        self.waveform_cache = None
+        self._visible_peak_positions = np.zeros(0, dtype=np.int64)
+        self._detected_peak_index = None
+        self._detected_peak_index_source = None
+        self._top_peak_mask = None
+        self._peak_geometry.clear()
+        self.waveform_cache.clear()
+        self._pending_tile_prefetch = None
 
         if self.analyzer:
             # Check if librosa is available in the analyzer
@@ -1833,30 +1815,19 @@ class WaveformView(QWidget):
 
     def _update_visible_peaks(self, rect: QRect):
         """Update list of visible peaks for current view"""
+        self.visible_peaks = []
+        self._visible_peak_positions = np.zeros(0, dtype=np.int64)
         if not self.analyzer or not hasattr(self.analyzer, 'peaks'):
-            self.visible_peaks = []
-            return
-
-        # Get auto-detected peaks
-        auto_peaks = self._get_peaks_from_any_source()
-
-        # Combine auto-detected peaks with manual peaks
-        all_peaks = []
-        if auto_peaks:
-            all_peaks.extend(auto_peaks)
-        if self.manual_peaks:
-            all_peaks.extend(self.manual_peaks)
-
-        if not all_peaks:
-            self.visible_peaks = []
             return
 
-        peaks = all_peaks
-
         # Calculate visible range
         if self.analyzer.waveform_data is None or len(
                 self.analyzer.waveform_data) == 0 or not self.analyzer.sample_rate:
-            self.visible_peaks = []
+            return
+
+        # Auto-detected peaks, sorted by sample (manual peaks are drawn from their own index)
+        index = self._get_detected_peak_index()
+        if index is None:
             return
 
         total_samples = len(self.analyzer.waveform_data[0])
@@ -1864,44 +1835,126 @@ class WaveformView(QWidget):
         visible_start = int(self.offset * total_samples)
         visible_end = int(visible_start + rect.width() * samples_per_pixel)
 
-        # Sort all peaks by prominence (highest first) for top-N filtering
+        # Find peaks in visible range
+        first, last = index.span(visible_start, visible_end)
+        positions = np.arange(first, last)
+
+        # Keep only the top N peaks by prominence (over the whole track)
         if self.max_peak_count is not None and self.max_peak_count > 0:
-            # Sort by prominence and take top N
-            sorted_peaks = sorted(peaks, key=lambda p: p.prominence if hasattr(p, 'prominence') else 0, reverse=True)
-            peaks = sorted_peaks[:self.max_peak_count]
+            positions = positions[self._get_top_peak_mask(index, self.max_peak_count)[first:last]]
 
-        # Find peaks in visible range
-        visible_range_peaks = []
-        for peak in peaks:
-            # Convert peak time to sample index for comparison
-            peak_sample_index = int(peak.position * self.analyzer.sample_rate)
-            if visible_start <= peak_sample_index <= visible_end:
-                visible_range_peaks.append(peak)
-
-        # CRITICAL FIX: Apply aggressive quality filtering
-        if visible_range_peaks:
-            # Sort by amplitude (highest first) and take only the best peaks
-            visible_range_peaks.sort(key=lambda p: p.amplitude, reverse=True)
-
-            # Show all segment-appropriate peaks (no artificial limits)
-            max_peaks_to_show = len(visible_range_peaks)  # Show all peaks that reach High/Very High segments
-
-            # Use segment-based filtering only (no additional amplitude thresholds)
-            if visible_range_peaks:
-                # Use all peaks in visible range - filtering is already done by the analyzer
-                # Sort by position for display
-                visible_range_peaks.sort(key=lambda p: p.position)
-                self.visible_peaks = visible_range_peaks
+        # Filtering is already done by the analyzer; the index keeps them sorted by position for display
+        self._visible_peak_positions = positions
+        self.visible_peaks = [index.peaks[position] for position in positions.tolist()]
 
-            else:
-                self.visible_peaks = []
-        else:
-            self.visible_peaks = []
+    def _get_detected_peak_index(self) -> Optional[PeakIndex]:
+        """Sample-sorted index of the auto-detected peaks (rebuilt when the peak list or sample rate changes)"""
+        peaks = self._get_peaks_from_any_source()
+        sample_rate = self.analyzer.sample_rate if self.analyzer else None
+        if not peaks or not sample_rate:
+            return None
+
+        source = self._detected_peak_index_source
+        if (self._detected_peak_index is None or source[0] is not peaks or source[1] != sample_rate
+                or len(self._detected_peak_index) != len(peaks)):
+            # Same sample index the markers are drawn at (position is in seconds)
+            self._detected_peak_index = PeakIndex(peaks, key=lambda peak: int(peak.position * sample_rate))
+            self._detected_peak_index_source = (peaks, sample_rate)
+        return self._detected_peak_index
+
+    def _get_manual_peak_index(self) -> PeakIndex:
+        """Sample-sorted index of manual_peaks, updated on add/delete (rebuilt if the list is replaced)"""
+        if (self._manual_peak_index is None or self._manual_peak_index_source is not self.manual_peaks
+                or len(self._manual_peak_index) != len(self.manual_peaks)):
+            # Manual peak position is already in samples
+            self._manual_peak_index = PeakIndex(self.manual_peaks, key=lambda peak: int(peak.position))
+            self._manual_peak_index_source = self.manual_peaks
+        return self._manual_peak_index
+
+    def _get_top_peak_mask(self, index: PeakIndex, count: int) -> np.ndarray:
+        """Mask of the `count` most prominent peaks of an index (cached until the peaks or count change)"""
+        key = (id(index), index.version, count)
+        if self._top_peak_mask is None or self._top_peak_mask[0] != key:
+            self._top_peak_mask = (key, index.top_by_prominence(count))
+        return self._top_peak_mask[1]
+
+    def _get_peak_marker_geometry(self, name: str, index: PeakIndex, rect: QRect,
+                                  total_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Marker geometry of an index's peaks at the current zoom level
+
+        Returns the column of every peak (sample / samples per pixel; a paint subtracts the
+        column the view starts at) and the height of the waveform at the peak above the
+        centre line (-1 past the end of the signal). Cached per zoom level and size, so
+        repaints and panning only slice it.
+        """
+        key = (id(index), index.version, total_samples, rect.width(), rect.height(), self.zoom_factor)
+        cached = self._peak_geometry.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2]
+
+        samples_per_pixel = total_samples / (rect.width() * self.zoom_factor)
+        columns = index.keys / samples_per_pixel
+
+        waveform_data = self.analyzer.waveform_data[0]
+        samples = index.keys.astype(np.int64)
+        inside = samples < len(waveform_data)
+        amplitude_scale = 0.8  # Scale factor for display
+        y_offsets = np.full(len(samples), -1, dtype=np.int64)
+        y_offsets[inside] = (np.abs(np.asarray(waveform_data[samples[inside]], dtype=np.float64))
+                             * rect.height() * amplitude_scale / 2).astype(np.int64)
+
+        self._peak_geometry[name] = (key, columns, y_offsets)
+        return columns, y_offsets
+
+    def _get_visible_detected_markers(self, rect: QRect, total_samples: int) -> Tuple[List, List, List]:
+        """Marker x (relative to rect), index in the peak list and waveform height of every visible peak"""
+        index = self._detected_peak_index
+        positions = self._visible_peak_positions
+        if index is None or not len(positions) or len(positions) != len(self.visible_peaks):
+            return [], [], []
+
+        samples_per_pixel = total_samples / (rect.width() * self.zoom_factor)
+        columns, y_offsets = self._get_peak_marker_geometry('detected', index, rect, total_samples)
+        x_positions = (columns[positions] - self.offset * total_samples / samples_per_pixel).astype(np.int64)
+        return x_positions.tolist(), index.source_indices[positions].tolist(), y_offsets[positions].tolist()
+
+    def _get_visible_manual_markers(self, rect: QRect, total_samples: int) -> Tuple[List, List, List]:
+        """Manual peaks in the view with their marker x (relative to rect) and waveform height"""
+        index = self._get_manual_peak_index()
+        if not len(index):
+            return [], [], []
+
+        samples_per_pixel = total_samples / (rect.width() * self.zoom_factor)
+        visible_start_sample = self.offset * total_samples
+        first, last = index.span(visible_start_sample - samples_per_pixel,
+                                 visible_start_sample + (rect.width() + 1) * samples_per_pixel)
+        columns, y_offsets = self._get_peak_marker_geometry('manual', index, rect, total_samples)
+        x_positions = (columns[first:last] - visible_start_sample / samples_per_pixel).astype(np.int64)
+        inside = np.flatnonzero((x_positions >= 0) & (x_positions <= rect.width()))
+        return ([index.peaks[first + i] for i in inside.tolist()], x_positions[inside].tolist(),
+                y_offsets[first:last][inside].tolist())
+
+    def _get_peak_indices_near(self, index: PeakIndex, x, content_rect: QRect, tolerance: int) -> np.ndarray:
+        """Indices (in the caller's peak list) of the peaks whose marker is within tolerance pixels of x"""
+        total_samples = len(self.analyzer.waveform_data[0])
+        samples_per_pixel = total_samples / (content_rect.width() * self.zoom_factor)
+        visible_start_sample = self.offset * total_samples
+        click_sample = visible_start_sample + (x - content_rect.left()) * samples_per_pixel
+        margin = (tolerance + 2) * samples_per_pixel
+        first, last = index.span(click_sample - margin, click_sample + margin)
+
+        peak_x_pos = content_rect.left() + ((index.keys[first:last] - visible_start_sample)
+                                            / samples_per_pixel).astype(np.int64)
+        return index.source_indices[first:last][np.abs(x - peak_x_pos) <= tolerance]
 
     def _draw_simplified_peak_markers_optimized(self, painter: QPainter, rect: QRect):
         """Draw small dots for peak markers when zoomed out"""
         if not self.visible_peaks and not self.manual_peaks:
             return
+        if self.analyzer.waveform_data is None or len(self.analyzer.waveform_data) == 0:
+            return
+        total_samples = len(self.analyzer.waveform_data[0])
 
         painter.save()
         painter.setRenderHint(QPainter.Antialiasing, True)
@@ -1911,28 +1964,19 @@ class WaveformView(QWidget):
         selected_color = QColor(255, 215, 0, 220)  # Gold for selected
         manual_color = QColor(255, 100, 255, 200)  # Magenta for manual peaks
 
+        # Position dots at top of window
+        dot_y = rect.top() + 8
+
         # Show analyzer-detected peaks only if enabled
         if self.show_analyzer_peaks and self.visible_peaks:
-            for i, peak in enumerate(self.visible_peaks):
+            x_positions, peak_indices, _ = self._get_visible_detected_markers(rect, total_samples)
+            for i, (peak, x, peak_index) in enumerate(zip(self.visible_peaks, x_positions, peak_indices)):
                 # Skip hidden detected peaks
-                if i in self.hidden_detected_peaks:
+                if peak_index in self.hidden_detected_peaks:
                     continue
-                if self.analyzer.waveform_data is None or len(self.analyzer.waveform_data) == 0:
-                    continue
-
-                total_samples = len(self.analyzer.waveform_data[0])
-                samples_per_pixel = total_samples / (rect.width() * self.zoom_factor)
-                # Fix position calculation to prevent clustering
-                visible_start_sample = self.offset * total_samples
-                # Convert peak time to sample index (position is in seconds)
-                peak_sample_index = int(peak.position * self.analyzer.sample_rate)
-                x = int((peak_sample_index - visible_start_sample) / samples_per_pixel)
 
                 if 0 <= x <= rect.width():
                     x_pos = rect.left() + x
-
-                    # Position dots at top of window
-                    dot_y = rect.top() + 8
                     dot_size = 3
 
                     # Choose color based on peak type and selection
@@ -1949,25 +1993,15 @@ class WaveformView(QWidget):
                     painter.drawEllipse(x_pos - dot_size // 2, dot_y - dot_size // 2, dot_size, dot_size)
 
         # Also draw manual peaks separately to ensure they're always visible
-        for i, peak in enumerate(self.manual_peaks):
-            if self.analyzer.waveform_data is None or len(self.analyzer.waveform_data) == 0:
-                continue
-
-            total_samples = len(self.analyzer.waveform_data[0])
-            samples_per_pixel = total_samples / (rect.width() * self.zoom_factor)
-            visible_start_sample = self.offset * total_samples
-            # Peak position is already in samples, not time
-            peak_sample_index = int(peak.position)
-            x = int((peak_sample_index - visible_start_sample) / samples_per_pixel)
-
-            if 0 <= x <= rect.width():
+        manual_peaks, x_positions, _ = self._get_visible_manual_markers(rect, total_samples)
+        if manual_peaks:
+            dot_size = 4  # Slightly larger for manual peaks
+
+            # Draw manual peak dots
+            painter.setBrush(QBrush(manual_color))
+            painter.setPen(QPen(manual_color.darker(150), 2))
+            for x in x_positions:
                 x_pos = rect.left() + x
-                dot_y = rect.top() + 8
-                dot_size = 4  # Slightly larger for manual peaks
-
-                # Draw manual peak dot
-                painter.setBrush(QBrush(manual_color))
-                painter.setPen(QPen(manual_color.darker(150), 2))
                 painter.drawEllipse(x_pos - dot_size // 2, dot_y - dot_size // 2, dot_size, dot_size)
 
         painter.restore()
@@ -2011,7 +2045,9 @@ class WaveformView(QWidget):
                 is_manual=True
             )
 
+            manual_index = self._get_manual_peak_index()
             self.manual_peaks.append(manual_peak)
+            manual_index.insert(manual_peak)
             self.logger.info(f"Added manual peak at position {sample_position}, amplitude {amplitude:.4f}")
 
             # DOUBLE SHOT FIX: If double shot mode is enabled, automatically mark this new manual peak as double shot
@@ -2036,23 +2072,16 @@ class WaveformView(QWidget):
 
         tolerance = 10  # pixels
 
-        for i, peak in enumerate(self.manual_peaks):
-            total_samples = len(self.analyzer.waveform_data[0])
-            samples_per_pixel = total_samples / (content_rect.width() * self.zoom_factor)
-            # Fix position calculation
-            visible_start_sample = self.offset * total_samples
-            # Peak position is already in samples, not time
-            peak_sample_index = int(peak.position)
-            peak_x = int((peak_sample_index - visible_start_sample) / samples_per_pixel)
-            peak_x_pos = content_rect.left() + peak_x
-
-            if abs(x - peak_x_pos) <= tolerance:
-                return i  # Return the index of the manual peak
+        # First manual peak (in placement order) whose marker is within the tolerance
+        matches = self._get_peak_indices_near(self._get_manual_peak_index(), x, content_rect, tolerance)
+        if len(matches):
+            return int(matches.min())  # Return the index of the manual peak
         return False
 
     def _delete_manual_peak_at_index(self, index):
         """Delete manual peak at the given index"""
         if 0 <= index < len(self.manual_peaks):
+            self._get_manual_peak_index().remove_source_index(index)
             peak = self.manual_peaks[index]
             del self.manual_peaks[index]
             self.logger.info(f"Deleted manual peak at position {peak.position}")
@@ -2072,25 +2101,16 @@ class WaveformView(QWidget):
         if not self.analyzer or not hasattr(self.analyzer, 'peaks') or not self.analyzer.peaks:
             return False
 
-        tolerance = 10  # pixels
-
-        # Get all peaks from analyzer
-        all_peaks = self.analyzer.peaks
-
-        for i, peak in enumerate(all_peaks):
-            if i in self.hidden_detected_peaks:
-                continue  # Skip hidden peaks
+        index = self._get_detected_peak_index()
+        if index is None:
+            return False
 
-            total_samples = len(self.analyzer.waveform_data[0])
-            samples_per_pixel = total_samples / (content_rect.width() * self.zoom_factor)
-            visible_start_sample = self.offset * total_samples
-            # Convert peak time to sample index
-            peak_sample_index = int(peak.position * self.analyzer.sample_rate)
-            peak_x = int((peak_sample_index - visible_start_sample) / samples_per_pixel)
-            peak_x_pos = content_rect.left() + peak_x
+        tolerance = 10  # pixels
 
-            if abs(x - peak_x_pos) <= tolerance:
-                return i  # Return the peak index
+        # First peak (in analyzer order) within the tolerance, skipping hidden peaks
+        for peak_index in np.sort(self._get_peak_indices_near(index, x, content_rect, tolerance)).tolist():
+            if peak_index not in self.hidden_detected_peaks:
+                return peak_index  # Return the peak index
 
         return False
 
@@ -2192,51 +2212,41 @@ class WaveformView(QWidget):
         """Draw professional detailed peak markers with precise alignment"""
         if not self.visible_peaks and not self.manual_peaks:
             return
+        if self.analyzer.waveform_data is None or len(self.analyzer.waveform_data) == 0:
+            return
+        total_samples = len(self.analyzer.waveform_data[0])
 
         painter.save()
         painter.setRenderHint(QPainter.Antialiasing, True)  # Enable for professional look
 
+        center_y = rect.center().y()
+        marker_size = 4 if self.zoom_factor > 15.0 else 3
+        outline_pen = QPen(QColor(255, 255, 255), 1)  # White outline
+
         # Draw auto-detected peaks only if enabled
         if self.show_analyzer_peaks and self.visible_peaks:
-            for i, peak in enumerate(self.visible_peaks):
+            # PROFESSIONAL PEAK MARKER DESIGN - ENHANCED: (main color, glow color, line width)
+            double_shot_style = (QColor(255, 0, 0, 255), QColor(255, 0, 0, 120), 4)  # Red with glow effect
+            selected_style = (QColor(255, 215, 0, 255), QColor(255, 215, 0, 120), 4)  # Gold with glow effect
+            normal_style = (QColor(0, 255, 255, 255), QColor(0, 255, 255, 100), 3)  # Bright cyan
+
+            x_positions, peak_indices, y_offsets = self._get_visible_detected_markers(rect, total_samples)
+            for i, (peak, x, peak_index, y_offset) in enumerate(
+                    zip(self.visible_peaks, x_positions, peak_indices, y_offsets)):
                 # Skip hidden detected peaks
-                if i in self.hidden_detected_peaks:
+                if peak_index in self.hidden_detected_peaks:
                     continue
 
-                if self.analyzer.waveform_data is None or len(self.analyzer.waveform_data) == 0:
-                    continue
-
-                total_samples = len(self.analyzer.waveform_data[0])
-                samples_per_pixel = total_samples / (rect.width() * self.zoom_factor)
-                # Fix position calculation to prevent clustering
-                visible_start_sample = self.offset * total_samples
-                # Convert peak time to sample index (position is in seconds)
-                peak_sample_index = int(peak.position * self.analyzer.sample_rate)
-                x = int((peak_sample_index - visible_start_sample) / samples_per_pixel)
-
                 if 0 <= x <= rect.width():
                     x_pos = rect.left() + x
 
                     # Check if peak is selected or marked as double shot
-                    is_selected = i in self.selected_peaks
-                    is_double_shot = peak.time in self.double_shot_peaks
-
-                    # PROFESSIONAL PEAK MARKER DESIGN - ENHANCED
-                    if is_double_shot:
-                        # Double shot peak: Red with glow effect
-                        main_color = QColor(255, 0, 0, 255)  # Solid red
-                        glow_color = QColor(255, 0, 0, 120)  # Red glow
-                        line_width = 4
-                    elif is_selected:
-                        # Selected peak: Gold with glow effect
-                        main_color = QColor(255, 215, 0, 255)  # Solid gold
-                        glow_color = QColor(255, 215, 0, 120)  # More visible glow
-                        line_width = 4
+                    if peak.time in self.double_shot_peaks:
+                        main_color, glow_color, line_width = double_shot_style
+                    elif i in self.selected_peaks:
+                        main_color, glow_color, line_width = selected_style
                     else:
-                        # Normal peak: Bright cyan with professional look
-                        main_color = QColor(0, 255, 255, 255)  # Bright cyan
-                        glow_color = QColor(0, 255, 255, 100)  # More visible glow
-                        line_width = 3
+                        main_color, glow_color, line_width = normal_style
 
                     # Draw glow effect (wider, transparent line behind)
                     painter.setPen(QPen(glow_color, line_width + 2))
@@ -2246,45 +2256,33 @@ class WaveformView(QWidget):
                     painter.setPen(QPen(main_color, line_width))
                     painter.drawLine(x_pos, rect.top(), x_pos, rect.bottom())
 
-                    # PRECISION PEAK INDICATOR: Show exact peak position
-                    if self.zoom_factor > 5.0:
-                        # Calculate precise waveform position for this peak
-                        waveform_data = self.analyzer.waveform_data[0]
-                        # Convert peak time to sample index
-                        sample_index = int(peak.position * self.analyzer.sample_rate)
-                        if sample_index < len(waveform_data):
-                            # Get the actual amplitude at this position
-                            actual_amplitude = abs(waveform_data[sample_index])
-
-                            # Calculate Y position based on actual waveform amplitude
-                            center_y = rect.center().y()
-                            amplitude_scale = 0.8  # Scale factor for display
-                            y_offset = int(actual_amplitude * rect.height() * amplitude_scale / 2)
-                            peak_y_top = center_y - y_offset
-
-                            # Position peak marker ABOVE the waveform peak
-                            marker_y = peak_y_top - 15  # Position 15 pixels above the peak
-
-                            # Draw diamond-shaped precision marker above the peak
-                            diamond_size = 4 if self.zoom_factor > 15.0 else 3
-                            diamond_points = [
-                                QPoint(x_pos, marker_y - diamond_size),  # Top
-                                QPoint(x_pos + diamond_size, marker_y),  # Right
-                                QPoint(x_pos, marker_y + diamond_size),  # Bottom
-                                QPoint(x_pos - diamond_size, marker_y)  # Left
-                            ]
-
-                            painter.setBrush(QBrush(main_color))
-                            painter.setPen(QPen(QColor(255, 255, 255), 1))  # White outline
-                            painter.drawPolygon(diamond_points)
-
-                            # Draw vertical line from marker to peak (not through it)
-                            painter.setPen(QPen(main_color, 2))
-                            painter.drawLine(x_pos, marker_y + diamond_size, x_pos, peak_y_top)
+                    # PRECISION PEAK INDICATOR: Show exact peak position (y_offset: actual waveform
+                    # amplitude at the peak, from the per-zoom geometry cache)
+                    if self.zoom_factor > 5.0 and y_offset >= 0:
+                        peak_y_top = center_y - y_offset
+
+                        # Position peak marker ABOVE the waveform peak
+                        marker_y = peak_y_top - 15  # Position 15 pixels above the peak
+
+                        # Draw diamond-shaped precision marker above the peak
+                        diamond_points = [
+                            QPoint(x_pos, marker_y - marker_size),  # Top
+                            QPoint(x_pos + marker_size, marker_y),  # Right
+                            QPoint(x_pos, marker_y + marker_size),  # Bottom
+                            QPoint(x_pos - marker_size, marker_y)  # Left
+                        ]
+
+                        painter.setBrush(QBrush(main_color))
+                        painter.setPen(outline_pen)
+                        painter.drawPolygon(diamond_points)
+
+                        # Draw vertical line from marker to peak (not through it)
+                        painter.setPen(QPen(main_color, 2))
+                        painter.drawLine(x_pos, marker_y + marker_size, x_pos, peak_y_top)
 
                     # PEAK INFO DISPLAY: Show amplitude and time when highly zoomed
                     if self.zoom_factor > 20.0:
-                        painter.setPen(QPen(QColor(255, 255, 255), 1))
+                        painter.setPen(outline_pen)
                         painter.setFont(QFont("Arial", 8))
 
                         # Show peak info
@@ -2299,35 +2297,19 @@ class WaveformView(QWidget):
                         painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignTop, info_text)
 
         # Draw manual peaks with different color
-        for i, peak in enumerate(self.manual_peaks):
-            if self.analyzer.waveform_data is None or len(self.analyzer.waveform_data) == 0:
-                continue
-
-            total_samples = len(self.analyzer.waveform_data[0])
-            samples_per_pixel = total_samples / (rect.width() * self.zoom_factor)
-            # Fix position calculation to prevent clustering
-            visible_start_sample = self.offset * total_samples
-            # Peak position is already in samples, not time
-            peak_sample_index = int(peak.position)
-            x = int((peak_sample_index - visible_start_sample) / samples_per_pixel)
-
-            if 0 <= x <= rect.width():
+        manual_peaks, x_positions, y_offsets = self._get_visible_manual_markers(rect, total_samples)
+        if manual_peaks:
+            double_shot_style = (QColor(255, 0, 0, 255), QColor(255, 0, 0, 120), 4)  # Red with glow effect
+            manual_style = (QColor(255, 100, 255, 255), QColor(255, 100, 255, 100), 3)  # Bright magenta
+            for peak, x, y_offset in zip(manual_peaks, x_positions, y_offsets):
                 x_pos = rect.left() + x
 
                 # Check if this manual peak is marked as double shot
                 manual_peak_id = f"m{peak.time}"
-                is_double_shot = manual_peak_id in self.double_shot_peaks
-
-                if is_double_shot:
-                    # Double shot manual peak: Red with glow effect
-                    main_color = QColor(255, 0, 0, 255)  # Solid red
-                    glow_color = QColor(255, 0, 0, 120)  # Red glow
-                    line_width = 4
+                if manual_peak_id in self.double_shot_peaks:
+                    main_color, glow_color, line_width = double_shot_style
                 else:
-                    # Regular manual peak colors (magenta/purple)
-                    main_color = QColor(255, 100, 255, 255)  # Bright magenta
-                    glow_color = QColor(255, 100, 255, 100)  # Magenta glow
-                    line_width = 3
+                    main_color, glow_color, line_width = manual_style
 
                 # Draw glow effect
                 painter.setPen(QPen(glow_color, line_width + 2))
@@ -2338,32 +2320,23 @@ class WaveformView(QWidget):
                 painter.drawLine(x_pos, rect.top(), x_pos, rect.bottom())
 
                 # Draw precision marker above the peak
-                if self.zoom_factor > 5.0:
-                    waveform_data = self.analyzer.waveform_data[0]
-                    # Manual peak position is already in samples
-                    sample_index = int(peak.position)
-                    if sample_index < len(waveform_data):
-                        actual_amplitude = abs(waveform_data[sample_index])
-                        center_y = rect.center().y()
-                        amplitude_scale = 0.8
-                        y_offset = int(actual_amplitude * rect.height() * amplitude_scale / 2)
-                        peak_y_top = center_y - y_offset
+                if self.zoom_factor > 5.0 and y_offset >= 0:
+                    peak_y_top = center_y - y_offset
 
-                        # Position marker above the peak
-                        marker_y = peak_y_top - 15
+                    # Position marker above the peak
+                    marker_y = peak_y_top - 15
 
-                        # Draw square marker for manual peaks (different from diamond for auto peaks)
-                        square_size = 4 if self.zoom_factor > 15.0 else 3
-                        square_rect = QRect(x_pos - square_size, marker_y - square_size,
-                                            square_size * 2, square_size * 2)
+                    # Draw square marker for manual peaks (different from diamond for auto peaks)
+                    square_rect = QRect(x_pos - marker_size, marker_y - marker_size,
+                                        marker_size * 2, marker_size * 2)
 
-                        painter.setBrush(QBrush(main_color))
-                        painter.setPen(QPen(QColor(255, 255, 255), 1))
-                        painter.drawRect(square_rect)
+                    painter.setBrush(QBrush(main_color))
+                    painter.setPen(outline_pen)
+                    painter.drawRect(square_rect)
 
-                        # Draw line from marker to peak
-                        painter.setPen(QPen(main_color, 2))
-                        painter.drawLine(x_pos, marker_y + square_size, x_pos, peak_y_top)
+                    # Draw line from marker to peak
+                    painter.setPen(QPen(main_color, 2))
+                    painter.drawLine(x_pos, marker_y + marker_size, x_pos, peak_y_top)
 
         painter.restore()
 